@@ -1,7 +1,36 @@
+import os
+import inspect
 import pytest
 import logging
-from undetected_playwright.sync_api import Page
 import pytest_html
+from tests.utils import artefatos as modulo_artefatos
+from tests.utils.artefatos import armazem, registrar_no_teste
+
+# Ordem pela duração histórica (LPT) e divisão da suíte em shards
+pytest_plugins = ["tests.utils.agendamento"]
+
+def capturar_artefatos(item, page):
+    """
+    Captura screenshot e DOM de uma página síncrona com falha.
+
+    Os arquivos são gravados em segundo plano no armazém de artefatos; o teste
+    guarda apenas os caminhos, que viram links no relatório.
+    """
+    try:
+        screenshot = armazem.salvar(page.screenshot(), "png")
+        fonte = armazem.salvar(page.content(), "html")
+    except Exception as e:
+        logging.error(f"Não foi possível capturar os artefatos da falha: {e}")
+        return
+    logging.error(f"Artefatos da falha: {screenshot}, {fonte}")
+    registrar_no_teste(item, {"Screenshot": screenshot, "DOM": fonte})
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+    """Expõe o teste em execução aos page objects e runners, que capturam artefatos sem recebê-lo."""
+    modulo_artefatos.teste_atual = item
+    item.artefatos_falha = []
+    item.rep_call = None  # De uma tentativa anterior (pytest-rerunfailures)
 
 @pytest.hookimpl(tryfirst=True, hookwrapper=True)
 def pytest_runtest_makereport(item, call):
@@ -10,27 +39,25 @@ def pytest_runtest_makereport(item, call):
     rep = outcome.get_result()
     setattr(item, "rep_" + rep.when, rep)
 
-@pytest.fixture(autouse=True)
-def log_on_failure(request, page: Page):
-    yield
-    # Execute this code after each test
-    for phase in ("setup", "call", "teardown"):
-        rep = getattr(request.node, "rep_" + phase, None)
-        if rep and rep.failed:
-            # Capture screenshot on failure
-            screenshot_path = f"screenshots/{request.node.nodeid.replace('::', '_')}.png"
-            page.screenshot(path=screenshot_path)
-            logging.error(f"Screenshot saved to {screenshot_path}")
-
-            # Capture page source on failure
-            page_source_path = f"page_sources/{request.node.nodeid.replace('::', '_')}.html"
-            with open(page_source_path, "w") as f:
-                f.write(page.content())
-            logging.error(f"Page source saved to {page_source_path}")
+    # Páginas síncronas ainda estão abertas aqui; as assíncronas são capturadas pelo
+    # `BasePage.capturar_erro` (BulasTestRunner) ou no teardown da fixture `page` de tests/conftest.py
+    page = item.funcargs.get("page") if rep.failed and rep.when == "call" else None
+    if page is not None and not inspect.iscoroutinefunction(page.screenshot):
+        capturar_artefatos(item, page)
 
-            # Attach screenshot and page source to the report
-            if "pytest_html" in request.config.pluginmanager.get_plugins():
-                extra = getattr(rep, "extra", [])
-                extra.append(pytest_html.extras.image(screenshot_path))
-                extra.append(pytest_html.extras.html(open(page_source_path).read()))
-                rep.extra = extra
+    # Anexa ao relatório links para os artefatos, em vez do conteúdo; capturas de
+    # erros contornados em um teste que passou são descartadas no teardown
+    artefatos = getattr(item, "artefatos_falha", None)
+    htmlpath = item.config.getoption("htmlpath", None)
+    chamada = getattr(item, "rep_call", None)
+    falhou = rep.failed or bool(chamada and chamada.failed)
+    if artefatos and htmlpath and falhou:
+        base = os.path.dirname(os.path.abspath(htmlpath))
+        extras = getattr(rep, "extras", [])
+        for nome, caminho in artefatos:
+            extras.append(pytest_html.extras.url(os.path.relpath(os.path.abspath(caminho), base), name=nome))
+        rep.extras = extras
+        item.artefatos_falha = []
+    if rep.when == "teardown":
+        item.artefatos_falha = []
+        modulo_artefatos.teste_atual = None
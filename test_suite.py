@@ -1,7 +1,10 @@
 import time
 import logging
 import os
-from undetected_playwright.sync_api import sync_playwright
+from tests.pages.base.base_page import BasePage
+from tests.pages.base.resolvedor_seletores import ResolvedorSeletores
+from tests.pages.base.sincrono import NavegadorSincrono
+from tests.utils.artefatos import ArmazemArtefatos
 
 # Configuração de logs
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
@@ -25,63 +28,68 @@ CAMPOS = [
     {"nome": "Botão Selecionar Empresa", "seletor": "button[ng-click='selecionarEmpresa()']"},
 ]
 
-# Diretório para salvar prints de erro
+# Atraso entre ações e tempo com o navegador aberto ao final, apenas para acompanhamento visual
+SLOW_MO = int(os.environ.get("ANVISA_SLOW_MO", "0"))
+MANTER_ABERTO = int(os.environ.get("ANVISA_MANTER_ABERTO", "0"))
+
+# Diretório para salvar prints de erro (endereçados por conteúdo: capturas idênticas não se repetem)
 ERRO_SCREENSHOT_DIR = "screenshots_erro"
-os.makedirs(ERRO_SCREENSHOT_DIR, exist_ok=True)
+artefatos_erro = ArmazemArtefatos(ERRO_SCREENSHOT_DIR)
 
 def verificar_elementos(page):
     """
     Verifica se os campos da página estão visíveis e habilitados.
-    """
-    for campo in CAMPOS:
-        nome = campo["nome"]
-        seletor = campo["seletor"]
 
-        try:
-            logging.info(f"🔎 Verificando: {nome} ({seletor})")
+    Todos os campos são inspecionados em uma única chamada ao navegador, que
+    espera até todos estarem presentes (ou 10 s). Campos já registrados como
+    ausentes neste build do portal não seguram a espera.
 
-            elemento = page.wait_for_selector(seletor, state="attached", timeout=10000)  # Increased timeout to 10000ms
+    :param page: Página síncrona (`Sincrono`) de um `NavegadorSincrono`.
+    """
+    resolvedor = page.envolver(ResolvedorSeletores(page.assincrono, "verificacao_bulario"))
+    base = page.envolver(BasePage(page.assincrono, page.url))
+    seletores = {campo["nome"]: campo["seletor"] for campo in CAMPOS}
+    ausentes_conhecidos = [nome for nome in seletores if resolvedor.conhecido_ausente(nome)]
 
-            if elemento.is_visible():
-                if elemento.is_enabled():
-                    logging.info(f"✅ {nome} está VISÍVEL e HABILITADO.")
-                else:
-                    logging.warning(f"⚠️ {nome} está VISÍVEL, mas NÃO está habilitado.")
-            else:
-                logging.warning(f"⚠️ {nome} está PRESENTE, mas NÃO visível!")
+    logging.info(f"🔎 Verificando {len(seletores)} campos...")
+    estados = base.inspecionar_elementos(seletores, esperar_prontos=True, ignorar=ausentes_conhecidos,
+                                         timeout=10000)
 
-        except Exception as e:
-            logging.error(f"❌ {nome} NÃO encontrado! Erro: {e}")
+    ausentes = []
+    for nome, estado in estados.items():
+        resolvedor.registrar(nome, estado["presente"])
+        if not estado["presente"]:
+            logging.error(f"❌ {nome} NÃO encontrado! ({seletores[nome]})")
+            ausentes.append(nome)
+        elif not estado["visivel"]:
+            logging.warning(f"⚠️ {nome} está PRESENTE, mas NÃO visível!")
+        elif not estado["habilitado"]:
+            logging.warning(f"⚠️ {nome} está VISÍVEL, mas NÃO está habilitado.")
+        else:
+            logging.info(f"✅ {nome} está VISÍVEL e HABILITADO.")
 
-            # Capturar print da tela para debug
-            screenshot_path = os.path.join(ERRO_SCREENSHOT_DIR, f"erro_{nome.replace(' ', '_')}.png")
-            page.screenshot(path=screenshot_path)
-            logging.error(f"📸 Print salvo: {screenshot_path}")
+    if ausentes:
+        # Capturar print da tela e estrutura do DOM uma única vez para todos os campos ausentes
+        screenshot_path = artefatos_erro.salvar(page.screenshot(), "png")
+        logging.error(f"📸 Print salvo: {screenshot_path}")
 
-            # Capturar estrutura do DOM e logar
-            html_source = page.evaluate("() => document.body.innerHTML")
-            with open(os.path.join(ERRO_SCREENSHOT_DIR, "dom_snapshot.html"), "w", encoding="utf-8") as f:
-                f.write(html_source)
-            logging.error(f"📝 Captura do HTML salva para análise!")
+        html_path = artefatos_erro.salvar(page.evaluate("() => document.body.innerHTML"), "html")
+        logging.error(f"📝 Captura do HTML salva para análise: {html_path}")
+    return estados
 
 def main():
-    with sync_playwright() as p:
-        args = ["--disable-blink-features=AutomationControlled"]
-        browser = p.chromium.launch(headless=False, slow_mo=500, args=args)
-        context = browser.new_context()
-        page = context.new_page()
-        
+    args = ["--disable-blink-features=AutomationControlled"]
+    with NavegadorSincrono(headless=False, slow_mo=SLOW_MO, args=args) as navegador:
+        bulas = navegador.pagina(BasePage, "https://consultas.anvisa.gov.br/#/bulario/")
+
         logging.info("🌐 Acessando a página de bulas...")
-        page.goto("https://consultas.anvisa.gov.br/#/bulario/")
-        page.wait_for_load_state("networkidle")
-        time.sleep(5)  # Increased sleep time to ensure the page is fully loaded
+        bulas.acessar_pagina()
 
         logging.info("🔍 Iniciando verificação dos campos...")
-        verificar_elementos(page)
+        verificar_elementos(bulas.page)
 
         logging.info("✅ Verificação concluída! Você pode fechar o navegador.")
-        time.sleep(10)  # Mantém o navegador aberto para visualização
-        browser.close()
+        time.sleep(MANTER_ABERTO)  # Mantém o navegador aberto para visualização, se configurado
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,43 @@
+import statistics
+import pytest
+from tests.benchmarks.historico import HistoricoDesempenho
+
+# Regressões encontradas na execução, exibidas no resumo do terminal
+REGRESSOES = []
+
+@pytest.fixture(scope="session")
+def historico():
+    historico = HistoricoDesempenho()
+    yield historico
+    historico.fechar()
+
+@pytest.fixture
+def registrar_desempenho(request, historico):
+    """
+    Registra as medições de um benchmark e verifica regressões.
+
+    Uso: `registrar_desempenho(ambiente, [{"metrica": valor, ...}, ...])`; a
+    mediana das repetições de cada métrica é comparada com a linha de base.
+    """
+    config = request.config
+
+    def registrar(ambiente: str, medicoes: list):
+        metricas = {chave: statistics.median(m[chave] for m in medicoes) for chave in medicoes[0]}
+        regressoes = historico.registrar(ambiente, request.node.name, metricas,
+                                         config.getoption("--benchmark-tolerancia"))
+        REGRESSOES.extend(regressoes)
+        if regressoes and config.getoption("--benchmark-falhar"):
+            pytest.fail("Regressão de desempenho: " + "; ".join(regressoes))
+        return metricas
+
+    return registrar
+
+@pytest.fixture
+def repeticoes(request):
+    return request.config.getoption("--benchmark-repeticoes")
+
+def pytest_terminal_summary(terminalreporter):
+    if REGRESSOES:
+        terminalreporter.write_sep("-", "regressões de desempenho")
+        for mensagem in REGRESSOES:
+            terminalreporter.write_line(mensagem)
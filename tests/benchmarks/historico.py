@@ -0,0 +1,69 @@
+import logging
+import os
+import sqlite3
+import statistics
+from datetime import datetime
+
+ARQUIVO_HISTORICO = os.path.join("reports", "benchmarks.sqlite")
+
+class HistoricoDesempenho:
+    """
+    Histórico local (SQLite) das medições dos benchmarks.
+
+    A linha de base de cada métrica é a mediana das últimas `janela` medições
+    do mesmo benchmark no mesmo ambiente (portal real ou servidor local), de
+    modo que medições de ambientes diferentes nunca são comparadas.
+    """
+
+    def __init__(self, caminho=ARQUIVO_HISTORICO, janela=5):
+        """
+        :param caminho: Arquivo SQLite do histórico.
+        :param janela: Quantidade de medições anteriores usadas na linha de base.
+        """
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        self.conexao = sqlite3.connect(caminho)
+        self.janela = janela
+        self.execucao = datetime.now().isoformat(timespec="seconds")
+        self.conexao.execute("""
+            CREATE TABLE IF NOT EXISTS medicoes (
+                execucao TEXT NOT NULL,
+                ambiente TEXT NOT NULL,
+                benchmark TEXT NOT NULL,
+                metrica TEXT NOT NULL,
+                valor REAL NOT NULL
+            )
+        """)
+        self.conexao.execute(
+            "CREATE INDEX IF NOT EXISTS idx_medicoes ON medicoes (ambiente, benchmark, metrica, execucao)")
+        self.conexao.commit()
+
+    def linha_de_base(self, ambiente: str, benchmark: str, metrica: str):
+        """Mediana das últimas medições de execuções anteriores, ou None se não houver."""
+        valores = [v for (v,) in self.conexao.execute(
+            "SELECT valor FROM medicoes WHERE ambiente = ? AND benchmark = ? AND metrica = ? AND execucao <> ? "
+            "ORDER BY execucao DESC LIMIT ?",
+            (ambiente, benchmark, metrica, self.execucao, self.janela))]
+        return statistics.median(valores) if valores else None
+
+    def registrar(self, ambiente: str, benchmark: str, metricas: dict, tolerancia: float) -> list:
+        """
+        Compara as métricas com a linha de base e grava a medição atual.
+
+        :param tolerancia: Aumento relativo tolerado (0.2 = 20% acima da linha de base).
+        :return: Lista de mensagens de regressão (vazia se nenhuma métrica regrediu).
+        """
+        regressoes = []
+        for metrica, valor in metricas.items():
+            base = self.linha_de_base(ambiente, benchmark, metrica)
+            if base and valor > base * (1 + tolerancia):
+                regressoes.append(f"{benchmark}.{metrica}: {valor:.1f} > linha de base {base:.1f} "
+                                  f"(+{(valor / base - 1) * 100:.0f}%, tolerância {tolerancia * 100:.0f}%)")
+            self.conexao.execute("INSERT INTO medicoes VALUES (?, ?, ?, ?, ?)",
+                                 (self.execucao, ambiente, benchmark, metrica, float(valor)))
+        self.conexao.commit()
+        for mensagem in regressoes:
+            logging.warning(f"Regressão de desempenho: {mensagem}")
+        return regressoes
+
+    def fechar(self):
+        self.conexao.close()
@@ -0,0 +1,62 @@
+import json
+import os
+import subprocess
+import sys
+from tests.utils.agendamento import HistoricoDuracoes, dividir_em_shards, mesclar_shards
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def test_divisao_lpt_equilibra_os_shards():
+    """Os testes mais longos são espalhados primeiro; a carga dos shards fica equivalente."""
+    custos = {"categoria": 9.0, "periodo": 8.0, "modal": 7.0, "nome": 3.0, "registro": 2.0,
+              "expediente": 2.0, "cnpj": 1.0}
+    shards = dividir_em_shards(custos, 3)
+    cargas = sorted(sum(custos[n] for n in shard) for shard in shards)
+    assert sorted(n for shard in shards for n in shard) == sorted(custos)
+    assert cargas == [10.0, 11.0, 11.0]
+    assert dividir_em_shards(custos, 3) == shards
+
+def test_historico_estima_pela_media_movel_e_instabilidade(tmp_path):
+    """Repetições aumentam o custo esperado; testes novos herdam a mediana do módulo."""
+    historico = HistoricoDuracoes(str(tmp_path / "duracoes.json"))
+    historico.registrar("a.py::lento", 10.0)
+    historico.registrar("a.py::lento", 20.0, reexecucoes=1)
+    historico.registrar("a.py::rapido", 1.0)
+    historico.registrar("b.py::outro", 4.0)
+    historico.salvar()
+
+    recarregado = HistoricoDuracoes(historico.caminho)
+    assert recarregado.testes["a.py::lento"]["duracao"] == 13.0
+    assert recarregado.estimativa("a.py::lento") == 13.0 * 1.5
+    assert recarregado.estimativa("a.py::novo") == 7.0
+    assert recarregado.estimativa("c.py::novo") == 4.0
+
+def test_shards_executam_partes_disjuntas_e_sao_mesclados(tmp_path):
+    """Cada shard roda só a sua parte, mais longa primeiro, e a mesclagem junta os resultados."""
+    (tmp_path / "pytest.ini").write_text("[pytest]\n")
+    (tmp_path / "test_lista.py").write_text(
+        "import pytest\n\n@pytest.mark.parametrize('n', range(6))\ndef test_item(n):\n    pass\n")
+    duracoes = {f"test_lista.py::test_item[{n}]": {"duracao": float(n + 1), "execucoes": 1, "falhas": 0,
+                                                  "reexecucoes": 0} for n in range(6)}
+    (tmp_path / "reports").mkdir()
+    (tmp_path / "reports" / "duracoes.json").write_text(json.dumps(duracoes))
+
+    ambiente = {**os.environ, "PYTHONPATH": RAIZ}
+    ambiente.pop("PYTEST_XDIST_WORKER", None)
+    for shard in (1, 2):
+        processo = subprocess.run(
+            [sys.executable, "-m", "pytest", "-p", "tests.utils.agendamento", "-p", "no:cacheprovider",
+             "-q", "-v", "--shards", "2", "--shard", str(shard)],
+            cwd=tmp_path, env=ambiente, capture_output=True, text=True, timeout=120)
+        assert processo.returncode == 0, processo.stdout + processo.stderr
+        assert "3 passed, 3 deselected" in processo.stdout
+
+    historico = HistoricoDuracoes(str(tmp_path / "reports" / "duracoes.json"))
+    resumo = mesclar_shards(str(tmp_path / "reports" / "shards"), historico)
+    assert resumo["totais"] == {"passed": 6}
+    assert all(dados["execucoes"] == 2 for dados in historico.testes.values())
+    assert [s["estimativa"] for s in resumo["shards"]] == [11.0, 10.0]
+    assert {nodeid: t["shard"] for nodeid, t in resumo["testes"].items()} == {
+        "test_lista.py::test_item[5]": 1, "test_lista.py::test_item[2]": 1, "test_lista.py::test_item[1]": 1,
+        "test_lista.py::test_item[4]": 2, "test_lista.py::test_item[3]": 2, "test_lista.py::test_item[0]": 2,
+    }
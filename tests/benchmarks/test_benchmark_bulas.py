@@ -0,0 +1,52 @@
+import os
+import time
+import pytest
+import pytest_asyncio
+from tests.config.test_data import TEST_DATA_BULAS
+from tests.pages.documentos.bulas_page import BulasPage
+from tests.services.browser_service import BrowserService
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.asyncio(loop_scope="session")]
+
+# Page object -> tipo de busca -> (método, argumentos). Novas páginas entram aqui.
+BUSCAS_POR_PAGINA = {
+    BulasPage: {
+        "nome": ("buscar_por_nome", (TEST_DATA_BULAS["nome_medicamento"],)),
+        "numero_registro": ("buscar_por_numero_registro", (TEST_DATA_BULAS["numero_registro"],)),
+        "numero_expediente": ("buscar_por_numero_expediente", (TEST_DATA_BULAS["numero_expediente"],)),
+        "cnpj": ("buscar_por_empresa", (TEST_DATA_BULAS["cnpj_empresa"],)),
+        "categoria": ("buscar_por_categoria", (TEST_DATA_BULAS["categorias_regulatorias"],)),
+        "periodo": ("buscar_por_periodo", (TEST_DATA_BULAS["data_inicial"], TEST_DATA_BULAS["data_final"])),
+    },
+}
+
+CASOS = [(classe, busca) for classe, buscas in BUSCAS_POR_PAGINA.items() for busca in buscas]
+
+@pytest_asyncio.fixture(scope="module", loop_scope="session")
+async def browser_service():
+    """
+    Navegador dos benchmarks de interface. Com ANVISA_MODO_REDE=replay, o portal
+    é servido pelo cache local e o próprio harness é medido de forma determinística.
+    """
+    service = BrowserService(headless=True, tamanho_pool=1)
+    yield service
+    await service.fechar_navegador()
+
+@pytest.mark.parametrize("classe_pagina, busca", CASOS, ids=[f"{c.__name__}-{b}" for c, b in CASOS])
+async def test_benchmark_interface(classe_pagina, busca, browser_service, registrar_desempenho, repeticoes):
+    """Tempo até o primeiro resultado, latência do XHR da consulta e tamanho da resposta."""
+    metodo, argumentos = BUSCAS_POR_PAGINA[classe_pagina][busca]
+    medicoes = []
+    for _ in range(repeticoes):
+        async with browser_service.pagina_aquecida(classe_pagina) as pagina:
+            inicio = time.perf_counter()
+            await getattr(pagina, metodo)(*argumentos)
+            await pagina.page.wait_for_selector(pagina.seletor_resultados)
+            primeiro_resultado_ms = (time.perf_counter() - inicio) * 1000
+            resposta = pagina.ultima_resposta_consulta
+            medicoes.append({
+                "primeiro_resultado_ms": primeiro_resultado_ms,
+                "latencia_xhr_ms": resposta.request.timing["responseEnd"],
+                "payload_bytes": len(await resposta.body()),
+            })
+    registrar_desempenho(f"interface-{browser_service.modo_rede}", medicoes)
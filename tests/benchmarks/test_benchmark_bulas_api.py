@@ -0,0 +1,36 @@
+import time
+import pytest
+from tests.config.test_data import TEST_DATA_BULAS
+from tests.services.bulas_api_service import BulasApiClient
+
+pytestmark = pytest.mark.benchmark
+
+# Tipo de busca -> (método do cliente, argumentos)
+BUSCAS = {
+    "nome": ("buscar_por_nome", (TEST_DATA_BULAS["nome_medicamento"],)),
+    "numero_registro": ("buscar_por_numero_registro", (TEST_DATA_BULAS["numero_registro"],)),
+    "numero_expediente": ("buscar_por_numero_expediente", (TEST_DATA_BULAS["numero_expediente"],)),
+    "cnpj": ("buscar_por_empresa", (TEST_DATA_BULAS["cnpj_empresa"],)),
+    "categoria": ("buscar_por_categoria", (TEST_DATA_BULAS["categorias_regulatorias"],)),
+    "periodo": ("buscar_por_periodo", (TEST_DATA_BULAS["data_inicial"], TEST_DATA_BULAS["data_final"])),
+}
+
+@pytest.mark.parametrize("busca", list(BUSCAS))
+def test_benchmark_api_bulario(busca, servidor_consultas, registrar_desempenho, repeticoes):
+    """Latência e tamanho da resposta de cada tipo de busca na API do bulário (servidor local)."""
+    metodo, argumentos = BUSCAS[busca]
+    cliente = BulasApiClient(base_url=servidor_consultas.url)
+    medicoes = []
+    try:
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            getattr(cliente, metodo)(*argumentos)
+            cliente.obter_resultados()
+            medicoes.append({
+                "primeiro_resultado_ms": (time.perf_counter() - inicio) * 1000,
+                "latencia_xhr_ms": cliente.ultima_resposta_http.elapsed.total_seconds() * 1000,
+                "payload_bytes": len(cliente.ultima_resposta_http.content),
+            })
+    finally:
+        cliente.fechar()
+    registrar_desempenho("api-local", medicoes)
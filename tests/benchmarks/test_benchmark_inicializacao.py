@@ -0,0 +1,54 @@
+import glob
+import os
+import re
+import subprocess
+import sys
+import time
+import pytest
+
+pytestmark = pytest.mark.benchmark
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Limites de tempo de inicialização (em segundos), ajustáveis por ambiente
+LIMITE_COLETA = float(os.environ.get("ANVISA_LIMITE_COLETA_S", "5"))
+LIMITE_IMPORTACAO = float(os.environ.get("ANVISA_LIMITE_IMPORTACAO_S", "1"))
+
+def modulos_cenarios() -> list:
+    arquivos = sorted(glob.glob(os.path.join(RAIZ, "tests", "scenarios", "**", "test_*.py"), recursive=True))
+    return [os.path.relpath(arquivo, RAIZ)[:-3].replace(os.sep, ".") for arquivo in arquivos]
+
+def test_benchmark_tempo_coleta(registrar_desempenho, repeticoes):
+    """Tempo de `pytest --collect-only` da árvore de cenários, em um processo novo."""
+    comando = [sys.executable, "-m", "pytest", "--collect-only", "-q", "-p", "no:cacheprovider",
+               "-o", "addopts=", os.path.join("tests", "scenarios")]
+    medicoes = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        processo = subprocess.run(comando, cwd=RAIZ, capture_output=True, text=True)
+        medicoes.append({"coleta_ms": (time.perf_counter() - inicio) * 1000})
+        assert processo.returncode == 0, processo.stdout[-2000:] + processo.stderr[-2000:]
+    metricas = registrar_desempenho("inicializacao", medicoes)
+    assert metricas["coleta_ms"] <= LIMITE_COLETA * 1000, \
+        f"Coleta levou {metricas['coleta_ms']:.0f} ms (limite: {LIMITE_COLETA * 1000:.0f} ms)."
+
+def test_benchmark_importacao_cenarios(registrar_desempenho, repeticoes):
+    """
+    Custo de importar o conftest e todos os módulos de cenário (`-X importtime`);
+    nenhum deles pode carregar o Playwright antes de um teste ser executado.
+    """
+    modulos = ["tests.conftest"] + modulos_cenarios()
+    codigo = "import sys\n" + "".join(f"import {modulo}\n" for modulo in modulos) + \
+             "print(sorted(m for m in sys.modules if 'playwright' in m))"
+    medicoes = []
+    for _ in range(repeticoes):
+        processo = subprocess.run([sys.executable, "-X", "importtime", "-c", codigo],
+                                  cwd=RAIZ, capture_output=True, text=True)
+        assert processo.returncode == 0, processo.stderr[-2000:]
+        assert processo.stdout.strip() == "[]", f"Playwright importado durante a coleta: {processo.stdout.strip()}"
+        # Linhas de primeiro nível ("import time: self | cumulativo | modulo"): custo total das importações
+        cumulativos = re.findall(r"^import time:\s+\d+ \|\s+(\d+) \| \S", processo.stderr, re.MULTILINE)
+        medicoes.append({"importacao_ms": sum(int(us) for us in cumulativos) / 1000})
+    metricas = registrar_desempenho("inicializacao", medicoes)
+    assert metricas["importacao_ms"] <= LIMITE_IMPORTACAO * 1000, \
+        f"Importação levou {metricas['importacao_ms']:.0f} ms (limite: {LIMITE_IMPORTACAO * 1000:.0f} ms)."
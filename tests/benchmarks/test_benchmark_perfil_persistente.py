@@ -0,0 +1,79 @@
+import asyncio
+import os
+import time
+import pytest
+from tests.pages.documentos.bulas_page import BulasPage
+from tests.services.browser_service import BrowserService
+from tests.services.perfil_persistente import PerfilPersistente
+
+pytestmark = pytest.mark.benchmark
+
+TAMANHO_POOL = int(os.environ.get("ANVISA_POOL_CONTEXTOS", "4"))
+
+def processos_descendentes(pid: int) -> list:
+    """Processos filhos (recursivamente) de `pid`, lidos do /proc; vazio fora do Linux."""
+    filhos = {}
+    for nome in os.listdir("/proc") if os.path.isdir("/proc") else []:
+        if not nome.isdigit():
+            continue
+        try:
+            with open(f"/proc/{nome}/stat", "r") as f:
+                pai = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        filhos.setdefault(pai, []).append(int(nome))
+    descendentes, pendentes = [], [pid]
+    while pendentes:
+        for filho in filhos.get(pendentes.pop(), []):
+            descendentes.append(filho)
+            pendentes.append(filho)
+    return descendentes
+
+def memoria_proporcional_mb(pids: list) -> float:
+    """Soma do PSS (memória compartilhada dividida entre os processos que a usam), em MB."""
+    total_kb = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+                total_kb += next(int(linha.split()[1]) for linha in f if linha.startswith("Pss:"))
+        except (OSError, StopIteration):
+            continue
+    return total_kb / 1024
+
+@pytest.mark.parametrize("modo", ["contextos", "perfil_persistente"])
+def test_benchmark_pool_com_perfil_persistente(modo, tmp_path, registrar_desempenho, repeticoes):
+    """
+    Pool com perfil persistente (um único contexto por worker: o navegador
+    aberto sobre a cópia do perfil, o único que usa o cache em disco) contra o
+    pool de contextos em um navegador comum: tempo até o pool e uma página
+    aquecida por contexto estarem prontos, processos do navegador e memória (PSS).
+    """
+    perfis = PerfilPersistente(str(tmp_path / "perfis"))
+
+    async def rodada() -> dict:
+        service = BrowserService(headless=True, reuse_session=False, tamanho_pool=TAMANHO_POOL, compartilhado=False,
+                                 perfil_persistente=perfis if modo == "perfil_persistente" else False)
+        try:
+            inicio = time.perf_counter()
+            await service.iniciar_pool()
+            pool_ms = (time.perf_counter() - inicio) * 1000
+            inicio = time.perf_counter()
+            paginas = await asyncio.gather(*(service.adquirir_pagina_aquecida(BulasPage)
+                                             for _ in range(service.tamanho_pool)))
+            paginas_ms = (time.perf_counter() - inicio) * 1000
+            processos = processos_descendentes(os.getpid())
+            for pagina in paginas:
+                service.liberar_pagina_aquecida(pagina)
+            return {"pool_pronto_ms": pool_ms, "paginas_prontas_ms": paginas_ms,
+                    "processos_navegador": len(processos), "memoria_mb": memoria_proporcional_mb(processos)}
+        finally:
+            await service.fechar_navegador()
+
+    async def executar():
+        if modo == "perfil_persistente":
+            await rodada()  # Aquece o modelo do build atual fora das medições
+        return [await rodada() for _ in range(repeticoes)]
+
+    medicoes = asyncio.run(executar())
+    contextos = 1 if modo == "perfil_persistente" else TAMANHO_POOL  # O pool persistente tem um só contexto
+    registrar_desempenho(f"perfil-{modo}-{contextos}", medicoes)
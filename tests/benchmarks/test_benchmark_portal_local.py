@@ -0,0 +1,54 @@
+import asyncio
+import time
+import pytest
+import requests
+from tests.mock.servidor_consultas import FalhaInjetada, ServidorConsultas
+from tests.services.bulas_api_service import BulasApiClient
+from tests.services.resiliencia import CamadaResiliencia, ErroPortal, RegistroEventos
+
+pytestmark = pytest.mark.benchmark
+
+CONSULTAS = 300
+
+@pytest.mark.parametrize("concorrencia", [1, 8, 32])
+def test_benchmark_vazao_com_falhas_injetadas(concorrencia, tmp_path, registrar_desempenho, repeticoes):
+    """
+    Vazão das consultas à API sob a camada de resiliência, contra o portal local
+    com latência e 10% de erros 503: mede o modo paralelo e a política de
+    retentativas sem depender da rede.
+    """
+    falhas = [FalhaInjetada(503, taxa=0.1)]
+    medicoes = []
+    with ServidorConsultas(latencia=0.01, falhas=falhas, sinteticas=2000) as servidor:
+        expedientes = [linha["expediente"] for linha in servidor.httpd.linhas][:CONSULTAS]
+        cliente = BulasApiClient(base_url=servidor.url, tamanho_pool=concorrencia)
+
+        async def consultar(camada, expediente):
+            async def operacao():
+                try:
+                    return await asyncio.to_thread(cliente.buscar_por_numero_expediente, expediente)
+                except requests.HTTPError as e:
+                    if e.response.status_code >= 500:
+                        raise ErroPortal(str(e)) from e
+                    raise
+            return await camada.executar(cliente.endpoint, operacao)
+
+        async def rodada():
+            camada = CamadaResiliencia(tentativas=5, espera_base=0.01, espera_maxima=0.05, limite_inicial=concorrencia,
+                                       registro=RegistroEventos(str(tmp_path / "eventos")))
+            await asyncio.gather(*(consultar(camada, expediente) for expediente in expedientes))
+
+        try:
+            for _ in range(repeticoes):
+                servidor.httpd.respostas.clear()
+                inicio = time.perf_counter()
+                asyncio.run(rodada())
+                duracao = time.perf_counter() - inicio
+                medicoes.append({
+                    "ms_por_consulta": duracao * 1000 / len(expedientes),
+                    "requisicoes_por_consulta": sum(servidor.httpd.respostas.values()) / len(expedientes),
+                })
+        finally:
+            cliente.fechar()
+    metricas = registrar_desempenho(f"portal-local-{concorrencia}", medicoes)
+    assert metricas["requisicoes_por_consulta"] >= 1
@@ -1,6 +1,7 @@
 TEST_DATA_BULAS = {
     "nome_medicamento": "Novalgina",  # Nome válido de medicamento
     "numero_registro": "186200018",  # Número de registro válido
+    "numero_registro_produto": "183260003",  # Registro da Novalgina, o produto dos demais valores válidos
     "numero_expediente": "0073370258",  # Número de expediente válido
     "cnpj_empresa": "38391432000143 ",  # CNPJ válido
     "nome_empresa": "OPELLA HEALTHCARE BRAZIL LTDA",  # Nome válido de empresa
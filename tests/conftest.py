@@ -1,20 +1,64 @@
+import os
+import shutil
 import pytest
-from undetected_playwright.async_api import async_playwright
+import pytest_asyncio
+from tests.services.bloqueio_recursos import PerfilBloqueio
+from tests.services.resiliencia import ARQUIVO_LIMITE, DIRETORIO_EVENTOS, RegistroEventos
+from tests.services.servidor_navegador import ServidorNavegador, conectar_navegador, usar_navegador_compartilhado
+from tests.utils.artefatos import armazem, encerrar_trace, registrar_no_teste
+from tests.utils.cenarios import resultados_sessao
+from tests.utils.config import url_portal
+from tests.utils.metricas import DIRETORIO_AMOSTRAS, ColetorMetricas, coletor
 
-@pytest.fixture(scope="session")
+def pytest_addoption(parser):
+    grupo = parser.getgroup("benchmark", "benchmarks de desempenho das consultas")
+    grupo.addoption("--benchmark", action="store_true", default=False,
+                    help="Executa os benchmarks de tests/benchmarks (ignorados por padrão).")
+    grupo.addoption("--benchmark-repeticoes", type=int, default=5,
+                    help="Repetições de cada benchmark; a mediana é registrada.")
+    grupo.addoption("--benchmark-tolerancia", type=float, default=0.2,
+                    help="Aumento relativo tolerado em relação à linha de base (0.2 = 20%%).")
+    grupo.addoption("--benchmark-falhar", action="store_true", default=False,
+                    help="Falha o benchmark em caso de regressão (por padrão apenas avisa).")
+
+def pytest_collection_modifyitems(config, items):
+    """Os benchmarks só rodam com --benchmark."""
+    if config.getoption("--benchmark"):
+        return
+    pular = pytest.mark.skip(reason="benchmark: use --benchmark para executar")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(pular)
+
+# Perfil de bloqueio compartilhado pela sessão (None se ANVISA_BLOQUEIO_RECURSOS=0)
+perfil_bloqueio = PerfilBloqueio.do_ambiente()
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
 async def browser():
+    """
+    Navegador da sessão, para testes que usam a `page` crua (os cenários do
+    bulário usam o `BrowserService`). Com o xdist (ou ANVISA_NAVEGADOR_COMPARTILHADO=1),
+    os workers se conectam ao mesmo processo do Chromium em vez de iniciar um cada.
+    """
+    from undetected_playwright.async_api import async_playwright
     async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=False)  # Altere para True se não quiser ver o navegador
+        servidor = ServidorNavegador(headless=False) if usar_navegador_compartilhado() else None
+        if servidor:
+            browser = await conectar_navegador(p, servidor)
+        else:
+            browser = await p.chromium.launch(headless=False)  # Altere para True se não quiser ver o navegador
         yield browser
         await browser.close()
+        if servidor:
+            servidor.desconectar()
 
-@pytest.fixture(scope="function")
-async def page(browser):
+@pytest_asyncio.fixture(loop_scope="session")
+async def page(browser, request):
     context = await browser.new_context(
         user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/110.0.0.0 Safari/537.36",
         extra_http_headers={
             "Accept-Language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7",
-            "Referer": "https://consultas.anvisa.gov.br/",
+            "Referer": url_portal("/"),
             "Sec-Fetch-Mode": "navigate",
             "Sec-Fetch-Site": "same-origin"
         },
@@ -22,17 +66,121 @@ async def page(browser):
         ignore_https_errors=True,
         java_script_enabled=True
     )
+    # Cenários marcados com @pytest.mark.visual carregam todos os recursos
+    if perfil_bloqueio and not request.node.get_closest_marker("visual"):
+        await context.route("**/*", perfil_bloqueio.interceptar)
+    elif perfil_bloqueio:
+        context.on("response", perfil_bloqueio.registrar_resposta)
+    # Traces são caros: só são gravados quando o teste está sendo repetido (pytest-rerunfailures)
+    rastrear = getattr(request.node, "execution_count", 1) > 1
+    if rastrear:
+        await context.tracing.start(screenshots=True, snapshots=True)
     page = await context.new_page()
     yield page
+    # Hooks do pytest não podem ser assíncronos: os artefatos da falha são capturados aqui
+    # e anexados ao relatório pelo hook de teardown (conftest.py da raiz)
+    rep = getattr(request.node, "rep_call", None)
+    falhou = bool(rep and rep.failed)
+    artefatos = {}
+    if falhou:
+        try:
+            artefatos["Screenshot"] = armazem.salvar(await page.screenshot(), "png")
+            artefatos["DOM"] = armazem.salvar(await page.content(), "html")
+        except Exception as e:
+            print(f"Não foi possível capturar os artefatos da falha: {e}")
+    if rastrear:
+        artefatos.update(await encerrar_trace(context, falhou))
+    if artefatos:
+        print(f"Artefatos da falha: {', '.join(artefatos.values())}")
+        registrar_no_teste(request.node, artefatos)
     await page.close()
+    await context.close()
+
+@pytest.fixture(scope="session")
+def servidor_consultas():
+    """Servidor local com respostas gravadas da API de consultas."""
+    from tests.mock.servidor_consultas import ServidorConsultas
+    with ServidorConsultas() as servidor:
+        yield servidor
+
+@pytest_asyncio.fixture(scope="module", loop_scope="session")
+async def browser_service_local(servidor_consultas):
+    """`BrowserService` próprio do módulo, com as páginas apontadas para o portal local."""
+    from tests.services.browser_service import BrowserService
+    anterior = os.environ.get("ANVISA_URL_PORTAL")
+    os.environ["ANVISA_URL_PORTAL"] = servidor_consultas.url
+    service = BrowserService(headless=True, reuse_session=False, tamanho_pool=1, compartilhado=False,
+                             cache_consultas=False, perfil_persistente=False)
+    yield service
+    await service.fechar_navegador()
+    if anterior is None:
+        os.environ.pop("ANVISA_URL_PORTAL", None)
+    else:
+        os.environ["ANVISA_URL_PORTAL"] = anterior
+
+def pytest_terminal_summary(terminalreporter):
+    """
+    Mostra os eventos de resiliência, as consultas reaproveitadas entre casos
+    equivalentes e quanto o perfil de bloqueio economizou na execução.
+    """
+    eventos = getattr(terminalreporter.config, "_eventos_resiliencia", None)
+    if eventos:
+        terminalreporter.write_sep("-", "resiliência")
+        for e in eventos:
+            terminalreporter.write_line(f"{e['instante']} [{e['worker']}] {e['endpoint']}: {e['evento']} {e['detalhe']}")
+    if resultados_sessao.reaproveitadas:
+        terminalreporter.write_sep("-", "consultas combinatórias")
+        terminalreporter.write_line(resultados_sessao.resumo())
+    if not perfil_bloqueio:
+        return
+    if perfil_bloqueio.bloqueados:
+        terminalreporter.write_sep("-", "bloqueio de recursos")
+        terminalreporter.write_line(perfil_bloqueio.resumo())
+    if perfil_bloqueio.tamanhos:
+        perfil_bloqueio.salvar_tamanhos()
+
+def pytest_sessionstart(session):
+    """
+    Limpa as amostras de tempo, os eventos de resiliência e o limite de
+    concorrência da execução anterior e, com ANVISA_URL_PORTAL=local, inicia
+    o portal local (apenas no processo principal).
+    """
+    if not os.environ.get("PYTEST_XDIST_WORKER"):
+        shutil.rmtree(DIRETORIO_AMOSTRAS, ignore_errors=True)
+        shutil.rmtree(DIRETORIO_EVENTOS, ignore_errors=True)
+        if os.path.exists(ARQUIVO_LIMITE):
+            os.remove(ARQUIVO_LIMITE)
+        # ANVISA_URL_PORTAL=local: um único portal local para a execução (os workers herdam a URL)
+        if os.environ.get("ANVISA_URL_PORTAL") == "local":
+            from tests.mock.servidor_consultas import ServidorConsultas
+            session.config._portal_local = ServidorConsultas().iniciar()
+            os.environ["ANVISA_URL_PORTAL"] = session.config._portal_local.url
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_sessionfinish(session):
+    """
+    Cada worker grava suas amostras; o processo principal (que termina por
+    último com o xdist) agrega p50/p95 por etapa em reports/metricas.json.
+    """
+    armazem.aguardar()
+    portal_local = getattr(session.config, "_portal_local", None)
+    if portal_local:
+        portal_local.parar()
+    worker = os.environ.get("PYTEST_XDIST_WORKER")
+    if coletor.amostras:
+        coletor.salvar_amostras(worker or "principal")
+    if not worker:
+        session.config._resumo_metricas = ColetorMetricas.agregar(ColetorMetricas.carregar_amostras())
+        if session.config._resumo_metricas:
+            ColetorMetricas.salvar_resumo(session.config._resumo_metricas)
+        session.config._eventos_resiliencia = RegistroEventos.carregar()
 
-@pytest.hookimpl(tryfirst=True, hookwrapper=True)
-async def pytest_runtest_makereport(item, call):
-    outcome = yield
-    rep = outcome.get_result()
-    if rep.when == "call" and rep.failed:
-        page = item.funcargs.get("page")
-        if page:
-            screenshot_path = f"screenshots/{item.name}.png"
-            await page.screenshot(path=screenshot_path)
-            print(f"Screenshot saved to {screenshot_path}")
+@pytest.hookimpl(optionalhook=True)
+def pytest_html_results_summary(prefix, summary, postfix, session):
+    """Inclui a tabela de tempo por etapa e os eventos de resiliência no reports/report.html."""
+    resumo = getattr(session.config, "_resumo_metricas", None)
+    if resumo:
+        postfix.append(ColetorMetricas.tabela_html(resumo))
+    eventos = getattr(session.config, "_eventos_resiliencia", None)
+    if eventos:
+        postfix.append(RegistroEventos.tabela_html(eventos))
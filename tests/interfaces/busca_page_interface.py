@@ -1,30 +1,38 @@
 from abc import ABC, abstractmethod
 
 class BuscaPageInterface(ABC):
+    """
+    Buscas comuns às páginas de consulta.
+
+    As buscas são corrotinas (Playwright assíncrono). O `BulasApiClient`, que
+    consulta a API sem navegador, oferece as mesmas buscas de forma síncrona e
+    por isso não implementa esta interface.
+    """
+
     @abstractmethod
-    def buscar_por_nome(self, nome: str):
+    async def buscar_por_nome(self, nome: str):
         pass
 
     @abstractmethod
-    def buscar_por_numero_registro(self, numero: str):
+    async def buscar_por_numero_registro(self, numero: str):
         pass
 
     @abstractmethod
-    def buscar_por_numero_expediente(self, expediente: str):
+    async def buscar_por_numero_expediente(self, expediente: str):
         pass
 
     @abstractmethod
-    def buscar_por_empresa(self, cnpj: str):
+    async def buscar_por_empresa(self, cnpj: str):
         pass
 
     @abstractmethod
-    def buscar_por_categoria(self, categorias: list, busca_textual: bool = False):
+    async def buscar_por_categoria(self, categorias: list, busca_textual: bool = False):
         pass
 
     @abstractmethod
-    def buscar_por_periodo(self, data_inicial: str, data_final: str):
+    async def buscar_por_periodo(self, data_inicial: str, data_final: str):
         pass
 
     @abstractmethod
-    def obter_resultados(self):
+    async def obter_resultados(self):
         pass
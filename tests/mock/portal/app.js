@@ -0,0 +1,323 @@
+/*
+ * Bulário do portal local (tests/mock/servidor_consultas.py).
+ *
+ * Reproduz os seletores e o comportamento do formulário do portal real e expõe
+ * em window.angular o mínimo que a automação inspeciona: injector() com
+ * $http.pendingRequests, $rootScope.$applyAsync, $uibModalStack.dismissAll e
+ * $route.reload, e controller('ngModel') em cada campo com ng-model.
+ */
+(function () {
+    'use strict';
+
+    var CATEGORIAS = ['Biológico', 'Dinamizado', 'Específico', 'Fitoterápico', 'Genérico', 'Novo',
+                      'Radiofármaco', 'Similar'];
+    var ROTA_PDF_BULA = '/api/consulta/medicamentos/arquivo/bula/parecer/';
+    var ITENS_POR_PAGINA = 10;
+
+    var pendentes = [];
+    var escopo;
+    var temporizadorSugestoes = null;
+
+    function escopoInicial() {
+        return {
+            filter: {categoriasRegulatorias: []},
+            empresa: {},
+            modal: {},
+            results: [],
+            resultados: null,
+            pagina: 1,
+            empresas: [],
+            empresaSelecionada: null
+        };
+    }
+
+    function obter(caminho) {
+        return caminho.split('.').reduce(function (objeto, parte) {
+            return objeto === undefined || objeto === null ? undefined : objeto[parte];
+        }, escopo);
+    }
+
+    function definir(caminho, valor) {
+        var partes = caminho.split('.');
+        var objeto = escopo;
+        partes.slice(0, -1).forEach(function (parte) {
+            objeto = objeto[parte] = objeto[parte] || {};
+        });
+        objeto[partes[partes.length - 1]] = valor;
+    }
+
+    function $(seletor, raiz) { return (raiz || document).querySelector(seletor); }
+
+    function mostrar(elemento, visivel) { elemento.classList.toggle('ng-hide', !visivel); }
+
+    function escapar(texto) {
+        return String(texto === undefined || texto === null ? '' : texto)
+            .replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;').replace(/"/g, '&quot;');
+    }
+
+    // Equivalente ao $http: as requisições em andamento ficam em pendingRequests
+    function http(url) {
+        var requisicao = {method: 'GET', url: url};
+        pendentes.push(requisicao);
+        return fetch(url, {headers: {'Authorization': 'Guest', 'Accept': 'application/json'}})
+            .then(function (resposta) {
+                return resposta.json().catch(function () { return {}; }).then(function (corpo) {
+                    if (!resposta.ok) {
+                        var erro = new Error(corpo.error || ('HTTP ' + resposta.status));
+                        erro.status = resposta.status;
+                        throw erro;
+                    }
+                    return corpo;
+                });
+            })
+            .finally(function () {
+                pendentes.splice(pendentes.indexOf(requisicao), 1);
+                renderizar();
+            });
+    }
+
+    function consulta(params) {
+        return Object.keys(params).reduce(function (partes, nome) {
+            [].concat(params[nome]).forEach(function (valor) {
+                if (valor !== undefined && valor !== null && valor !== '') {
+                    partes.push(encodeURIComponent(nome) + '=' + encodeURIComponent(valor));
+                }
+            });
+            return partes;
+        }, []).join('&');
+    }
+
+    // Valor do campo no modelo: caixas de seleção guardam true/false e botões de opção o próprio value
+    function valorCampo(campo) {
+        if (campo.type === 'checkbox') return campo.checked;
+        if (campo.type === 'radio') return campo.checked ? campo.value : obter(campo.getAttribute('ng-model'));
+        return campo.value;
+    }
+
+    function renderizar() {
+        document.querySelectorAll('input[ng-model]').forEach(function (campo) {
+            var valor = obter(campo.getAttribute('ng-model'));
+            if (campo.type === 'checkbox' || campo.type === 'radio') {
+                campo.checked = campo.type === 'checkbox' ? valor === true : valor === campo.value;
+                return;
+            }
+            valor = valor === undefined || valor === null ? '' : String(valor);
+            if (campo.value !== valor) campo.value = valor;
+        });
+        var categorias = escopo.filter.categoriasRegulatorias || [];
+        $('.anvs-multiselect .rotulo').textContent = categorias.length ? categorias.join(', ') : 'Selecione';
+        renderizarCategorias();
+
+        var sugestoes = $("select[ng-show='results.length > 0']");
+        sugestoes.innerHTML = escopo.results.map(function (valor) {
+            return '<option>' + escapar(valor) + '</option>';
+        }).join('');
+        mostrar(sugestoes, escopo.results.length > 0);
+
+        var resultados = escopo.resultados;
+        mostrar($('#resultados'), !!resultados);
+        if (resultados) {
+            $("span[ng-bind='resultados.totalElements']").textContent = resultados.totalElements;
+            $('#resultados tbody').innerHTML = resultados.content.map(function (produto) {
+                return '<tr ng-repeat="produto in resultados.content">' +
+                    '<td>' + escapar(produto.nomeProduto) + '</td>' +
+                    '<td>' + escapar(produto.razaoSocial) + '</td>' +
+                    '<td>' + escapar(produto.expediente) + '</td>' +
+                    '<td>' + escapar(produto.data) + '</td>' +
+                    '<td>' + linkBula(produto.idBulaPacienteProtegido) + '</td>' +
+                    '<td>' + linkBula(produto.idBulaProfissionalProtegido) + '</td>' +
+                    '</tr>';
+            }).join('');
+            $('li.pagination-prev').classList.toggle('disabled', resultados.first);
+            $('li.pagination-next').classList.toggle('disabled', resultados.last);
+        }
+
+        $('#resultadoEmpresas tbody').innerHTML = escopo.empresas.map(function (empresa, indice) {
+            var classe = escopo.empresaSelecionada === indice ? ' class="selecionado"' : '';
+            return '<tr data-indice="' + indice + '"' + classe + '><td>' + escapar(empresa.cnpj) + '</td><td>' +
+                escapar(empresa.razaoSocial) + '</td></tr>';
+        }).join('');
+    }
+
+    function linkBula(id) {
+        return id ? '<a href="' + ROTA_PDF_BULA + encodeURIComponent(id) + '/?Authorization=Guest">PDF</a>' : '';
+    }
+
+    function renderizarCategorias() {
+        var termo = ($("input[placeholder='Pesquisar...']").value || '').toLowerCase();
+        var selecionadas = escopo.filter.categoriasRegulatorias || [];
+        $('.anvs-multiselect .lista').innerHTML = CATEGORIAS.filter(function (categoria) {
+            return categoria.toLowerCase().indexOf(termo) >= 0;
+        }).map(function (categoria) {
+            var classe = selecionadas.indexOf(categoria) >= 0 ? 'option selecionada' : 'option';
+            return '<div class="' + classe + '" data-value="' + escapar(categoria) + '">' + escapar(categoria) + '</div>';
+        }).join('');
+    }
+
+    function buscarSugestoes(campo) {
+        clearTimeout(temporizadorSugestoes);
+        var termo = campo.value.trim();
+        if (!termo) {
+            escopo.results = [];
+            renderizar();
+            return;
+        }
+        temporizadorSugestoes = setTimeout(function () {
+            var caminho = campo.getAttribute('ng-model');
+            http('/api/consulta/sugestoes?' + consulta({campo: caminho.split('.').pop(), termo: termo}))
+                .then(function (valores) { escopo.results = valores.length ? valores : [termo]; })
+                .catch(function () { escopo.results = [termo]; });
+        }, 100);
+    }
+
+    function consultar(pagina) {
+        var filtro = escopo.filter;
+        var params = {
+            'count': ITENS_POR_PAGINA,
+            'page': pagina,
+            'filter[nomeProduto]': filtro.nomeProduto,
+            'filter[numeroRegistro]': filtro.numeroRegistro,
+            'filter[expediente]': filtro.expediente,
+            'filter[cnpj]': (escopo.empresa.cnpj || '').replace(/\D/g, ''),
+            'filter[periodoPublicacaoInicial]': filtro.periodoPublicacaoInicial,
+            'filter[periodoPublicacaoFinal]': filtro.periodoPublicacaoFinal,
+            'filter[categoriasRegulatorias]': filtro.categoriasRegulatorias
+        };
+        escopo.results = [];
+        mostrar($('#erroConsulta'), false);
+        return http('/api/consulta/bulario?' + consulta(params))
+            .then(function (resposta) {
+                escopo.resultados = resposta;
+                escopo.pagina = pagina;
+            })
+            .catch(function (erro) {
+                escopo.resultados = null;
+                $('#erroConsulta').textContent = 'Não foi possível realizar a consulta (' + erro.message + ').';
+                mostrar($('#erroConsulta'), true);
+            });
+    }
+
+    function pesquisarEmpresa() {
+        http('/api/consulta/empresas?' + consulta({'filter[razaoSocial]': escopo.modal.razaoSocial}))
+            .then(function (resposta) {
+                escopo.empresas = resposta.content || [];
+                escopo.empresaSelecionada = escopo.empresas.length ? 0 : null;
+            });
+    }
+
+    function selecionarEmpresa() {
+        var empresa = escopo.empresas[escopo.empresaSelecionada];
+        if (!empresa) return;
+        escopo.empresa = {cnpj: empresa.cnpj, razaoSocial: empresa.razaoSocial};
+        fecharModal();
+    }
+
+    function fecharModal() {
+        escopo.modal = {};
+        escopo.empresas = [];
+        escopo.empresaSelecionada = null;
+        mostrar($('#modalEmpresa'), false);
+        renderizar();
+    }
+
+    function fecharCategorias() { mostrar($('.anvs-multiselect .opcoes'), false); }
+
+    function controleModelo(elemento) {
+        var caminho = elemento.getAttribute('ng-model');
+        return {
+            get $modelValue() { return obter(caminho); },
+            $setViewValue: function (valor) { definir(caminho, valor); },
+            $render: renderizar,
+            $setPristine: function () {}
+        };
+    }
+
+    var servicos = {
+        '$http': {pendingRequests: pendentes},
+        '$rootScope': {$applyAsync: function () { setTimeout(renderizar); }},
+        '$uibModalStack': {dismissAll: fecharModal},
+        '$route': {
+            reload: function () {
+                escopo = escopoInicial();
+                fecharCategorias();
+                mostrar($('#erroConsulta'), false);
+                $("input[placeholder='Pesquisar...']").value = '';
+                renderizar();
+            }
+        }
+    };
+    var injector = {
+        has: function (nome) { return nome in servicos; },
+        get: function (nome) { return servicos[nome]; }
+    };
+
+    window.angular = {
+        version: {full: '1.5.8-portal-local'},
+        element: function (elemento) {
+            return {
+                injector: function () { return injector; },
+                controller: function (nome) {
+                    return nome === 'ngModel' && elemento.hasAttribute('ng-model') ? controleModelo(elemento) : undefined;
+                }
+            };
+        }
+    };
+
+    document.addEventListener('input', function (evento) {
+        var campo = evento.target;
+        if (campo.matches("input[placeholder='Pesquisar...']")) {
+            renderizarCategorias();
+        } else if (campo.matches('input[ng-model]')) {
+            definir(campo.getAttribute('ng-model'), valorCampo(campo));
+            if (campo.closest('#formBulario') && campo.type === 'text') buscarSugestoes(campo);
+        }
+    });
+
+    document.addEventListener('click', function (evento) {
+        var alvo = evento.target;
+        var opcao = alvo.closest('.anvs-multiselect .option');
+        if (opcao) {
+            var categorias = escopo.filter.categoriasRegulatorias;
+            var indice = categorias.indexOf(opcao.dataset.value);
+            if (indice >= 0) categorias.splice(indice, 1); else categorias.push(opcao.dataset.value);
+            fecharCategorias();
+            renderizar();
+            return;
+        }
+        if (alvo.closest('.anvs-multiselect .opcoes')) return;
+        if (alvo.closest('.anvs-multiselect')) {
+            var painel = $('.anvs-multiselect .opcoes');
+            mostrar(painel, painel.classList.contains('ng-hide'));
+            renderizarCategorias();
+            return;
+        }
+        var linhaEmpresa = alvo.closest('#resultadoEmpresas tbody tr');
+        if (linhaEmpresa) {
+            escopo.empresaSelecionada = Number(linhaEmpresa.dataset.indice);
+            renderizar();
+            return;
+        }
+        var acao = alvo.getAttribute('ng-click');
+        if (acao === 'abrirModalEmpresa()') {
+            mostrar($('#modalEmpresa'), true);
+        } else if (acao === 'pesquisarEmpresa()') {
+            pesquisarEmpresa();
+        } else if (acao === 'selecionarEmpresa()') {
+            selecionarEmpresa();
+        } else if (alvo.closest('li.pagination-next a')) {
+            evento.preventDefault();
+            consultar(escopo.pagina + 1);
+        } else if (alvo.closest('li.pagination-prev a')) {
+            evento.preventDefault();
+            consultar(escopo.pagina - 1);
+        }
+    });
+
+    document.addEventListener('submit', function (evento) {
+        evento.preventDefault();
+        consultar(1);
+    });
+
+    escopo = escopoInicial();
+    renderizar();
+})();
@@ -0,0 +1,419 @@
+import argparse
+import json
+import logging
+import mimetypes
+import os
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# Linhas gravadas a partir de respostas reais da API do bulário
+DADOS_BULARIO = os.path.join(os.path.dirname(__file__), "dados", "bulario.json")
+
+# Página do bulário (mesmos seletores do portal) servida em "/"
+DIRETORIO_PORTAL = os.path.join(os.path.dirname(__file__), "portal")
+
+ROTA_BULARIO = "/api/consulta/bulario"
+ROTA_CONFIGURACAO = "/__mock/configuracao"
+
+# Parâmetro da API -> campo da linha retornada
+FILTROS_TEXTUAIS = {
+    "filter[nomeProduto]": "nomeProduto",
+    "filter[numeroRegistro]": "numeroRegistro",
+    "filter[expediente]": "expediente",
+    "filter[cnpj]": "cnpj",
+}
+
+# Rota dos PDFs das bulas: /api/consulta/medicamentos/arquivo/bula/parecer/<idBula...Protegido>/
+ROTA_PDF_BULA = "/api/consulta/medicamentos/arquivo/bula/parecer/"
+
+def gerar_pdf(texto: str) -> bytes:
+    """Gera um PDF mínimo (uma página, uma linha de texto) para simular as bulas."""
+    texto = texto.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    conteudo = f"BT /F1 12 Tf 72 720 Td ({texto}) Tj ET".encode("latin-1", "replace")
+    objetos = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length " + str(len(conteudo)).encode() + b" >>\nstream\n" + conteudo + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    pdf = bytearray(b"%PDF-1.4\n")
+    posicoes = []
+    for numero, objeto in enumerate(objetos, start=1):
+        posicoes.append(len(pdf))
+        pdf += f"{numero} 0 obj\n".encode() + objeto + b"\nendobj\n"
+    inicio_xref = len(pdf)
+    pdf += f"xref\n0 {len(objetos) + 1}\n0000000000 65535 f \n".encode()
+    pdf += "".join(f"{posicao:010d} 00000 n \n" for posicao in posicoes).encode()
+    pdf += f"trailer\n<< /Size {len(objetos) + 1} /Root 1 0 R >>\nstartxref\n{inicio_xref}\n%%EOF\n".encode()
+    return bytes(pdf)
+
+@dataclass
+class FalhaInjetada:
+    """
+    Erro simulado pelo servidor local.
+
+    Ex.: `FalhaInjetada(500, parametro="filter[expediente]")` responde 500 a
+    toda busca por expediente; com `taxa=0.3`, a 30% delas.
+    """
+    status: int = 500
+    rota: str = ROTA_BULARIO
+    parametro: str = None
+    taxa: float = 1.0
+
+    def aplica(self, caminho: str, params: dict, sorteio: float) -> bool:
+        if not caminho.startswith(self.rota):
+            return False
+        if self.parametro and not params.get(self.parametro, [""])[0].strip():
+            return False
+        return sorteio < self.taxa
+
+    @classmethod
+    def do_texto(cls, texto: str):
+        """Lê a forma da linha de comando: `[parametro=]status[:taxa]` (ex.: 'filter[expediente]=500:0.5')."""
+        parametro, _, resto = texto.rpartition("=")
+        status, _, taxa = resto.partition(":")
+        return cls(int(status), parametro=parametro or None, taxa=float(taxa or 1))
+
+def gerar_linhas(base: list, quantidade: int, semente: int = 0) -> list:
+    """
+    Gera linhas sintéticas (determinísticas para a mesma semente) a partir das
+    gravadas, para consultas com muitos resultados e testes de carga.
+
+    :param base: Linhas gravadas usadas como modelo.
+    :param quantidade: Número de linhas a gerar.
+    :param semente: Semente do gerador pseudoaleatório.
+    """
+    aleatorio = random.Random(semente)
+    categorias = sorted({linha["categoriaRegulatoria"] for linha in base})
+    linhas = []
+    for indice in range(quantidade):
+        modelo = aleatorio.choice(base)
+        data = (_data(modelo["data"]) - timedelta(days=aleatorio.randint(0, 365))).strftime("%d/%m/%Y")
+        linhas.append(dict(
+            modelo,
+            idProduto=900000 + indice,
+            nomeProduto=f"{modelo['nomeProduto']} {indice + 1}",
+            numeroRegistro=f"{aleatorio.randint(100000000, 199999999)}",
+            expediente=f"{aleatorio.randint(0, 9999999999):010d}",
+            numeroTransacao=f"{aleatorio.randint(0, 9999999999):010d}",
+            data=data,
+            dataAtualizacao=data,
+            categoriaRegulatoria=aleatorio.choice(categorias),
+            idBulaPacienteProtegido=f"{modelo['idBulaPacienteProtegido']}-{indice + 1}",
+            idBulaProfissionalProtegido=f"{modelo['idBulaProfissionalProtegido']}-{indice + 1}",
+        ))
+    return linhas
+
+def _data(valor: str):
+    return datetime.strptime(valor, "%d/%m/%Y")
+
+def filtrar_linhas(linhas: list, params: dict) -> list:
+    """Aplica os filtros da API do bulário sobre as linhas gravadas."""
+    resultado = linhas
+    for parametro, campo in FILTROS_TEXTUAIS.items():
+        valor = params.get(parametro, [""])[0].strip().lower()
+        if valor:
+            resultado = [l for l in resultado if valor in str(l.get(campo, "")).lower()]
+    categorias = params.get("filter[categoriasRegulatorias]", [])
+    if categorias:
+        resultado = [l for l in resultado if l.get("categoriaRegulatoria") in categorias]
+    inicio = params.get("filter[periodoPublicacaoInicial]", [""])[0]
+    fim = params.get("filter[periodoPublicacaoFinal]", [""])[0]
+    if inicio:
+        resultado = [l for l in resultado if _data(l["data"]) >= _data(inicio)]
+    if fim:
+        resultado = [l for l in resultado if _data(l["data"]) <= _data(fim)]
+    return resultado
+
+def _inteiro_positivo(params: dict, nome: str, padrao: int) -> int:
+    """
+    Parâmetro inteiro da consulta (`page`, `count`), com padrão quando ausente.
+
+    :raises ValueError: Se o valor não for um inteiro maior que zero.
+    """
+    valor = params.get(nome, [str(padrao)])[0]
+    if not valor.strip().isdigit() or int(valor) < 1:
+        raise ValueError(f"Parâmetro '{nome}' inválido: {valor!r}")
+    return int(valor)
+
+def paginar(linhas: list, pagina: int, tamanho: int) -> dict:
+    """Monta a resposta paginada no mesmo formato da API do portal."""
+    inicio = (pagina - 1) * tamanho
+    total_paginas = max(1, -(-len(linhas) // tamanho))
+    return {
+        "content": linhas[inicio:inicio + tamanho],
+        "totalElements": len(linhas),
+        "totalPages": total_paginas,
+        "number": pagina - 1,
+        "size": tamanho,
+        "first": pagina == 1,
+        "last": pagina >= total_paginas,
+    }
+
+class ConsultasHandler(BaseHTTPRequestHandler):
+    """Responde à página do bulário e às rotas da API de consultas usando os dados gravados."""
+
+    # Conexões persistentes: todas as respostas informam Content-Length
+    protocol_version = "HTTP/1.1"
+    # Cabeçalhos e corpo saem em escritas separadas; sem o Nagle, não há espera pelo ACK atrasado
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = parse_qs(url.query)
+        if url.path in ("/", "/index.html"):
+            self._responder_arquivo("index.html")
+            return
+        if url.path.startswith("/portal/"):
+            self._responder_arquivo(url.path[len("/portal/"):])
+            return
+        if url.path == ROTA_CONFIGURACAO:
+            self._responder(200, self.server.configuracao())
+            return
+        if self._simular(url.path, params):
+            return
+        if url.path.startswith(ROTA_PDF_BULA):
+            self._responder_pdf(url.path[len(ROTA_PDF_BULA):].strip("/"))
+        elif url.path.rstrip("/") == ROTA_BULARIO:
+            try:
+                pagina = _inteiro_positivo(params, "page", 1)
+                tamanho = _inteiro_positivo(params, "count", 10)
+            except ValueError as e:
+                self._responder(400, {"error": str(e), "status": 400})
+                return
+            try:
+                linhas = filtrar_linhas(self.server.linhas, params)
+            except ValueError as e:
+                # Como o portal, datas fora do formato dd/mm/aaaa são recusadas
+                self._responder(400, {"error": f"Período de publicação inválido: {e}", "status": 400})
+                return
+            self._responder(200, paginar(linhas, pagina, tamanho))
+        elif url.path.rstrip("/") == "/api/consulta/sugestoes":
+            self._responder(200, self._sugestoes(params))
+        elif url.path.rstrip("/") == "/api/consulta/empresas":
+            self._responder(200, self._empresas(params))
+        else:
+            self._responder(404, {"error": "Not Found"})
+
+    def do_POST(self):
+        if urlsplit(self.path).path != ROTA_CONFIGURACAO:
+            self.close_connection = True  # O corpo não lido inviabiliza a conexão persistente
+            self._responder(404, {"error": "Not Found"})
+            return
+        corpo = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        falhas = corpo.get("falhas")
+        self.server.configurar(corpo.get("latencia"), corpo.get("variacao"),
+                               None if falhas is None else [FalhaInjetada(**f) for f in falhas])
+        self._responder(200, self.server.configuracao())
+
+    def _simular(self, caminho: str, params: dict) -> bool:
+        """Aplica a latência e as falhas configuradas; retorna True se respondeu com erro."""
+        if not caminho.startswith("/api/"):
+            return False
+        espera, status = self.server.sortear(caminho, params)
+        if espera:
+            time.sleep(espera)
+        if status:
+            self._responder(status, {"error": "Falha injetada pelo servidor local", "status": status})
+            return True
+        return False
+
+    def _sugestoes(self, params: dict) -> list:
+        """Autocomplete dos campos do formulário: valores distintos que contêm o termo."""
+        campo = params.get("campo", [""])[0]
+        termo = params.get("termo", [""])[0].strip().lower()
+        valores = []
+        for linha in self.server.linhas:
+            valor = str(linha.get(campo, ""))
+            if termo and termo in valor.lower() and valor not in valores:
+                valores.append(valor)
+        return valores[:10]
+
+    def _empresas(self, params: dict) -> dict:
+        """Pesquisa do modal de empresas (por razão social ou CNPJ)."""
+        razao_social = params.get("filter[razaoSocial]", [""])[0].strip().lower()
+        cnpj = params.get("filter[cnpj]", [""])[0].strip()
+        empresas = {}
+        for linha in self.server.linhas:
+            if razao_social in linha["razaoSocial"].lower() and cnpj in linha["cnpj"]:
+                empresas[linha["cnpj"]] = {"cnpj": linha["cnpj"], "razaoSocial": linha["razaoSocial"]}
+        return paginar(list(empresas.values()), 1, max(1, len(empresas)))
+
+    def _responder_pdf(self, id_protegido: str):
+        for linha in self.server.linhas:
+            for tipo, campo in (("paciente", "idBulaPacienteProtegido"), ("profissional", "idBulaProfissionalProtegido")):
+                if linha.get(campo) == id_protegido:
+                    conteudo = gerar_pdf(f"Bula do {tipo}: {linha['nomeProduto']} ({linha['razaoSocial']})")
+                    self._enviar(200, "application/pdf", conteudo)
+                    return
+        self._responder(404, {"error": "Not Found"})
+
+    def _responder_arquivo(self, nome: str):
+        caminho = os.path.normpath(os.path.join(DIRETORIO_PORTAL, nome))
+        if not caminho.startswith(DIRETORIO_PORTAL + os.sep) or not os.path.isfile(caminho):
+            self._responder(404, {"error": "Not Found"})
+            return
+        with open(caminho, "rb") as f:
+            conteudo = f.read()
+        tipo = mimetypes.guess_type(caminho)[0] or "application/octet-stream"
+        self._enviar(200, f"{tipo};charset=UTF-8", conteudo)
+
+    def _responder(self, status: int, corpo):
+        conteudo = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+        self._enviar(status, "application/json;charset=UTF-8", conteudo)
+
+    def _enviar(self, status: int, tipo: str, conteudo: bytes):
+        self.server.respostas[status] += 1
+        self.send_response(status)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(conteudo)))
+        self.end_headers()
+        self.wfile.write(conteudo)
+
+    def log_message(self, format, *args):
+        logging.debug(f"[servidor_consultas] {format % args}")
+
+class _HTTPServerConsultas(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, endereco, linhas: list, latencia=0.0, variacao=0.0, falhas=None, semente=0):
+        super().__init__(endereco, ConsultasHandler)
+        self.linhas = linhas
+        self.respostas = Counter()
+        self._trava = threading.Lock()
+        self._aleatorio = random.Random(semente)
+        self.latencia, self.variacao, self.falhas = 0.0, 0.0, []
+        self.configurar(latencia, variacao, falhas or [])
+
+    def configurar(self, latencia=None, variacao=None, falhas=None):
+        with self._trava:
+            if latencia is not None:
+                self.latencia = float(latencia)
+            if variacao is not None:
+                self.variacao = float(variacao)
+            if falhas is not None:
+                self.falhas = list(falhas)
+
+    def configuracao(self) -> dict:
+        return {"latencia": self.latencia, "variacao": self.variacao,
+                "falhas": [asdict(f) for f in self.falhas], "respostas": dict(self.respostas)}
+
+    def sortear(self, caminho: str, params: dict) -> tuple:
+        """Espera (em segundos) e status de erro (ou None) desta requisição."""
+        with self._trava:
+            espera = self.latencia + (self._aleatorio.uniform(0, self.variacao) if self.variacao else 0)
+            for falha in self.falhas:
+                if falha.aplica(caminho, params, self._aleatorio.random()):
+                    return espera, falha.status
+        return espera, None
+
+class ServidorConsultas:
+    """
+    Servidor HTTP local que substitui o portal de consultas nos testes.
+
+    Serve a página do bulário em "/" (mesmos seletores e comportamento do
+    formulário do portal, para os page objects) e as rotas da API, com
+    latência e falhas configuráveis para testar paralelismo e retentativas
+    sem rede.
+
+    Uso:
+        with ServidorConsultas(latencia=0.05, falhas=[FalhaInjetada(500, parametro="filter[expediente]")]) as servidor:
+            cliente = BulasApiClient(base_url=servidor.url)
+            pagina = BulasPage(page, browser_service)  # com ANVISA_URL_PORTAL=servidor.url
+    """
+
+    def __init__(self, host="127.0.0.1", porta=0, dados=DADOS_BULARIO, latencia=0.0, variacao=0.0, falhas=None,
+                 sinteticas=0, semente=0):
+        """
+        :param host: Interface em que o servidor escuta.
+        :param porta: Porta TCP (0 escolhe uma porta livre).
+        :param dados: Arquivo JSON com as linhas gravadas do bulário.
+        :param latencia: Atraso fixo (em segundos) das respostas da API.
+        :param variacao: Atraso adicional aleatório, de 0 até este valor (em segundos).
+        :param falhas: Lista de `FalhaInjetada`.
+        :param sinteticas: Linhas sintéticas acrescentadas às gravadas (ver `gerar_linhas`).
+        :param semente: Semente das linhas sintéticas, da latência e das falhas.
+        """
+        with open(dados, "r", encoding="utf-8") as f:
+            linhas = json.load(f)
+        if sinteticas:
+            linhas += gerar_linhas(linhas, sinteticas, semente)
+        self.httpd = _HTTPServerConsultas((host, porta), linhas, latencia, variacao, falhas, semente)
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, porta = self.httpd.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    def configurar(self, latencia=None, variacao=None, falhas=None):
+        """Altera a latência e as falhas injetadas com o servidor em execução (None mantém o valor atual)."""
+        self.httpd.configurar(latencia, variacao, falhas)
+
+    def iniciar(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        logging.info(f"Servidor local de consultas ativo em {self.url}")
+        return self
+
+    def parar(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        logging.info("Servidor local de consultas encerrado.")
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.parar()
+
+def gravar_dados(cliente, buscas: list, caminho: str = DADOS_BULARIO):
+    """
+    Regrava o arquivo de dados a partir do portal real.
+
+    :param cliente: `BulasApiClient` apontando para o portal.
+    :param buscas: Lista de dicionários de filtros aceitos por `BulasApiClient.consultar`.
+    :param caminho: Arquivo JSON de destino.
+    """
+    linhas = {}
+    for filtros in buscas:
+        for linha in cliente.consultar(filtros).get("content", []):
+            linhas[linha["idProduto"]] = linha
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(list(linhas.values()), f, ensure_ascii=False, indent=2)
+    logging.info(f"{len(linhas)} linhas gravadas em {caminho}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Portal de consultas local (bulário) para testes sem rede.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8000)
+    parser.add_argument("--latencia", type=float, default=0.0, help="Atraso fixo das respostas da API (segundos).")
+    parser.add_argument("--variacao", type=float, default=0.0, help="Atraso aleatório adicional (segundos).")
+    parser.add_argument("--falha", action="append", default=[], type=FalhaInjetada.do_texto,
+                        help="Falha injetada, '[parametro=]status[:taxa]' (ex.: 'filter[expediente]=500:0.5').")
+    parser.add_argument("--sinteticas", type=int, default=0, help="Linhas sintéticas acrescentadas às gravadas.")
+    parser.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    servidor = ServidorConsultas(args.host, args.porta, latencia=args.latencia, variacao=args.variacao,
+                                 falhas=args.falha, sinteticas=args.sinteticas, semente=args.semente)
+    logging.info(f"Bulário local em {servidor.url}/#/bulario/ (use ANVISA_URL_PORTAL={servidor.url})")
+    try:
+        servidor.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.httpd.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Registro dos page objects, carregados sob demanda.
+
+Os módulos `tests/pages/<seção>/<nome>_page.py` são descobertos pelo nome do
+arquivo, sem importá-los; pacotes externos podem registrar páginas no grupo de
+entry points `anvisa_consultas.paginas` (`nome = "pacote.modulo:Classe"`).
+A classe só é importada (e a especificação YAML lida) em `obter_pagina`.
+"""
+import functools
+import importlib
+import os
+import re
+from importlib.metadata import entry_points
+
+GRUPO_ENTRY_POINTS = "anvisa_consultas.paginas"
+
+DIRETORIO_PAGINAS = os.path.dirname(__file__)
+
+# Diretório com as especificações (YAML/JSON) das páginas declarativas
+DIRETORIO_ESPECIFICACOES = os.path.join(os.path.dirname(os.path.dirname(DIRETORIO_PAGINAS)), "configs", "paginas")
+
+# `class BulasPage(...)` ou `<Nome>Page = criar_pagina(...)`
+_DEFINICAO_PAGINA = re.compile(r"^(?:class\s+(\w+Page)\b|(\w+Page)\s*=)", re.MULTILINE)
+
+def _paginas_do_repositorio() -> dict:
+    paginas = {}
+    for secao in sorted(os.listdir(DIRETORIO_PAGINAS)):
+        diretorio = os.path.join(DIRETORIO_PAGINAS, secao)
+        if secao == "base" or not os.path.isfile(os.path.join(diretorio, "__init__.py")):
+            continue
+        for arquivo in sorted(os.listdir(diretorio)):
+            if not arquivo.endswith("_page.py"):
+                continue
+            with open(os.path.join(diretorio, arquivo), "r", encoding="utf-8") as f:
+                codigo = f.read()
+            definicao = _DEFINICAO_PAGINA.search(codigo)
+            if definicao:
+                modulo = f"{__name__}.{secao}.{arquivo[:-3]}"
+                paginas[arquivo[:-len("_page.py")]] = f"{modulo}:{definicao.group(1) or definicao.group(2)}"
+    return paginas
+
+@functools.lru_cache(maxsize=None)
+def registro_paginas() -> dict:
+    """Nome da página -> referência `modulo:Classe`, sem importar nenhum page object."""
+    paginas = _paginas_do_repositorio()
+    for entry_point in entry_points(group=GRUPO_ENTRY_POINTS):
+        paginas[entry_point.name] = entry_point.value
+    return paginas
+
+@functools.lru_cache(maxsize=None)
+def obter_pagina(nome: str):
+    """Importa e retorna a classe do page object registrada como `nome` (ex.: 'bulas')."""
+    try:
+        referencia = registro_paginas()[nome]
+    except KeyError:
+        raise ValueError(f"Página '{nome}' não registrada. Disponíveis: {', '.join(sorted(registro_paginas()))}.")
+    modulo, _, atributo = referencia.partition(":")
+    return getattr(importlib.import_module(modulo), atributo)
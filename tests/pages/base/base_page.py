@@ -1,31 +1,315 @@
-from undetected_playwright.sync_api import Page
+import asyncio
+import logging
+from typing import TYPE_CHECKING
+from tests.pages.base.resolvedor_seletores import ResolvedorSeletores
+from tests.utils.artefatos import armazem, registrar_captura
+from tests.utils.config import url_portal
+from tests.utils.metricas import medir_etapa
+
+if TYPE_CHECKING:  # O Playwright só é importado quando um navegador é de fato iniciado
+    from undetected_playwright.async_api import Page
+
+# Verdadeiro quando o AngularJS terminou o bootstrap e não há requisições $http pendentes
+JS_ANGULAR_OCIOSO = """
+() => {
+    if (document.readyState !== 'complete') return false;
+    if (!window.angular) return true;
+    const raiz = document.querySelector('[ng-app], [data-ng-app]') || document.body;
+    const injector = window.angular.element(raiz).injector();
+    if (!injector) return false;
+    return injector.get('$http').pendingRequests.length === 0;
+}
+"""
+
+# Instala (uma vez por documento) um MutationObserver que registra o instante da última mutação
+JS_OBSERVAR_MUTACOES = """
+() => {
+    if (window.__anvisaUltimaMutacao !== undefined) return;
+    window.__anvisaUltimaMutacao = performance.now();
+    new MutationObserver(() => { window.__anvisaUltimaMutacao = performance.now(); })
+        .observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+}
+"""
+
+JS_DOM_ESTAVEL = "quietude => performance.now() - window.__anvisaUltimaMutacao >= quietude"
+
+# Fecha modais e limpa todos os ng-model do formulário sem recarregar a aplicação
+JS_LIMPAR_MODELO = """
+() => {
+    if (!window.angular) return false;
+    const raiz = document.querySelector('[ng-app], [data-ng-app]') || document.body;
+    const injector = window.angular.element(raiz).injector();
+    if (!injector) return false;
+    for (const servico of ['$uibModalStack', '$modalStack']) {
+        if (injector.has(servico)) injector.get(servico).dismissAll();
+    }
+    document.querySelectorAll('[ng-model]').forEach(el => {
+        const controle = window.angular.element(el).controller('ngModel');
+        if (!controle) return;
+        controle.$setViewValue(Array.isArray(controle.$modelValue) ? [] : '');
+        controle.$render();
+        controle.$setPristine();
+    });
+    injector.get('$rootScope').$applyAsync();
+    return true;
+}
+"""
+
+# Recria o controller da rota atual (equivale a recarregar a rota do hash, sem novo bootstrap)
+JS_RECARREGAR_ROTA = """
+() => {
+    if (!window.angular) return false;
+    const raiz = document.querySelector('[ng-app], [data-ng-app]') || document.body;
+    const injector = window.angular.element(raiz).injector();
+    if (!injector) return false;
+    if (injector.has('$route')) { injector.get('$route').reload(); }
+    else if (injector.has('$state')) { injector.get('$state').reload(); }
+    else return false;
+    injector.get('$rootScope').$applyAsync();
+    return true;
+}
+"""
+
+# Verdadeiro quando nenhum campo com ng-model tem valor preenchido; caixas de
+# seleção e botões de opção contam pelo `checked` (o `value` deles é fixo, "on")
+JS_FORMULARIO_VAZIO = """
+() => Array.from(document.querySelectorAll('input[ng-model], select[ng-model], textarea[ng-model]'))
+    .every(el => {
+        if (el.type === 'submit' || el.type === 'button') return true;
+        if (el.type === 'checkbox' || el.type === 'radio') return !el.checked;
+        return !el.value;
+    })
+"""
+
+# Inspeciona todos os campos em uma única chamada; no modo de espera, um único
+# MutationObserver reavalia os campos até todos estarem presentes ou o tempo acabar
+JS_INSPECIONAR_ELEMENTOS = """
+async ({campos, esperar, ignorar, timeout}) => {
+    const inspecionar = () => {
+        const resultado = {};
+        for (const [nome, seletor] of Object.entries(campos)) {
+            let el = null;
+            try {
+                el = document.querySelector(seletor);
+            } catch (e) {
+                resultado[nome] = {presente: false, visivel: false, habilitado: false, caixa: null, valor: null,
+                                   erro: String(e)};
+                continue;
+            }
+            if (!el) {
+                resultado[nome] = {presente: false, visivel: false, habilitado: false, caixa: null, valor: null};
+                continue;
+            }
+            const r = el.getBoundingClientRect();
+            const estilo = getComputedStyle(el);
+            resultado[nome] = {
+                presente: true,
+                visivel: r.width > 0 && r.height > 0 && estilo.visibility !== 'hidden' && estilo.display !== 'none',
+                habilitado: !el.disabled && el.getAttribute('aria-disabled') !== 'true',
+                caixa: {x: r.x, y: r.y, width: r.width, height: r.height},
+                valor: 'value' in el ? el.value : el.textContent.trim(),
+            };
+        }
+        return resultado;
+    };
+    const prontos = r => Object.entries(r).every(([nome, e]) => e.presente || ignorar.includes(nome));
+    let resultado = inspecionar();
+    if (!esperar || prontos(resultado)) return resultado;
+    return await new Promise(resolve => {
+        const observador = new MutationObserver(() => {
+            resultado = inspecionar();
+            if (prontos(resultado)) {
+                observador.disconnect();
+                clearTimeout(limite);
+                resolve(resultado);
+            }
+        });
+        const limite = setTimeout(() => { observador.disconnect(); resolve(inspecionar()); }, timeout);
+        observador.observe(document, {childList: true, subtree: true, attributes: true});
+    });
+}
+"""
+
+# Etapas medidas em todos os page objects, além dos métodos buscar_por_*
+ETAPAS_MEDIDAS = ("acessar_pagina", "preencher_campo", "clicar", "esperar_elemento_visivel")
 
 class BasePage:
-    def __init__(self, page: Page, url: str):
+    """
+    Base dos page objects, sobre a API assíncrona do Playwright (o mesmo event
+    loop do `BrowserService`). Scripts síncronos usam `tests.pages.base.sincrono`.
+    """
+
+    # Padrão de URL da requisição disparada pelo botão "Consultar" (definido pelas páginas filhas)
+    endpoint_consulta = None
+    # Elemento que indica que o formulário está utilizável (verificação de saúde da página reaproveitada)
+    seletor_pronto = None
+    # Linhas da grade de resultados; uma página reaproveitada não deve exibir resultados antigos
+    seletor_resultados = None
+
+    def __init_subclass__(cls, **kwargs):
+        """Instrumenta as etapas redefinidas ou criadas pelas páginas filhas."""
+        super().__init_subclass__(**kwargs)
+        for nome, valor in list(vars(cls).items()):
+            if callable(valor) and (nome in ETAPAS_MEDIDAS or nome.startswith("buscar_por_")):
+                setattr(cls, nome, medir_etapa(valor))
+
+    def __init__(self, page: "Page", url: str):
         self.page = page
-        self.url = url
+        self.url = url_portal(url)
+        self.ultima_resposta_consulta = None
+        self._resolvedor = None
+
+    @property
+    def resolvedor(self) -> ResolvedorSeletores:
+        """Resolvedor de seletores com cache de estratégias desta página."""
+        if self._resolvedor is None:
+            self._resolvedor = ResolvedorSeletores(self.page, type(self).__name__)
+        return self._resolvedor
 
-    def acessar_pagina(self):
-        """Acessa a página informada na URL da classe."""
-        self.page.goto(self.url)
-        self.page.wait_for_timeout(3000)
+    @medir_etapa
+    async def acessar_pagina(self):
+        """Acessa a página informada na URL da classe e aguarda a aplicação ficar pronta."""
+        await self.page.goto(self.url)
+        await self.esperar_pagina_pronta()
 
-    def preencher_campo(self, seletor: str, valor: str):
+    @medir_etapa
+    async def preencher_campo(self, seletor: str, valor: str):
         """Preenche um campo de input na página."""
-        self.page.fill(seletor, valor)
+        await self.page.fill(seletor, valor)
+
+    async def preencher_campos(self, valores: dict, timeout: int = 30000):
+        """
+        Preenche vários campos: as esperas por visibilidade correm juntas e os
+        preenchimentos vêm em seguida, um a um (o foco da página é único).
 
-    def clicar(self, seletor: str):
+        :param valores: Dicionário seletor -> valor; valores vazios são ignorados.
+        """
+        valores = {seletor: valor for seletor, valor in valores.items() if valor not in (None, "")}
+        await asyncio.gather(*(self.esperar_elemento_visivel(seletor, timeout=timeout) for seletor in valores))
+        for seletor, valor in valores.items():
+            await self.preencher_campo(seletor, valor)
+
+    @medir_etapa
+    async def clicar(self, seletor: str):
         """Clica em um botão na página."""
-        self.page.click(seletor)
+        await self.page.click(seletor)
 
-    def esperar_elemento_visivel(self, seletor: str, timeout: int = 30000):
+    @medir_etapa
+    async def esperar_elemento_visivel(self, seletor: str, timeout: int = 30000):
         """Espera até que o elemento esteja visível na página."""
-        self.page.wait_for_selector(seletor, state='visible', timeout=timeout)
+        await self.page.wait_for_selector(seletor, state='visible', timeout=timeout)
+
+    async def capturar_erro(self, motivo: str) -> str:
+        """
+        Registra o screenshot e o DOM do erro no armazém de artefatos (gravação
+        em segundo plano, capturas idênticas guardadas uma vez só) e os associa
+        ao teste em execução, para os links do relatório se ele falhar.
 
-    def elemento_presente(self, seletor: str) -> bool:
+        :return: Caminho do screenshot.
+        """
+        try:
+            artefatos = {"Screenshot": armazem.salvar(await self.page.screenshot(), "png"),
+                         "DOM": armazem.salvar(await self.page.content(), "html")}
+        except Exception as e:
+            logging.error(f"Não foi possível capturar o screenshot ({motivo}): {e}")
+            return None
+        logging.error(f"Artefatos do erro ({motivo}): {', '.join(artefatos.values())}")
+        registrar_captura(artefatos)
+        return artefatos["Screenshot"]
+
+    async def elemento_presente(self, seletor: str) -> bool:
         """Verifica se o elemento está presente na página."""
-        return self.page.query_selector(seletor) is not None
+        return await self.page.query_selector(seletor) is not None
 
-    def selecionar_opcao(self, seletor: str, valor: str):
+    async def selecionar_opcao(self, seletor: str, valor: str):
         """Seleciona uma opção em um dropdown ou autocomplete."""
-        self.page.select_option(seletor, label=valor)
+        await self.page.select_option(seletor, label=valor)
+
+    async def esperar_angular_ocioso(self, timeout: int = 30000):
+        """Espera o bootstrap do AngularJS e até não haver requisições $http pendentes."""
+        await self.page.wait_for_function(JS_ANGULAR_OCIOSO, timeout=timeout)
+
+    async def esperar_dom_estavel(self, quietude: int = 200, timeout: int = 10000):
+        """
+        Espera até o DOM passar `quietude` milissegundos sem mutações.
+
+        :param quietude: Intervalo sem mutações que caracteriza o DOM como estável (ms).
+        :param timeout: Tempo limite total da espera (ms).
+        """
+        await self.page.evaluate(JS_OBSERVAR_MUTACOES)
+        await self.page.wait_for_function(JS_DOM_ESTAVEL, arg=quietude, timeout=timeout, polling=50)
+
+    async def esperar_pagina_pronta(self, timeout: int = 30000):
+        """Espera o Angular ficar ocioso e o DOM parar de mudar."""
+        await self.esperar_angular_ocioso(timeout=timeout)
+        await self.esperar_dom_estavel(timeout=timeout)
+
+    async def clicar_e_esperar_consulta(self, seletor: str, timeout: int = 30000):
+        """
+        Clica no botão de consulta e espera a resposta do endpoint da página,
+        em vez de esperar um tempo fixo.
+        """
+        if not self.endpoint_consulta:
+            await self.clicar(seletor)
+            await self.esperar_angular_ocioso(timeout=timeout)
+            return None
+        async with self.page.expect_response(self.endpoint_consulta, timeout=timeout) as info:
+            await self.clicar(seletor)
+        self.ultima_resposta_consulta = await info.value
+        await self.esperar_angular_ocioso(timeout=timeout)
+        return self.ultima_resposta_consulta
+
+    async def pagina_saudavel(self) -> bool:
+        """
+        Verifica se a página pode ser reaproveitada por outro teste: continua na
+        rota da classe, com o formulário vazio, sem resultados e utilizável.
+        """
+        try:
+            if self.page.is_closed() or self.page.url.split("#")[-1] != self.url.split("#")[-1]:
+                return False
+            await self.esperar_angular_ocioso(timeout=5000)
+            if not await self.page.evaluate(JS_FORMULARIO_VAZIO):
+                return False
+            if self.seletor_resultados and await self.page.query_selector(self.seletor_resultados):
+                return False
+            return not self.seletor_pronto or await self.page.is_visible(self.seletor_pronto)
+        except Exception:
+            return False
+
+    async def restaurar_estado_inicial(self) -> str:
+        """
+        Devolve a página ao estado inicial pelo caminho mais barato que passar na
+        verificação de saúde: limpar o modelo do Angular, recarregar a rota ou,
+        em último caso, navegar novamente.
+
+        :return: Estratégia usada ('modelo', 'rota' ou 'navegacao').
+        """
+        if await self.page.evaluate(JS_LIMPAR_MODELO):
+            await self.esperar_dom_estavel()
+            if await self.pagina_saudavel():
+                return "modelo"
+        if await self.page.evaluate(JS_RECARREGAR_ROTA):
+            await self.esperar_pagina_pronta()
+            if await self.pagina_saudavel():
+                return "rota"
+        await self.acessar_pagina()
+        return "navegacao"
+
+    async def inspecionar_elementos(self, campos: dict, esperar_prontos: bool = False, ignorar: list = None,
+                                    timeout: int = 10000) -> dict:
+        """
+        Inspeciona vários campos em uma única chamada ao navegador.
+
+        :param campos: Dicionário nome -> seletor CSS.
+        :param esperar_prontos: Se True, espera (com um MutationObserver) até todos
+                                os campos estarem presentes ou o tempo limite acabar.
+        :param ignorar: Campos que não precisam estar presentes para encerrar a espera.
+        :param timeout: Tempo limite da espera (ms).
+        :return: Dicionário nome -> {presente, visivel, habilitado, caixa, valor}.
+        """
+        return await self.page.evaluate(JS_INSPECIONAR_ELEMENTOS, {
+            "campos": campos,
+            "esperar": esperar_prontos,
+            "ignorar": list(ignorar or []),
+            "timeout": timeout,
+        })
@@ -0,0 +1,80 @@
+import logging
+import re
+
+# Lê todas as linhas visíveis da grade em uma única chamada: texto e links de cada célula
+JS_LER_LINHAS = """
+seletor => Array.from(document.querySelectorAll(seletor)).map(linha =>
+    Array.from(linha.querySelectorAll('td')).map(celula => ({
+        texto: celula.innerText.trim(),
+        links: Array.from(celula.querySelectorAll('a[href]')).map(a => a.href),
+    }))
+)
+"""
+
+class ExtratorResultados:
+    """
+    Extrai a grade de resultados de uma consulta como registros tipados,
+    página a página, seguindo a paginação da própria grade.
+
+    A conversão de cada linha em registro é feita por `fabrica_registro`, que
+    recebe a lista de células (`{"texto": ..., "links": [...]}`) e devolve o
+    objeto do domínio.
+    """
+
+    def __init__(self, pagina, seletor_linhas: str, seletor_proxima: str, fabrica_registro,
+                 seletor_total: str = None):
+        """
+        :param pagina: Page object (`BasePage`) que contém a grade.
+        :param seletor_linhas: Seletor das linhas (`tr`) de resultados.
+        :param seletor_proxima: Seletor do link "próxima página" habilitado.
+        :param fabrica_registro: Função que converte as células de uma linha em registro.
+        :param seletor_total: Elemento com o texto do total de resultados (fallback da API).
+        """
+        self.pagina = pagina
+        self.seletor_linhas = seletor_linhas
+        self.seletor_proxima = seletor_proxima
+        self.fabrica_registro = fabrica_registro
+        self.seletor_total = seletor_total
+
+    async def registros_da_pagina(self) -> list:
+        """Registros exibidos na página atual da grade."""
+        linhas = await self.pagina.page.evaluate(JS_LER_LINHAS, self.seletor_linhas)
+        return [self.fabrica_registro(celulas) for celulas in linhas if celulas]
+
+    async def iterar(self, limite_paginas: int = None):
+        """
+        Gera os registros de todas as páginas da grade, mantendo em memória só a
+        página atual.
+
+        :param limite_paginas: Número máximo de páginas percorridas (None para todas).
+        """
+        numero = 1
+        while True:
+            logging.info(f"Extraindo resultados da página {numero}...")
+            for registro in await self.registros_da_pagina():
+                yield registro
+            if limite_paginas and numero >= limite_paginas:
+                return
+            if not await self.pagina.elemento_presente(self.seletor_proxima):
+                return
+            await self.pagina.clicar_e_esperar_consulta(self.seletor_proxima)
+            numero += 1
+
+    async def total(self):
+        """
+        Total de resultados da consulta, sem percorrer as páginas.
+
+        Usa o `totalElements` da última resposta da API e, se não houver, o texto
+        do contador exibido na página. Retorna None se nenhum estiver disponível.
+        """
+        resposta = self.pagina.ultima_resposta_consulta
+        if resposta is not None and resposta.ok:
+            try:
+                return int((await resposta.json())["totalElements"])
+            except Exception as e:
+                logging.warning(f"Resposta da consulta sem total de elementos: {e}")
+        if self.seletor_total and await self.pagina.elemento_presente(self.seletor_total):
+            numeros = re.findall(r"\d[\d.]*", await self.pagina.page.text_content(self.seletor_total))
+            if numeros:
+                return int(numeros[-1].replace(".", ""))
+        return None
@@ -0,0 +1,256 @@
+import asyncio
+import functools
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from tests.pages.base.base_page import BasePage
+from tests.pages.base.extrator_resultados import ExtratorResultados
+from tests.interfaces.busca_page_interface import BuscaPageInterface
+from tests.pages import DIRETORIO_ESPECIFICACOES
+
+# Valores padrão do portal de consultas, usados quando a especificação não os define
+BOTAO_CONSULTAR_PADRAO = "input.btn.btn-primary[type='submit']"
+LINHAS_GRADE_PADRAO = "table.table tbody tr[ng-repeat]"
+PROXIMA_PAGINA_PADRAO = "ul.pagination li.pagination-next:not(.disabled) a"
+BUSCA_MULTISELECT_PADRAO = "input[placeholder='Pesquisar...']"
+OPCAO_MULTISELECT_PADRAO = "div.option"
+
+class BuscaIndisponivel(LookupError):
+    """A página não oferece a busca pedida (ela não está em `buscas` na especificação)."""
+
+@dataclass(frozen=True)
+class CampoCompilado:
+    """Campo do formulário com os seletores alternativos em ordem de preferência."""
+    nome: str
+    seletores: tuple
+    tipo: str = "texto"
+    seletor_busca: str = None
+    seletor_opcao: str = None
+
+    @property
+    def qualquer(self) -> str:
+        """União CSS dos seletores: serve para esperar o campo, não para escolher o elemento."""
+        return ", ".join(self.seletores)
+
+    @property
+    def candidatos(self) -> list:
+        """Seletores no formato de candidatos do `ResolvedorSeletores`, na mesma ordem."""
+        return [{"css": seletor} for seletor in self.seletores]
+
+@dataclass(frozen=True)
+class EspecificacaoPagina:
+    """Especificação compilada de uma página de consulta."""
+    nome: str
+    titulo: str
+    url: str
+    endpoint: str
+    botao_consultar: str
+    campos: dict
+    buscas: dict
+    linhas_grade: str
+    proxima_pagina: str
+    colunas: tuple
+    contador: str = None
+    extras: dict = field(default_factory=dict)
+
+def _ler_arquivo(caminho: str) -> dict:
+    with open(caminho, "r", encoding="utf-8") as f:
+        if caminho.endswith(".json"):
+            return json.load(f)
+        import yaml
+        return yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+
+def compilar_especificacao(dados: dict) -> EspecificacaoPagina:
+    """
+    Valida e compila a especificação lida do arquivo.
+
+    Cada campo pode declarar uma lista de seletores alternativos, mantida na
+    ordem de preferência (ver `PaginaDeclarativa.seletor`).
+    """
+    for chave in ("nome", "url", "campos", "buscas"):
+        if chave not in dados:
+            raise ValueError(f"Especificação '{dados.get('nome', '?')}' sem a chave obrigatória '{chave}'.")
+
+    campos = {}
+    for nome, campo in dados["campos"].items():
+        seletores = campo["seletores"] if isinstance(campo, dict) else campo
+        if isinstance(seletores, str):
+            seletores = [seletores]
+        campo = campo if isinstance(campo, dict) else {}
+        tipo = campo.get("tipo", "texto")
+        campos[nome] = CampoCompilado(
+            nome=nome,
+            seletores=tuple(seletores),
+            tipo=tipo,
+            seletor_busca=campo.get("busca", BUSCA_MULTISELECT_PADRAO) if tipo == "multiselect" else None,
+            seletor_opcao=campo.get("opcao", OPCAO_MULTISELECT_PADRAO) if tipo == "multiselect" else None,
+        )
+
+    buscas = {}
+    for metodo, nomes in dados["buscas"].items():
+        nomes = tuple([nomes] if isinstance(nomes, str) else nomes)
+        desconhecidos = [n for n in nomes if n not in campos]
+        if desconhecidos:
+            raise ValueError(f"Especificação '{dados['nome']}': {metodo} usa campos inexistentes {desconhecidos}.")
+        buscas[metodo] = nomes
+
+    grade = dados.get("grade", {})
+    return EspecificacaoPagina(
+        nome=dados["nome"],
+        titulo=dados.get("titulo", dados["nome"]),
+        url=dados["url"],
+        endpoint=dados.get("endpoint"),
+        botao_consultar=dados.get("botao_consultar", BOTAO_CONSULTAR_PADRAO),
+        campos=campos,
+        buscas=buscas,
+        linhas_grade=grade.get("linhas", LINHAS_GRADE_PADRAO),
+        proxima_pagina=grade.get("proxima", PROXIMA_PAGINA_PADRAO),
+        colunas=tuple(grade.get("colunas", ())),
+        contador=grade.get("contador"),
+        extras=dados.get("extras", {}),
+    )
+
+@functools.lru_cache(maxsize=None)
+def carregar_especificacao(nome: str, diretorio: str = DIRETORIO_ESPECIFICACOES) -> EspecificacaoPagina:
+    """Lê e compila a especificação `configs/paginas/<nome>.yaml` (ou `.json`), uma vez por processo."""
+    for extensao in (".yaml", ".yml", ".json"):
+        caminho = os.path.join(diretorio, nome + extensao)
+        if os.path.exists(caminho):
+            return compilar_especificacao(_ler_arquivo(caminho))
+    raise FileNotFoundError(f"Especificação da página '{nome}' não encontrada em {diretorio}.")
+
+class PaginaDeclarativa(BasePage, BuscaPageInterface):
+    """
+    Page object genérico construído a partir de uma `EspecificacaoPagina`.
+
+    As buscas da `BuscaPageInterface` são mapeadas para campos do formulário
+    pela chave `buscas` da especificação; buscas não declaradas levantam
+    `BuscaIndisponivel` (verificável antes com `oferece`). Combinações livres
+    de campos usam `buscar(**valores)`.
+    """
+    especificacao: EspecificacaoPagina = None
+
+    def __init__(self, page, browser_service=None):
+        super().__init__(page, self.especificacao.url)
+        self.browser_service = browser_service
+        self.botao_consultar = self.especificacao.botao_consultar
+        self.extrator = ExtratorResultados(self, self.seletor_resultados, self.especificacao.proxima_pagina,
+                                           self._registro_da_linha, seletor_total=self.especificacao.contador)
+
+    @classmethod
+    def oferece(cls, metodo: str) -> bool:
+        """Indica se a busca `metodo` (ex.: 'buscar_por_nome') está declarada na especificação."""
+        return metodo in cls.especificacao.buscas
+
+    async def seletor(self, campo: str) -> str:
+        """
+        Seletor de um campo da especificação, resolvido em ordem de preferência.
+
+        Com alternativas, espera qualquer uma ficar visível e fica com a primeira
+        da lista disponível (a união CSS escolheria a primeira no DOM, que pode
+        ser um fallback); a escolha é memorizada pelo `resolvedor`.
+        """
+        compilado = self.especificacao.campos[campo]
+        if len(compilado.seletores) == 1:
+            return compilado.seletores[0]
+        await self.esperar_elemento_visivel(compilado.qualquer)
+        seletor = await self.resolvedor.resolver(campo, compilado.candidatos, exigir_habilitado=False)
+        return seletor or compilado.seletores[0]
+
+    async def preencher(self, campo: str, valor):
+        """Preenche um campo conforme o tipo declarado na especificação."""
+        compilado = self.especificacao.campos[campo]
+        logging.info(f"[{self.especificacao.nome}] Preenchendo {campo} com {valor!r}")
+        seletor = await self.seletor(campo)
+        await self.esperar_elemento_visivel(seletor)
+        if compilado.tipo == "multiselect":
+            for opcao in ([valor] if isinstance(valor, str) else valor):
+                # A lista pode fechar a cada opção clicada
+                if not await self.page.is_visible(compilado.seletor_busca):
+                    await self.clicar(seletor)
+                    await self.esperar_elemento_visivel(compilado.seletor_busca)
+                await self.preencher_campo(compilado.seletor_busca, opcao)
+                await self.clicar(f"{seletor} >> {compilado.seletor_opcao}:text-is(\"{opcao}\")")
+        elif compilado.tipo == "select":
+            await self.selecionar_opcao(seletor, valor)
+        else:
+            await self.preencher_campo(seletor, valor)
+
+    async def buscar(self, **valores):
+        """
+        Preenche os campos informados e executa a consulta.
+
+        Campos de texto são preenchidos de uma vez (`preencher_campos`); selects e
+        multiselects, que abrem listas, um de cada vez.
+        """
+        valores = {campo: valor for campo, valor in valores.items() if valor not in (None, "", [])}
+        campos_texto = [campo for campo in valores if self.especificacao.campos[campo].tipo == "texto"]
+        seletores = await asyncio.gather(*(self.seletor(campo) for campo in campos_texto))
+        await self.preencher_campos({seletor: valores[campo] for seletor, campo in zip(seletores, campos_texto)})
+        for campo, valor in valores.items():
+            if self.especificacao.campos[campo].tipo != "texto":
+                await self.preencher(campo, valor)
+        return await self.clicar_e_esperar_consulta(self.botao_consultar)
+
+    async def _buscar_declarada(self, metodo: str, *valores):
+        campos = self.especificacao.buscas.get(metodo)
+        if not campos:
+            raise BuscaIndisponivel(f"A página '{self.especificacao.nome}' não oferece {metodo}.")
+        return await self.buscar(**dict(zip(campos, valores)))
+
+    async def buscar_por_nome(self, nome: str):
+        return await self._buscar_declarada("buscar_por_nome", nome)
+
+    async def buscar_por_numero_registro(self, numero: str):
+        return await self._buscar_declarada("buscar_por_numero_registro", numero)
+
+    async def buscar_por_numero_expediente(self, expediente: str):
+        return await self._buscar_declarada("buscar_por_numero_expediente", expediente)
+
+    async def buscar_por_empresa(self, cnpj: str):
+        return await self._buscar_declarada("buscar_por_empresa", cnpj)
+
+    async def buscar_por_categoria(self, categorias: list, busca_textual: bool = False):
+        return await self._buscar_declarada("buscar_por_categoria", categorias)
+
+    async def buscar_por_periodo(self, data_inicial: str, data_final: str):
+        return await self._buscar_declarada("buscar_por_periodo", data_inicial, data_final)
+
+    def _registro_da_linha(self, celulas: list) -> dict:
+        colunas = self.especificacao.colunas or [f"coluna_{i}" for i in range(len(celulas))]
+        registro = {nome: celula["texto"] for nome, celula in zip(colunas, celulas)}
+        links = [link for celula in celulas for link in celula["links"]]
+        if links:
+            registro["links"] = links
+        return registro
+
+    async def obter_resultados(self):
+        """Retorna os registros (dicionários por coluna) exibidos na página atual da grade."""
+        return await self.extrator.registros_da_pagina()
+
+    def iterar_resultados(self, limite_paginas: int = None):
+        """Gera (assincronamente) os registros de todas as páginas de resultados, uma página por vez."""
+        return self.extrator.iterar(limite_paginas)
+
+    async def total_resultados(self):
+        """Total de resultados da última busca, sem percorrer a paginação."""
+        return await self.extrator.total()
+
+@functools.lru_cache(maxsize=None)
+def criar_pagina(nome: str, nome_classe: str = None):
+    """
+    Cria (uma vez por processo) a classe de page object da especificação `nome`.
+
+    :param nome: Nome do arquivo de especificação em `configs/paginas/`, sem extensão.
+    :param nome_classe: Nome da classe gerada (padrão: `<Nome>Page`).
+    """
+    especificacao = carregar_especificacao(nome)
+    nome_classe = nome_classe or "".join(p.capitalize() for p in nome.split("_")) + "Page"
+    return type(nome_classe, (PaginaDeclarativa,), {
+        "especificacao": especificacao,
+        "endpoint_consulta": especificacao.endpoint,
+        "seletor_pronto": especificacao.botao_consultar,
+        "seletor_resultados": especificacao.linhas_grade,
+        "__doc__": f"{especificacao.titulo} ({especificacao.url}).",
+    })
@@ -0,0 +1,259 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from tests.utils.travas import trava_arquivo
+
+# Cache em disco das estratégias vencedoras, por página e build da aplicação
+ARQUIVO_CACHE_SELETORES = os.path.join("reports", "cache_seletores.json")
+
+# Assinatura do build: URLs dos scripts e folhas de estilo (os bundles mudam de nome/versão a cada deploy)
+JS_ASSINATURA_BUILD = """
+() => Array.from(document.querySelectorAll('script[src], link[rel=stylesheet][href]'))
+    .map(el => el.src || el.href).sort().join('|')
+"""
+
+# Elementos do documento que correspondem a um candidato (visíveis ou não)
+JS_ELEMENTOS_CANDIDATO = """
+c => {
+    const PAPEIS = {
+        button: "button, input[type=submit], input[type=button], [role=button]",
+        textbox: "input:not([type]), input[type=text], input[type=search], textarea, [role=textbox]",
+        combobox: "select, [role=combobox]",
+        option: "option, [role=option]",
+        link: "a[href], [role=link]",
+        checkbox: "input[type=checkbox], [role=checkbox]",
+    };
+    const nome = el => (el.getAttribute('aria-label') || el.value || el.getAttribute('placeholder')
+                        || el.textContent || '').trim();
+    const contemTexto = (el, texto) => el.textContent.trim() === texto
+        || Array.from(el.querySelectorAll('*')).some(f => f.children.length === 0 && f.textContent.trim() === texto);
+    if (c.papel) {
+        return Array.from(document.querySelectorAll(PAPEIS[c.papel] || `[role=${c.papel}]`))
+            .filter(el => !c.nome || nome(el) === c.nome);
+    }
+    if (c.css) {
+        const elementos = Array.from(document.querySelectorAll(c.css));
+        return c.texto ? elementos.filter(el => contemTexto(el, c.texto)) : elementos;
+    }
+    if (c.texto) {
+        return Array.from(document.querySelectorAll('body *'))
+            .filter(el => el.children.length === 0 && el.textContent.trim() === c.texto);
+    }
+    return [];
+}
+"""
+
+# Avalia todos os candidatos em uma única chamada: true (visível e habilitado),
+# false (visível mas desabilitado) ou null (ausente/invisível) para cada um
+JS_AVALIAR_CANDIDATOS = """
+candidatos => {
+    const elementos = %s;
+    const visivel = el => {
+        const r = el.getBoundingClientRect();
+        const s = getComputedStyle(el);
+        return r.width > 0 && r.height > 0 && s.visibility !== 'hidden' && s.display !== 'none';
+    };
+    return candidatos.map(c => {
+        let encontrados;
+        try {
+            encontrados = elementos(c);
+        } catch (e) {
+            return null;
+        }
+        const el = encontrados.find(visivel);
+        return el ? !el.disabled : null;
+    });
+}
+""" % JS_ELEMENTOS_CANDIDATO.strip()
+
+# Se algum elemento do candidato (uma opção de lista ou multiselect) está marcado:
+# aria-selected/aria-checked, <option> selecionado, checkbox marcado ou classe de seleção
+JS_CANDIDATO_MARCADO = """
+candidato => {
+    const elementos = %s;
+    const marcado = el => {
+        const alvo = el.closest('[role=option], [role=checkbox], [aria-selected], [aria-checked], option, li, .option')
+            || el;
+        const caixa = alvo.matches('input[type=checkbox], input[type=radio]')
+            ? alvo : alvo.querySelector('input[type=checkbox], input[type=radio]');
+        return alvo.getAttribute('aria-selected') === 'true' || alvo.getAttribute('aria-checked') === 'true'
+            || alvo.selected === true || Boolean(caixa && caixa.checked)
+            || /(^|[\\s-])(selected|selecionad[ao]|checked|marcad[ao]|active|ativ[ao])($|[\\s-])/i
+                .test(alvo.getAttribute('class') || '');
+    };
+    try {
+        return elementos(candidato).some(marcado);
+    } catch (e) {
+        return false;
+    }
+}
+""" % JS_ELEMENTOS_CANDIDATO.strip()
+
+def seletor_playwright(candidato: dict) -> str:
+    """Converte um candidato na sintaxe de seletor do Playwright."""
+    if "papel" in candidato:
+        return f"role={candidato['papel']}" + (f"[name=\"{candidato['nome']}\"]" if candidato.get("nome") else "")
+    if "css" in candidato and "texto" in candidato:
+        return f"css={candidato['css']} >> text={candidato['texto']}"
+    if "css" in candidato:
+        return f"css={candidato['css']}"
+    return f"text={candidato['texto']}"
+
+class ResolvedorSeletores:
+    """
+    Resolve o seletor de um campo lógico entre várias estratégias candidatas
+    (CSS, papel ARIA, texto, atributos data-*) em uma única ida ao navegador.
+
+    A estratégia vencedora (posição na lista de candidatos) é memorizada por
+    página e build da aplicação em um cache em disco. Nas próximas vezes ela é
+    verificada primeiro; só quando deixa de funcionar (o DOM mudou) todos os
+    candidatos são avaliados de novo e o cache é reaprendido. Campos ausentes
+    também são memorizados, por `validade_ausente` segundos, para não esperar
+    por eles a cada execução sem descartá-los pelo resto do build (um campo
+    que só demorou a renderizar volta a ser procurado).
+
+    O arquivo é compartilhado pelos workers: cada gravação relê o arquivo sob
+    uma trava entre processos e aplica apenas os campos alterados por este
+    processo, sem apagar o que os outros aprenderam.
+    """
+
+    def __init__(self, page, nome_pagina: str, arquivo_cache: str = ARQUIVO_CACHE_SELETORES,
+                 validade_ausente: float = None, relogio=time.time):
+        """
+        :param page: Página assíncrona do Playwright.
+        :param nome_pagina: Identificador da página no cache (ex.: nome da classe).
+        :param arquivo_cache: Arquivo JSON do cache de estratégias.
+        :param validade_ausente: Segundos em que um campo ausente não é esperado. Se None,
+                                 usa ANVISA_VALIDADE_AUSENTE (padrão: 900).
+        :param relogio: Fonte da hora atual (substituível nos testes).
+        """
+        self.page = page
+        self.nome_pagina = nome_pagina
+        self.arquivo_cache = arquivo_cache
+        if validade_ausente is None:
+            validade_ausente = float(os.environ.get("ANVISA_VALIDADE_AUSENTE", "900"))
+        self.validade_ausente = validade_ausente
+        self.relogio = relogio
+        self._build = None
+        self._cache = None
+        self._alterados = {}
+
+    async def chave(self) -> str:
+        if self._build is None:
+            assinatura = await self.page.evaluate(JS_ASSINATURA_BUILD)
+            self._build = hashlib.sha1(assinatura.encode("utf-8")).hexdigest()[:12]
+        return f"{self.nome_pagina}@{self._build}"
+
+    def _ler_arquivo(self) -> dict:
+        if not os.path.exists(self.arquivo_cache):
+            return {}
+        try:
+            with open(self.arquivo_cache, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Cache de seletores ignorado ({self.arquivo_cache}): {e}")
+            return {}
+
+    async def _carregar(self) -> dict:
+        if self._cache is None:
+            self._cache = self._ler_arquivo()
+        return self._cache.setdefault(await self.chave(), {})
+
+    async def _gravar(self, campo: str, valor):
+        """Altera um campo do cache (None o remove) e grava a alteração no arquivo."""
+        chave = await self.chave()
+        memoria = await self._carregar()
+        if valor is None:
+            memoria.pop(campo, None)
+        else:
+            memoria[campo] = valor
+        self._alterados.setdefault(chave, {})[campo] = valor
+        self._salvar()
+
+    def _salvar(self):
+        """
+        Relê o arquivo sob a trava, aplica os campos alterados por este processo e
+        grava o resultado de forma atômica; o cache em memória passa a incluir o
+        que os outros workers gravaram nesse meio-tempo.
+        """
+        with trava_arquivo(f"{self.arquivo_cache}.trava", timeout=10, validade=30):
+            atual = self._ler_arquivo()
+            for chave, campos in self._alterados.items():
+                memoria = atual.setdefault(chave, {})
+                for campo, valor in campos.items():
+                    if valor is None:
+                        memoria.pop(campo, None)
+                    else:
+                        memoria[campo] = valor
+            temporario = f"{self.arquivo_cache}.{os.getpid()}.tmp"
+            with open(temporario, "w", encoding="utf-8") as f:
+                json.dump(atual, f, ensure_ascii=False, indent=2)
+            os.replace(temporario, self.arquivo_cache)
+        self._alterados.clear()
+        self._cache = atual
+
+    def _ausente(self, valor) -> bool:
+        """Se o valor do cache é um registro de ausência ainda válido."""
+        return isinstance(valor, dict) and self.relogio() - valor.get("ausente_em", 0) < self.validade_ausente
+
+    async def _registrar_ausente(self, campo: str):
+        if not self._ausente((await self._carregar()).get(campo)):
+            await self._gravar(campo, {"ausente_em": self.relogio()})
+
+    async def conhecido_ausente(self, campo: str) -> bool:
+        """Indica se o campo foi registrado como ausente neste build há menos de `validade_ausente` segundos."""
+        return self._ausente((await self._carregar()).get(campo))
+
+    async def esquecer(self, campo: str):
+        """Descarta a estratégia memorizada do campo (ex.: ela encontrou o elemento, mas a ação não teve efeito)."""
+        if campo in await self._carregar():
+            logging.info(f"Estratégia memorizada para '{campo}' descartada.")
+            await self._gravar(campo, None)
+
+    async def resolver(self, campo: str, candidatos: list, exigir_habilitado: bool = True, excluir=()):
+        """
+        Retorna o seletor Playwright do primeiro candidato disponível, ou None.
+
+        :param campo: Nome lógico do campo (chave do cache).
+        :param candidatos: Lista de dicionários com `css`, `texto`, `papel`/`nome`.
+        :param exigir_habilitado: Se True, ignora elementos visíveis mas desabilitados.
+        :param excluir: Seletores já tentados sem sucesso, que não concorrem. Com eles, um
+                        campo sem candidato restante não é registrado como ausente.
+        """
+        memoria = await self._carregar()
+        lembrado = memoria.get(campo)
+
+        def disponivel(estado) -> bool:
+            return bool(estado) or (estado is False and not exigir_habilitado)
+
+        if isinstance(lembrado, int) and 0 <= lembrado < len(candidatos) \
+                and seletor_playwright(candidatos[lembrado]) not in excluir:
+            estado = (await self.page.evaluate(JS_AVALIAR_CANDIDATOS, [candidatos[lembrado]]))[0]
+            if disponivel(estado):
+                return seletor_playwright(candidatos[lembrado])
+            logging.info(f"Estratégia memorizada para '{campo}' deixou de funcionar; reaprendendo...")
+
+        indices = [i for i, candidato in enumerate(candidatos) if seletor_playwright(candidato) not in excluir]
+        estados = await self.page.evaluate(JS_AVALIAR_CANDIDATOS, [candidatos[i] for i in indices])
+        vencedor = next((i for i, estado in zip(indices, estados) if disponivel(estado)), None)
+        if vencedor is None:
+            if not excluir:
+                await self._registrar_ausente(campo)
+            return None
+        if memoria.get(campo) != vencedor:
+            await self._gravar(campo, vencedor)
+        logging.info(f"'{campo}' resolvido pela estratégia {vencedor}: {seletor_playwright(candidatos[vencedor])}")
+        return seletor_playwright(candidatos[vencedor])
+
+    async def marcado(self, candidato: dict) -> bool:
+        """Indica se a opção do candidato ficou marcada/selecionada depois de clicada."""
+        return bool(await self.page.evaluate(JS_CANDIDATO_MARCADO, candidato))
+
+    async def registrar(self, campo: str, presente: bool):
+        """Registra o resultado de uma verificação feita por fora do resolvedor."""
+        if not presente:
+            await self._registrar_ausente(campo)
+        elif (await self._carregar()).get(campo) != 0:
+            await self._gravar(campo, 0)
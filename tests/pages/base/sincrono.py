@@ -0,0 +1,147 @@
+"""
+Uso síncrono da camada assíncrona de page objects (scripts como o `test_suite.py`).
+
+Um event loop roda em uma thread própria e cada chamada é executada nele:
+corrotinas são aguardadas, geradores assíncronos viram geradores comuns e
+objetos com métodos assíncronos (page objects, páginas do Playwright) são
+devolvidos também envolvidos.
+
+    with NavegadorSincrono(headless=True) as navegador:
+        bulas = navegador.pagina(BulasPage)
+        bulas.acessar_pagina()
+        bulas.buscar_por_nome("Novalgina")
+        print(bulas.obter_resultados())
+"""
+import asyncio
+import functools
+import inspect
+import threading
+
+class LoopSincrono:
+    """Event loop em uma thread dedicada, acionado a partir de código síncrono."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="loop-sincrono", daemon=True)
+        self.thread.start()
+
+    def executar(self, corrotina):
+        """Executa a corrotina no loop e devolve o resultado (ou levanta a exceção)."""
+        return asyncio.run_coroutine_threadsafe(corrotina, self.loop).result()
+
+    def iterar(self, gerador):
+        """Consome um gerador assíncrono como um gerador comum."""
+        while True:
+            try:
+                yield self.executar(gerador.__anext__())
+            except StopAsyncIteration:
+                return
+
+    def fechar(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+@functools.lru_cache(maxsize=None)
+def _tem_metodos_assincronos(tipo: type) -> bool:
+    return any(inspect.iscoroutinefunction(getattr(tipo, nome, None)) or
+               inspect.isasyncgenfunction(getattr(tipo, nome, None))
+               for nome in dir(tipo) if not nome.startswith("__"))
+
+class Sincrono:
+    """Proxy síncrono de um objeto assíncrono; os métodos rodam no `LoopSincrono`."""
+
+    def __init__(self, alvo, loop: LoopSincrono):
+        self._alvo = alvo
+        self._loop = loop
+
+    @property
+    def assincrono(self):
+        """Objeto assíncrono envolvido."""
+        return self._alvo
+
+    def envolver(self, objeto):
+        """Envolve outro objeto assíncrono no mesmo loop."""
+        return Sincrono(objeto, self._loop)
+
+    def _converter(self, valor):
+        if inspect.isasyncgen(valor):
+            return (self._converter(item) for item in self._loop.iterar(valor))
+        if not isinstance(valor, type) and _tem_metodos_assincronos(type(valor)):
+            return Sincrono(valor, self._loop)
+        return valor
+
+    def __getattr__(self, nome):
+        valor = getattr(self._alvo, nome)
+        if not (inspect.ismethod(valor) or inspect.isfunction(valor)):
+            return self._converter(valor)
+
+        @functools.wraps(valor)
+        def chamar(*args, **kwargs):
+            async def executar():
+                resultado = valor(*args, **kwargs)
+                return await resultado if inspect.isawaitable(resultado) else resultado
+            return self._converter(self._loop.executar(executar()))
+        return chamar
+
+    def __repr__(self):
+        return f"Sincrono({self._alvo!r})"
+
+class NavegadorSincrono:
+    """Playwright assíncrono (o mesmo dos testes) exposto de forma síncrona."""
+
+    def __init__(self, headless=False, **opcoes):
+        """
+        :param headless: Se True, o navegador roda sem interface gráfica.
+        :param opcoes: Demais argumentos de `chromium.launch` (ex.: slow_mo, args).
+        """
+        self.headless = headless
+        self.opcoes = opcoes
+        self.loop = None
+        self.playwright = None
+        self.browser = None
+
+    async def _iniciar(self):
+        from undetected_playwright.async_api import async_playwright
+        self.playwright = await async_playwright().start()
+        self.browser = await self.playwright.chromium.launch(headless=self.headless, **self.opcoes)
+
+    async def _nova_pagina(self):
+        contexto = await self.browser.new_context()
+        return await contexto.new_page()
+
+    async def _encerrar(self):
+        if self.browser:
+            await self.browser.close()
+        if self.playwright:
+            await self.playwright.stop()
+
+    def nova_pagina(self) -> Sincrono:
+        """Página do Playwright em um contexto novo."""
+        return Sincrono(self.loop.executar(self._nova_pagina()), self.loop)
+
+    def pagina(self, classe_pagina, *args, **kwargs) -> Sincrono:
+        """
+        Page object síncrono sobre uma página nova.
+
+        :param classe_pagina: Classe do page object (ex.: `BulasPage`, `BasePage`).
+        :param args: Demais argumentos do construtor (ex.: a URL, para a `BasePage`).
+        """
+        return Sincrono(classe_pagina(self.loop.executar(self._nova_pagina()), *args, **kwargs), self.loop)
+
+    def __enter__(self):
+        self.loop = LoopSincrono()
+        self.loop.executar(self._iniciar())
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            self.loop.executar(self._encerrar())
+        finally:
+            self.loop.fechar()
@@ -1,12 +1,60 @@
+import asyncio
 import logging
-from undetected_playwright.sync_api import Page
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
 from tests.pages.base.base_page import BasePage
+from tests.pages.base.extrator_resultados import ExtratorResultados
+from tests.pages.base.resolvedor_seletores import seletor_playwright
 from tests.interfaces.busca_page_interface import BuscaPageInterface
 
+if TYPE_CHECKING:
+    from undetected_playwright.async_api import Page
+
+# Preenche a empresa direto no modelo do formulário, como faria o "Selecionar" do modal
+JS_INJETAR_EMPRESA = """
+empresa => {
+    if (!window.angular) return false;
+    const raiz = document.querySelector('[ng-app], [data-ng-app]') || document.body;
+    const injector = window.angular.element(raiz).injector();
+    const valores = {'empresa.cnpj': empresa.cnpj, 'empresa.razaoSocial': empresa.razaoSocial};
+    for (const [modelo, valor] of Object.entries(valores)) {
+        const campo = document.querySelector(`[ng-model='${modelo}']`);
+        const controle = campo && window.angular.element(campo).controller('ngModel');
+        if (!controle) return false;
+        controle.$setViewValue(valor);
+        controle.$render();
+    }
+    if (injector) injector.get('$rootScope').$applyAsync();
+    return true;
+}
+"""
+
+@dataclass
+class RegistroBula:
+    """Linha da grade de resultados do bulário."""
+    produto: str
+    empresa: str
+    expediente: str
+    data_publicacao: str
+    bula_paciente: str = None
+    bula_profissional: str = None
+
+    @classmethod
+    def das_celulas(cls, celulas: list):
+        """Monta o registro a partir das células (texto e links) de uma linha da grade."""
+        textos = [c["texto"] for c in celulas] + [""] * 4
+        links = [c["links"][0] if c["links"] else None for c in celulas[4:6]] + [None, None]
+        return cls(textos[0], textos[1], textos[2], textos[3], links[0], links[1])
+
 class BulasPage(BasePage, BuscaPageInterface):
-    def __init__(self, page: Page, browser_service):
+    endpoint_consulta = "**/api/consulta/bulario**"
+    seletor_pronto = "input.btn.btn-primary[type='submit']"
+    seletor_resultados = "table.table tbody tr[ng-repeat]"
+
+    def __init__(self, page: "Page", browser_service=None):
         super().__init__(page, "https://consultas.anvisa.gov.br/#/bulario/")
         self.browser_service = browser_service
+        self.cache_consultas = getattr(browser_service, "cache_consultas", None)
 
         # Campos do formulário
         self.campo_nome_medicamento = "input.form-control[ng-model='filter.nomeProduto']"
@@ -24,150 +72,254 @@ class BulasPage(BasePage, BuscaPageInterface):
         self.botao_pesquisar_modal = "button[ng-click='pesquisarEmpresa()']"
         self.resultado_modal_empresa = "table#resultadoEmpresas tbody tr:first-child"
         self.botao_selecionar_modal = "button[ng-click='selecionarEmpresa()']"
+        self.sugestoes_autocomplete = "select[ng-show='results.length > 0']"
+
+        # Campos de texto da busca combinada (mesmas chaves de `BulasApiClient.PARAMETROS`)
+        self.campos_busca = {
+            "nome": self.campo_nome_medicamento,
+            "numero_registro": self.campo_numero_registro,
+            "numero_expediente": self.campo_numero_expediente,
+            "cnpj": self.campo_empresa_cnpj,
+            "data_inicial": self.campo_data_inicial,
+            "data_final": self.campo_data_final,
+        }
 
-    def esperar_elemento_visivel(self, seletor: str, timeout=10000):
+        # Grade de resultados
+        self.botao_proxima_pagina = "ul.pagination li.pagination-next:not(.disabled) a"
+        self.contador_resultados = "span[ng-bind*='totalElements'], .total-registros"
+        self.extrator = ExtratorResultados(self, self.seletor_resultados, self.botao_proxima_pagina,
+                                           RegistroBula.das_celulas, seletor_total=self.contador_resultados)
+
+    async def esperar_elemento_visivel(self, seletor: str, timeout=10000):
         """Espera que um elemento fique visível antes de interagir."""
         try:
             logging.info(f"Verificando se o elemento {seletor} está visível...")
-            self.page.wait_for_selector(seletor, state="visible", timeout=timeout)
+            await self.page.wait_for_selector(seletor, state="visible", timeout=timeout)
             logging.info(f"Elemento {seletor} encontrado e visível.")
         except Exception as e:
             logging.error(f"Erro ao verificar o campo {seletor}: {e}")
-            self.page.screenshot(path=f"erro_{seletor.replace('[', '').replace(']', '').replace('=', '_')}.png")
+            await self.capturar_erro(f"elemento {seletor} não visível")
             raise
 
-    def realizar_busca(self, campo: str, valor: str):
+    async def realizar_busca(self, campo: str, valor: str):
         """Preenche um campo e executa a busca."""
         logging.info(f"Preenchendo o campo {campo} com o valor '{valor}'...")
         try:
-            self.esperar_elemento_visivel(campo)
-            elemento = self.page.query_selector(campo)
-            if elemento and elemento.is_visible() and elemento.is_enabled():
+            await self.esperar_elemento_visivel(campo)
+            elemento = await self.page.query_selector(campo)
+            if elemento and await elemento.is_visible() and await elemento.is_enabled():
                 logging.info("Elemento encontrado e está visível e habilitado.")
-                self.page.screenshot(path=f"antes_preenchendo_campo_{campo}.png")
-                self.preencher_campo(campo, valor)
-                self.page.screenshot(path=f"depois_preenchendo_campo_{campo}.png")
-                logging.info("Esperando sugestões de autocomplete aparecerem...")
-                self.page.wait_for_selector("select[ng-show='results.length > 0']", timeout=10000)
-                logging.info("Sugestões de autocomplete apareceram.")
+                await self.preencher_campo(campo, valor)
+                if await self.sugestoes_em_cache(campo, valor) is not None:
+                    logging.info("Sugestões de autocomplete já conhecidas (cache); sem esperar o dropdown.")
+                else:
+                    logging.info("Esperando sugestões de autocomplete aparecerem...")
+                    await self.page.wait_for_selector(self.sugestoes_autocomplete, timeout=10000)
+                    logging.info("Sugestões de autocomplete apareceram.")
                 logging.info("Clicando no botão consultar...")
-                self.clicar(self.botao_consultar)
-                logging.info("Esperando o corpo da página ficar visível...")
-                self.esperar_elemento_visivel("body")
+                await self.clicar_e_esperar_consulta(self.botao_consultar)
             else:
                 logging.error(f"Erro: O campo {campo} não está visível ou habilitado.")
                 raise ValueError(f"O campo {campo} não está visível ou habilitado.")
         except Exception as e:
             logging.error(f"Erro ao preencher o campo {campo}: {e}")
-            self.page.screenshot(path=f"erro_preenchendo_campo_{campo}.png")
+            await self.capturar_erro(f"preenchendo o campo {campo}")
             raise
 
-    def buscar_por_nome(self, nome: str):
+    async def buscar_por_nome(self, nome: str):
         logging.info(f"Buscando por nome do medicamento: {nome}")
-        self.realizar_busca(self.campo_nome_medicamento, nome)
+        await self.realizar_busca(self.campo_nome_medicamento, nome)
 
-    def buscar_por_numero_registro(self, numero: str):
+    async def buscar_por_numero_registro(self, numero: str):
         logging.info(f"Buscando por número de registro: {numero}")
-        self.realizar_busca(self.campo_numero_registro, numero)
+        await self.realizar_busca(self.campo_numero_registro, numero)
 
-    def buscar_por_numero_expediente(self, expediente: str):
+    async def buscar_por_numero_expediente(self, expediente: str):
         logging.info(f"Buscando por número de expediente: {expediente}")
-        self.realizar_busca(self.campo_numero_expediente, expediente)
+        await self.realizar_busca(self.campo_numero_expediente, expediente)
 
-    def buscar_por_empresa(self, cnpj: str):
+    async def buscar_por_empresa(self, cnpj: str):
         logging.info(f"Buscando por CNPJ da empresa: {cnpj}")
-        self.realizar_busca(self.campo_empresa_cnpj, cnpj)
+        await self.realizar_busca(self.campo_empresa_cnpj, cnpj)
 
-    def buscar_por_nome_empresa(self, razao_social: str):
-        """Interage com o modal de empresas para buscar por Razão Social."""
+    async def sugestoes_em_cache(self, campo: str, valor: str):
+        """Sugestões de autocomplete do campo para o valor já vistas em um XHR, ou None."""
+        if not self.cache_consultas:
+            return None
+        modelo = await self.page.get_attribute(campo, "ng-model")
+        return self.cache_consultas.sugestoes(modelo.split(".")[-1], valor) if modelo else None
+
+    async def injetar_empresa(self, empresa: dict) -> bool:
+        """
+        Preenche CNPJ e razão social direto no modelo do formulário, sem o modal.
+
+        :param empresa: Dicionário com `cnpj` e `razaoSocial`.
+        :return: False se o modelo não pôde ser alterado (o modal deve ser usado).
+        """
+        if not await self.page.evaluate(JS_INJETAR_EMPRESA, empresa):
+            return False
+        await self.esperar_angular_ocioso()
+        return True
+
+    async def buscar_por_nome_empresa(self, razao_social: str):
+        """
+        Seleciona a empresa pela Razão Social. Se ela já estiver no cache de
+        consultas, é injetada direto no formulário; senão, o modal de empresas
+        é usado (e a resposta dele alimenta o cache).
+        """
         logging.info(f"Buscando por nome da empresa: {razao_social}")
-        self.clicar(self.botao_lupa_empresa)
+        empresa = self.cache_consultas.empresa_por_razao_social(razao_social) if self.cache_consultas else None
+        if empresa and await self.injetar_empresa(empresa):
+            logging.info(f"Empresa '{razao_social}' resolvida pelo cache (CNPJ {empresa['cnpj']}).")
+        else:
+            await self.selecionar_empresa_no_modal(razao_social)
+
+        # Verificação final para garantir que o campo foi preenchido corretamente
+        empresa_selecionada = await self.page.input_value(self.campo_empresa_nome)
+        if not empresa_selecionada or empresa_selecionada != razao_social:
+            logging.error(f"Erro: Nome da empresa '{razao_social}' não foi preenchido corretamente, valor encontrado: '{empresa_selecionada}'")
+            raise ValueError(f"Nome da empresa '{razao_social}' não foi preenchido corretamente.")
+        if self.cache_consultas and not empresa:
+            self.cache_consultas.guardar_empresa(await self.page.input_value(self.campo_empresa_cnpj), razao_social)
+        logging.info(f"Empresa '{razao_social}' selecionada corretamente.")
+
+    async def selecionar_empresa_no_modal(self, razao_social: str):
+        """Interage com o modal de empresas para buscar por Razão Social."""
+        await self.clicar(self.botao_lupa_empresa)
         logging.info("Esperando o campo de razão social do modal ficar visível...")
-        self.esperar_elemento_visivel(self.campo_modal_razao_social, timeout=20000)
+        await self.esperar_elemento_visivel(self.campo_modal_razao_social, timeout=20000)
         logging.info(f"Preenchendo o campo de razão social do modal com: {razao_social}")
-        self.preencher_campo(self.campo_modal_razao_social, razao_social)
+        await self.preencher_campo(self.campo_modal_razao_social, razao_social)
         logging.info("Clicando no botão pesquisar do modal...")
-        self.clicar(self.botao_pesquisar_modal)
+        await self.clicar(self.botao_pesquisar_modal)
         logging.info("Esperando o resultado da pesquisa no modal ficar visível...")
-        self.esperar_elemento_visivel(self.resultado_modal_empresa, timeout=20000)
+        await self.esperar_elemento_visivel(self.resultado_modal_empresa, timeout=20000)
         logging.info("Selecionando o resultado da pesquisa no modal...")
-        self.clicar(self.resultado_modal_empresa)
+        await self.clicar(self.resultado_modal_empresa)
         logging.info("Clicando no botão selecionar do modal...")
-        self.clicar(self.botao_selecionar_modal)
+        await self.clicar(self.botao_selecionar_modal)
         logging.info("Esperando o campo de nome da empresa ficar visível...")
-        self.esperar_elemento_visivel(self.campo_empresa_nome, timeout=20000)
+        await self.esperar_elemento_visivel(self.campo_empresa_nome, timeout=20000)
 
-        # Verificação final para garantir que o campo foi preenchido corretamente
-        empresa_selecionada = self.page.input_value(self.campo_empresa_nome)
-        if not empresa_selecionada or empresa_selecionada != razao_social:
-            logging.error(f"Erro: Nome da empresa '{razao_social}' não foi preenchido corretamente, valor encontrado: '{empresa_selecionada}'")
-            raise ValueError(f"Nome da empresa '{razao_social}' não foi preenchido corretamente.")
-        logging.info(f"Empresa '{razao_social}' selecionada corretamente.")
+    async def abrir_categorias(self):
+        """Abre o dropdown de categorias e espera a lista de opções."""
+        await self.esperar_elemento_visivel(self.dropdown_categoria)
+        await self.clicar(self.dropdown_categoria)
+        await self.esperar_elemento_visivel(self.campo_busca_categoria)
 
-    def buscar_por_categoria(self, categorias: list, busca_textual: bool = False):
-        logging.info(f"Buscando por categorias: {categorias}")
-        self.esperar_elemento_visivel(self.dropdown_categoria)
-        self.clicar(self.dropdown_categoria)
-        self.esperar_elemento_visivel(self.campo_busca_categoria)
-        for categoria in categorias:
+    async def selecionar_categorias(self, categorias: list, busca_textual: bool = False):
+        for categoria in ([categorias] if isinstance(categorias, str) else categorias):
             logging.info(f"Selecionando a categoria: {categoria}")
-            self.selecionar_opcao_generica(self.campo_busca_categoria, categoria, busca_textual)
+            await self.selecionar_opcao_generica(self.campo_busca_categoria, categoria, busca_textual)
+
+    async def buscar_por_categoria(self, categorias: list, busca_textual: bool = False):
+        logging.info(f"Buscando por categorias: {categorias}")
+        await self.abrir_categorias()
+        await self.selecionar_categorias(categorias, busca_textual)
         logging.info("Clicando no botão consultar...")
-        self.clicar(self.botao_consultar)
-        logging.info("Esperando o corpo da página ficar visível...")
-        self.esperar_elemento_visivel("body")
+        await self.clicar_e_esperar_consulta(self.botao_consultar)
 
-    def buscar_por_periodo(self, data_inicial: str, data_final: str):
+    async def buscar_por_periodo(self, data_inicial: str, data_final: str):
         logging.info(f"Buscando por período: {data_inicial} a {data_final}")
-        self.realizar_busca(self.campo_data_inicial, data_inicial)
-        self.realizar_busca(self.campo_data_final, data_final)
+        await self.preencher_campos({self.campo_data_inicial: data_inicial, self.campo_data_final: data_final})
+        logging.info("Clicando no botão consultar...")
+        await self.clicar_e_esperar_consulta(self.botao_consultar)
+
+    async def buscar_por_periodo_e_categoria(self, data_inicial: str, data_final: str, categorias: list,
+                                             busca_textual: bool = False):
+        """
+        Busca combinando período e categorias: as datas são preenchidas
+        enquanto o dropdown de categorias carrega as opções.
+        """
+        logging.info(f"Buscando por período ({data_inicial} a {data_final}) e categorias {categorias}")
+        await asyncio.gather(
+            self.abrir_categorias(),
+            self.preencher_campos({self.campo_data_inicial: data_inicial, self.campo_data_final: data_final}),
+        )
+        await self.selecionar_categorias(categorias, busca_textual)
+        logging.info("Clicando no botão consultar...")
+        await self.clicar_e_esperar_consulta(self.botao_consultar)
+
+    async def buscar(self, **valores):
+        """
+        Busca combinando livremente os campos do formulário; campos vazios não são preenchidos.
 
-    def obter_resultados(self):
-        """Retorna os resultados da busca."""
+        :param valores: Campos de `campos_busca` e, opcionalmente, `categorias` (lista ou texto).
+        """
+        valores = {campo: valor for campo, valor in valores.items() if valor not in (None, "", [])}
+        categorias = valores.pop("categorias", None)
+        desconhecidos = set(valores) - set(self.campos_busca)
+        if desconhecidos:
+            raise ValueError(f"Campos de busca inexistentes no bulário: {sorted(desconhecidos)}")
+        logging.info(f"Buscando pela combinação de campos {valores} e categorias {categorias}")
+        await self.preencher_campos({self.campos_busca[campo]: valor for campo, valor in valores.items()})
+        if categorias:
+            await self.abrir_categorias()
+            await self.selecionar_categorias(categorias)
+        logging.info("Clicando no botão consultar...")
+        await self.clicar_e_esperar_consulta(self.botao_consultar)
+
+    async def obter_resultados(self):
+        """Retorna os registros (`RegistroBula`) exibidos na página atual da grade."""
         logging.info("Obtendo resultados da busca...")
-        return self.page.text_content("body")
+        return await self.extrator.registros_da_pagina()
+
+    def iterar_resultados(self, limite_paginas: int = None):
+        """Gera (assincronamente) os registros de todas as páginas de resultados, uma página por vez."""
+        return self.extrator.iterar(limite_paginas)
 
-    def selecionar_opcao_generica(self, campo_busca: str, valor: str, busca_textual: bool):
+    async def total_resultados(self):
+        """Total de resultados da última busca, sem percorrer a paginação."""
+        return await self.extrator.total()
+
+    async def selecionar_opcao_generica(self, campo_busca: str, valor: str, busca_textual: bool):
         """Método genérico para selecionar opções em dropdowns e autocompletes."""
         logging.info(f"Selecionando opção genérica: {valor}")
         if busca_textual:
-            self.preencher_campo(campo_busca, valor)
-            self.clicar(self.detectar_estrutura_dropdown(valor))
-        else:
-            self.clicar(self.detectar_estrutura_dropdown(valor))
+            await self.preencher_campo(campo_busca, valor)
+        # detectar_estrutura_dropdown já clica na opção; clicar de novo a desmarcaria
+        await self.detectar_estrutura_dropdown(valor)
 
-    def detectar_estrutura_dropdown(self, valor: str) -> str:
+    async def detectar_estrutura_dropdown(self, valor: str) -> str:
         """Detecta dinamicamente a estrutura do dropdown para selecionar a opção correta, garantindo que foi aplicada corretamente."""
         logging.info(f"Detectando estrutura do dropdown para o valor: {valor}")
         # Simular scroll para garantir carregamento de todas as opções
-        self.page.mouse.wheel(0, 1000)
-        self.page.wait_for_timeout(500)  # Pequena pausa para permitir carregamento
-
-        seletores = [
-            f"css=div.option >> text={valor}",
-            f"css=li.option >> text={valor}",
-            f"css=span.option >> text={valor}",
-            f"css=button.option >> text={valor}",
-            f"css=[data-value='{valor}']",
-            f"css=[data-option='{valor}']"
+        await self.page.mouse.wheel(0, 1000)
+        await self.esperar_dom_estavel()  # Aguarda as opções carregadas pelo scroll
+
+        # Estratégias candidatas, avaliadas de uma vez; a vencedora fica memorizada para as próximas opções
+        candidatos = [
+            {"css": "div.option", "texto": valor},
+            {"css": "li.option", "texto": valor},
+            {"css": "span.option", "texto": valor},
+            {"css": "button.option", "texto": valor},
+            {"css": f"[data-value='{valor}']"},
+            {"css": f"[data-option='{valor}']"},
+            {"papel": "option", "nome": valor},
+            {"papel": "checkbox", "nome": valor},
         ]
 
-        for seletor in seletores:
-            elemento = self.page.query_selector(seletor)
-            if elemento and elemento.is_visible() and elemento.is_enabled():
-                logging.info(f"Opção encontrada: {seletor}")
-                self.esperar_elemento_visivel(seletor)
-                elemento.click()
-                self.page.wait_for_timeout(300)  # Pequena pausa para garantir a seleção
-            
-                # Verifica se o dropdown fechou e se a opção foi realmente aplicada
-                if not self.page.is_visible(self.dropdown_categoria) and self.page.input_value(self.dropdown_categoria) == valor:
-                    logging.info(f"Opção '{valor}' selecionada corretamente.")
-                    return seletor
-                else:
-                    logging.warning(f"Possível erro: '{valor}' foi clicado, mas não está marcado como selecionado.")
+        # Uma estratégia que encontra a opção mas não a marca é descartada e as demais concorrem de novo
+        por_seletor = {seletor_playwright(c): c for c in candidatos}
+        tentados = set()
+        while True:
+            seletor = await self.resolvedor.resolver("opcao_categoria", candidatos, excluir=tentados)
+            if not seletor:
+                break
+            logging.info(f"Opção encontrada: {seletor}")
+            await self.page.click(seletor)
+            await self.esperar_angular_ocioso()  # Aguarda o digest aplicar a seleção
+
+            # A opção clicada (ainda que a lista tenha fechado) precisa estar marcada
+            if await self.resolvedor.marcado(por_seletor[seletor]):
+                logging.info(f"Opção '{valor}' selecionada corretamente.")
+                return seletor
+            logging.warning(f"Possível erro: '{valor}' foi clicado com {seletor}, mas não está marcado como selecionado.")
+            await self.resolvedor.esquecer("opcao_categoria")
+            tentados.add(seletor)
+            if not await self.page.is_visible(self.campo_busca_categoria):
+                await self.abrir_categorias()  # A lista fechou com o clique
 
-        # Fallback: tentar uma solução alternativa antes de falhar
-        logging.error(f"Erro: Opção '{valor}' não encontrada no dropdown. Tentativas: {seletores}")
-        self.page.screenshot(path=f"erro_dropdown_{valor}.png")
-        raise ValueError(f"Opção '{valor}' não encontrada no dropdown.")
\ No newline at end of file
+        logging.error(f"Erro: Opção '{valor}' não encontrada ou não marcada no dropdown. Tentativas: {candidatos}")
+        await self.capturar_erro(f"opção '{valor}' no dropdown")
+        raise ValueError(f"Opção '{valor}' não encontrada no dropdown.")
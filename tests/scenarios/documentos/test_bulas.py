@@ -1,101 +1,126 @@
+import asyncio
 import logging
+import os
 import pytest
-from tests.pages.documentos.bulas_page import BulasPage
+import pytest_asyncio
+from datetime import datetime
 from tests.config.test_data import TEST_DATA_BULAS
 from tests.services.browser_service import BrowserService
+from tests.services.resiliencia import CircuitoAberto
+from tests.utils.artefatos import encerrar_trace, registrar_captura, repeticao_do_teste
+from tests.utils.cenarios import CLASSES_BULAS, classes_de_valores, gerar_casos, resultados_sessao
 
 class BulasTestRunner:
-    def __init__(self, browser_type="chromium", headless=False, timeout=30000):
+    def __init__(self, browser_type="chromium", headless=False, timeout=30000, tamanho_pool=None,
+                 pular_circuito_aberto=None):
         """
         Inicializa o serviço do navegador.
 
         :param browser_type: Tipo do navegador ('chromium', 'firefox', 'webkit').
         :param headless: Se True, roda em modo headless (sem interface gráfica).
         :param timeout: Tempo limite para carregamento da página e ações (em milissegundos).
+        :param tamanho_pool: Quantidade de contextos isolados usados em paralelo por este worker.
+        :param pular_circuito_aberto: Se True, testes barrados pelo circuito aberto do bulário são
+                                      pulados em vez de falhar. Se None, usa ANVISA_PULAR_CIRCUITO_ABERTO
+                                      (padrão: '0').
         """
-        self.browser_service = BrowserService(browser_type, headless=headless)
+        self.browser_type = browser_type
+        self.headless = headless
+        self.tamanho_pool = tamanho_pool
         self.timeout = timeout
-
-    async def executar_teste(self, acao):
+        if pular_circuito_aberto is None:
+            pular_circuito_aberto = os.environ.get("ANVISA_PULAR_CIRCUITO_ABERTO", "0") == "1"
+        self.pular_circuito_aberto = pular_circuito_aberto
+        self._browser_service = None
+
+    @property
+    def browser_service(self) -> BrowserService:
+        """Serviço do navegador, criado apenas quando o primeiro teste é executado."""
+        if self._browser_service is None:
+            self._browser_service = BrowserService(self.browser_type, headless=self.headless,
+                                                   tamanho_pool=self.tamanho_pool)
+        return self._browser_service
+
+    async def executar_teste(self, acao, espera_resultados=True):
         """
         Executa um teste usando o Page Object Model (POM).
 
+        O navegador é mantido aberto entre os testes; cada execução recebe uma
+        página de bulas já carregada (aquecida) do `BrowserService`, com o
+        formulário restaurado ao estado inicial, e a devolve ao final. Erros
+        transitórios do portal passam pela camada de resiliência do serviço.
+
         :param acao: Função que recebe a instância de `BulasPage` e executa um teste.
+        :param espera_resultados: Se True, falha quando a grade de resultados vem vazia.
         """
-        page = await self.browser_service.iniciar_navegador()
-        page.set_default_timeout(self.timeout)
-        bulas = BulasPage(page, self.browser_service)
-
-        try:
-            logging.info("Acessando a página de bulas...")
-            await bulas.acessar_pagina()
-            logging.info("Página acessada com sucesso.")
-
-            logging.info("Executando a ação de teste...")
-            await acao(bulas)
-
-            logging.info("Obtendo resultados...")
-            resultado = await bulas.obter_resultados()
-            if not resultado:
-                raise AssertionError("Nenhum resultado encontrado na busca.")
+        async def executar(bulas):
+            logging.info("Página pronta.")
+            # Traces são caros: só são gravados quando o teste está sendo repetido (pytest-rerunfailures)
+            rastrear = repeticao_do_teste()
+            if rastrear:
+                await bulas.page.context.tracing.start(screenshots=True, snapshots=True)
+            falhou = True
+            try:
+                logging.info("Executando a ação de teste...")
+                await acao(bulas)
+
+                logging.info("Obtendo resultados...")
+                resultado = await bulas.obter_resultados()
+                if espera_resultados and not resultado:
+                    raise AssertionError("Nenhum resultado encontrado na busca.")
+                logging.info(f"{len(resultado)} resultados na primeira página.")
+                falhou = False
+            except Exception as e:
+                # A página ainda está aberta: screenshot e DOM vão para o relatório se o teste falhar
+                await bulas.capturar_erro(f"falha do teste: {e}")
+                raise
+            finally:
+                if rastrear:
+                    registrar_captura(await encerrar_trace(bulas.page.context, falhou))
 
             logging.info("Teste finalizado com sucesso.")
 
+        try:
+            logging.info("Obtendo a página de bulas...")
+            # Erros 5xx do portal são repetidos; com o circuito do endpoint aberto, a consulta nem é feita
+            await self.browser_service.executar_consulta("bulas", executar, timeout=self.timeout)
+
+        except CircuitoAberto as e:
+            # O circuito é do endpoint do bulário, comum a todas as buscas: pular esconderia falhas reais
+            if self.pular_circuito_aberto:
+                logging.warning(f"Teste pulado: {e}")
+                pytest.skip(str(e))
+            logging.error(f"Teste barrado pelo circuito aberto: {e}")
+            pytest.fail(f"Consulta não realizada: {e}")
         except Exception as e:
             logging.error(f"Erro durante o teste: {e}")
             pytest.fail(f"Teste falhou com erro: {e}")
 
-        finally:
-            logging.info("Fechando o navegador...")
-            await self.browser_service.fechar_navegador()
+    async def executar_em_paralelo(self, *acoes):
+        """
+        Executa várias ações simultaneamente, cada uma em uma página aquecida própria.
+
+        :param acoes: Funções que recebem a instância de `BulasPage`.
+        """
+        await asyncio.gather(*(self.executar_teste(acao) for acao in acoes))
 
     async def finalizar(self):
-        """Finaliza o navegador após todos os testes."""
-        await self.browser_service.fechar_navegador()
+        """Finaliza o navegador após todos os testes (se algum chegou a iniciá-lo)."""
+        if self._browser_service is not None:
+            await self._browser_service.fechar_navegador()
+            self._browser_service = None
 
-# Instância global do BulasTestRunner para ser usada nos testes
+# Instância global do BulasTestRunner para ser usada nos testes (o BrowserService só é criado no primeiro uso)
+# Os testes compartilham o event loop da sessão, e com ele o navegador e o pool de contextos
 test_runner = BulasTestRunner()
 
-@pytest.mark.asyncio
-async def test_busca_bula_por_medicamento():
-    """Testa a busca por Nome do Medicamento."""
-    async def acao(bulas):
-        logging.info("Buscando por nome do medicamento...")
-        try:
-            await bulas.buscar_por_nome(TEST_DATA_BULAS["nome_medicamento"])
-            logging.info("Busca por nome do medicamento concluída.")
-        except Exception as e:
-            logging.error(f"Erro ao buscar por nome do medicamento: {e}")
-            raise
-    await test_runner.executar_teste(acao)
-
-@pytest.mark.asyncio
-async def test_busca_bula_por_numero_registro():
-    """Testa a busca pelo Número de Registro."""
-    async def acao(bulas):
-        logging.info("Buscando por número de registro...")
-        try:
-            await bulas.buscar_por_numero_registro(TEST_DATA_BULAS["numero_registro"])
-            logging.info("Busca por número de registro concluída.")
-        except Exception as e:
-            logging.error(f"Erro ao buscar por número de registro: {e}")
-            raise
-    await test_runner.executar_teste(acao)
-
-@pytest.mark.asyncio
-async def test_busca_bula_por_empresa():
-    """Testa a busca pelo CNPJ da Empresa."""
-    async def acao(bulas):
-        logging.info("Buscando por CNPJ da empresa...")
-        try:
-            await bulas.buscar_por_empresa(TEST_DATA_BULAS["cnpj_empresa"])
-            logging.info("Busca por CNPJ da empresa concluída.")
-        except Exception as e:
-            logging.error(f"Erro ao buscar por CNPJ da empresa: {e}")
-            raise
-    await test_runner.executar_teste(acao)
+@pytest_asyncio.fixture(scope="module", loop_scope="session", autouse=True)
+async def finalizar_navegador():
+    """Finaliza o navegador após todos os testes do módulo."""
+    yield
+    await test_runner.finalizar()
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="session")
 async def test_busca_bula_por_nome_empresa():
     """Testa a busca pelo Nome da Empresa através do modal e verifica se o campo foi preenchido corretamente."""
     async def acao(bulas):
@@ -105,7 +130,7 @@ async def test_busca_bula_por_nome_empresa():
             logging.info("Busca por nome da empresa concluída.")
             
             # Captura o valor preenchido no campo após a seleção
-            empresa_preenchida = await bulas.page.input_value(bulas.campo_empresa_nome).strip()
+            empresa_preenchida = (await bulas.page.input_value(bulas.campo_empresa_nome)).strip()
             
             # Validação: O nome da empresa preenchido deve ser igual ao esperado
             assert empresa_preenchida == TEST_DATA_BULAS["nome_empresa"], (
@@ -117,176 +142,7 @@ async def test_busca_bula_por_nome_empresa():
             raise
     await test_runner.executar_teste(acao)
 
-@pytest.mark.asyncio
-async def test_busca_bula_por_categoria():
-    """Testa a busca por Categoria Regulatória."""
-    async def acao(bulas):
-        logging.info("Buscando por categoria regulatória...")
-        try:
-            await bulas.buscar_por_categoria(TEST_DATA_BULAS["categoria_regulatoria"])
-            logging.info("Busca por categoria regulatória concluída.")
-        except Exception as e:
-            logging.error(f"Erro ao buscar por categoria regulatória: {e}")
-            raise
-    await test_runner.executar_teste(acao)
-
-@pytest.mark.asyncio
-async def test_busca_bula_por_multiplas_categorias():
-    """Testa a busca por múltiplas categorias regulatórias."""
-    async def acao(bulas):
-        logging.info("Buscando por múltiplas categorias regulatórias...")
-        try:
-            await bulas.buscar_por_categoria(TEST_DATA_BULAS["categorias_regulatorias"])
-            logging.info("Busca por múltiplas categorias regulatórias concluída.")
-        except Exception as e:
-            logging.error(f"Erro ao buscar por múltiplas categorias regulatórias: {e}")
-            raise
-    await test_runner.executar_teste(acao)
-
-@pytest.mark.asyncio
-async def test_busca_bula_por_periodo():
-    """Testa a busca por Período de Publicação."""
-    async def acao(bulas):
-        logging.info("Buscando por período de publicação...")
-        try:
-            await bulas.buscar_por_periodo(TEST_DATA_BULAS["data_inicial"], TEST_DATA_BULAS["data_final"])
-            logging.info("Busca por período de publicação concluída.")
-        except Exception as e:
-            logging.error(f"Erro ao buscar por período de publicação: {e}")
-            raise
-    await test_runner.executar_teste(acao)
-
-@pytest.mark.asyncio
-async def test_busca_bula_por_periodo_data_inicial_vazia():
-    """Testa a busca por Período de Publicação com data inicial vazia."""
-    async def acao(bulas):
-        logging.info("Buscando por período de publicação com data inicial vazia...")
-        try:
-            await bulas.buscar_por_periodo(TEST_DATA_BULAS["data_inicial_vazia"], TEST_DATA_BULAS["data_final"])
-            logging.info("Busca por período de publicação com data inicial vazia concluída.")
-        except Exception as e:
-            logging.error(f"Erro ao buscar por período de publicação com data inicial vazia: {e}")
-            raise
-    await test_runner.executar_teste(acao)
-
-@pytest.mark.asyncio
-async def test_busca_bula_por_periodo_data_final_vazia():
-    """Testa a busca por Período de Publicação com data final vazia."""
-    async def acao(bulas):
-        logging.info("Buscando por período de publicação com data final vazia...")
-        try:
-            await bulas.buscar_por_periodo(TEST_DATA_BULAS["data_inicial"], TEST_DATA_BULAS["data_final_vazia"])
-            logging.info("Busca por período de publicação com data final vazia concluída.")
-        except Exception as e:
-            logging.error(f"Erro ao buscar por período de publicação com data final vazia: {e}")
-            raise
-    await test_runner.executar_teste(acao)
-
-@pytest.mark.asyncio
-async def test_busca_bula_por_numero_expediente():
-    """Testa a busca pelo Número de Expediente."""
-    async def acao(bulas):
-        logging.info("Buscando por número de expediente...")
-        try:
-            await bulas.buscar_por_numero_expediente(TEST_DATA_BULAS["numero_expediente"])
-            logging.info("Busca por número de expediente concluída.")
-        except Exception as e:
-            logging.error(f"Erro ao buscar por número de expediente: {e}")
-            raise
-    await test_runner.executar_teste(acao)
-
-@pytest.mark.asyncio
-async def test_busca_bula_campos_vazios():
-    """Testa a busca com todos os campos vazios."""
-    async def acao(bulas):
-        logging.info("Clicando no botão consultar com campos vazios...")
-        try:
-            await bulas.clicar(bulas.botao_consultar)
-            logging.info("Clique no botão consultar concluído.")
-        except Exception as e:
-            logging.error(f"Erro ao clicar no botão consultar com campos vazios: {e}")
-            raise
-    await test_runner.executar_teste(acao)
-
-@pytest.mark.asyncio
-async def test_busca_bula_dados_invalidos():
-    """Testa a busca com dados inválidos."""
-    async def acao(bulas):
-        logging.info("Buscando por nome do medicamento inválido...")
-        try:
-            await bulas.buscar_por_nome(TEST_DATA_BULAS["nome_medicamento_invalido"])
-            logging.info("Busca por nome do medicamento inválido concluída.")
-        except Exception as e:
-            logging.error(f"Erro ao buscar por nome do medicamento inválido: {e}")
-            raise
-    await test_runner.executar_teste(acao)
-
-@pytest.mark.asyncio
-async def test_busca_bula_numero_registro_invalido():
-    """Testa a busca com Número de Registro inválido."""
-    async def acao(bulas):
-        logging.info("Buscando por número de registro inválido...")
-        try:
-            await bulas.buscar_por_numero_registro(TEST_DATA_BULAS["numero_registro_invalido"])
-            logging.info("Busca por número de registro inválido concluída.")
-        except Exception as e:
-            logging.error(f"Erro ao buscar por número de registro inválido: {e}")
-            raise
-    await test_runner.executar_teste(acao)
-
-@pytest.mark.asyncio
-async def test_busca_bula_cnpj_invalido():
-    """Testa a busca com CNPJ da Empresa inválido."""
-    async def acao(bulas):
-        logging.info("Buscando por CNPJ da empresa inválido...")
-        try:
-            await bulas.buscar_por_empresa(TEST_DATA_BULAS["cnpj_empresa_invalido"])
-            logging.info("Busca por CNPJ da empresa inválido concluída.")
-        except Exception as e:
-            logging.error(f"Erro ao buscar por CNPJ da empresa inválido: {e}")
-            raise
-    await test_runner.executar_teste(acao)
-
-@pytest.mark.asyncio
-async def test_busca_bula_categoria_invalida():
-    """Testa a busca com Categoria Regulatória inválida."""
-    async def acao(bulas):
-        logging.info("Buscando por categoria regulatória inválida...")
-        try:
-            await bulas.buscar_por_categoria(TEST_DATA_BULAS["categoria_invalida"])
-            logging.info("Busca por categoria regulatória inválida concluída.")
-        except Exception as e:
-            logging.error(f"Erro ao buscar por categoria regulatória inválida: {e}")
-            raise
-    await test_runner.executar_teste(acao)
-
-@pytest.mark.asyncio
-async def test_busca_bula_periodo_invalido():
-    """Testa a busca com Período de Publicação inválido."""
-    async def acao(bulas):
-        logging.info("Buscando por período de publicação inválido...")
-        try:
-            await bulas.buscar_por_periodo(TEST_DATA_BULAS["data_inicial_invalida"], TEST_DATA_BULAS["data_final_invalida"])
-            logging.info("Busca por período de publicação inválido concluída.")
-        except Exception as e:
-            logging.error(f"Erro ao buscar por período de publicação inválido: {e}")
-            raise
-    await test_runner.executar_teste(acao)
-
-@pytest.mark.asyncio
-async def test_busca_bula_numero_expediente_invalido():
-    """Testa a busca com Número de Expediente inválido."""
-    async def acao(bulas):
-        logging.info("Buscando por número de expediente inválido...")
-        try:
-            await bulas.buscar_por_numero_expediente(TEST_DATA_BULAS["numero_expediente_invalido"])
-            logging.info("Busca por número de expediente inválido concluída.")
-        except Exception as e:
-            logging.error(f"Erro ao buscar por número de expediente inválido: {e}")
-            raise
-    await test_runner.executar_teste(acao)
-
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="session")
 async def test_busca_bula_nome_empresa_invalido():
     """Testa a busca com Nome da Empresa inválido."""
     async def acao(bulas):
@@ -297,9 +153,38 @@ async def test_busca_bula_nome_empresa_invalido():
         except Exception as e:
             logging.error(f"Erro ao buscar por nome da empresa inválido: {e}")
             raise
-    await test_runner.executar_teste(acao)
-
-@pytest.mark.asyncio
-async def teardown_module(module):
-    """Finaliza o navegador após todos os testes."""
-    await test_runner.finalizar()
\ No newline at end of file
+    await test_runner.executar_teste(acao, espera_resultados=False)
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.parametrize("valores, classes", gerar_casos(classes_de_valores(CLASSES_BULAS, TEST_DATA_BULAS)))
+async def test_busca_bula_combinacoes(valores, classes):
+    """
+    Testa combinações das classes de valor (válido, inválido, vazio) dos campos do formulário.
+
+    Os casos cobrem todos os pares de classes (ANVISA_COMBINACOES_FORCA=3 para trios), inclusive
+    as buscas por um só campo e com todos vazios; consultas equivalentes a uma já executada na
+    sessão reaproveitam os resultados dela.
+    """
+    async def consultar():
+        registros = []
+
+        async def acao(bulas):
+            logging.info(f"Buscando pela combinação {classes}...")
+            await bulas.buscar(**valores)
+            registros.extend(await bulas.obter_resultados())
+
+        await test_runner.executar_teste(acao, espera_resultados=False)
+        return registros
+
+    registros = await resultados_sessao.obter_ou_executar("bulas", valores, consultar)
+    if "invalido" in classes.values():
+        assert not registros, f"Busca com campo inválido retornou {len(registros)} resultados."
+    elif set(classes.values()) != {"vazio"}:
+        # Os valores válidos são todos do mesmo produto: a bula dele atende qualquer combinação
+        assert registros, "Busca só com campos válidos não retornou resultados."
+    for registro in (r for r in registros if r.data_publicacao):
+        publicacao = datetime.strptime(registro.data_publicacao, "%d/%m/%Y")
+        if valores["data_inicial"]:
+            assert publicacao >= datetime.strptime(valores["data_inicial"], "%d/%m/%Y"), registro
+        if valores["data_final"]:
+            assert publicacao <= datetime.strptime(valores["data_final"], "%d/%m/%Y"), registro
@@ -0,0 +1,68 @@
+import pytest
+from tests.config.test_data import TEST_DATA_BULAS
+from tests.services.bulas_api_service import BulasApiClient
+
+@pytest.fixture
+def cliente(servidor_consultas):
+    cliente = BulasApiClient(base_url=servidor_consultas.url)
+    yield cliente
+    cliente.fechar()
+
+def test_api_busca_por_nome(cliente):
+    """Testa a busca por Nome do Medicamento direto na API."""
+    cliente.buscar_por_nome(TEST_DATA_BULAS["nome_medicamento"])
+    resultados = cliente.obter_resultados()
+    assert resultados, "Nenhum resultado encontrado na busca."
+    assert all("NOVALGINA" in linha["nomeProduto"] for linha in resultados)
+
+def test_api_busca_por_numero_registro(cliente):
+    """Testa a busca pelo Número de Registro direto na API."""
+    cliente.buscar_por_numero_registro(TEST_DATA_BULAS["numero_registro"])
+    assert [l["numeroRegistro"] for l in cliente.obter_resultados()] == [TEST_DATA_BULAS["numero_registro"]]
+
+def test_api_busca_por_numero_expediente(cliente):
+    """Testa a busca pelo Número de Expediente direto na API."""
+    cliente.buscar_por_numero_expediente(TEST_DATA_BULAS["numero_expediente"])
+    assert [l["expediente"] for l in cliente.obter_resultados()] == [TEST_DATA_BULAS["numero_expediente"]]
+
+def test_api_busca_por_empresa(cliente):
+    """Testa a busca pelo CNPJ da Empresa direto na API (o CNPJ de teste tem espaço no final)."""
+    cliente.buscar_por_empresa(TEST_DATA_BULAS["cnpj_empresa"])
+    resultados = cliente.obter_resultados()
+    assert resultados
+    assert {l["razaoSocial"] for l in resultados} == {TEST_DATA_BULAS["nome_empresa"]}
+
+def test_api_busca_por_multiplas_categorias(cliente):
+    """Testa a busca por múltiplas categorias regulatórias direto na API."""
+    cliente.buscar_por_categoria(TEST_DATA_BULAS["categorias_regulatorias"])
+    categorias = {l["categoriaRegulatoria"] for l in cliente.obter_resultados()}
+    assert categorias == set(TEST_DATA_BULAS["categorias_regulatorias"])
+
+def test_api_busca_por_periodo(cliente):
+    """Testa a busca por Período de Publicação direto na API."""
+    cliente.buscar_por_periodo(TEST_DATA_BULAS["data_inicial"], TEST_DATA_BULAS["data_final"])
+    assert len(cliente.obter_resultados()) == 4
+
+@pytest.mark.parametrize("campo, metodo", [
+    ("nome_medicamento_invalido", "buscar_por_nome"),
+    ("numero_registro_invalido", "buscar_por_numero_registro"),
+    ("numero_expediente_invalido", "buscar_por_numero_expediente"),
+    ("cnpj_empresa_invalido", "buscar_por_empresa"),
+])
+def test_api_busca_dados_invalidos(cliente, campo, metodo):
+    """Testa que buscas com dados inválidos não retornam linhas."""
+    getattr(cliente, metodo)(TEST_DATA_BULAS[campo])
+    assert cliente.obter_resultados() == []
+
+@pytest.mark.parametrize("params", [{"page": "abc"}, {"page": "0"}, {"count": "-1"}])
+def test_api_recusa_paginacao_invalida(cliente, params):
+    """Paginação inválida é recusada com 400 (e não derruba o servidor com 500)."""
+    resposta = cliente.session.get(cliente.endpoint, params=params, timeout=cliente.timeout)
+    assert resposta.status_code == 400
+    assert "inválido" in resposta.json()["error"]
+
+def test_api_pagina_padrao_sem_paginacao(cliente):
+    """Sem `page` e `count`, a API responde a primeira página de 10 linhas."""
+    resposta = cliente.session.get(cliente.endpoint, timeout=cliente.timeout)
+    assert resposta.status_code == 200
+    assert (resposta.json()["number"], resposta.json()["size"]) == (0, 10)
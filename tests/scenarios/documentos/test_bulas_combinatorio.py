@@ -0,0 +1,94 @@
+import asyncio
+import itertools
+from datetime import datetime
+import pytest
+import requests
+from tests.config.test_data import TEST_DATA_BULAS
+from tests.services.bulas_api_service import BulasApiClient
+from tests.utils.cenarios import (CLASSES_BULAS, CLASSES_VALOR, ResultadosSessao, classes_de_valores, combinacoes,
+                                  gerar_casos, resultados_sessao)
+
+VALORES_BULAS = classes_de_valores(CLASSES_BULAS, TEST_DATA_BULAS)
+
+# Campo da busca -> coluna da linha da API que ele filtra (por trecho do texto)
+COLUNAS_TEXTUAIS = {"nome": "nomeProduto", "numero_registro": "numeroRegistro",
+                    "numero_expediente": "expediente", "cnpj": "cnpj"}
+
+def _data(valor: str):
+    return datetime.strptime(valor, "%d/%m/%Y")
+
+def atende_filtros(linha: dict, valores: dict) -> bool:
+    """Se a linha devolvida pela API respeita cada filtro preenchido da consulta."""
+    for campo, coluna in COLUNAS_TEXTUAIS.items():
+        if valores[campo].strip() and valores[campo].strip().lower() not in linha[coluna].lower():
+            return False
+    if valores["categorias"] and linha["categoriaRegulatoria"] not in valores["categorias"]:
+        return False
+    if valores["data_inicial"] and _data(linha["data"]) < _data(valores["data_inicial"]):
+        return False
+    if valores["data_final"] and _data(linha["data"]) > _data(valores["data_final"]):
+        return False
+    return True
+
+@pytest.fixture
+def cliente(servidor_consultas):
+    cliente = BulasApiClient(base_url=servidor_consultas.url, itens_por_pagina=100)
+    yield cliente
+    cliente.fechar()
+
+def test_combinacoes_cobrem_os_pares_com_poucos_casos():
+    """Todo par de classes aparece em algum caso (inválidos só com válidos e vazios), bem abaixo de 3^7 casos."""
+    dominios = {campo: CLASSES_VALOR for campo in VALORES_BULAS}
+    tamanhos = {}
+    for forca in (2, 3):
+        casos = combinacoes(dominios, forca, negativos=("invalido",))
+        assert casos == combinacoes(dominios, forca, negativos=("invalido",))
+        assert all(list(caso.values()).count("invalido") <= 1 for caso in casos)
+        for grupo in itertools.combinations(dominios, forca):
+            for classes in itertools.product(CLASSES_VALOR, repeat=forca):
+                # Interações só de válidos e vazios precisam de um caso sem nenhum inválido
+                candidatos = [caso for caso in casos if classes.count("invalido") == 1 or "invalido" not in caso.values()]
+                if classes.count("invalido") <= 1:
+                    assert any(all(caso[c] == v for c, v in zip(grupo, classes)) for caso in candidatos), (grupo, classes)
+        tamanhos[forca] = len(casos)
+    assert tamanhos[2] < 25 and tamanhos[3] < 3 ** len(dominios) // 20
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_consultas_equivalentes_reaproveitam_o_resultado():
+    """Caixa, espaços, ordem das categorias e campos vazios não tornam a consulta diferente."""
+    resultados = ResultadosSessao()
+    execucoes = []
+
+    async def consulta():
+        execucoes.append(1)
+        await asyncio.sleep(0.01)
+        return ["NOVALGINA"]
+
+    primeira, simultanea = await asyncio.gather(
+        resultados.obter_ou_executar("bulas", {"nome": "Novalgina", "categorias": ["Novo", "Similar"]}, consulta),
+        resultados.obter_ou_executar("bulas", {"nome": " NOVALGINA", "categorias": ["Similar", "Novo"],
+                                               "data_inicial": ""}, consulta),
+    )
+    assert simultanea is primeira
+    assert await resultados.obter_ou_executar("bulas", {"categorias": "Novo"}, lambda: ["sync"]) == ["sync"]
+    assert await resultados.obter_ou_executar("bulas", {"categorias": ["Novo"]}, consulta) == ["sync"]
+    assert (len(execucoes), resultados.executadas, resultados.reaproveitadas) == (1, 2, 2)
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.parametrize("valores, classes", gerar_casos(VALORES_BULAS))
+async def test_api_combinacoes_de_campos(cliente, valores, classes):
+    """Combinações das classes de valor (pairwise; ANVISA_COMBINACOES_FORCA=3 para trios) direto na API."""
+    async def consultar():
+        try:
+            return cliente.buscar(**valores)["content"]
+        except requests.HTTPError as e:
+            return e.response.status_code
+
+    resultado = await resultados_sessao.obter_ou_executar("bulas_api", valores, consultar)
+    if "invalido" in classes.values():
+        assert resultado == [] or resultado == 400, f"Consulta com campo inválido retornou {resultado!r}"
+    else:
+        assert isinstance(resultado, list), f"Consulta válida recusada com HTTP {resultado}"
+        # Os valores válidos são todos do mesmo produto: a linha dele atende qualquer combinação
+        assert resultado, "Consulta só com campos válidos não retornou linhas."
+        assert all(atende_filtros(linha, valores) for linha in resultado)
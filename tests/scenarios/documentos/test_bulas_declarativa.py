@@ -0,0 +1,37 @@
+import pytest
+from tests.config.test_data import TEST_DATA_BULAS
+from tests.pages.base.pagina_declarativa import carregar_especificacao, criar_pagina
+from tests.services.bulas_api_service import BulasApiClient
+
+# Nome próprio: "BulasPage" (e o cache de seletores com esse nome) é da página escrita à mão
+BulasDeclarativaPage = criar_pagina("bulas", "BulasDeclarativaPage")
+
+BUSCAS = {
+    "buscar_por_nome": (TEST_DATA_BULAS["nome_medicamento"],),
+    "buscar_por_numero_registro": (TEST_DATA_BULAS["numero_registro_produto"],),
+    "buscar_por_numero_expediente": (TEST_DATA_BULAS["numero_expediente"],),
+    "buscar_por_empresa": (TEST_DATA_BULAS["cnpj_empresa"],),
+    "buscar_por_categoria": (TEST_DATA_BULAS["categorias_regulatorias"],),
+    "buscar_por_periodo": (TEST_DATA_BULAS["data_inicial"], TEST_DATA_BULAS["data_final"]),
+}
+
+def test_especificacao_declara_todas_as_buscas_exercitadas():
+    """Toda busca declarada na especificação do bulário é exercitada abaixo."""
+    assert set(carregar_especificacao("bulas").buscas) == set(BUSCAS)
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.parametrize("metodo", list(BUSCAS))
+async def test_pagina_declarativa_do_bulario_no_portal_local(browser_service_local, servidor_consultas, metodo):
+    """Cada busca declarada em configs/paginas/bulas.yaml traz na grade as mesmas linhas que a API."""
+    campos = carregar_especificacao("bulas").buscas[metodo]
+    cliente = BulasApiClient(base_url=servidor_consultas.url, itens_por_pagina=100)
+    try:
+        esperados = [linha["expediente"] for linha in cliente.buscar(**dict(zip(campos, BUSCAS[metodo])))["content"]]
+    finally:
+        cliente.fechar()
+
+    async with browser_service_local.pagina_aquecida(BulasDeclarativaPage) as bulas:
+        await getattr(bulas, metodo)(*BUSCAS[metodo])
+        encontrados = [registro["expediente"] async for registro in bulas.iterar_resultados()]
+    assert esperados, f"{metodo}: a API do portal local não retornou linhas."
+    assert sorted(encontrados) == sorted(esperados)
@@ -0,0 +1,62 @@
+import pytest
+from tests.pages.base.base_page import JS_FORMULARIO_VAZIO
+from tests.pages.documentos.bulas_page import BulasPage
+
+# Campos fora do formulário do bulário, acrescentados ao portal local só para estes testes
+JS_ACRESCENTAR_CAIXAS = """
+() => document.querySelector('#formBulario').insertAdjacentHTML('beforeend',
+    '<div id="caixasTeste"><input type="checkbox" ng-model="filter.somenteVigentes">' +
+    '<input type="radio" name="tipoBula" value="paciente" ng-model="filter.tipoBula"></div>')
+"""
+JS_REMOVER_CAIXAS = "() => document.querySelector('#caixasTeste')?.remove()"
+JS_ACRESCENTAR_DEPOIS = """
+() => setTimeout(() => document.body.insertAdjacentHTML('beforeend', '<input id="campoTardio">'), 300)
+"""
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_inspecionar_elementos_no_portal_local(browser_service_local):
+    """Presença, visibilidade, habilitação e valor vêm de uma só chamada; a espera aguarda campos tardios."""
+    async with browser_service_local.pagina_aquecida(BulasPage) as bulas:
+        await bulas.preencher_campo(bulas.campo_nome_medicamento, "Novalgina")
+        estados = await bulas.inspecionar_elementos({
+            "nome": bulas.campo_nome_medicamento,
+            "consultar": bulas.botao_consultar,
+            "modal": bulas.campo_modal_razao_social,
+            "ausente": "#campoInexistente",
+            "invalido": "input[",
+        })
+        assert (estados["nome"]["presente"], estados["nome"]["visivel"], estados["nome"]["habilitado"]) == \
+            (True, True, True)
+        assert estados["nome"]["valor"] == "Novalgina" and estados["nome"]["caixa"]["width"] > 0
+        assert estados["consultar"]["valor"] == "Consultar"
+        assert estados["modal"]["presente"] and not estados["modal"]["visivel"]
+        assert not estados["ausente"]["presente"] and estados["ausente"]["caixa"] is None
+        assert not estados["invalido"]["presente"] and estados["invalido"]["erro"]
+
+        await bulas.page.evaluate(JS_ACRESCENTAR_DEPOIS)
+        sem_espera = await bulas.inspecionar_elementos({"tardio": "#campoTardio"})
+        assert not sem_espera["tardio"]["presente"]
+        estados = await bulas.inspecionar_elementos({"tardio": "#campoTardio", "ausente": "#campoInexistente"},
+                                                    esperar_prontos=True, ignorar=["ausente"], timeout=5000)
+        assert estados["tardio"]["presente"] and not estados["ausente"]["presente"]
+        await bulas.page.evaluate("() => document.querySelector('#campoTardio').remove()")
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_formulario_vazio_considera_caixas_marcadas(browser_service_local):
+    """Caixas de seleção e botões de opção contam pelo `checked`, não pelo `value` ("on") fixo."""
+    async with browser_service_local.pagina_aquecida(BulasPage) as bulas:
+        await bulas.page.evaluate(JS_ACRESCENTAR_CAIXAS)
+        try:
+            assert await bulas.page.evaluate(JS_FORMULARIO_VAZIO)
+
+            for caixa in ("#caixasTeste input[type=checkbox]", "#caixasTeste input[type=radio]"):
+                await bulas.page.check(caixa)
+                assert not await bulas.page.evaluate(JS_FORMULARIO_VAZIO)
+                assert await bulas.restaurar_estado_inicial() == "modelo"
+                assert not await bulas.page.is_checked(caixa)
+                assert await bulas.page.evaluate(JS_FORMULARIO_VAZIO)
+
+            await bulas.preencher_campo(bulas.campo_numero_registro, "183260003")
+            assert not await bulas.page.evaluate(JS_FORMULARIO_VAZIO)
+        finally:
+            await bulas.page.evaluate(JS_REMOVER_CAIXAS)
@@ -0,0 +1,46 @@
+import asyncio
+import os
+import pytest
+from tests.services.bulas_api_service import BulasApiClient
+from tests.services.pdf_bulas_service import PipelineBulasPdf
+
+@pytest.fixture
+def cliente(servidor_consultas):
+    cliente = BulasApiClient(base_url=servidor_consultas.url)
+    yield cliente
+    cliente.fechar()
+
+def processar(pipeline: PipelineBulasPdf, registros, cliente) -> list:
+    async def coletar():
+        return [documento async for documento in pipeline.processar_resultados(registros, cliente)]
+    return asyncio.run(coletar())
+
+def test_pipeline_baixa_e_extrai_texto_das_bulas(cliente, tmp_path):
+    """Cada linha gera os dois PDFs, gravados pelo hash do conteúdo e com o texto extraído."""
+    registros = list(cliente.iterar_consulta({"nome": "novalgina"}))
+    pipeline = PipelineBulasPdf(str(tmp_path), concorrencia=4, processos=2)
+    try:
+        documentos = processar(pipeline, registros, cliente)
+    finally:
+        pipeline.fechar()
+    assert registros and len(documentos) == 2 * len(registros)
+    for documento in documentos:
+        assert documento.erro is None
+        assert os.path.basename(documento.caminho) == f"{documento.sha256}.pdf"
+        assert f"Bula do {documento.tipo}" in documento.texto
+        assert os.path.exists(os.path.join(tmp_path, f"{documento.sha256}.txt"))
+
+def test_pipeline_reaproveita_pdfs_e_textos_do_disco(cliente, tmp_path):
+    """Numa segunda execução os PDFs já existentes são marcados como duplicados e o texto vem do cache."""
+    registros = list(cliente.iterar_consulta({"nome": "novalgina"}))[:1]
+    pipeline = PipelineBulasPdf(str(tmp_path), extrair=True, processos=1)
+    try:
+        primeira = processar(pipeline, registros, cliente)
+        for documento in primeira:
+            with open(os.path.join(tmp_path, f"{documento.sha256}.txt"), "w", encoding="utf-8") as f:
+                f.write("texto em cache")
+        segunda = processar(pipeline, registros, cliente)
+    finally:
+        pipeline.fechar()
+    assert not any(documento.duplicado for documento in primeira)
+    assert all(documento.duplicado and documento.texto == "texto em cache" for documento in segunda)
@@ -0,0 +1,52 @@
+import json
+import pytest
+import requests
+from tests.mock.servidor_consultas import FalhaInjetada, ServidorConsultas
+from tests.pages.base.base_page import BasePage
+from tests.services.bulas_api_service import BulasApiClient
+from tests.config.test_data import TEST_DATA_BULAS
+
+@pytest.fixture
+def portal():
+    with ServidorConsultas(falhas=[FalhaInjetada(500, parametro="filter[expediente]")]) as servidor:
+        yield servidor
+
+def test_portal_local_serve_o_bulario_com_os_seletores_do_portal(portal):
+    """A página servida em "/" tem os campos usados pela `BulasPage`."""
+    html = requests.get(f"{portal.url}/", timeout=5).text
+    for seletor in ("ng-model=\"filter.nomeProduto\"", "id=\"txtNumeroRegistro\"", "id=\"txtNumeroExpedienteBula\"",
+                    "class=\"anvs-multiselect\"", "ng-click=\"abrirModalEmpresa()\"", "id=\"resultadoEmpresas\""):
+        assert seletor in html
+    assert requests.get(f"{portal.url}/portal/app.js", timeout=5).ok
+    assert requests.get(f"{portal.url}/portal/../dados/bulario.json", timeout=5).status_code == 404
+
+def test_portal_local_injeta_falhas_configuradas(portal):
+    """Buscas por expediente recebem 500; as demais seguem normais até a falha ser removida."""
+    cliente = BulasApiClient(base_url=portal.url)
+    try:
+        with pytest.raises(requests.HTTPError) as erro:
+            cliente.buscar_por_numero_expediente(TEST_DATA_BULAS["numero_expediente"])
+        assert erro.value.response.status_code == 500
+        assert cliente.buscar_por_nome(TEST_DATA_BULAS["nome_medicamento"])["totalElements"] == 2
+
+        configuracao = requests.post(f"{portal.url}/__mock/configuracao", data=json.dumps({"falhas": []}), timeout=5)
+        assert configuracao.json()["falhas"] == []
+        assert cliente.buscar_por_numero_expediente(TEST_DATA_BULAS["numero_expediente"])["totalElements"] == 1
+    finally:
+        cliente.fechar()
+
+def test_portal_local_empresas_e_dados_sinteticos():
+    """O modal de empresas é atendido pelos dados e as linhas sintéticas são determinísticas."""
+    with ServidorConsultas(sinteticas=50, semente=7) as servidor, ServidorConsultas(sinteticas=50, semente=7) as copia:
+        assert servidor.httpd.linhas == copia.httpd.linhas
+        assert len(servidor.httpd.linhas) == 54
+        empresas = requests.get(f"{servidor.url}/api/consulta/empresas",
+                                params={"filter[razaoSocial]": "opella"}, timeout=5).json()["content"]
+    assert empresas == [{"cnpj": "38391432000143", "razaoSocial": TEST_DATA_BULAS["nome_empresa"]}]
+
+def test_url_do_portal_alternavel(monkeypatch):
+    """ANVISA_URL_PORTAL troca a base das páginas; sem ela, o portal real é usado."""
+    monkeypatch.delenv("ANVISA_URL_PORTAL", raising=False)
+    assert BasePage(None, "https://consultas.anvisa.gov.br/#/bulario/").url == "https://consultas.anvisa.gov.br/#/bulario/"
+    monkeypatch.setenv("ANVISA_URL_PORTAL", "http://127.0.0.1:8000/")
+    assert BasePage(None, "https://consultas.anvisa.gov.br/#/bulario/").url == "http://127.0.0.1:8000/#/bulario/"
@@ -0,0 +1,47 @@
+import asyncio
+import json
+import pytest
+from datetime import date
+from tests.services.bulas_api_service import BulasApiClient
+from tests.services.sincronizacao_service import EstadoSincronizacao, FonteBulario, SincronizadorIncremental
+
+@pytest.fixture
+def sincronizador(servidor_consultas, tmp_path):
+    cliente = BulasApiClient(base_url=servidor_consultas.url, itens_por_pagina=2)
+    sincronizador = SincronizadorIncremental(
+        FonteBulario(cliente),
+        estado=EstadoSincronizacao(str(tmp_path / "estado.sqlite")),
+        arquivo_feed=str(tmp_path / "mudancas.jsonl"),
+        diretorio_documentos=str(tmp_path / "documentos"),
+    )
+    yield sincronizador
+    sincronizador.fechar()
+    cliente.fechar()
+
+def test_sincronizacao_inicial_percorre_paginas_e_baixa_bulas(sincronizador, tmp_path):
+    """A primeira sincronização encontra todos os itens da janela (várias páginas) e baixa os PDFs."""
+    mudancas = asyncio.run(sincronizador.sincronizar(date(2025, 1, 1), date(2025, 2, 28)))
+    assert len(mudancas) == 4
+    assert {m["mudanca"] for m in mudancas} == {"novo"}
+    for mudanca in mudancas:
+        assert set(mudanca["documentos"]) == {"paciente", "profissional"}
+        with open(mudanca["documentos"]["paciente"]["caminho"], "rb") as f:
+            assert f.read(5) == b"%PDF-"
+    with open(tmp_path / "mudancas.jsonl", "r", encoding="utf-8") as f:
+        assert [json.loads(linha)["chave"] for linha in f] == [m["chave"] for m in mudancas]
+
+def test_sincronizacao_incremental_so_emite_mudancas(sincronizador, servidor_consultas):
+    """Itens sem alteração não voltam ao feed; um item alterado é emitido como 'alterado'."""
+    asyncio.run(sincronizador.sincronizar(date(2025, 1, 1), date(2025, 2, 28)))
+    assert sincronizador.estado.ultima_data("bulario") == date(2025, 2, 25)
+    assert asyncio.run(sincronizador.sincronizar(fim=date(2025, 2, 28))) == []
+
+    linha = servidor_consultas.httpd.linhas[-1]
+    original = dict(linha)
+    try:
+        linha["categoriaRegulatoria"] = "Genérico"
+        mudancas = asyncio.run(sincronizador.sincronizar(fim=date(2025, 2, 28)))
+    finally:
+        linha.clear()
+        linha.update(original)
+    assert [(m["chave"], m["mudanca"]) for m in mudancas] == [(original["expediente"], "alterado")]
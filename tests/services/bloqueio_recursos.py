@@ -0,0 +1,110 @@
+import json
+import logging
+import os
+from collections import Counter
+from fnmatch import fnmatch
+
+# Tamanhos já observados por URL, usados para estimar os bytes economizados
+ARQUIVO_TAMANHOS = os.path.join("reports", "tamanhos_recursos.json")
+
+# Rastreadores e scripts de terceiros que não participam das consultas
+RASTREADORES = [
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*hotjar.com*",
+    "*facebook.net*",
+    "*barra.sistema.gov.br*",
+    "*vlibras.gov.br*",
+]
+
+class PerfilBloqueio:
+    """
+    Perfil de interceptação que bloqueia recursos desnecessários às consultas
+    (imagens, fontes, mídia, rastreadores e, opcionalmente, CSS).
+
+    A lista de permissões tem precedência sobre a de bloqueio. Requisições não
+    bloqueadas seguem com `route.fallback()`, preservando outros handlers de
+    rota (como o cache de rede).
+    """
+
+    def __init__(self, tipos_bloqueados=("image", "font", "media"), padroes_bloqueados=None,
+                 padroes_permitidos=None, bloquear_css=False, arquivo_tamanhos=ARQUIVO_TAMANHOS):
+        """
+        :param tipos_bloqueados: Tipos de recurso do Playwright a bloquear.
+        :param padroes_bloqueados: Padrões glob de URL a bloquear (padrão: rastreadores conhecidos).
+        :param padroes_permitidos: Padrões glob de URL que nunca são bloqueados.
+        :param bloquear_css: Se True, bloqueia também as folhas de estilo.
+        :param arquivo_tamanhos: JSON com os tamanhos observados por URL.
+        """
+        self.tipos_bloqueados = set(tipos_bloqueados)
+        if bloquear_css:
+            self.tipos_bloqueados.add("stylesheet")
+        self.padroes_bloqueados = list(RASTREADORES if padroes_bloqueados is None else padroes_bloqueados)
+        self.padroes_permitidos = list(padroes_permitidos or [])
+        self.arquivo_tamanhos = arquivo_tamanhos
+        self.tamanhos = self._carregar_tamanhos()
+        self.bloqueados = Counter()
+        self.bytes_economizados = 0
+        self.sem_tamanho_conhecido = 0
+
+    @classmethod
+    def do_ambiente(cls):
+        """
+        Cria o perfil a partir das variáveis de ambiente, ou retorna None se desativado.
+
+        ANVISA_BLOQUEIO_RECURSOS=0 desativa o bloqueio; ANVISA_BLOQUEAR_CSS=1 bloqueia CSS.
+        """
+        if os.environ.get("ANVISA_BLOQUEIO_RECURSOS", "1") == "0":
+            return None
+        return cls(bloquear_css=os.environ.get("ANVISA_BLOQUEAR_CSS", "0") == "1")
+
+    def _carregar_tamanhos(self) -> dict:
+        if os.path.exists(self.arquivo_tamanhos):
+            with open(self.arquivo_tamanhos, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return {}
+
+    def deve_bloquear(self, url: str, tipo: str) -> bool:
+        """Decide se uma requisição deve ser bloqueada."""
+        if any(fnmatch(url, padrao) for padrao in self.padroes_permitidos):
+            return False
+        return tipo in self.tipos_bloqueados or any(fnmatch(url, padrao) for padrao in self.padroes_bloqueados)
+
+    async def interceptar(self, route):
+        """Handler de `context.route`/`page.route` que aplica o perfil."""
+        requisicao = route.request
+        if not self.deve_bloquear(requisicao.url, requisicao.resource_type):
+            await route.fallback()
+            return
+        self.bloqueados[requisicao.resource_type] += 1
+        tamanho = self.tamanhos.get(requisicao.url)
+        if tamanho is None:
+            self.sem_tamanho_conhecido += 1
+        else:
+            self.bytes_economizados += tamanho
+        await route.abort("blockedbyclient")
+
+    def registrar_resposta(self, response):
+        """
+        Handler do evento `response` para contextos sem bloqueio (execuções visuais):
+        aprende o tamanho dos recursos que o perfil bloquearia.
+        """
+        if not self.deve_bloquear(response.url, response.request.resource_type):
+            return
+        tamanho = response.headers.get("content-length")
+        if tamanho and tamanho.isdigit():
+            self.tamanhos[response.url] = int(tamanho)
+
+    def salvar_tamanhos(self):
+        """Persiste os tamanhos aprendidos para as próximas execuções."""
+        os.makedirs(os.path.dirname(self.arquivo_tamanhos) or ".", exist_ok=True)
+        with open(self.arquivo_tamanhos, "w", encoding="utf-8") as f:
+            json.dump(self.tamanhos, f)
+
+    def resumo(self) -> str:
+        """Resumo legível das requisições bloqueadas e dos bytes economizados."""
+        por_tipo = ", ".join(f"{tipo}={qtd}" for tipo, qtd in self.bloqueados.most_common()) or "nenhuma"
+        return (f"Requisições bloqueadas: {sum(self.bloqueados.values())} ({por_tipo}); "
+                f"~{self.bytes_economizados / 1024:.1f} KiB economizados "
+                f"({self.sem_tamanho_conhecido} sem tamanho conhecido)")
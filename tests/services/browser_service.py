@@ -1,38 +1,131 @@
 import os
+import json
+import asyncio
 import logging
-from undetected_playwright.async_api import async_playwright
+from contextlib import asynccontextmanager
+from tests.pages import obter_pagina
+from tests.services.bloqueio_recursos import PerfilBloqueio
+from tests.services.cache_consultas import CacheConsultas
+from tests.services.cache_rede import CacheRede
+from tests.services.perfil_persistente import PerfilPersistente
+from tests.services.resiliencia import CamadaResiliencia, ErroPortal
+from tests.services.servidor_navegador import ServidorNavegador, conectar_navegador, usar_navegador_compartilhado
+from tests.utils.config import url_portal
 
-# Configuração básica de logs
-logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+# Estado de sessão compartilhado de execuções anteriores (ponto de partida dos workers)
+ARQUIVO_SESSAO = "session.json"
+
+def arquivo_sessao(worker: str = None) -> str:
+    """Arquivo de sessão deste processo: um por worker do xdist, para que um não sobrescreva o do outro."""
+    worker = worker or os.environ.get("PYTEST_XDIST_WORKER")
+    return f"session-{worker}.json" if worker else ARQUIVO_SESSAO
 
 class BrowserService:
-    def __init__(self, browser_type='chromium', headless=False, reuse_session=True):
+    MODOS_REDE = ("live", "record", "replay")
+
+    def __init__(self, browser_type='chromium', headless=False, reuse_session=True, tamanho_pool=None,
+                 modo_rede=None, cache_rede=None, bloqueio_recursos=None, visual=False, resiliencia=None,
+                 compartilhado=None, max_contextos=None, cache_consultas=None, perfil_persistente=None):
         """
         Inicializa o serviço do navegador.
 
         :param browser_type: Tipo do navegador ('chromium', 'firefox', 'webkit').
         :param headless: Se True, roda em modo headless (sem interface gráfica).
         :param reuse_session: Se True, reutiliza cookies/sessão para evitar logins repetidos.
+        :param tamanho_pool: Quantidade de contextos isolados mantidos no pool deste worker.
+                             Se None, usa a variável de ambiente ANVISA_POOL_CONTEXTOS (padrão: 4).
+        :param modo_rede: 'live' (acessa o portal), 'record' (acessa e grava o tráfego no cache)
+                          ou 'replay' (serve tudo do cache, sem rede).
+                          Se None, usa a variável de ambiente ANVISA_MODO_REDE (padrão: 'live').
+        :param cache_rede: Instância de `CacheRede`. Se None, usa o cache versionado padrão
+                           (versão definida por ANVISA_VERSAO_CACHE, padrão: 'v1').
+        :param bloqueio_recursos: `PerfilBloqueio` aplicado aos contextos, False para desativar.
+                                  Se None, usa `PerfilBloqueio.do_ambiente()` (ativo por padrão).
+        :param visual: Se True, nenhum contexto bloqueia recursos (execuções com screenshots).
+        :param resiliencia: `CamadaResiliencia` que observa os XHRs da API (retentativas, circuit
+                            breaker por endpoint e limite adaptativo de concorrência).
+                            Se None, usa uma camada com a configuração padrão.
+        :param compartilhado: Se True, conecta-se (via CDP) ao navegador único da máquina em vez
+                              de iniciar um próprio. Se None, usa `usar_navegador_compartilhado()`
+                              (ANVISA_NAVEGADOR_COMPARTILHADO; por padrão, ativo com o xdist).
+        :param max_contextos: Máximo de contextos no navegador compartilhado, somando os workers.
+                              Se None, usa ANVISA_MAX_CONTEXTOS (padrão: 32).
+        :param cache_consultas: `CacheConsultas` alimentado pelos XHRs (empresas e autocomplete),
+                                False para desativar. Se None, usa `CacheConsultas.do_ambiente()`.
+        :param perfil_persistente: `PerfilPersistente` cuja cópia vira o único contexto do pool deste
+                                   worker (cache em disco aquecido), False para desativar. Se None, usa
+                                   `PerfilPersistente.do_ambiente()` (ANVISA_PERFIL_PERSISTENTE=1).
         """
         self.playwright = None
         self.browser_type = browser_type
         self.headless = headless
         self.reuse_session = reuse_session
-        self.storage_state = "session.json"  # Armazena cookies/sessão
+        self.storage_state = arquivo_sessao()  # Armazena cookies/sessão (um arquivo por worker)
         self.browser = None
         self.context = None
         self.page = None
 
+        # Pool de contextos: um navegador por worker, N contextos isolados
+        self.tamanho_pool = tamanho_pool or int(os.environ.get("ANVISA_POOL_CONTEXTOS", "4"))
+        self._pool = None
+        self._contextos_pool = []
+        self._lock_pool = None
+
+        # Gravação/reprodução do tráfego do portal
+        self.modo_rede = modo_rede or os.environ.get("ANVISA_MODO_REDE", "live")
+        if self.modo_rede not in self.MODOS_REDE:
+            raise ValueError(f"Unsupported network mode: {self.modo_rede}")
+        self.cache_rede = cache_rede or CacheRede(versao=os.environ.get("ANVISA_VERSAO_CACHE", "v1"))
+
+        # Bloqueio de imagens, fontes, rastreadores etc. em cenários não visuais
+        if bloqueio_recursos is None:
+            bloqueio_recursos = PerfilBloqueio.do_ambiente()
+        self.bloqueio_recursos = bloqueio_recursos or None
+        self.visual = visual
+        self._contextos_visuais = set()
+
+        # Páginas já navegadas e hidratadas, ociosas, por classe de page object
+        self._paginas_aquecidas = {}
+
+        # Retentativas, circuit breaker e controle de concorrência das consultas
+        self.resiliencia = resiliencia or CamadaResiliencia()
+
+        # Empresas (CNPJ <-> razão social) e sugestões de autocomplete já vistas nos XHRs
+        if cache_consultas is None:
+            cache_consultas = CacheConsultas.do_ambiente()
+        self.cache_consultas = cache_consultas or None
+
+        # Navegador compartilhado pelos workers: cada worker fica com a sua parte dos contextos
+        if compartilhado is None:
+            compartilhado = usar_navegador_compartilhado()
+        self.servidor = None
+        self._reciclar = False
+        if compartilhado and browser_type != 'chromium':
+            logging.warning(f"Navegador compartilhado só é suportado no chromium; {browser_type} será iniciado localmente.")
+        elif compartilhado:
+            self.servidor = ServidorNavegador(headless=headless)
+            max_contextos = max_contextos or int(os.environ.get("ANVISA_MAX_CONTEXTOS", "32"))
+            workers = int(os.environ.get("PYTEST_XDIST_WORKER_COUNT", "1"))
+            self.tamanho_pool = min(self.tamanho_pool, max(1, max_contextos // workers))
+
+        # Perfil com o cache em disco aquecido: um navegador por worker, com uma cópia do modelo
+        if perfil_persistente is None:
+            perfil_persistente = PerfilPersistente.do_ambiente()
+        if perfil_persistente and self.servidor:
+            logging.warning("Perfil persistente não é usado com o navegador compartilhado "
+                            "(contextos via CDP não usam o cache em disco).")
+            perfil_persistente = None
+        self.perfil_persistente = perfil_persistente or None
+        if self.perfil_persistente and self.tamanho_pool > 1:
+            logging.info(f"Perfil persistente: pool reduzido de {self.tamanho_pool} para 1 contexto por worker.")
+            self.tamanho_pool = 1
+
     async def _launch_browser(self):
-        """Inicia o navegador com base no tipo especificado."""
-        launch_options = {
-            "headless": self.headless,
-            "args": [
-                "--disable-blink-features=AutomationControlled",  # Ajuda a evitar detecção de automação
-                "--disable-infobars",
-                "--start-maximized"
-            ]
-        }
+        """Inicia o navegador com base no tipo especificado, ou conecta-se ao compartilhado."""
+        if self.servidor:
+            return await conectar_navegador(self.playwright, self.servidor)
+
+        launch_options = self._opcoes_lancamento()
 
         if self.browser_type == 'chromium':
             return await self.playwright.chromium.launch(**launch_options)
@@ -43,14 +136,24 @@ class BrowserService:
         else:
             raise ValueError(f"Unsupported browser type: {self.browser_type}")
 
-    async def _create_context(self):
-        """Cria um novo contexto de navegação, reutilizando sessão se necessário."""
-        context_options = {
+    def _opcoes_lancamento(self) -> dict:
+        return {
+            "headless": self.headless,
+            "args": [
+                "--disable-blink-features=AutomationControlled",  # Ajuda a evitar detecção de automação
+                "--disable-infobars",
+                "--start-maximized"
+            ]
+        }
+
+    @staticmethod
+    def _opcoes_contexto() -> dict:
+        return {
             "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
                           "(KHTML, like Gecko) Chrome/110.0.0.0 Safari/537.36",
             "extra_http_headers": {
                 "Accept-Language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7",
-                "Referer": "https://consultas.anvisa.gov.br/",
+                "Referer": url_portal("/"),
                 "Sec-Fetch-Mode": "navigate",
                 "Sec-Fetch-Site": "same-origin"
             },
@@ -59,47 +162,352 @@ class BrowserService:
             "java_script_enabled": True
         }
 
-        # Criar arquivo de sessão caso ele não exista
-        if self.reuse_session:
-            if not os.path.exists(self.storage_state):
-                logging.warning(f"Arquivo {self.storage_state} não encontrado. Criando um novo estado de sessão...")
-                with open(self.storage_state, 'w') as f:
-                    f.write("{}")  # Criar um arquivo JSON vazio para evitar erro
+    def _sessao_salva(self):
+        """Sessão a reutilizar: a deste worker ou, na primeira execução dele, a compartilhada."""
+        for caminho in dict.fromkeys((self.storage_state, ARQUIVO_SESSAO)):
+            if os.path.exists(caminho):
+                return caminho
+        return None
+
+    async def _create_context(self):
+        """Cria um novo contexto de navegação, reutilizando sessão se necessário."""
+        context_options = self._opcoes_contexto()
+
+        sessao = self._sessao_salva() if self.reuse_session else None
+        if sessao:
+            logging.info(f"Reutilizando sessão armazenada em {sessao}")
+        elif self.reuse_session:
+            logging.warning(f"Arquivo {self.storage_state} não encontrado. Iniciando um novo estado de sessão...")
+
+        if self.modo_rede == "record":
+            context_options.update(self.cache_rede.opcoes_gravacao())
+
+        if self.perfil_persistente:
+            # Só o contexto padrão de um perfil usa o cache em disco, e um perfil só abre em um processo:
+            # contextos criados com new_context sobre ele seriam anônimos, com o cache em memória e vazio.
+            # Por isso o pool tem um só contexto nesse modo (o navegador do worker). Contextos
+            # persistentes não aceitam storage_state: os cookies são carregados abaixo.
+            tipo = getattr(self.playwright, self.browser_type)
+            copia = await asyncio.to_thread(self.perfil_persistente.nova_copia)
+            context = await tipo.launch_persistent_context(copia, **self._opcoes_lancamento(), **context_options)
+        else:
+            if sessao:
+                context_options["storage_state"] = sessao
+            context = await self.browser.new_context(**context_options)
+
+        if self.modo_rede == "replay":
+            await context.route("**/*", self.cache_rede.responder)
 
-            context_options["storage_state"] = self.storage_state
-            logging.info(f"Reutilizando sessão armazenada em {self.storage_state}")
+        context.on("response", self.resiliencia.observar_resposta)
+        context.on("requestfailed", self.resiliencia.observar_falha)
+        if self.cache_consultas:
+            context.on("response", self.cache_consultas.observar_resposta)
 
-        context = await self.browser.new_context(**context_options)
+        # Registrado depois do cache: recebe as requisições primeiro e repassa as permitidas
+        await self._configurar_bloqueio(context, visual=self.visual)
 
         # Carregar o estado da sessão após a criação do contexto
-        if self.reuse_session and os.path.exists(self.storage_state):
-            await context.add_cookies(self._load_cookies_from_storage())
+        if sessao:
+            await context.add_cookies(self._load_cookies_from_storage(sessao))
 
         return context
 
-    def _load_cookies_from_storage(self):
+    async def _configurar_bloqueio(self, context, visual: bool):
+        """Ativa o perfil de bloqueio no contexto, ou o desativa quando há screenshots."""
+        if not self.bloqueio_recursos:
+            return
+        if visual:
+            await context.unroute("**/*", self.bloqueio_recursos.interceptar)
+            context.on("response", self.bloqueio_recursos.registrar_resposta)
+            self._contextos_visuais.add(context)
+        else:
+            if context in self._contextos_visuais:
+                context.remove_listener("response", self.bloqueio_recursos.registrar_resposta)
+                self._contextos_visuais.discard(context)
+            await context.route("**/*", self.bloqueio_recursos.interceptar)
+
+    def _load_cookies_from_storage(self, caminho=None):
         """Carrega cookies do arquivo de estado de armazenamento."""
-        import json
-        with open(self.storage_state, 'r') as f:
+        with open(caminho or self.storage_state, 'r') as f:
             storage = json.load(f)
         return storage.get('cookies', [])
 
-    async def iniciar_navegador(self):
-        """Retorna a instância da página."""
+    async def _garantir_navegador(self):
+        """Inicia o Playwright e o navegador deste worker, caso ainda não estejam ativos."""
         if not self.playwright:
+            # Importado só aqui: coletar e importar os cenários não deve carregar o Playwright
+            from undetected_playwright.async_api import async_playwright
             self.playwright = await async_playwright().start()
-        if not self.browser:
+        if self.perfil_persistente:
+            # O contexto persistente é o próprio navegador; aqui só se garante o modelo do build atual
+            if not self.perfil_persistente.modelo:
+                await self.perfil_persistente.garantir_modelo(
+                    self.playwright, {**self._opcoes_lancamento(), **self._opcoes_contexto()})
+        elif not self.browser:
             self.browser = await self._launch_browser()
+
+    async def iniciar_navegador(self):
+        """Retorna a instância da página."""
+        await self._garantir_navegador()
         if not self.context:
             self.context = await self._create_context()
         if not self.page:
             self.page = await self.context.new_page()
         return self.page
 
+    async def iniciar_pool(self):
+        """
+        Cria o pool de contextos isolados sobre um único processo de navegador.
+
+        Os contextos são criados em paralelo e ficam disponíveis em uma fila
+        assíncrona para `adquirir_contexto`/`liberar_contexto`.
+        """
+        if self._lock_pool is None:
+            self._lock_pool = asyncio.Lock()
+        async with self._lock_pool:
+            if self._pool is not None:
+                return
+            await self._garantir_navegador()
+            logging.info(f"Criando pool com {self.tamanho_pool} contextos...")
+            contextos = await asyncio.gather(*(self._create_context() for _ in range(self.tamanho_pool)))
+            self._pool = asyncio.Queue()
+            for contexto in contextos:
+                self._contextos_pool.append(contexto)
+                self._pool.put_nowait(contexto)
+            logging.info("Pool de contextos pronto.")
+
+    async def adquirir_contexto(self, visual=False):
+        """
+        Retira um contexto do pool, aguardando caso todos estejam em uso.
+
+        :param visual: Se True, o contexto é entregue sem bloqueio de recursos.
+        """
+        await self._reciclar_se_necessario()
+        if self._pool is None:
+            await self.iniciar_pool()
+        contexto = await self._pool.get()
+        await self._registrar_uso()
+        if visual and not self.visual:
+            await self._configurar_bloqueio(contexto, visual=True)
+        logging.info(f"Contexto adquirido do pool ({self._pool.qsize()} livres).")
+        return contexto
+
+    async def _registrar_uso(self):
+        """Conta um uso (contexto ou página aquecida entregue) no navegador compartilhado."""
+        if self.servidor:
+            self._reciclar = await asyncio.to_thread(self.servidor.registrar_uso) or self._reciclar
+
+    async def _reciclar_se_necessario(self):
+        """Troca o navegador compartilhado, se ele pediu ou caiu, quando nada deste worker está em uso."""
+        if self.servidor and self._pool is not None and self._pool_ocioso() and (
+                self._reciclar or not self.browser.is_connected()):
+            await self._reciclar_navegador()
+
+    def _pool_ocioso(self) -> bool:
+        """Nenhum contexto em uso: todos na fila ou em páginas aquecidas ociosas."""
+        ociosas = sum(len(paginas) for paginas in self._paginas_aquecidas.values())
+        return self._pool.qsize() + ociosas == len(self._contextos_pool)
+
+    async def _reciclar_navegador(self):
+        """
+        Troca a conexão com o navegador compartilhado quando ele atingiu o limite
+        de usos ou deixou de responder; o servidor entrega um processo novo.
+        """
+        logging.info("Reciclando a conexão com o navegador compartilhado...")
+        await self.fechar_pool()
+        try:
+            await self.browser.close()
+        except Exception as e:
+            logging.warning(f"Erro ao desconectar do navegador compartilhado: {e}")
+        await asyncio.to_thread(self.servidor.desconectar)
+        self.browser = self.context = self.page = None
+        self._reciclar = False
+
+    async def liberar_contexto(self, contexto):
+        """
+        Devolve um contexto ao pool, fechando suas páginas e limpando cookies
+        para que o próximo teste receba um contexto isolado.
+        """
+        try:
+            for pagina in list(contexto.pages):
+                await pagina.close()
+            await contexto.clear_cookies()
+            if contexto in self._contextos_visuais and not self.visual:
+                await self._configurar_bloqueio(contexto, visual=False)
+        except Exception as e:
+            # Contexto corrompido: substitui por um novo para não reduzir o pool
+            logging.warning(f"Contexto descartado ao ser liberado: {e}")
+            if contexto in self._contextos_pool:
+                self._contextos_pool.remove(contexto)
+            self._contextos_visuais.discard(contexto)
+            contexto = await self._create_context()
+            self._contextos_pool.append(contexto)
+        self._pool.put_nowait(contexto)
+        logging.info(f"Contexto devolvido ao pool ({self._pool.qsize()} livres).")
+
+    @asynccontextmanager
+    async def contexto_do_pool(self, visual=False):
+        """Context manager assíncrono que adquire e libera um contexto do pool."""
+        contexto = await self.adquirir_contexto(visual=visual)
+        try:
+            yield contexto
+        finally:
+            await self.liberar_contexto(contexto)
+
+    async def adquirir_pagina_aquecida(self, classe_pagina, timeout=30000):
+        """
+        Entrega uma instância de `classe_pagina` já navegada e hidratada.
+
+        Uma página ociosa da mesma classe é reaproveitada depois de
+        `restaurar_estado_inicial()`; só quando não há nenhuma é que um contexto
+        do pool é ocupado e a navegação completa é feita. Cookies e storage são
+        compartilhados entre os testes que reaproveitam a mesma página. Se a
+        navegação ou o reset falham, a página é fechada e o contexto volta ao
+        pool antes de o erro ser propagado.
+
+        :param classe_pagina: Classe do page object (ex.: `BulasPage`) ou nome registrado (ex.: 'bulas').
+        :param timeout: Tempo limite padrão das ações na página (em milissegundos).
+        """
+        if isinstance(classe_pagina, str):
+            classe_pagina = obter_pagina(classe_pagina)
+        await self._reciclar_se_necessario()  # Descarta também as páginas aquecidas do navegador antigo
+        ociosas = self._paginas_aquecidas.setdefault(classe_pagina, [])
+        while ociosas:
+            pagina = ociosas.pop()
+            if pagina.page.is_closed():
+                await self.liberar_contexto(pagina.page.context)
+                continue
+            await self._registrar_uso()
+            try:
+                estrategia = await pagina.restaurar_estado_inicial()
+            except BaseException as e:
+                # Sem o contexto de volta, cada falha encolheria o pool até `adquirir_contexto` travar
+                logging.warning(f"Página aquecida de {classe_pagina.__name__} descartada; reset falhou: {e!r}")
+                await self.liberar_contexto(pagina.page.context)
+                raise
+            logging.info(f"Página aquecida de {classe_pagina.__name__} reaproveitada (reset: {estrategia}).")
+            return pagina
+
+        contexto = await self.adquirir_contexto()
+        try:
+            page = await contexto.new_page()
+            page.set_default_timeout(timeout)
+            pagina = classe_pagina(page, self)
+            logging.info(f"Aquecendo nova página de {classe_pagina.__name__}...")
+            await pagina.acessar_pagina()
+        except BaseException as e:
+            # Fecha a página e devolve o contexto (ou um substituto, se ele estiver corrompido)
+            logging.warning(f"Aquecimento da página de {classe_pagina.__name__} falhou: {e!r}")
+            await self.liberar_contexto(contexto)
+            raise
+        return pagina
+
+    def liberar_pagina_aquecida(self, pagina):
+        """Devolve a página para reaproveitamento pelo próximo teste da mesma classe."""
+        self._paginas_aquecidas.setdefault(type(pagina), []).append(pagina)
+
+    @asynccontextmanager
+    async def pagina_aquecida(self, classe_pagina, timeout=30000):
+        """Context manager assíncrono que adquire e libera uma página aquecida."""
+        pagina = None
+        try:
+            pagina = await self.adquirir_pagina_aquecida(classe_pagina, timeout=timeout)
+            yield pagina
+        finally:
+            if pagina is not None:
+                self.liberar_pagina_aquecida(pagina)
+
+    async def executar_consulta(self, classe_pagina, acao, idempotente=True, timeout=30000):
+        """
+        Executa `acao` em uma página aquecida sob a camada de resiliência: erros
+        5xx na consulta da página provocam nova tentativa (em página restaurada)
+        e contam para o circuito do endpoint.
+
+        :param classe_pagina: Classe do page object (define o endpoint pela `endpoint_consulta`)
+                              ou nome registrado.
+        :param acao: Função assíncrona que recebe a página e retorna o resultado.
+        :param idempotente: Se False, a consulta não é repetida.
+        :raises CircuitoAberto: Se o circuito do endpoint estiver aberto.
+        """
+        if isinstance(classe_pagina, str):
+            classe_pagina = obter_pagina(classe_pagina)
+
+        def verificar_resposta(pagina):
+            resposta = pagina.ultima_resposta_consulta
+            if resposta is not None and resposta.status >= 500:
+                raise ErroPortal(f"HTTP {resposta.status} em {resposta.url}")
+
+        async def tentativa():
+            async with self.pagina_aquecida(classe_pagina, timeout=timeout) as pagina:
+                pagina.ultima_resposta_consulta = None
+                try:
+                    resultado = await acao(pagina)
+                except ErroPortal:
+                    raise
+                except Exception as e:
+                    # A ação costuma falhar em consequência do 5xx (grade vazia, elemento ausente)
+                    try:
+                        verificar_resposta(pagina)
+                    except ErroPortal as erro_portal:
+                        raise erro_portal from e
+                    raise
+                verificar_resposta(pagina)
+                return resultado
+
+        endpoint = classe_pagina.endpoint_consulta or classe_pagina.__name__
+        return await self.resiliencia.executar(endpoint, tentativa, idempotente=idempotente)
+
+    async def executar_em_abas(self, classe_pagina, acoes: list, timeout=30000) -> list:
+        """
+        Executa várias ações ao mesmo tempo, cada uma em uma aba própria de um
+        único contexto do pool (cookies e sessão compartilhados), e devolve os
+        resultados na ordem das ações. As abas são fechadas ao final.
+
+        :param classe_pagina: Classe do page object ou nome registrado.
+        :param acoes: Funções assíncronas que recebem a página e retornam o resultado.
+        :param timeout: Tempo limite padrão das ações nas abas (em milissegundos).
+        """
+        if isinstance(classe_pagina, str):
+            classe_pagina = obter_pagina(classe_pagina)
+
+        async def executar_na_aba(contexto, acao):
+            page = await contexto.new_page()
+            page.set_default_timeout(timeout)
+            try:
+                pagina = classe_pagina(page, self)
+                await pagina.acessar_pagina()
+                return await acao(pagina)
+            finally:
+                await page.close()
+
+        async with self.contexto_do_pool() as contexto:
+            logging.info(f"Executando {len(acoes)} ações em abas de {classe_pagina.__name__}...")
+            return list(await asyncio.gather(*(executar_na_aba(contexto, acao) for acao in acoes)))
+
+    async def fechar_pool(self):
+        """Fecha todos os contextos do pool, mantendo o navegador aberto."""
+        self._paginas_aquecidas = {}
+        for contexto in self._contextos_pool:
+            try:
+                await contexto.close()
+            except Exception as e:
+                logging.error(f"Erro ao fechar contexto do pool: {e}")
+        self._contextos_pool = []
+        self._pool = None
+        logging.info("Pool de contextos fechado.")
+
     async def salvar_sessao(self):
         """Salva o estado atual do navegador para reutilização futura."""
+        contexto = self.context or (self._contextos_pool[0] if self._contextos_pool else None)
+        if not contexto:
+            return
         try:
-            await self.context.storage_state(path=self.storage_state)
+            # Gravação atômica: quem lê o arquivo (outro worker, na primeira execução) nunca o vê pela metade
+            estado = await contexto.storage_state()
+            temporario = f"{self.storage_state}.{os.getpid()}.tmp"
+            with open(temporario, "w", encoding="utf-8") as f:
+                json.dump(estado, f)
+            os.replace(temporario, self.storage_state)
             logging.info(f"Estado da sessão salvo em {self.storage_state}")
         except Exception as e:
             logging.error(f"Erro ao salvar estado da sessão: {e}")
@@ -118,9 +526,17 @@ class BrowserService:
             if self.page:
                 await self.page.close()
                 self.page = None
+            await self.fechar_pool()
+            if self.context:
+                await self.context.close()  # Grava o HAR no modo 'record'
+                self.context = None
             if self.browser:
-                await self.browser.close()
+                await self.browser.close()  # No modo compartilhado, apenas desconecta
                 self.browser = None
+            if self.servidor:
+                await asyncio.to_thread(self.servidor.desconectar)
+            if self.perfil_persistente:
+                self.perfil_persistente.remover_copias()
             logging.info("Navegador fechado.")
         except Exception as e:
             logging.error(f"Erro ao fechar navegador: {e}")
@@ -130,5 +546,10 @@ class BrowserService:
                     await self.playwright.stop()  # Garante que o Playwright seja encerrado corretamente
                     self.playwright = None
                 logging.info("Playwright encerrado.")
+                if self.modo_rede == "replay":
+                    logging.info(f"Cache de rede: {self.cache_rede.acertos} acertos, {self.cache_rede.faltas} faltas.")
+                if self.bloqueio_recursos:
+                    logging.info(self.bloqueio_recursos.resumo())
+                    self.bloqueio_recursos.salvar_tamanhos()
             except Exception as e:
                 logging.error(f"Erro ao encerrar Playwright: {e}")
@@ -0,0 +1,157 @@
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlsplit, urlunsplit
+from tests.utils.config import url_portal
+
+class BulasApiClient:
+    """
+    Cliente que consulta o bulário diretamente na API JSON do portal, sem
+    renderizar a página. Oferece as buscas da `BuscaPageInterface` (mesmos
+    nomes e argumentos), mas síncronas: não é um page object e não herda
+    a interface assíncrona.
+
+    A requisição do backend é capturada uma única vez com o Playwright
+    (`capturar_requisicao`) e depois reproduzida com uma `requests.Session`
+    com pool de conexões. O fluxo pela interface (`BulasPage`) continua
+    disponível para os testes ponta a ponta.
+    """
+
+    # Parâmetros da API, nomeados conforme os ng-model do formulário do bulário
+    PARAMETROS = {
+        "nome": "filter[nomeProduto]",
+        "numero_registro": "filter[numeroRegistro]",
+        "numero_expediente": "filter[expediente]",
+        "cnpj": "filter[cnpj]",
+        "categorias": "filter[categoriasRegulatorias]",
+        "data_inicial": "filter[periodoPublicacaoInicial]",
+        "data_final": "filter[periodoPublicacaoFinal]",
+    }
+
+    # Arquivos PDF das bulas, identificados pelos ids protegidos de cada linha
+    ROTA_PDF_BULA = "/api/consulta/medicamentos/arquivo/bula/parecer/"
+    DOCUMENTOS_BULA = {"paciente": "idBulaPacienteProtegido", "profissional": "idBulaProfissionalProtegido"}
+
+    def __init__(self, base_url=None, itens_por_pagina=10,
+                 tamanho_pool=10, timeout=15):
+        """
+        Inicializa o cliente da API do bulário.
+
+        :param base_url: URL base do portal (ou do servidor local que o substitui); se None, `url_portal()`.
+        :param itens_por_pagina: Quantidade de linhas pedidas por página da API.
+        :param tamanho_pool: Conexões HTTP mantidas abertas para reuso.
+        :param timeout: Tempo limite de cada requisição (em segundos).
+        """
+        self.endpoint = f"{(base_url or url_portal()).rstrip('/')}/api/consulta/bulario"
+        self.itens_por_pagina = itens_por_pagina
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=tamanho_pool, pool_maxsize=tamanho_pool)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # O portal exige este cabeçalho mesmo para consultas anônimas
+        self.session.headers.update({"Authorization": "Guest", "Accept": "application/json"})
+        self.ultima_resposta = None
+        self.ultima_resposta_http = None
+
+    async def capturar_requisicao(self, page, acao=None):
+        """
+        Captura a requisição real do bulário feita pela página e reaproveita
+        endpoint, cabeçalhos e cookies nas buscas seguintes.
+
+        :param page: Página assíncrona do Playwright, já com contexto do portal.
+        :param acao: Corrotina que dispara a busca na página. Se None, acessa o
+                     bulário e clica em "Consultar" com os campos vazios.
+        """
+        logging.info("Capturando a requisição do bulário via Playwright...")
+        async with page.expect_request(lambda r: "/api/consulta/bulario" in r.url) as info:
+            if acao:
+                await acao(page)
+            else:
+                await page.goto(self.endpoint.split("/api/")[0] + "/#/bulario/")
+                await page.click("input.btn.btn-primary[type='submit']")
+        requisicao = await info.value
+
+        url = urlsplit(requisicao.url)
+        self.endpoint = urlunsplit((url.scheme, url.netloc, url.path, "", ""))
+        cabecalhos = await requisicao.all_headers()
+        for nome in ("authorization", "user-agent", "accept-language", "referer"):
+            if nome in cabecalhos:
+                self.session.headers[nome.title()] = cabecalhos[nome]
+        for cookie in await page.context.cookies():
+            self.session.cookies.set(cookie["name"], cookie["value"], domain=cookie["domain"])
+        logging.info(f"Requisição capturada: {self.endpoint}")
+
+    def consultar(self, filtros: dict, pagina: int = 1):
+        """
+        Executa uma consulta na API e devolve a página de resultados em JSON.
+
+        :param filtros: Dicionário com as chaves de `PARAMETROS` e seus valores.
+        :param pagina: Número da página de resultados (começando em 1).
+        """
+        params = {"count": self.itens_por_pagina, "page": pagina}
+        for chave, valor in filtros.items():
+            if valor in (None, "", []):
+                continue
+            params[self.PARAMETROS[chave]] = valor
+        logging.info(f"Consultando API do bulário com {params}")
+        resposta = self.session.get(self.endpoint, params=params, timeout=self.timeout)
+        resposta.raise_for_status()
+        self.ultima_resposta_http = resposta
+        self.ultima_resposta = resposta.json()
+        return self.ultima_resposta
+
+    def iterar_consulta(self, filtros: dict):
+        """Gera as linhas de todas as páginas de uma consulta, seguindo a paginação da API."""
+        pagina = 1
+        while True:
+            resposta = self.consultar(filtros, pagina)
+            yield from resposta.get("content", [])
+            if resposta.get("last", True) or pagina >= resposta.get("totalPages", 1):
+                return
+            pagina += 1
+
+    def documentos_bula(self, linha: dict) -> dict:
+        """URLs dos PDFs (bula do paciente e do profissional) de uma linha de resultado."""
+        base = self.endpoint.split("/api/")[0]
+        return {
+            tipo: f"{base}{self.ROTA_PDF_BULA}{linha[campo]}/?Authorization=Guest"
+            for tipo, campo in self.DOCUMENTOS_BULA.items() if linha.get(campo)
+        }
+
+    def buscar_por_nome(self, nome: str):
+        return self.consultar({"nome": nome.strip()})
+
+    def buscar_por_numero_registro(self, numero: str):
+        return self.consultar({"numero_registro": numero.strip()})
+
+    def buscar_por_numero_expediente(self, expediente: str):
+        return self.consultar({"numero_expediente": expediente.strip()})
+
+    def buscar_por_empresa(self, cnpj: str):
+        return self.consultar({"cnpj": cnpj.strip()})
+
+    def buscar_por_categoria(self, categorias: list, busca_textual: bool = False):
+        if isinstance(categorias, str):
+            categorias = [categorias]
+        return self.consultar({"categorias": list(categorias)})
+
+    def buscar_por_periodo(self, data_inicial: str, data_final: str):
+        return self.consultar({"data_inicial": data_inicial, "data_final": data_final})
+
+    def buscar(self, **valores):
+        """Busca combinando livremente os filtros de `PARAMETROS`; textos são enviados sem espaços nas pontas."""
+        if isinstance(valores.get("categorias"), str):
+            valores["categorias"] = [valores["categorias"]] if valores["categorias"] else []
+        return self.consultar({chave: valor.strip() if isinstance(valor, str) else valor
+                               for chave, valor in valores.items()})
+
+    def obter_resultados(self):
+        """Retorna as linhas estruturadas da última busca."""
+        if not self.ultima_resposta:
+            return []
+        return self.ultima_resposta.get("content", [])
+
+    def fechar(self):
+        """Fecha as conexões mantidas pela sessão HTTP."""
+        self.session.close()
@@ -0,0 +1,158 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from urllib.parse import parse_qs, urlsplit
+
+# Cache compartilhado pelos workers do xdist (o SQLite serializa as gravações)
+ARQUIVO_CACHE_CONSULTAS = os.path.join("reports", "cache_consultas.sqlite")
+
+def normalizar_cnpj(cnpj: str) -> str:
+    return re.sub(r"\D", "", cnpj or "")
+
+def normalizar_razao_social(razao_social: str) -> str:
+    return " ".join((razao_social or "").split()).casefold()
+
+class CacheConsultas:
+    """
+    Cache das consultas auxiliares do bulário: resolução CNPJ <-> razão social
+    e sugestões de autocomplete.
+
+    É alimentado pelos XHRs da API observados nos contextos do `BrowserService`
+    (modal de empresas, autocomplete e a própria grade, que traz CNPJ e razão
+    social de cada linha). Cada entrada vale por `ttl` segundos; acima de
+    `capacidade` entradas, as usadas há mais tempo são descartadas (LRU).
+    """
+
+    EMPRESA_CNPJ = "empresa_cnpj"
+    EMPRESA_RAZAO_SOCIAL = "empresa_razao_social"
+    SUGESTOES = "sugestoes"
+
+    def __init__(self, caminho: str = ARQUIVO_CACHE_CONSULTAS, ttl: float = None, capacidade: int = None):
+        """
+        :param caminho: Arquivo SQLite do cache.
+        :param ttl: Validade das entradas (em segundos).
+                    Se None, usa ANVISA_CACHE_CONSULTAS_TTL (padrão: 7 dias).
+        :param capacidade: Máximo de entradas mantidas.
+                           Se None, usa ANVISA_CACHE_CONSULTAS_MAX (padrão: 5000).
+        """
+        self.caminho = caminho
+        self.ttl = ttl if ttl is not None else float(os.environ.get("ANVISA_CACHE_CONSULTAS_TTL", str(7 * 24 * 3600)))
+        self.capacidade = capacidade or int(os.environ.get("ANVISA_CACHE_CONSULTAS_MAX", "5000"))
+        self.acertos = 0
+        self.faltas = 0
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        self.conexao = sqlite3.connect(caminho, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute("""
+            CREATE TABLE IF NOT EXISTS consultas (
+                tipo TEXT NOT NULL,
+                chave TEXT NOT NULL,
+                valor TEXT NOT NULL,
+                expira_em REAL NOT NULL,
+                ultimo_acesso REAL NOT NULL,
+                PRIMARY KEY (tipo, chave)
+            )
+        """)
+
+    @classmethod
+    def do_ambiente(cls):
+        """Cria o cache a partir das variáveis de ambiente, ou retorna None se ANVISA_CACHE_CONSULTAS=0."""
+        if os.environ.get("ANVISA_CACHE_CONSULTAS", "1") == "0":
+            return None
+        return cls()
+
+    def obter(self, tipo: str, chave: str):
+        """Retorna o valor guardado e ainda válido, ou None."""
+        agora = time.time()
+        linha = self.conexao.execute("SELECT valor, expira_em FROM consultas WHERE tipo = ? AND chave = ?",
+                                     (tipo, chave)).fetchone()
+        if linha and linha[1] > agora:
+            self.conexao.execute("UPDATE consultas SET ultimo_acesso = ? WHERE tipo = ? AND chave = ?",
+                                 (agora, tipo, chave))
+            self.acertos += 1
+            return json.loads(linha[0])
+        if linha:
+            self.conexao.execute("DELETE FROM consultas WHERE tipo = ? AND chave = ?", (tipo, chave))
+        self.faltas += 1
+        return None
+
+    def guardar(self, tipo: str, chave: str, valor):
+        """Guarda o valor (renovando a validade) e descarta expirados e excedentes."""
+        agora = time.time()
+        with self.conexao:
+            self.conexao.execute(
+                "INSERT OR REPLACE INTO consultas (tipo, chave, valor, expira_em, ultimo_acesso) VALUES (?, ?, ?, ?, ?)",
+                (tipo, chave, json.dumps(valor, ensure_ascii=False), agora + self.ttl, agora),
+            )
+            self.conexao.execute("DELETE FROM consultas WHERE expira_em <= ?", (agora,))
+            self.conexao.execute("""
+                DELETE FROM consultas WHERE rowid IN (
+                    SELECT rowid FROM consultas ORDER BY ultimo_acesso
+                    LIMIT max((SELECT COUNT(*) FROM consultas) - ?, 0)
+                )
+            """, (self.capacidade,))
+
+    def guardar_empresa(self, cnpj: str, razao_social: str):
+        """Registra a empresa nos dois sentidos (CNPJ -> razão social e razão social -> CNPJ)."""
+        cnpj = normalizar_cnpj(cnpj)
+        if not cnpj or not razao_social:
+            return
+        empresa = {"cnpj": cnpj, "razaoSocial": razao_social.strip()}
+        self.guardar(self.EMPRESA_CNPJ, cnpj, empresa)
+        self.guardar(self.EMPRESA_RAZAO_SOCIAL, normalizar_razao_social(razao_social), empresa)
+
+    def empresa_por_cnpj(self, cnpj: str):
+        """Empresa ({'cnpj', 'razaoSocial'}) com o CNPJ informado, ou None."""
+        return self.obter(self.EMPRESA_CNPJ, normalizar_cnpj(cnpj))
+
+    def empresa_por_razao_social(self, razao_social: str):
+        """Empresa ({'cnpj', 'razaoSocial'}) com a razão social informada, ou None."""
+        return self.obter(self.EMPRESA_RAZAO_SOCIAL, normalizar_razao_social(razao_social))
+
+    def guardar_sugestoes(self, campo: str, termo: str, sugestoes: list):
+        self.guardar(self.SUGESTOES, f"{campo}|{termo.strip().casefold()}", list(sugestoes))
+
+    def sugestoes(self, campo: str, termo: str):
+        """Sugestões de autocomplete do campo (nome do ng-model) para o termo, ou None."""
+        return self.obter(self.SUGESTOES, f"{campo}|{termo.strip().casefold()}")
+
+    def registrar_resposta(self, url: str, corpo):
+        """
+        Extrai do corpo JSON de uma resposta da API o que interessa ao cache:
+        sugestões de autocomplete e pares CNPJ/razão social de qualquer listagem.
+        """
+        partes = urlsplit(url)
+        if partes.path.rstrip("/").endswith("/sugestoes") and isinstance(corpo, list):
+            params = parse_qs(partes.query)
+            campo, termo = params.get("campo", [""])[0], params.get("termo", [""])[0]
+            if campo and termo:
+                self.guardar_sugestoes(campo, termo, corpo)
+            return
+        linhas = corpo.get("content") if isinstance(corpo, dict) else corpo
+        if not isinstance(linhas, list):
+            return
+        for linha in linhas:
+            if isinstance(linha, dict) and linha.get("cnpj") and linha.get("razaoSocial"):
+                self.guardar_empresa(linha["cnpj"], linha["razaoSocial"])
+
+    async def observar_resposta(self, response):
+        """Listener de 'response' dos contextos: alimenta o cache com os XHRs da API."""
+        if response.request.resource_type not in ("xhr", "fetch") or "/api/" not in response.url:
+            return
+        if response.status != 200 or "json" not in (response.headers.get("content-type") or ""):
+            return
+        try:
+            corpo = await response.json()
+        except Exception as e:
+            logging.debug(f"Resposta ignorada pelo cache de consultas ({response.url}): {e}")
+            return
+        self.registrar_resposta(response.url, corpo)
+
+    def resumo(self) -> str:
+        return f"{self.acertos} acertos e {self.faltas} faltas no cache de consultas ({self.caminho})"
+
+    def fechar(self):
+        self.conexao.close()
@@ -0,0 +1,101 @@
+import base64
+import glob
+import json
+import logging
+import os
+import uuid
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+# Diretório padrão do cache versionado de respostas do portal
+DIRETORIO_CACHE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "mock", "cache_rede")
+
+# Parâmetros que mudam a cada requisição e não identificam a consulta
+PARAMETROS_VOLATEIS = {"_", "timestamp", "nocache"}
+
+class CacheRede:
+    """
+    Cache de rede versionado baseado em arquivos HAR.
+
+    No modo de gravação, cada contexto grava um HAR com o conteúdo embutido
+    (assets e respostas da API). No modo de reprodução, os HARs da versão são
+    indexados por método, host, caminho e parâmetros de consulta ordenados, e
+    servidos através de `context.route`, sem acesso à rede.
+    """
+
+    def __init__(self, diretorio=DIRETORIO_CACHE, versao="v1", permitir_rede=False):
+        """
+        :param diretorio: Diretório raiz do cache.
+        :param versao: Subdiretório da versão do cache (troque ao mudar o portal).
+        :param permitir_rede: No modo de reprodução, deixa passar para a rede
+                              as requisições que não estão no cache.
+        """
+        self.diretorio = os.path.join(diretorio, versao)
+        self.permitir_rede = permitir_rede
+        self._indice = None
+        self.acertos = 0
+        self.faltas = 0
+
+    @staticmethod
+    def chave(metodo: str, url: str, corpo: str = None) -> str:
+        """Monta a chave de busca de uma requisição, independente da ordem dos parâmetros."""
+        partes = urlsplit(url)
+        params = sorted((k, v) for k, v in parse_qsl(partes.query, keep_blank_values=True)
+                        if k not in PARAMETROS_VOLATEIS)
+        chave = f"{metodo.upper()} {partes.netloc}{partes.path}?{urlencode(params)}"
+        if corpo:
+            chave += f" {corpo}"
+        return chave
+
+    def opcoes_gravacao(self) -> dict:
+        """Opções de `browser.new_context` para gravar um novo HAR nesta versão."""
+        os.makedirs(self.diretorio, exist_ok=True)
+        caminho = os.path.join(self.diretorio, f"consultas-{uuid.uuid4().hex[:8]}.har")
+        logging.info(f"Gravando tráfego do portal em {caminho}")
+        return {
+            "record_har_path": caminho,
+            "record_har_content": "embed",
+            "record_har_mode": "full",
+        }
+
+    def carregar(self):
+        """Indexa as respostas de todos os HARs da versão (o mais recente prevalece)."""
+        self._indice = {}
+        arquivos = sorted(glob.glob(os.path.join(self.diretorio, "*.har")), key=os.path.getmtime)
+        for arquivo in arquivos:
+            with open(arquivo, "r", encoding="utf-8") as f:
+                har = json.load(f)
+            for entrada in har.get("log", {}).get("entries", []):
+                requisicao, resposta = entrada["request"], entrada["response"]
+                if resposta.get("status", 0) <= 0:
+                    continue
+                corpo = (requisicao.get("postData") or {}).get("text")
+                self._indice[self.chave(requisicao["method"], requisicao["url"], corpo)] = resposta
+        logging.info(f"Cache de rede carregado: {len(self._indice)} respostas de {len(arquivos)} HAR(s).")
+        return self
+
+    def buscar(self, metodo: str, url: str, corpo: str = None):
+        """Retorna a resposta gravada no formato HAR, ou None."""
+        if self._indice is None:
+            self.carregar()
+        return self._indice.get(self.chave(metodo, url, corpo))
+
+    async def responder(self, route):
+        """Handler de `context.route` que serve as respostas gravadas."""
+        requisicao = route.request
+        resposta = self.buscar(requisicao.method, requisicao.url, requisicao.post_data)
+        if resposta is None:
+            self.faltas += 1
+            if self.permitir_rede:
+                await route.continue_()
+            else:
+                logging.warning(f"Sem resposta gravada para {requisicao.method} {requisicao.url}")
+                await route.abort("internetdisconnected")
+            return
+
+        self.acertos += 1
+        conteudo = resposta.get("content", {})
+        texto = conteudo.get("text", "")
+        corpo = base64.b64decode(texto) if conteudo.get("encoding") == "base64" else texto.encode("utf-8")
+        cabecalhos = {h["name"]: h["value"] for h in resposta.get("headers", [])
+                      if h["name"].lower() not in ("content-length", "content-encoding", "transfer-encoding")}
+        await route.fulfill(status=resposta["status"], headers=cabecalhos, body=corpo)
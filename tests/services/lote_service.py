@@ -0,0 +1,299 @@
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+from dataclasses import asdict
+from tests.pages.documentos.bulas_page import BulasPage
+from tests.services.browser_service import BrowserService
+from tests.services.resiliencia import CircuitoAberto
+
+# Tipo de consulta -> método de busca do BulasPage
+METODOS_BUSCA = {
+    "nome": "buscar_por_nome",
+    "numero_registro": "buscar_por_numero_registro",
+    "numero_expediente": "buscar_por_numero_expediente",
+    "cnpj": "buscar_por_empresa",
+    "nome_empresa": "buscar_por_nome_empresa",
+}
+
+# Tipos cujo método só seleciona o valor no formulário: a consulta é disparada em seguida
+SELECAO_SEM_CONSULTA = {"nome_empresa"}
+
+def ler_consultas(caminho: str):
+    """
+    Lê as consultas de um arquivo CSV ou JSONL sem carregá-lo inteiro na memória.
+
+    Cada linha deve ter as colunas/chaves `tipo` e `valor` e, opcionalmente, `id`
+    (por padrão, o número da linha).
+    """
+    with open(caminho, "r", encoding="utf-8", newline="") as f:
+        if caminho.endswith(".csv"):
+            linhas = csv.DictReader(f)
+        else:
+            linhas = (json.loads(linha) for linha in f if linha.strip())
+        for numero, linha in enumerate(linhas, start=1):
+            if linha.get("tipo") not in METODOS_BUSCA:
+                raise ValueError(f"Linha {numero}: tipo de consulta inválido '{linha.get('tipo')}'.")
+            yield {"id": str(linha.get("id") or numero), "tipo": linha["tipo"], "valor": str(linha["valor"])}
+
+class SaidaJsonl:
+    """
+    Grava os resultados em JSONL, uma linha por consulta, à medida que chegam.
+
+    Cada linha vai para o disco na hora: `escrever` devolve o próprio registro,
+    que já pode entrar no checkpoint.
+    """
+
+    def __init__(self, caminho: str):
+        self.arquivo = open(caminho, "a", encoding="utf-8")
+
+    @staticmethod
+    def compactar(caminho: str, concluidas: set) -> int:
+        """
+        Remove da saída de execuções anteriores as linhas fora do checkpoint
+        (consultas com erro ou interrompidas), que serão refeitas.
+
+        :return: Quantidade de linhas removidas.
+        """
+        if not os.path.exists(caminho):
+            return 0
+        removidas = 0
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        with open(caminho, "r", encoding="utf-8") as origem, open(temporario, "w", encoding="utf-8") as destino:
+            for linha in origem:
+                if not linha.strip():
+                    continue
+                if json.loads(linha).get("id") in concluidas:
+                    destino.write(linha)
+                else:
+                    removidas += 1
+        os.replace(temporario, caminho)
+        return removidas
+
+    def escrever(self, registro: dict) -> list:
+        self.arquivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        self.arquivo.flush()
+        return [registro]
+
+    def fechar(self) -> list:
+        self.arquivo.close()
+        return []
+
+class SaidaParquet:
+    """
+    Grava os resultados em Parquet, em grupos de linhas (requer `pyarrow`).
+
+    A saída é um diretório (lido como um único dataset por `pyarrow.parquet.read_table`)
+    com um arquivo por grupo: um Parquet só é legível depois de fechado, então cada
+    grupo é gravado inteiro em um arquivo temporário e renomeado. `escrever` só
+    devolve os registros quando o grupo deles está no disco.
+    """
+
+    def __init__(self, caminho: str, tamanho_grupo: int = 500):
+        self.pa, self.pq = self._importar()
+        os.makedirs(caminho, exist_ok=True)
+        self.caminho = caminho
+        self.tamanho_grupo = tamanho_grupo
+        self.pendentes = []
+        self._parte = len(self._partes(caminho))
+
+    @staticmethod
+    def _importar():
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise RuntimeError("A saída em Parquet requer o pacote 'pyarrow'.") from e
+        return pyarrow, pyarrow.parquet
+
+    @staticmethod
+    def _partes(caminho: str) -> list:
+        if not os.path.isdir(caminho):
+            return []
+        return sorted(os.path.join(caminho, nome) for nome in os.listdir(caminho)
+                      if nome.startswith("parte-") and nome.endswith(".parquet"))
+
+    @classmethod
+    def compactar(cls, caminho: str, concluidas: set) -> int:
+        """Remove dos grupos de execuções anteriores as linhas fora do checkpoint."""
+        partes = cls._partes(caminho)
+        if not partes:
+            return 0
+        pa, pq = cls._importar()
+        removidas = 0
+        for parte in partes:
+            linhas = pq.read_table(parte).to_pylist()
+            mantidas = [linha for linha in linhas if linha["id"] in concluidas]
+            removidas += len(linhas) - len(mantidas)
+            if not mantidas:
+                os.remove(parte)
+            elif len(mantidas) != len(linhas):
+                pq.write_table(pa.Table.from_pylist(mantidas), f"{parte}.tmp")
+                os.replace(f"{parte}.tmp", parte)
+        return removidas
+
+    def escrever(self, registro: dict) -> list:
+        self.pendentes.append(registro)
+        if len(self.pendentes) >= self.tamanho_grupo:
+            return self._descarregar()
+        return []
+
+    def _descarregar(self) -> list:
+        if not self.pendentes:
+            return []
+        # Os registros de bula variam em quantidade; ficam como JSON em uma coluna
+        tabela = self.pa.Table.from_pylist([
+            {**registro, "resultado": json.dumps(registro.get("resultado"), ensure_ascii=False)}
+            for registro in self.pendentes
+        ])
+        # O número da parte continua o das execuções anteriores; nomes já usados são pulados
+        while True:
+            destino = os.path.join(self.caminho, f"parte-{self._parte:05d}.parquet")
+            self._parte += 1
+            if not os.path.exists(destino):
+                break
+        self.pq.write_table(tabela, f"{destino}.tmp")
+        os.replace(f"{destino}.tmp", destino)
+        gravados, self.pendentes = self.pendentes, []
+        return gravados
+
+    def fechar(self) -> list:
+        return self._descarregar()
+
+class ConsultaEmLote:
+    """
+    Executa listas grandes de consultas ao bulário sobre um conjunto limitado de
+    páginas aquecidas do `BrowserService`.
+
+    As consultas passam por `BrowserService.executar_consulta`, com as
+    retentativas, o circuito do endpoint e o limite de concorrência da camada
+    de resiliência. O progresso é registrado em um arquivo de checkpoint
+    (`<saida>.checkpoint`) assim que os resultados estão gravados na saída, de
+    modo que uma execução interrompida continua de onde parou; na retomada, as
+    linhas fora do checkpoint (com erro ou não confirmadas) saem da saída e as
+    consultas são refeitas.
+    """
+
+    def __init__(self, browser_service: BrowserService, paralelismo: int = 4, tamanho_grupo: int = 500,
+                 espera_circuito: float = 30.0, esperas_circuito: int = 3):
+        """
+        :param browser_service: Serviço que fornece as páginas e a camada de resiliência.
+        :param paralelismo: Número máximo de consultas simultâneas (páginas em uso).
+        :param tamanho_grupo: Linhas por grupo da saída em Parquet.
+        :param espera_circuito: Espera (em segundos) quando o circuito do bulário está aberto.
+        :param esperas_circuito: Quantas vezes uma consulta espera o circuito antes de ser dada como erro.
+        """
+        self.browser_service = browser_service
+        self.paralelismo = paralelismo
+        self.tamanho_grupo = tamanho_grupo
+        self.espera_circuito = espera_circuito
+        self.esperas_circuito = esperas_circuito
+
+    @staticmethod
+    def _carregar_checkpoint(caminho: str) -> set:
+        if not os.path.exists(caminho):
+            return set()
+        with open(caminho, "r", encoding="utf-8") as f:
+            return {linha.strip() for linha in f if linha.strip()}
+
+    async def _consultar(self, consulta: dict):
+        """Executa uma consulta pela camada de resiliência; com o circuito aberto, espera a reabertura."""
+        async def acao(bulas):
+            await getattr(bulas, METODOS_BUSCA[consulta["tipo"]])(consulta["valor"])
+            if consulta["tipo"] in SELECAO_SEM_CONSULTA:
+                await bulas.clicar_e_esperar_consulta(bulas.botao_consultar)
+            return [asdict(registro) for registro in await bulas.obter_resultados()]
+
+        for espera in range(self.esperas_circuito + 1):
+            try:
+                resultado = await self.browser_service.executar_consulta(BulasPage, acao)
+                return {**consulta, "status": "ok", "resultado": resultado}
+            except CircuitoAberto as e:
+                if espera == self.esperas_circuito:
+                    return {**consulta, "status": "erro", "erro": str(e)}
+                logging.warning(f"Consulta {consulta['id']}: {e} Nova tentativa em {self.espera_circuito:.0f}s...")
+                await asyncio.sleep(self.espera_circuito)
+            except Exception as e:
+                logging.error(f"Consulta {consulta['id']} falhou: {e}")
+                return {**consulta, "status": "erro", "erro": str(e)}
+
+    async def executar(self, entrada: str, saida: str):
+        """
+        Processa o arquivo de entrada e grava os resultados incrementalmente.
+
+        :param entrada: Arquivo CSV ou JSONL com as consultas.
+        :param saida: Arquivo de saída (.jsonl) ou diretório de grupos Parquet (.parquet).
+        :return: Quantidade de consultas processadas nesta execução.
+        """
+        caminho_checkpoint = f"{saida}.checkpoint"
+        concluidas = self._carregar_checkpoint(caminho_checkpoint)
+        if concluidas:
+            logging.info(f"Retomando lote: {len(concluidas)} consultas já concluídas serão ignoradas.")
+        parquet = saida.endswith(".parquet")
+        removidas = (SaidaParquet if parquet else SaidaJsonl).compactar(saida, concluidas)
+        if removidas:
+            logging.info(f"{removidas} resultados fora do checkpoint removidos da saída; as consultas serão refeitas.")
+
+        escritor = SaidaParquet(saida, self.tamanho_grupo) if parquet else SaidaJsonl(saida)
+        checkpoint = open(caminho_checkpoint, "a", encoding="utf-8")
+        fila = asyncio.Queue(maxsize=self.paralelismo * 2)
+        processadas = 0
+
+        def confirmar(gravados: list):
+            """Só entram no checkpoint as consultas bem-sucedidas cujos resultados já estão no disco."""
+            for registro in gravados:
+                if registro["status"] == "ok":
+                    checkpoint.write(registro["id"] + "\n")
+            checkpoint.flush()
+
+        async def trabalhador():
+            nonlocal processadas
+            while True:
+                consulta = await fila.get()
+                if consulta is None:
+                    return
+                confirmar(escritor.escrever(await self._consultar(consulta)))
+                processadas += 1
+                if processadas % 100 == 0:
+                    logging.info(f"{processadas} consultas processadas...")
+
+        trabalhadores = [asyncio.create_task(trabalhador()) for _ in range(self.paralelismo)]
+        try:
+            for consulta in ler_consultas(entrada):
+                if consulta["id"] not in concluidas:
+                    await fila.put(consulta)
+            for _ in trabalhadores:
+                await fila.put(None)
+            await asyncio.gather(*trabalhadores)
+        finally:
+            for tarefa in trabalhadores:
+                tarefa.cancel()
+            try:
+                confirmar(escritor.fechar())
+            finally:
+                checkpoint.close()
+        logging.info(f"Lote concluído: {processadas} consultas processadas.")
+        return processadas
+
+async def executar_lote(entrada: str, saida: str, paralelismo: int = 4, headless: bool = True):
+    """Executa um lote com um `BrowserService` próprio, dimensionado para o paralelismo."""
+    browser_service = BrowserService(headless=headless, tamanho_pool=paralelismo)
+    try:
+        return await ConsultaEmLote(browser_service, paralelismo=paralelismo).executar(entrada, saida)
+    finally:
+        await browser_service.fechar_navegador()
+
+def main():
+    parser = argparse.ArgumentParser(description="Consulta em lote de bulas na ANVISA.")
+    parser.add_argument("entrada", help="Arquivo CSV ou JSONL com as colunas tipo, valor e id (opcional).")
+    parser.add_argument("saida", help="Arquivo de resultados (.jsonl) ou diretório de grupos Parquet (.parquet).")
+    parser.add_argument("--paralelismo", type=int, default=4, help="Páginas usadas simultaneamente.")
+    parser.add_argument("--visivel", action="store_true", help="Mostra o navegador durante a execução.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    asyncio.run(executar_lote(args.entrada, args.saida, args.paralelismo, headless=not args.visivel))
+
+if __name__ == "__main__":
+    main()
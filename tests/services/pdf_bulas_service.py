@@ -0,0 +1,172 @@
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import requests
+from pypdf import PdfReader
+from requests.adapters import HTTPAdapter
+
+# PDFs (e o texto extraído de cada um) ficam no disco com o hash do conteúdo como nome
+DIRETORIO_DOCUMENTOS = os.path.join("reports", "documentos")
+
+@dataclass
+class DocumentoBula:
+    """PDF de bula baixado (e, opcionalmente, com o texto extraído)."""
+    chave: str
+    tipo: str
+    url: str
+    caminho: str = None
+    sha256: str = None
+    tamanho: int = 0
+    duplicado: bool = False
+    texto: str = None
+    erro: str = None
+
+def extrair_texto(caminho: str) -> str:
+    """Extrai o texto de um PDF com o `pypdf` (executada no pool de processos)."""
+    return "\n".join(pagina.extract_text() or "" for pagina in PdfReader(caminho).pages)
+
+def links_bula(registro, cliente=None) -> dict:
+    """
+    Resolve os links dos PDFs de um resultado do bulário.
+
+    :param registro: `RegistroBula` (grade da interface) ou linha da API.
+    :param cliente: `BulasApiClient`, necessário para as linhas da API.
+    :return: Dicionário tipo ('paciente'/'profissional') -> URL.
+    """
+    if isinstance(registro, dict):
+        return cliente.documentos_bula(registro)
+    return {tipo: url for tipo, url in (("paciente", registro.bula_paciente),
+                                        ("profissional", registro.bula_profissional)) if url}
+
+class PipelineBulasPdf:
+    """
+    Download e extração de texto das bulas em PDF.
+
+    Os downloads compartilham uma `requests.Session` com pool de conexões e
+    rodam em threads, no máximo `concorrencia` ao mesmo tempo; cada PDF é
+    gravado em streaming e renomeado pelo SHA-256 do conteúdo, de modo que
+    bulas idênticas ocupam um único arquivo. O texto é extraído em um pool de
+    processos e guardado ao lado do PDF (`<sha256>.txt`), servindo de cache
+    para as próximas execuções.
+    """
+
+    def __init__(self, diretorio: str = DIRETORIO_DOCUMENTOS, concorrencia: int = 8, processos: int = None,
+                 extrair: bool = True, timeout: int = 60, cabecalhos: dict = None):
+        """
+        :param diretorio: Diretório dos PDFs e textos.
+        :param concorrencia: Downloads simultâneos (e conexões mantidas no pool).
+        :param processos: Processos de extração; se None, o número de CPUs.
+        :param extrair: Se False, apenas baixa os PDFs.
+        :param timeout: Tempo limite de cada download (em segundos).
+        :param cabecalhos: Cabeçalhos extras das requisições (ex.: os capturados pelo `BulasApiClient`).
+        """
+        self.diretorio = diretorio
+        self.concorrencia = concorrencia
+        self.processos = processos
+        self.extrair = extrair
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=concorrencia, pool_maxsize=concorrencia)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(cabecalhos or {"Authorization": "Guest"})
+        self._executor = None
+        self._extracoes = {}
+
+    def _baixar(self, url: str) -> tuple:
+        """Baixa em streaming para um arquivo temporário e o move para `<sha256>.pdf`."""
+        os.makedirs(self.diretorio, exist_ok=True)
+        descritor, temporario = tempfile.mkstemp(dir=self.diretorio, suffix=".tmp")
+        digest, tamanho = hashlib.sha256(), 0
+        try:
+            with os.fdopen(descritor, "wb") as f, self.session.get(url, stream=True, timeout=self.timeout) as resposta:
+                resposta.raise_for_status()
+                for bloco in resposta.iter_content(chunk_size=64 * 1024):
+                    digest.update(bloco)
+                    tamanho += len(bloco)
+                    f.write(bloco)
+        except Exception:
+            os.remove(temporario)
+            raise
+        caminho = os.path.join(self.diretorio, f"{digest.hexdigest()}.pdf")
+        duplicado = os.path.exists(caminho)
+        if duplicado:
+            os.remove(temporario)
+        else:
+            os.replace(temporario, caminho)
+        return caminho, digest.hexdigest(), tamanho, duplicado
+
+    async def _texto(self, caminho: str, sha256: str) -> str:
+        """Texto do PDF: do cache em disco, de uma extração já em andamento ou do pool de processos."""
+        arquivo_texto = caminho[:-len(".pdf")] + ".txt"
+        if os.path.exists(arquivo_texto):
+            with open(arquivo_texto, "r", encoding="utf-8") as f:
+                return f.read()
+        if sha256 not in self._extracoes:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.processos)
+            self._extracoes[sha256] = asyncio.get_running_loop().run_in_executor(self._executor, extrair_texto, caminho)
+        try:
+            texto = await self._extracoes[sha256]
+        finally:
+            self._extracoes.pop(sha256, None)
+        temporario = f"{arquivo_texto}.{os.getpid()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            f.write(texto)
+        os.replace(temporario, arquivo_texto)
+        return texto
+
+    async def _processar_item(self, limite: asyncio.Semaphore, chave: str, tipo: str, url: str) -> DocumentoBula:
+        documento = DocumentoBula(chave=chave, tipo=tipo, url=url)
+        try:
+            async with limite:
+                documento.caminho, documento.sha256, documento.tamanho, documento.duplicado = \
+                    await asyncio.to_thread(self._baixar, url)
+            if self.extrair:
+                documento.texto = await self._texto(documento.caminho, documento.sha256)
+        except Exception as e:
+            logging.error(f"Erro ao processar a bula {tipo} de {chave}: {e}")
+            documento.erro = str(e)
+        return documento
+
+    async def processar(self, itens):
+        """
+        Gera os documentos à medida que ficam prontos (fora da ordem de entrada).
+
+        :param itens: Iterável de tuplas (chave, tipo, url).
+        """
+        limite = asyncio.Semaphore(self.concorrencia)
+        tarefas = [asyncio.ensure_future(self._processar_item(limite, chave, tipo, url)) for chave, tipo, url in itens]
+        try:
+            for tarefa in asyncio.as_completed(tarefas):
+                yield await tarefa
+        finally:
+            for tarefa in tarefas:
+                tarefa.cancel()
+
+    async def processar_resultados(self, registros, cliente=None):
+        """
+        Etapa seguinte ao `obter_resultados`: resolve os links de PDF dos
+        registros (da interface ou da API) e gera os documentos prontos.
+
+        :param registros: `RegistroBula`s ou linhas da API.
+        :param cliente: `BulasApiClient` (para linhas da API).
+        """
+        itens = [
+            (registro["expediente"] if isinstance(registro, dict) else registro.expediente, tipo, url)
+            for registro in registros
+            for tipo, url in links_bula(registro, cliente).items()
+        ]
+        async for documento in self.processar(itens):
+            yield documento
+
+    def fechar(self):
+        self.session.close()
+        if self._executor:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+        self._extracoes.clear()
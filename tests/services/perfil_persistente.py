@@ -0,0 +1,154 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import urllib.request
+from datetime import datetime
+from urllib.parse import urljoin
+from tests.utils.config import url_portal
+
+# Modelos de perfil (por build do portal) e cópias de trabalho dos workers desta máquina
+DIRETORIO_PERFIS = os.path.join(tempfile.gettempdir(), "anvisa-perfis")
+
+# Arquivos de trava do Chromium: não podem ir para as cópias do perfil
+ARQUIVOS_TRAVA = ("SingletonLock", "SingletonCookie", "SingletonSocket", "lockfile")
+
+RE_RECURSOS_BUILD = re.compile(r"<(?:script[^>]+src|link[^>]+rel=[\"']?stylesheet[^>]*href)=[\"']?([^\"' >]+)",
+                               re.IGNORECASE)
+
+def assinatura_build(html: str, base: str) -> str:
+    """Assinatura do build a partir das URLs dos scripts e folhas de estilo da página inicial."""
+    recursos = sorted(urljoin(base, recurso) for recurso in RE_RECURSOS_BUILD.findall(html))
+    return hashlib.sha1("|".join(recursos).encode("utf-8")).hexdigest()[:12]
+
+def assinatura_build_portal(url: str = None, timeout: float = 10):
+    """Assinatura do build publicado no portal, ou None se o portal não respondeu."""
+    url = url or url_portal("/")
+    try:
+        requisicao = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
+        with urllib.request.urlopen(requisicao, timeout=timeout) as resposta:
+            return assinatura_build(resposta.read().decode("utf-8", errors="replace"), resposta.geturl())
+    except OSError as e:
+        logging.warning(f"Não foi possível verificar o build do portal ({url}): {e}")
+        return None
+
+def clonar_diretorio(origem: str, destino: str):
+    """
+    Copia o perfil; no Linux, com `cp --reflink=auto` (cópia sob demanda em
+    sistemas de arquivos que a suportam, como btrfs e XFS).
+    """
+    if sys.platform.startswith("linux") and shutil.which("cp"):
+        resultado = subprocess.run(["cp", "-a", "--reflink=auto", origem, destino], capture_output=True)
+        if resultado.returncode == 0:
+            for nome in ARQUIVOS_TRAVA:
+                caminho = os.path.join(destino, nome)
+                if os.path.lexists(caminho):
+                    os.remove(caminho)
+            return
+        shutil.rmtree(destino, ignore_errors=True)
+    shutil.copytree(origem, destino, symlinks=True, ignore=shutil.ignore_patterns(*ARQUIVOS_TRAVA))
+
+class PerfilPersistente:
+    """
+    Perfis do Chromium com o cache em disco já aquecido (bundles do Angular,
+    CSS e fontes do portal).
+
+    Um modelo é criado por build do portal (`modelo-<assinatura>`): um
+    navegador com um `user_data_dir` novo abre o bulário e é fechado, deixando
+    o cache gravado. O navegador de cada worker abre uma cópia do modelo. Na
+    inicialização, a assinatura do build publicado é comparada com a do
+    modelo; quando o portal muda, um modelo novo é criado e os antigos são
+    removidos. Vários workers podem criar o modelo ao mesmo tempo: cada um o
+    monta em um diretório temporário e só o primeiro a renomeá-lo prevalece.
+    """
+
+    def __init__(self, diretorio: str = DIRETORIO_PERFIS, url_aquecimento: str = None):
+        """
+        :param diretorio: Diretório dos modelos e das cópias de trabalho.
+        :param url_aquecimento: Página aberta para aquecer o cache. Se None, o bulário.
+        """
+        self.diretorio = diretorio
+        self.url_aquecimento = url_aquecimento or url_portal("/#/bulario/")
+        self.modelo = None
+        self.copias = []
+
+    @classmethod
+    def do_ambiente(cls):
+        """Cria os perfis se ANVISA_PERFIL_PERSISTENTE=1 (desativado por padrão); senão, retorna None."""
+        if os.environ.get("ANVISA_PERFIL_PERSISTENTE", "0") != "1":
+            return None
+        return cls(os.environ.get("ANVISA_DIRETORIO_PERFIS", DIRETORIO_PERFIS))
+
+    def _modelos(self) -> list:
+        """Modelos prontos, do mais recente para o mais antigo."""
+        if not os.path.isdir(self.diretorio):
+            return []
+        modelos = [os.path.join(self.diretorio, nome) for nome in os.listdir(self.diretorio)
+                   if nome.startswith("modelo-") and os.path.exists(os.path.join(self.diretorio, nome, "modelo.json"))]
+        return sorted(modelos, key=os.path.getmtime, reverse=True)
+
+    async def garantir_modelo(self, playwright, opcoes: dict) -> str:
+        """
+        Retorna o modelo do build atual do portal, criando-o se necessário.
+
+        :param playwright: Instância assíncrona do Playwright.
+        :param opcoes: Opções de `launch_persistent_context` (headless, args, user_agent...).
+        """
+        assinatura = await asyncio.to_thread(assinatura_build_portal, url_portal("/"))
+        modelos = self._modelos()
+        if assinatura is None and modelos:
+            self.modelo = modelos[0]
+            logging.info(f"Build do portal não verificado; usando o perfil modelo mais recente ({self.modelo}).")
+            return self.modelo
+        assinatura = assinatura or "desconhecido"
+        self.modelo = os.path.join(self.diretorio, f"modelo-{assinatura}")
+        if self.modelo not in modelos:
+            logging.info(f"Perfil modelo do build {assinatura} não encontrado; aquecendo um novo...")
+            await self._criar_modelo(playwright, opcoes, assinatura)
+        for antigo in self._modelos():
+            if antigo != self.modelo:
+                logging.info(f"Removendo perfil modelo de um build anterior: {antigo}")
+                shutil.rmtree(antigo, ignore_errors=True)
+        return self.modelo
+
+    async def _criar_modelo(self, playwright, opcoes: dict, assinatura: str):
+        os.makedirs(self.diretorio, exist_ok=True)
+        temporario = tempfile.mkdtemp(prefix="montando-", dir=self.diretorio)
+        try:
+            contexto = await playwright.chromium.launch_persistent_context(temporario, **opcoes)
+            try:
+                pagina = contexto.pages[0] if contexto.pages else await contexto.new_page()
+                await pagina.goto(self.url_aquecimento, wait_until="networkidle")
+            finally:
+                await contexto.close()  # O cache só fica completo no disco depois de fechar
+            with open(os.path.join(temporario, "modelo.json"), "w", encoding="utf-8") as f:
+                json.dump({"assinatura": assinatura, "url": self.url_aquecimento,
+                           "criado_em": datetime.now().isoformat(timespec="seconds")}, f, indent=2)
+            try:
+                os.rename(temporario, self.modelo)
+                logging.info(f"Perfil modelo criado: {self.modelo}")
+            except OSError:
+                logging.info(f"Perfil modelo {self.modelo} já criado por outro worker.")
+        finally:
+            shutil.rmtree(temporario, ignore_errors=True)
+
+    def nova_copia(self) -> str:
+        """Cópia de trabalho do modelo para um contexto deste worker."""
+        worker = os.environ.get("PYTEST_XDIST_WORKER", "principal")
+        os.makedirs(os.path.join(self.diretorio, "trabalho"), exist_ok=True)
+        destino = tempfile.mkdtemp(prefix=f"{worker}-", dir=os.path.join(self.diretorio, "trabalho"))
+        os.rmdir(destino)
+        clonar_diretorio(self.modelo, destino)
+        self.copias.append(destino)
+        return destino
+
+    def remover_copias(self):
+        for copia in self.copias:
+            shutil.rmtree(copia, ignore_errors=True)
+        self.copias = []
@@ -0,0 +1,340 @@
+import asyncio
+import glob
+import html
+import json
+import logging
+import math
+import os
+import random
+import time
+from collections import deque
+from fnmatch import fnmatchcase
+from urllib.parse import urlsplit
+
+# Eventos de resiliência (retentativas, aberturas de circuito, ajustes de concorrência), um arquivo por worker
+DIRETORIO_EVENTOS = os.path.join("reports", "resiliencia")
+# Limite total de consultas simultâneas, compartilhado pelos workers do xdist
+ARQUIVO_LIMITE = os.path.join("reports", "limite_concorrencia.json")
+
+class ErroPortal(Exception):
+    """Erro transitório do backend do portal (HTTP 5xx ou XHR sem resposta)."""
+
+class CircuitoAberto(ErroPortal):
+    """O circuito do endpoint está aberto: a consulta nem chega a ser feita."""
+
+def espera_backoff(tentativa: int, espera_base: float, espera_maxima: float) -> float:
+    """Espera exponencial (base * 2^(tentativa-1), limitada) com jitter de até `espera_base`."""
+    return min(espera_base * 2 ** (tentativa - 1), espera_maxima) + random.uniform(0, espera_base)
+
+def chave_endpoint(url_ou_padrao: str) -> str:
+    """Caminho do endpoint, a partir de uma URL ou de um padrão como '**/api/consulta/bulario**'."""
+    caminho = urlsplit(url_ou_padrao.replace("**", "")).path if "://" in url_ou_padrao \
+        else url_ou_padrao.replace("**", "").split("?")[0]
+    return caminho.rstrip("/") or "/"
+
+def worker_atual() -> str:
+    return os.environ.get("PYTEST_XDIST_WORKER", "principal")
+
+class RegistroEventos:
+    """Registra os eventos de resiliência deste processo para o relatório."""
+
+    def __init__(self, diretorio: str = DIRETORIO_EVENTOS):
+        self.diretorio = diretorio
+        self.eventos = []
+
+    def registrar(self, endpoint: str, evento: str, detalhe: str = ""):
+        registro = {
+            "instante": time.strftime("%H:%M:%S"),
+            "worker": worker_atual(),
+            "teste": os.environ.get("PYTEST_CURRENT_TEST", "").split(" ")[0],
+            "endpoint": endpoint,
+            "evento": evento,
+            "detalhe": detalhe,
+        }
+        self.eventos.append(registro)
+        logging.warning(f"[resiliência] {endpoint}: {evento} {detalhe}".rstrip())
+        os.makedirs(self.diretorio, exist_ok=True)
+        with open(os.path.join(self.diretorio, f"{registro['worker']}.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+    @staticmethod
+    def carregar(diretorio: str = DIRETORIO_EVENTOS) -> list:
+        """Lê os eventos gravados por todos os workers, em ordem cronológica."""
+        eventos = []
+        for caminho in sorted(glob.glob(os.path.join(diretorio, "*.jsonl"))):
+            with open(caminho, "r", encoding="utf-8") as f:
+                eventos.extend(json.loads(linha) for linha in f if linha.strip())
+        return sorted(eventos, key=lambda e: e["instante"])
+
+    @staticmethod
+    def tabela_html(eventos: list) -> str:
+        """Tabela HTML dos eventos, para o resumo do pytest-html."""
+        linhas = "".join(
+            "<tr>" + "".join(f"<td>{html.escape(str(e[c]))}</td>"
+                             for c in ("instante", "worker", "teste", "endpoint", "evento", "detalhe")) + "</tr>"
+            for e in eventos
+        )
+        return ("<h2>Resiliência (retentativas e circuitos)</h2>"
+                "<table><tr><th>Instante</th><th>Worker</th><th>Teste</th><th>Endpoint</th>"
+                f"<th>Evento</th><th>Detalhe</th></tr>{linhas}</table>")
+
+class DisjuntorCircuito:
+    """
+    Circuit breaker de um endpoint.
+
+    Fechado: as consultas passam e os resultados entram em uma janela deslizante.
+    Quando a taxa de erro da janela passa do limiar, o circuito abre e as
+    consultas falham na hora durante `tempo_aberto` segundos. Depois disso, uma
+    consulta de teste (meio aberto) decide se o circuito fecha ou abre de novo.
+    """
+
+    def __init__(self, endpoint: str, registro: RegistroEventos, tamanho_janela: int = 20,
+                 minimo_amostras: int = 5, limiar_erro: float = 0.5, tempo_aberto: float = 30.0,
+                 relogio=time.monotonic):
+        """
+        :param endpoint: Caminho do endpoint monitorado.
+        :param registro: Destino dos eventos de abertura e fechamento.
+        :param tamanho_janela: Quantidade de respostas consideradas na taxa de erro.
+        :param minimo_amostras: Respostas necessárias antes de o circuito poder abrir.
+        :param limiar_erro: Taxa de erro (0 a 1) que abre o circuito.
+        :param tempo_aberto: Tempo (em segundos) até a consulta de teste.
+        :param relogio: Função que retorna o instante atual em segundos.
+        """
+        self.endpoint = endpoint
+        self.registro = registro
+        self.minimo_amostras = minimo_amostras
+        self.limiar_erro = limiar_erro
+        self.tempo_aberto = tempo_aberto
+        self.janela = deque(maxlen=tamanho_janela)
+        self.relogio = relogio
+        self.estado = "fechado"
+        self.aberto_em = 0.0
+        self.motivo = ""
+        self._teste_iniciado_em = None
+
+    def permitir(self) -> bool:
+        """Indica se uma consulta pode ser feita agora."""
+        agora = self.relogio()
+        if self.estado == "aberto" and agora - self.aberto_em >= self.tempo_aberto:
+            self.estado = "meio_aberto"
+            self._teste_iniciado_em = None
+        if self.estado == "meio_aberto":
+            # Uma consulta de teste por vez; outra só se a anterior não trouxe resposta do endpoint
+            if self._teste_iniciado_em is None or agora - self._teste_iniciado_em >= self.tempo_aberto:
+                self._teste_iniciado_em = agora
+                return True
+            return False
+        return self.estado == "fechado"
+
+    def registrar(self, sucesso: bool, detalhe: str = ""):
+        """Registra o resultado de uma resposta do endpoint."""
+        if self.estado == "meio_aberto":
+            if sucesso:
+                self.estado = "fechado"
+                self.janela.clear()
+                self.registro.registrar(self.endpoint, "circuito fechado")
+            else:
+                self._abrir(f"consulta de teste falhou: {detalhe}")
+            return
+        self.janela.append(sucesso)
+        if self.estado == "fechado" and len(self.janela) >= self.minimo_amostras:
+            taxa = self.janela.count(False) / len(self.janela)
+            if taxa >= self.limiar_erro:
+                self._abrir(f"taxa de erro {taxa:.0%} nas últimas {len(self.janela)} respostas ({detalhe})")
+
+    def _abrir(self, motivo: str):
+        self.estado = "aberto"
+        self.aberto_em = self.relogio()
+        self.motivo = motivo
+        self.registro.registrar(self.endpoint, "circuito aberto", motivo)
+
+class LimitadorAdaptativo:
+    """
+    Limita as consultas simultâneas com ajuste AIMD: o limite cai pela metade a
+    cada erro do portal e sobe de um em um após uma sequência de sucessos.
+
+    O limite é um total para todos os workers: fica em um arquivo compartilhado,
+    e cada worker usa a sua parte (limite / número de workers).
+    """
+
+    def __init__(self, registro: RegistroEventos, limite_inicial: int = 8, limite_minimo: int = 1,
+                 limite_maximo: int = 32, arquivo: str = ARQUIVO_LIMITE):
+        """
+        :param registro: Destino dos eventos de ajuste do limite.
+        :param limite_inicial: Limite total inicial, somando todos os workers.
+        :param limite_minimo: Limite total mínimo.
+        :param limite_maximo: Limite total máximo.
+        :param arquivo: Arquivo JSON com o limite compartilhado.
+        """
+        self.registro = registro
+        self.limite_minimo = limite_minimo
+        self.limite_maximo = limite_maximo
+        self.arquivo = arquivo
+        self.workers = int(os.environ.get("PYTEST_XDIST_WORKER_COUNT", "1"))
+        self.limite_total = limite_inicial
+        self._lido_em = 0.0
+        self._em_uso = 0
+        self._sucessos = 0
+        self._condicao = None
+
+    @property
+    def limite_local(self) -> int:
+        """Parte do limite total que cabe a este worker."""
+        self._ler_compartilhado()
+        return max(1, math.ceil(self.limite_total / self.workers))
+
+    def _ler_compartilhado(self):
+        try:
+            modificado = os.path.getmtime(self.arquivo)
+        except OSError:
+            return
+        if modificado <= self._lido_em:
+            return
+        try:
+            with open(self.arquivo, "r", encoding="utf-8") as f:
+                self.limite_total = int(json.load(f)["limite"])
+            self._lido_em = modificado
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"Limite de concorrência compartilhado ignorado ({self.arquivo}): {e}")
+
+    def _publicar(self):
+        os.makedirs(os.path.dirname(self.arquivo) or ".", exist_ok=True)
+        temporario = f"{self.arquivo}.{os.getpid()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump({"limite": self.limite_total, "worker": worker_atual()}, f)
+        os.replace(temporario, self.arquivo)
+        self._lido_em = os.path.getmtime(self.arquivo)
+
+    async def __aenter__(self):
+        if self._condicao is None:
+            self._condicao = asyncio.Condition()
+        async with self._condicao:
+            await self._condicao.wait_for(lambda: self._em_uso < self.limite_local)
+            self._em_uso += 1
+        return self
+
+    async def __aexit__(self, *excecao):
+        async with self._condicao:
+            self._em_uso -= 1
+            self._condicao.notify_all()
+
+    def sucesso(self):
+        """Aumento aditivo: +1 no limite total a cada `limite_local` sucessos seguidos."""
+        self._sucessos += 1
+        if self._sucessos >= self.limite_local and self.limite_total < self.limite_maximo:
+            self._sucessos = 0
+            self._ler_compartilhado()
+            self.limite_total += 1
+            self._publicar()
+
+    def erro(self, endpoint: str):
+        """Redução multiplicativa: o limite total cai pela metade."""
+        self._sucessos = 0
+        self._ler_compartilhado()
+        novo = max(self.limite_minimo, self.limite_total // 2)
+        if novo != self.limite_total:
+            self.registro.registrar(endpoint, "concorrência reduzida", f"{self.limite_total} → {novo}")
+            self.limite_total = novo
+            self._publicar()
+
+class CamadaResiliencia:
+    """
+    Camada de resiliência das consultas ao portal.
+
+    Observa as respostas XHR da API (via `observar_resposta`/`observar_falha`,
+    registrados nos contextos do `BrowserService`) para alimentar um circuit
+    breaker por endpoint, repete consultas idempotentes que falham com erro do
+    portal (backoff exponencial com jitter) e limita a concorrência de forma
+    adaptativa entre os workers.
+    """
+
+    def __init__(self, tentativas: int = 3, espera_base: float = 1.0, espera_maxima: float = 15.0,
+                 limite_inicial: int = None, registro: RegistroEventos = None):
+        """
+        :param tentativas: Número máximo de tentativas por consulta idempotente.
+        :param espera_base: Espera inicial do backoff (em segundos).
+        :param espera_maxima: Limite da espera entre tentativas (em segundos).
+        :param limite_inicial: Limite total de consultas simultâneas (todos os workers).
+                               Se None, usa ANVISA_LIMITE_CONSULTAS (padrão: 8).
+        :param registro: Destino dos eventos; se None, um `RegistroEventos` padrão.
+        """
+        self.tentativas = tentativas
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self.registro = registro or RegistroEventos()
+        self.limitador = LimitadorAdaptativo(
+            self.registro, limite_inicial or int(os.environ.get("ANVISA_LIMITE_CONSULTAS", "8")))
+        self._disjuntores = {}
+        self._padroes = {}
+
+    def chave(self, url_ou_padrao: str) -> str:
+        """
+        Chave do endpoint, a mesma para o padrão passado a `executar` e para as
+        URLs dos XHRs observados: uma URL casada por um padrão já registrado
+        (como '**/api/consulta/bulario**') fica com a chave desse padrão.
+        """
+        if "*" in url_ou_padrao:
+            self._padroes.setdefault(url_ou_padrao, chave_endpoint(url_ou_padrao))
+        else:
+            for padrao, chave in self._padroes.items():
+                if fnmatchcase(url_ou_padrao, padrao):
+                    return chave
+        return chave_endpoint(url_ou_padrao)
+
+    def disjuntor(self, endpoint: str) -> DisjuntorCircuito:
+        chave = self.chave(endpoint)
+        if chave not in self._disjuntores:
+            self._disjuntores[chave] = DisjuntorCircuito(chave, self.registro)
+        return self._disjuntores[chave]
+
+    @staticmethod
+    def _monitorada(request) -> bool:
+        return request.resource_type in ("xhr", "fetch") and "/api/" in request.url
+
+    def observar_resposta(self, response):
+        """Listener de 'response': alimenta o disjuntor do endpoint com o status do XHR."""
+        if not self._monitorada(response.request):
+            return
+        sucesso = response.status < 500
+        disjuntor = self.disjuntor(response.url)
+        disjuntor.registrar(sucesso, f"HTTP {response.status}")
+        if not sucesso:
+            self.limitador.erro(disjuntor.endpoint)
+
+    def observar_falha(self, request):
+        """Listener de 'requestfailed': XHR sem resposta conta como erro do endpoint."""
+        if not self._monitorada(request):
+            return
+        disjuntor = self.disjuntor(request.url)
+        disjuntor.registrar(False, request.failure or "sem resposta")
+        self.limitador.erro(disjuntor.endpoint)
+
+    async def executar(self, endpoint: str, operacao, idempotente: bool = True):
+        """
+        Executa `operacao` (função assíncrona sem argumentos) sob o circuito e o
+        limite de concorrência do endpoint.
+
+        `ErroPortal` (e timeouts, para operações idempotentes) provocam nova
+        tentativa com backoff; qualquer outra exceção é repassada na hora.
+
+        :raises CircuitoAberto: Se o circuito do endpoint estiver aberto.
+        """
+        disjuntor = self.disjuntor(endpoint)
+        tentativas = self.tentativas if idempotente else 1
+        for tentativa in range(1, tentativas + 1):
+            if not disjuntor.permitir():
+                raise CircuitoAberto(f"Circuito aberto para {disjuntor.endpoint} ({disjuntor.motivo}); "
+                                     f"consulta não realizada.")
+            try:
+                async with self.limitador:
+                    resultado = await operacao()
+                self.limitador.sucesso()
+                return resultado
+            except Exception as e:
+                transitorio = isinstance(e, ErroPortal) or type(e).__name__ == "TimeoutError"
+                if not transitorio or tentativa == tentativas:
+                    raise
+                espera = espera_backoff(tentativa, self.espera_base, self.espera_maxima)
+                self.registro.registrar(disjuntor.endpoint, "retentativa",
+                                        f"tentativa {tentativa + 1} em {espera:.1f}s ({e})")
+                await asyncio.sleep(espera)
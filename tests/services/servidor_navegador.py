@@ -0,0 +1,202 @@
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import shutil
+import signal
+import subprocess
+import tempfile
+import time
+import urllib.request
+from tests.utils.travas import trava_arquivo
+
+# Estado do navegador compartilhado pelos processos (workers do xdist) desta máquina
+DIRETORIO_SERVIDOR = os.path.join(tempfile.gettempdir(), "anvisa-navegador")
+
+def usar_navegador_compartilhado() -> bool:
+    """
+    Indica se os workers devem se conectar ao navegador compartilhado.
+
+    Definido por ANVISA_NAVEGADOR_COMPARTILHADO ('1'/'0'); por padrão, ativo
+    apenas quando os testes rodam com o xdist.
+    """
+    valor = os.environ.get("ANVISA_NAVEGADOR_COMPARTILHADO")
+    if valor is None:
+        return bool(os.environ.get("PYTEST_XDIST_WORKER"))
+    return valor.lower() not in ("0", "false", "nao", "não")
+
+class ServidorNavegador:
+    """
+    Um único processo do Chromium por máquina, compartilhado pelos workers via CDP.
+
+    O primeiro worker inicia o navegador com `--remote-debugging-port`; os demais
+    encontram a porta em um arquivo de estado (protegido por uma trava entre
+    processos) e se conectam com `connect_over_cdp`, cada um com os próprios
+    contextos. O navegador é verificado (`/json/version`) a cada conexão e, após
+    `reiniciar_apos` usos (contextos ou páginas aquecidas entregues), as novas
+    conexões recebem um processo novo; o antigo é encerrado quando o último
+    worker conectado a ele sai.
+    """
+
+    def __init__(self, headless=False, reiniciar_apos=None, manter_aberto=None, diretorio=DIRETORIO_SERVIDOR):
+        """
+        :param headless: Se True, o navegador compartilhado roda sem interface gráfica.
+        :param reiniciar_apos: Usos (contextos ou páginas aquecidas entregues) até o navegador ser trocado.
+                               Se None, usa ANVISA_REINICIAR_NAVEGADOR_APOS (padrão: 200).
+        :param manter_aberto: Se True, o navegador continua aberto ao fim da execução, para
+                              ser reaproveitado pela próxima. Se None, usa ANVISA_MANTER_NAVEGADOR.
+        :param diretorio: Diretório do arquivo de estado, da trava e dos perfis.
+        """
+        self.headless = headless
+        self.reiniciar_apos = reiniciar_apos or int(os.environ.get("ANVISA_REINICIAR_NAVEGADOR_APOS", "200"))
+        if manter_aberto is None:
+            manter_aberto = os.environ.get("ANVISA_MANTER_NAVEGADOR", "0") == "1"
+        self.manter_aberto = manter_aberto
+        self.diretorio = diretorio
+        self.arquivo_estado = os.path.join(diretorio, "estado.json")
+        self.arquivo_trava = os.path.join(diretorio, "trava")
+        self.cliente = f"{os.environ.get('PYTEST_XDIST_WORKER', 'principal')}-{os.getpid()}"
+        self.geracao = None
+
+    def _trava(self, timeout=60, validade=120):
+        """Trava entre processos do arquivo de estado (ver `trava_arquivo`)."""
+        return trava_arquivo(self.arquivo_trava, timeout=timeout, validade=validade)
+
+    def _ler_estado(self) -> dict:
+        try:
+            with open(self.arquivo_estado, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"geracao": 0, "processos": {}}
+
+    def _gravar_estado(self, estado: dict):
+        temporario = f"{self.arquivo_estado}.{os.getpid()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(estado, f, indent=2)
+        os.replace(temporario, self.arquivo_estado)
+
+    @staticmethod
+    def saudavel(porta: int) -> bool:
+        """Verificação de saúde: o endpoint de depuração responde."""
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{porta}/json/version", timeout=2) as resposta:
+                return resposta.status == 200
+        except OSError:
+            return False
+
+    def _iniciar_processo(self, executavel: str, geracao: int, timeout=30) -> dict:
+        perfil = os.path.join(self.diretorio, f"perfil-{geracao}")
+        arquivo_porta = os.path.join(perfil, "DevToolsActivePort")
+        with contextlib.suppress(OSError):
+            os.remove(arquivo_porta)
+        argumentos = [
+            executavel,
+            "--remote-debugging-port=0",
+            f"--user-data-dir={perfil}",
+            "--no-first-run",
+            "--no-default-browser-check",
+            "--disable-blink-features=AutomationControlled",
+            "--disable-infobars",
+        ]
+        if self.headless:
+            argumentos.append("--headless=new")
+        processo = subprocess.Popen(argumentos, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                    start_new_session=True)
+        limite = time.monotonic() + timeout
+        while not os.path.exists(arquivo_porta):
+            if processo.poll() is not None or time.monotonic() > limite:
+                raise RuntimeError(f"Não foi possível iniciar o navegador compartilhado ({executavel}).")
+            time.sleep(0.05)
+        time.sleep(0.05)  # O arquivo é criado antes de a porta ser escrita
+        with open(arquivo_porta, "r", encoding="utf-8") as f:
+            porta = int(f.readline().strip())
+        logging.info(f"Navegador compartilhado iniciado (geração {geracao}, pid {processo.pid}, porta {porta}).")
+        return {"pid": processo.pid, "porta": porta, "perfil": perfil, "clientes": [], "usos": 0}
+
+    @staticmethod
+    def _encerrar_processo(processo: dict):
+        with contextlib.suppress(OSError):
+            os.kill(processo["pid"], signal.SIGTERM)
+        shutil.rmtree(processo.get("perfil", ""), ignore_errors=True)
+
+    def conectar(self, executavel: str) -> str:
+        """
+        Garante um navegador saudável e registra este processo como cliente.
+
+        :param executavel: Caminho do Chromium (`playwright.chromium.executable_path`).
+        :return: Endpoint para `connect_over_cdp`.
+        """
+        with self._trava():
+            estado = self._ler_estado()
+            atual = estado["processos"].get(str(estado["geracao"]))
+            if atual and not self.saudavel(atual["porta"]):
+                logging.warning(f"Navegador compartilhado (geração {estado['geracao']}) não responde; reiniciando...")
+                self._encerrar_processo(atual)
+                del estado["processos"][str(estado["geracao"])]
+                atual = None
+            elif atual and atual["usos"] >= self.reiniciar_apos:
+                logging.info(f"Navegador compartilhado atingiu {atual['usos']} usos; iniciando um novo.")
+                atual = None
+            if atual is None:
+                estado["geracao"] += 1
+                atual = self._iniciar_processo(executavel, estado["geracao"])
+                estado["processos"][str(estado["geracao"])] = atual
+            atual["clientes"].append(self.cliente)
+            self.geracao = estado["geracao"]
+            self._aposentar(estado)
+            self._gravar_estado(estado)
+            return f"http://127.0.0.1:{atual['porta']}"
+
+    def registrar_uso(self, quantidade: int = 1) -> bool:
+        """
+        Soma usos (contextos ou páginas aquecidas entregues) no navegador deste cliente.
+
+        :return: True quando o navegador deve ser trocado (limite de usos atingido).
+        """
+        with self._trava():
+            estado = self._ler_estado()
+            processo = estado["processos"].get(str(self.geracao))
+            if processo is None:
+                return True
+            processo["usos"] += quantidade
+            self._gravar_estado(estado)
+            return processo["usos"] >= self.reiniciar_apos
+
+    def desconectar(self):
+        """Remove este cliente; navegadores sem clientes (antigos ou, ao final, o atual) são encerrados."""
+        if self.geracao is None:
+            return
+        with self._trava():
+            estado = self._ler_estado()
+            processo = estado["processos"].get(str(self.geracao))
+            if processo and self.cliente in processo["clientes"]:
+                processo["clientes"].remove(self.cliente)
+            self._aposentar(estado, incluir_atual=not self.manter_aberto)
+            self._gravar_estado(estado)
+        self.geracao = None
+
+    @staticmethod
+    def _cliente_ativo(cliente: str) -> bool:
+        if os.name == "nt":
+            return True  # os.kill(pid, 0) encerra o processo no Windows
+        try:
+            os.kill(int(cliente.rsplit("-", 1)[-1]), 0)
+            return True
+        except (OSError, ValueError):
+            return False
+
+    def _aposentar(self, estado: dict, incluir_atual: bool = False):
+        for geracao, processo in list(estado["processos"].items()):
+            # Clientes de workers encerrados sem desconectar não seguram o navegador
+            processo["clientes"] = [c for c in processo["clientes"] if self._cliente_ativo(c)]
+            if processo["clientes"] or (geracao == str(estado["geracao"]) and not incluir_atual):
+                continue
+            logging.info(f"Encerrando navegador compartilhado (geração {geracao}, {processo['usos']} usos).")
+            self._encerrar_processo(processo)
+            del estado["processos"][geracao]
+
+async def conectar_navegador(playwright, servidor: ServidorNavegador):
+    """Conecta o Playwright deste processo ao navegador compartilhado."""
+    endpoint = await asyncio.to_thread(servidor.conectar, playwright.chromium.executable_path)
+    return await playwright.chromium.connect_over_cdp(endpoint)
@@ -0,0 +1,305 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+from datetime import date, datetime, timedelta
+from tests.services.bulas_api_service import BulasApiClient
+from tests.services.pdf_bulas_service import DIRETORIO_DOCUMENTOS, PipelineBulasPdf
+
+# Estado da sincronização (última data por fonte, hash por item) e saídas padrão
+ARQUIVO_ESTADO = os.path.join("reports", "sincronizacao.sqlite")
+ARQUIVO_FEED = os.path.join("reports", "mudancas.jsonl")
+
+FORMATO_DATA = "%d/%m/%Y"
+
+class FonteSincronizavel(ABC):
+    """
+    Fonte de itens publicados por data (bulário, legislação, listas regulatórias).
+
+    Basta saber consultar uma janela de datas (seguindo a paginação), identificar
+    cada item e dizer a data de publicação dele; o `SincronizadorIncremental`
+    cuida do estado, da detecção de mudanças e dos documentos.
+    """
+    nome = None
+
+    @abstractmethod
+    def registros(self, data_inicial: date, data_final: date):
+        """
+        Gera todos os itens publicados na janela, de todas as páginas de resultado.
+
+        Pode ser um gerador comum (API) ou assíncrono (page objects).
+        """
+
+    @abstractmethod
+    def chave(self, registro: dict) -> str:
+        """Identificador estável do item (ex.: número do expediente)."""
+
+    @abstractmethod
+    def data(self, registro: dict) -> date:
+        """Data de publicação (ou atualização) do item."""
+
+    def conteudo(self, registro: dict) -> dict:
+        """Campos considerados no hash do item; por padrão, o registro inteiro."""
+        return registro
+
+    def documentos(self, registro: dict) -> dict:
+        """Documentos (nome -> URL) a baixar quando o item é novo ou mudou."""
+        return {}
+
+class FonteBulario(FonteSincronizavel):
+    """Bulário consultado pela API (`BulasApiClient`), com as bulas em PDF como documentos."""
+    nome = "bulario"
+
+    def __init__(self, cliente: BulasApiClient):
+        self.cliente = cliente
+
+    def registros(self, data_inicial: date, data_final: date):
+        return self.cliente.iterar_consulta({
+            "data_inicial": data_inicial.strftime(FORMATO_DATA),
+            "data_final": data_final.strftime(FORMATO_DATA),
+        })
+
+    def chave(self, registro: dict) -> str:
+        return registro["expediente"]
+
+    def data(self, registro: dict) -> date:
+        return datetime.strptime(registro.get("dataAtualizacao") or registro["data"], FORMATO_DATA).date()
+
+    def conteudo(self, registro: dict) -> dict:
+        # Os ids "protegidos" das bulas são tokens que mudam a cada consulta
+        return {campo: valor for campo, valor in registro.items() if not campo.endswith("Protegido")}
+
+    def documentos(self, registro: dict) -> dict:
+        return self.cliente.documentos_bula(registro)
+
+class FontePaginaDeclarativa(FonteSincronizavel):
+    """
+    Fonte sobre um page object declarativo com `buscar_por_periodo` (ex.: a
+    página gerada de configs/paginas/bulas.yaml): busca a janela na interface
+    e percorre a grade.
+    """
+
+    def __init__(self, pagina, colunas_chave: tuple, coluna_data: str = "data_publicacao",
+                 formato_data: str = FORMATO_DATA):
+        """
+        :param pagina: Instância de `PaginaDeclarativa`, já acessada.
+        :param colunas_chave: Colunas da grade que identificam o item (ex.: ('ato',)).
+        :param coluna_data: Coluna com a data de publicação.
+        :param formato_data: Formato da data na grade e nos campos de período.
+        """
+        self.pagina = pagina
+        self.nome = pagina.especificacao.nome
+        self.colunas_chave = colunas_chave
+        self.coluna_data = coluna_data
+        self.formato_data = formato_data
+
+    async def registros(self, data_inicial: date, data_final: date):
+        await self.pagina.buscar_por_periodo(data_inicial.strftime(self.formato_data),
+                                             data_final.strftime(self.formato_data))
+        async for registro in self.pagina.iterar_resultados():
+            yield registro
+
+    def chave(self, registro: dict) -> str:
+        return "|".join(registro.get(coluna, "") for coluna in self.colunas_chave)
+
+    def data(self, registro: dict) -> date:
+        return datetime.strptime(registro[self.coluna_data].strip(), self.formato_data).date()
+
+    def documentos(self, registro: dict) -> dict:
+        pdfs = [link for link in registro.get("links", []) if link.lower().split("?")[0].endswith(".pdf")]
+        return {f"documento_{i}": link for i, link in enumerate(pdfs, start=1)}
+
+async def _iterar(registros):
+    """Percorre os registros de uma fonte, sejam eles um gerador comum ou assíncrono."""
+    if hasattr(registros, "__aiter__"):
+        async for registro in registros:
+            yield registro
+    else:
+        for registro in registros:
+            yield registro
+
+class EstadoSincronizacao:
+    """Estado em SQLite: última data sincronizada por fonte e hash do conteúdo por item."""
+
+    def __init__(self, caminho: str = ARQUIVO_ESTADO):
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        self.conexao = sqlite3.connect(caminho)
+        self.conexao.executescript("""
+            CREATE TABLE IF NOT EXISTS fontes (
+                fonte TEXT PRIMARY KEY,
+                ultima_data TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS itens (
+                fonte TEXT NOT NULL,
+                chave TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                data TEXT NOT NULL,
+                sincronizado_em TEXT NOT NULL,
+                PRIMARY KEY (fonte, chave)
+            );
+        """)
+
+    def ultima_data(self, fonte: str):
+        linha = self.conexao.execute("SELECT ultima_data FROM fontes WHERE fonte = ?", (fonte,)).fetchone()
+        return date.fromisoformat(linha[0]) if linha else None
+
+    def hash_item(self, fonte: str, chave: str):
+        linha = self.conexao.execute("SELECT hash FROM itens WHERE fonte = ? AND chave = ?", (fonte, chave)).fetchone()
+        return linha[0] if linha else None
+
+    def registrar_item(self, fonte: str, chave: str, hash_conteudo: str, data_item: date):
+        self.conexao.execute(
+            "INSERT OR REPLACE INTO itens (fonte, chave, hash, data, sincronizado_em) VALUES (?, ?, ?, ?, ?)",
+            (fonte, chave, hash_conteudo, data_item.isoformat(), datetime.now().isoformat(timespec="seconds")),
+        )
+
+    def registrar_ultima_data(self, fonte: str, data_fonte: date):
+        self.conexao.execute("INSERT OR REPLACE INTO fontes (fonte, ultima_data) VALUES (?, ?)",
+                             (fonte, data_fonte.isoformat()))
+        self.conexao.commit()
+
+    def salvar(self):
+        self.conexao.commit()
+
+    def fechar(self):
+        self.conexao.close()
+
+def hash_conteudo(conteudo: dict) -> str:
+    return hashlib.sha256(json.dumps(conteudo, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+class SincronizadorIncremental:
+    """
+    Sincronização incremental de uma `FonteSincronizavel`.
+
+    Consulta apenas a janela desde a última data sincronizada (com alguns dias
+    de sobreposição para publicações tardias), compara o hash de cada item com
+    o guardado, baixa em paralelo (com limite) os documentos dos itens novos ou
+    alterados e registra cada mudança em um feed JSONL.
+    """
+
+    def __init__(self, fonte: FonteSincronizavel, estado: EstadoSincronizacao = None,
+                 arquivo_feed: str = ARQUIVO_FEED, diretorio_documentos: str = DIRETORIO_DOCUMENTOS,
+                 paralelismo: int = 4, sobreposicao_dias: int = 1, janela_inicial_dias: int = 30,
+                 baixar_documentos: bool = True):
+        """
+        :param fonte: Fonte a sincronizar.
+        :param estado: Estado persistente; se None, usa `reports/sincronizacao.sqlite`.
+        :param arquivo_feed: Arquivo JSONL em que as mudanças são acrescentadas.
+        :param diretorio_documentos: Diretório dos documentos baixados (nome = hash do conteúdo).
+        :param paralelismo: Downloads simultâneos.
+        :param sobreposicao_dias: Dias consultados de novo antes da última data sincronizada.
+        :param janela_inicial_dias: Janela da primeira sincronização, sem estado anterior.
+        :param baixar_documentos: Se False, apenas detecta as mudanças.
+        """
+        self.fonte = fonte
+        self.estado = estado or EstadoSincronizacao()
+        self.arquivo_feed = arquivo_feed
+        self.diretorio_documentos = diretorio_documentos
+        self.paralelismo = paralelismo
+        self.sobreposicao_dias = sobreposicao_dias
+        self.janela_inicial_dias = janela_inicial_dias
+        self.baixar_documentos = baixar_documentos
+        self.pipeline = PipelineBulasPdf(diretorio_documentos, concorrencia=paralelismo, extrair=False)
+
+    def janela(self, inicio: date = None, fim: date = None):
+        """Janela de datas da próxima sincronização."""
+        fim = fim or date.today()
+        if inicio is None:
+            ultima = self.estado.ultima_data(self.fonte.nome)
+            if ultima is None:
+                inicio = fim - timedelta(days=self.janela_inicial_dias)
+            else:
+                inicio = ultima - timedelta(days=self.sobreposicao_dias)
+        return inicio, fim
+
+    async def _baixar_documentos(self, mudancas: list):
+        por_chave = {mudanca["chave"]: mudanca for mudanca in mudancas}
+        itens = [(mudanca["chave"], nome, url)
+                 for mudanca in mudancas for nome, url in self.fonte.documentos(mudanca["registro"]).items()]
+        async for documento in self.pipeline.processar(itens):
+            if documento.erro:
+                por_chave[documento.chave]["documentos"][documento.tipo] = {"url": documento.url, "erro": documento.erro}
+            else:
+                por_chave[documento.chave]["documentos"][documento.tipo] = {"caminho": documento.caminho,
+                                                                           "sha256": documento.sha256}
+
+    async def sincronizar(self, inicio: date = None, fim: date = None) -> list:
+        """
+        Executa uma sincronização e devolve as mudanças encontradas.
+
+        :param inicio: Início da janela; se None, a partir do estado salvo.
+        :param fim: Fim da janela; se None, hoje.
+        """
+        inicio, fim = self.janela(inicio, fim)
+        logging.info(f"[{self.fonte.nome}] Sincronizando de {inicio:%d/%m/%Y} a {fim:%d/%m/%Y}...")
+        mudancas, vistos, ultima = [], 0, self.estado.ultima_data(self.fonte.nome)
+        async for registro in _iterar(self.fonte.registros(inicio, fim)):
+            vistos += 1
+            chave = self.fonte.chave(registro)
+            data_item = self.fonte.data(registro)
+            ultima = max(ultima, data_item) if ultima else data_item
+            novo_hash = hash_conteudo(self.fonte.conteudo(registro))
+            hash_anterior = self.estado.hash_item(self.fonte.nome, chave)
+            if hash_anterior == novo_hash:
+                continue
+            mudancas.append({
+                "fonte": self.fonte.nome,
+                "chave": chave,
+                "mudanca": "novo" if hash_anterior is None else "alterado",
+                "data": data_item.isoformat(),
+                "hash": novo_hash,
+                "registro": registro,
+                "documentos": {},
+            })
+
+        if self.baixar_documentos and mudancas:
+            await self._baixar_documentos(mudancas)
+
+        detectado_em = datetime.now().isoformat(timespec="seconds")
+        os.makedirs(os.path.dirname(self.arquivo_feed) or ".", exist_ok=True)
+        with open(self.arquivo_feed, "a", encoding="utf-8") as feed:
+            for mudanca in mudancas:
+                feed.write(json.dumps({**mudanca, "detectado_em": detectado_em}, ensure_ascii=False) + "\n")
+                data_item = date.fromisoformat(mudanca["data"])
+                if any("erro" in documento for documento in mudanca["documentos"].values()):
+                    # Sem registrar o item nem avançar além dele: a próxima sincronização tenta de novo
+                    ultima = min(ultima, data_item - timedelta(days=1))
+                    continue
+                self.estado.registrar_item(self.fonte.nome, mudanca["chave"], mudanca["hash"], data_item)
+        self.estado.salvar()
+        if ultima:
+            self.estado.registrar_ultima_data(self.fonte.nome, ultima)
+        logging.info(f"[{self.fonte.nome}] {vistos} itens consultados, {len(mudancas)} mudanças.")
+        return mudancas
+
+    def fechar(self):
+        self.pipeline.fechar()
+        self.estado.fechar()
+
+def main():
+    parser = argparse.ArgumentParser(description="Sincronização incremental do bulário da ANVISA.")
+    parser.add_argument("--desde", help="Data inicial (dd/mm/aaaa); por padrão, a partir do estado salvo.")
+    parser.add_argument("--base-url", default=None, help="URL base do portal (padrão: ANVISA_URL_PORTAL ou o portal real).")
+    parser.add_argument("--feed", default=ARQUIVO_FEED, help="Arquivo JSONL de mudanças.")
+    parser.add_argument("--paralelismo", type=int, default=4, help="Downloads simultâneos.")
+    parser.add_argument("--sem-documentos", action="store_true", help="Não baixa os PDFs das bulas.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    cliente = BulasApiClient(base_url=args.base_url, itens_por_pagina=50)
+    sincronizador = SincronizadorIncremental(FonteBulario(cliente), arquivo_feed=args.feed,
+                                             paralelismo=args.paralelismo,
+                                             baixar_documentos=not args.sem_documentos)
+    inicio = datetime.strptime(args.desde, FORMATO_DATA).date() if args.desde else None
+    try:
+        asyncio.run(sincronizador.sincronizar(inicio))
+    finally:
+        sincronizador.fechar()
+        cliente.fechar()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import asyncio
+from datetime import date
+from tests.pages.base.sincrono import LoopSincrono, Sincrono
+from tests.services.sincronizacao_service import FontePaginaDeclarativa, _iterar
+
+class PaginaPeriodo:
+    """Page object assíncrono mínimo, com a mesma forma das páginas declarativas."""
+
+    class especificacao:
+        nome = "legislacao"
+
+    def __init__(self):
+        self.periodo = None
+
+    async def buscar_por_periodo(self, data_inicial, data_final):
+        await asyncio.sleep(0)
+        self.periodo = (data_inicial, data_final)
+
+    async def iterar_resultados(self):
+        for ato in ("RDC 1", "RDC 2"):
+            await asyncio.sleep(0)
+            yield {"ato": ato, "data_publicacao": "02/01/2024"}
+
+def test_wrapper_sincrono_executa_page_object_assincrono():
+    """Corrotinas são aguardadas e geradores assíncronos viram geradores comuns no loop próprio."""
+    with LoopSincrono() as loop:
+        pagina = Sincrono(PaginaPeriodo(), loop)
+        pagina.buscar_por_periodo("01/01/2024", "31/01/2024")
+        assert pagina.periodo == ("01/01/2024", "31/01/2024")
+        assert [r["ato"] for r in pagina.iterar_resultados()] == ["RDC 1", "RDC 2"]
+
+def test_fonte_declarativa_percorre_resultados_assincronos():
+    """A sincronização consome tanto fontes síncronas (API) quanto assíncronas (páginas)."""
+    fonte = FontePaginaDeclarativa(PaginaPeriodo(), colunas_chave=("ato",))
+
+    async def coletar(registros):
+        return [fonte.chave(registro) async for registro in _iterar(registros)]
+
+    assert asyncio.run(coletar(fonte.registros(date(2024, 1, 1), date(2024, 1, 31)))) == ["RDC 1", "RDC 2"]
+    assert fonte.pagina.periodo == ("01/01/2024", "31/01/2024")
+    assert asyncio.run(coletar(iter([{"ato": "RDC 3"}]))) == ["RDC 3"]
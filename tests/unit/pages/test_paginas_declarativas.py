@@ -0,0 +1,174 @@
+import asyncio
+import glob
+import itertools
+import json
+import os
+import pytest
+from tests.pages import DIRETORIO_ESPECIFICACOES
+from tests.pages.base.pagina_declarativa import (BUSCA_MULTISELECT_PADRAO, LINHAS_GRADE_PADRAO, BuscaIndisponivel,
+                                                 PaginaDeclarativa, carregar_especificacao, compilar_especificacao,
+                                                 criar_pagina)
+from tests.pages.base.resolvedor_seletores import JS_ASSINATURA_BUILD, JS_AVALIAR_CANDIDATOS, ResolvedorSeletores
+from tests.pages.documentos.bulas_page import BulasPage
+
+ESPECIFICACAO = {
+    "nome": "teste",
+    "url": "https://consultas.anvisa.gov.br/#/teste/",
+    "endpoint": "**/api/consulta/teste**",
+    "campos": {
+        "nome": {"seletores": ["input[ng-model='filter.nomeProduto']", "input#txtNome"]},
+        "numero_registro": "input#txtNumeroRegistro",
+        "categorias": {"seletores": "div.anvs-multiselect", "tipo": "multiselect"},
+    },
+    "buscas": {"buscar_por_nome": "nome", "buscar_por_categoria": ["categorias"]},
+    "grade": {"colunas": ["produto", "registro"]},
+}
+
+class PageFalsa:
+    """
+    Página falsa: `estados` diz o que JS_AVALIAR_CANDIDATOS devolve para cada
+    seletor CSS; `lista_fecha` fecha a lista do multiselect a cada opção clicada.
+    """
+
+    def __init__(self, estados=None, lista_fecha=False):
+        self.estados = dict(estados or {})
+        self.lista_fecha = lista_fecha
+        self.lista_aberta = False
+        self.acoes = []
+
+    def on(self, evento, funcao):
+        pass
+
+    def remove_listener(self, evento, funcao):
+        pass
+
+    async def evaluate(self, script, argumento=None):
+        if script == JS_ASSINATURA_BUILD:
+            return "https://consultas.anvisa.gov.br/app.js"
+        if script == JS_AVALIAR_CANDIDATOS:
+            return [self.estados.get(c["css"]) for c in argumento]
+        return None
+
+    async def wait_for_selector(self, seletor, state=None, timeout=None):
+        pass
+
+    async def is_visible(self, seletor):
+        return self.lista_aberta
+
+    async def fill(self, seletor, valor):
+        self.acoes.append(("fill", seletor, valor))
+
+    async def click(self, seletor):
+        self.acoes.append(("click", seletor))
+        if seletor == ESPECIFICACAO["campos"]["categorias"]["seletores"]:
+            self.lista_aberta = True
+        elif self.lista_fecha:
+            self.lista_aberta = False
+
+class PaginaTeste(PaginaDeclarativa):
+    especificacao = compilar_especificacao(ESPECIFICACAO)
+
+@pytest.fixture
+def pagina(tmp_path):
+    """Cria páginas de teste, cada uma com o próprio cache de seletores (um build por DOM falso)."""
+    paginas = itertools.count()
+
+    def criar(**kwargs):
+        pagina = PaginaTeste(PageFalsa(**kwargs))
+        arquivo = tmp_path / f"cache_seletores_{next(paginas)}.json"
+        pagina._resolvedor = ResolvedorSeletores(pagina.page, "PaginaTeste", str(arquivo))
+        return pagina
+    return criar
+
+def test_compilacao_mantem_a_ordem_dos_seletores_e_aplica_os_padroes():
+    """Seletores alternativos ficam na ordem declarada; buscas viram tuplas de campos; o resto tem padrão."""
+    especificacao = compilar_especificacao(ESPECIFICACAO)
+    nome = especificacao.campos["nome"]
+    assert nome.seletores == ("input[ng-model='filter.nomeProduto']", "input#txtNome")
+    assert nome.candidatos == [{"css": "input[ng-model='filter.nomeProduto']"}, {"css": "input#txtNome"}]
+    assert especificacao.campos["numero_registro"].seletores == ("input#txtNumeroRegistro",)
+    assert especificacao.campos["categorias"].seletor_busca == BUSCA_MULTISELECT_PADRAO
+    assert especificacao.buscas == {"buscar_por_nome": ("nome",), "buscar_por_categoria": ("categorias",)}
+    assert (especificacao.titulo, especificacao.linhas_grade, especificacao.colunas) == \
+        ("teste", LINHAS_GRADE_PADRAO, ("produto", "registro"))
+
+    with pytest.raises(ValueError, match="'buscas'"):
+        compilar_especificacao({k: v for k, v in ESPECIFICACAO.items() if k != "buscas"})
+    with pytest.raises(ValueError, match="cnpj"):
+        compilar_especificacao({**ESPECIFICACAO, "buscas": {"buscar_por_empresa": "cnpj"}})
+
+def test_especificacoes_do_repositorio_compilam(tmp_path):
+    """Todas as especificações de configs/paginas compilam; YAML e JSON dão o mesmo resultado."""
+    arquivos = sorted(glob.glob(os.path.join(DIRETORIO_ESPECIFICACOES, "*.yaml")))
+    assert arquivos
+    for arquivo in arquivos:
+        nome = os.path.basename(arquivo)[:-len(".yaml")]
+        especificacao = carregar_especificacao(nome)
+        assert especificacao.nome == nome and especificacao.buscas
+
+    (tmp_path / "teste.json").write_text(json.dumps(ESPECIFICACAO))
+    assert carregar_especificacao("teste", str(tmp_path)) == compilar_especificacao(ESPECIFICACAO)
+    with pytest.raises(FileNotFoundError):
+        carregar_especificacao("inexistente", str(tmp_path))
+
+def test_especificacao_do_bulario_usa_os_seletores_da_bulas_page():
+    """A especificação do bulário preenche os mesmos campos que a `BulasPage` e lê a mesma grade."""
+    especificacao = carregar_especificacao("bulas")
+    bulas = BulasPage(PageFalsa())
+    campos = {"nome": bulas.campo_nome_medicamento, "numero_registro": bulas.campo_numero_registro,
+              "numero_expediente": bulas.campo_numero_expediente, "cnpj": bulas.campo_empresa_cnpj,
+              "data_inicial": bulas.campo_data_inicial, "data_final": bulas.campo_data_final,
+              "categorias": bulas.dropdown_categoria}
+    assert {nome: campo.seletores[0] for nome, campo in especificacao.campos.items()} == campos
+    assert especificacao.campos["categorias"].seletor_busca == bulas.campo_busca_categoria
+    assert (especificacao.endpoint, especificacao.linhas_grade, especificacao.botao_consultar,
+            especificacao.contador) == (BulasPage.endpoint_consulta, BulasPage.seletor_resultados,
+                                        bulas.botao_consultar, bulas.contador_resultados)
+    assert especificacao.colunas == ("produto", "empresa", "expediente", "data_publicacao")
+    assert set(especificacao.buscas) == {"buscar_por_nome", "buscar_por_numero_registro",
+                                         "buscar_por_numero_expediente", "buscar_por_empresa",
+                                         "buscar_por_categoria", "buscar_por_periodo"}
+
+def test_seletor_alternativo_so_vence_sem_o_preferido(pagina):
+    """A primeira alternativa disponível na ordem declarada vence, ainda que outra venha antes no DOM."""
+    preferido, alternativo = PaginaTeste.especificacao.campos["nome"].seletores
+    ambos = pagina(estados={preferido: True, alternativo: True})
+    asyncio.run(ambos.preencher("nome", "Novalgina"))
+    assert ambos.page.acoes == [("fill", f"css={preferido}", "Novalgina")]
+
+    so_alternativo = pagina(estados={alternativo: True})
+    asyncio.run(so_alternativo.preencher("nome", "Novalgina"))
+    assert so_alternativo.page.acoes == [("fill", f"css={alternativo}", "Novalgina")]
+
+    desabilitado = pagina(estados={preferido: False, alternativo: True})
+    assert asyncio.run(desabilitado.seletor("nome")) == f"css={preferido}"
+    assert asyncio.run(desabilitado.seletor("numero_registro")) == "input#txtNumeroRegistro"
+
+def test_multiselect_reabre_a_lista_fechada_pela_opcao(pagina):
+    """Cada opção é filtrada e clicada dentro do multiselect; a lista é reaberta se fechou com o clique."""
+    categorias = PaginaTeste.especificacao.campos["categorias"]
+    multiselect = pagina(lista_fecha=True)
+    asyncio.run(multiselect.preencher("categorias", ["Novo", "Similar"]))
+    assert multiselect.page.acoes == [
+        ("click", categorias.seletores[0]),
+        ("fill", BUSCA_MULTISELECT_PADRAO, "Novo"),
+        ("click", f"{categorias.seletores[0]} >> div.option:text-is(\"Novo\")"),
+        ("click", categorias.seletores[0]),
+        ("fill", BUSCA_MULTISELECT_PADRAO, "Similar"),
+        ("click", f"{categorias.seletores[0]} >> div.option:text-is(\"Similar\")"),
+    ]
+
+def test_criar_pagina_gera_a_classe_e_recusa_buscas_nao_declaradas():
+    """A classe gerada expõe endpoint e seletores da especificação; buscas fora dela levantam BuscaIndisponivel."""
+    BulasDeclarativaPage = criar_pagina("bulas", "BulasDeclarativaPage")
+    assert criar_pagina("bulas", "BulasDeclarativaPage") is BulasDeclarativaPage
+    assert criar_pagina("bulas").__name__ == "BulasPage"
+    assert BulasDeclarativaPage.endpoint_consulta == BulasDeclarativaPage.especificacao.endpoint
+    assert BulasDeclarativaPage.seletor_resultados == BulasDeclarativaPage.especificacao.linhas_grade
+    assert BulasDeclarativaPage.oferece("buscar_por_empresa") and not PaginaTeste.oferece("buscar_por_empresa")
+
+    pagina = PaginaTeste(PageFalsa())
+    with pytest.raises(BuscaIndisponivel, match="buscar_por_empresa"):
+        asyncio.run(pagina.buscar_por_empresa("38391432000143"))
+    registro = pagina._registro_da_linha([{"texto": "NOVALGINA", "links": []}, {"texto": "183260003", "links": ["/pdf"]}])
+    assert registro == {"produto": "NOVALGINA", "registro": "183260003", "links": ["/pdf"]}
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import os
+import pytest
+from tests.pages.base.resolvedor_seletores import (JS_ASSINATURA_BUILD, JS_AVALIAR_CANDIDATOS, JS_CANDIDATO_MARCADO,
+                                                   ResolvedorSeletores, seletor_playwright)
+from tests.pages.documentos.bulas_page import BulasPage
+
+class Mouse:
+    async def wheel(self, x, y):
+        pass
+
+class PaginaFalsa:
+    """
+    Página falsa: `estados` diz o que JS_AVALIAR_CANDIDATOS devolve para cada
+    seletor (True, False ou None) e `marcam` quais seletores, clicados,
+    marcam a opção.
+    """
+
+    def __init__(self, estados=None, marcam=()):
+        self.estados = dict(estados or {})
+        self.marcam = set(marcam)
+        self.marcados = set()
+        self.avaliacoes = []
+        self.cliques = []
+        self.mouse = Mouse()
+
+    async def evaluate(self, script, argumento=None):
+        if script == JS_ASSINATURA_BUILD:
+            return "https://consultas.anvisa.gov.br/app.js"
+        if script == JS_AVALIAR_CANDIDATOS:
+            self.avaliacoes.append([seletor_playwright(c) for c in argumento])
+            return [self.estados.get(seletor_playwright(c)) for c in argumento]
+        if script == JS_CANDIDATO_MARCADO:
+            return seletor_playwright(argumento) in self.marcados
+        return None
+
+    async def wait_for_function(self, *args, **kwargs):
+        pass
+
+    async def is_visible(self, seletor):
+        return True
+
+    async def screenshot(self, **kwargs):
+        return b"png"
+
+    async def click(self, seletor):
+        self.cliques.append(seletor)
+        if seletor in self.marcam:
+            self.marcados.add(seletor)
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1000.0
+
+    def __call__(self) -> float:
+        return self.agora
+
+CANDIDATOS = [{"css": "div.option", "texto": "Novo"}, {"css": "[data-value='Novo']"}, {"papel": "option", "nome": "Novo"}]
+SELETORES = [seletor_playwright(c) for c in CANDIDATOS]
+
+@pytest.fixture
+def arquivo(tmp_path):
+    return str(tmp_path / "cache_seletores.json")
+
+def test_gravacoes_de_workers_diferentes_sao_mescladas(arquivo):
+    """Cada processo grava só o que alterou: o cache de um worker não apaga o do outro."""
+    async def cenario():
+        primeiro = ResolvedorSeletores(PaginaFalsa({SELETORES[1]: True}), "BulasPage", arquivo)
+        segundo = ResolvedorSeletores(PaginaFalsa({SELETORES[2]: True}), "BulasPage", arquivo)
+        assert await primeiro.resolver("opcao", CANDIDATOS) == SELETORES[1]
+        await segundo._carregar()  # Carregado antes da gravação do primeiro
+        assert await segundo.resolver("categoria", CANDIDATOS) == SELETORES[2]
+        assert await primeiro.resolver("outro", CANDIDATOS) == SELETORES[1]
+
+    asyncio.run(cenario())
+    cache = json.load(open(arquivo))
+    assert list(cache.values()) == [{"opcao": 1, "categoria": 2, "outro": 1}]
+    assert not [nome for nome in os.listdir(os.path.dirname(arquivo)) if nome.endswith((".trava", ".tmp"))]
+
+def test_ausencia_expira(arquivo):
+    """Um campo ausente não é esperado por `validade_ausente` segundos; depois, volta a ser procurado."""
+    relogio = Relogio()
+    pagina = PaginaFalsa()
+
+    async def cenario():
+        resolvedor = ResolvedorSeletores(pagina, "BulasPage", arquivo, validade_ausente=60, relogio=relogio)
+        assert await resolvedor.resolver("opcao", CANDIDATOS) is None
+        assert await resolvedor.conhecido_ausente("opcao")
+        relogio.agora += 61
+        outro_worker = ResolvedorSeletores(pagina, "BulasPage", arquivo, validade_ausente=60, relogio=relogio)
+        assert not await outro_worker.conhecido_ausente("opcao")
+
+        pagina.estados[SELETORES[0]] = True  # O campo só demorou a renderizar
+        assert await resolvedor.resolver("opcao", CANDIDATOS) == SELETORES[0]
+        assert not await resolvedor.conhecido_ausente("opcao")
+        await resolvedor.registrar("Botão Consultar", False)
+        await resolvedor.registrar("Botão Consultar", True)
+        assert not await resolvedor.conhecido_ausente("Botão Consultar")
+
+    asyncio.run(cenario())
+    assert list(json.load(open(arquivo)).values()) == [{"opcao": 0, "Botão Consultar": 0}]
+
+def test_estrategia_descartada_da_lugar_as_demais(arquivo):
+    """Descartada a estratégia memorizada, os outros candidatos concorrem; os excluídos não."""
+    pagina = PaginaFalsa({s: True for s in SELETORES})
+
+    async def cenario():
+        resolvedor = ResolvedorSeletores(pagina, "BulasPage", arquivo)
+        assert await resolvedor.resolver("opcao", CANDIDATOS) == SELETORES[0]
+        await resolvedor.esquecer("opcao")
+        assert await resolvedor.resolver("opcao", CANDIDATOS, excluir={SELETORES[0]}) == SELETORES[1]
+        assert pagina.avaliacoes[-1] == SELETORES[1:]
+        # Sem candidatos restantes, o campo não é dado como ausente: ele foi encontrado, só não funcionou
+        assert await resolvedor.resolver("opcao", CANDIDATOS, excluir=set(SELETORES)) is None
+        assert not await resolvedor.conhecido_ausente("opcao")
+
+    asyncio.run(cenario())
+
+def test_dropdown_descarta_a_estrategia_que_nao_marca_a_opcao(arquivo, tmp_path, monkeypatch):
+    """Clicada a opção, ela precisa ficar marcada; senão a estratégia é trocada pela próxima que funcione."""
+    monkeypatch.chdir(tmp_path)  # Screenshot da falha em reports/ do diretório temporário
+    pagina = PaginaFalsa({s: True for s in SELETORES}, marcam={SELETORES[1]})
+    bulas = BulasPage(pagina)
+    bulas._resolvedor = ResolvedorSeletores(pagina, "BulasPage", arquivo)
+    asyncio.run(bulas.resolvedor.registrar("opcao_categoria", True))  # Estratégia 0 memorizada
+
+    assert asyncio.run(bulas.detectar_estrutura_dropdown("Novo")) == SELETORES[1]
+    assert pagina.cliques == SELETORES[:2]
+    assert list(json.load(open(arquivo)).values()) == [{"opcao_categoria": 4}]  # [data-value] na lista da página
+
+    # Nenhuma estratégia marca a opção: todas são tentadas uma vez e nenhuma fica memorizada
+    pagina.marcam.clear()
+    pagina.marcados.clear()
+    pagina.cliques.clear()
+    with pytest.raises(ValueError, match="Novo"):
+        asyncio.run(bulas.detectar_estrutura_dropdown("Novo"))
+    assert pagina.cliques == [SELETORES[1], SELETORES[0], SELETORES[2]]
+    assert list(json.load(open(arquivo)).values()) == [{}]
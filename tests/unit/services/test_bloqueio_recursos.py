@@ -0,0 +1,93 @@
+import asyncio
+import json
+import pytest
+from tests.services.bloqueio_recursos import PerfilBloqueio
+
+PORTAL = "https://consultas.anvisa.gov.br"
+
+class Requisicao:
+    def __init__(self, url, resource_type):
+        self.url = url
+        self.resource_type = resource_type
+
+class RotaFalsa:
+    def __init__(self, url, tipo):
+        self.request = Requisicao(url, tipo)
+        self.resultado = None
+
+    async def fallback(self):
+        self.resultado = "seguiu"
+
+    async def abort(self, motivo):
+        self.resultado = motivo
+
+class Resposta:
+    def __init__(self, url, tipo, tamanho):
+        self.url = url
+        self.request = Requisicao(url, tipo)
+        self.headers = {"content-length": tamanho}
+
+@pytest.fixture
+def arquivo(tmp_path):
+    return str(tmp_path / "tamanhos.json")
+
+@pytest.mark.parametrize("url, tipo, bloqueado", [
+    (f"{PORTAL}/api/consulta/bulario?count=10", "xhr", False),
+    (f"{PORTAL}/#/bulario/", "document", False),
+    (f"{PORTAL}/app.js", "script", False),
+    (f"{PORTAL}/estilos.css", "stylesheet", False),
+    (f"{PORTAL}/logo.png", "image", True),
+    (f"{PORTAL}/fontes/roboto.woff2", "font", True),
+    (f"{PORTAL}/video.mp4", "media", True),
+    ("https://www.google-analytics.com/analytics.js", "script", True),
+    ("https://www.googletagmanager.com/gtm.js?id=X", "script", True),
+    ("https://barra.sistema.gov.br/v1/barra.js", "script", True),
+    ("https://vlibras.gov.br/app/vlibras-plugin.js", "script", True),
+])
+def test_perfil_padrao(url, tipo, bloqueado, arquivo):
+    """Imagens, fontes, mídia e rastreadores são bloqueados; documento, scripts do portal, XHR e CSS passam."""
+    assert PerfilBloqueio(arquivo_tamanhos=arquivo).deve_bloquear(url, tipo) is bloqueado
+
+def test_css_permissoes_e_padroes_proprios(arquivo):
+    """`bloquear_css` acrescenta as folhas de estilo; a lista de permissões vence os tipos e os padrões."""
+    perfil = PerfilBloqueio(bloquear_css=True, padroes_permitidos=[f"{PORTAL}/imagens/captcha*"],
+                            arquivo_tamanhos=arquivo)
+    assert perfil.deve_bloquear(f"{PORTAL}/estilos.css", "stylesheet")
+    assert not perfil.deve_bloquear(f"{PORTAL}/imagens/captcha.png", "image")
+    assert perfil.deve_bloquear(f"{PORTAL}/imagens/logo.png", "image")
+
+    proprio = PerfilBloqueio(tipos_bloqueados=(), padroes_bloqueados=["*hotjar.com*"], arquivo_tamanhos=arquivo)
+    assert not proprio.deve_bloquear(f"{PORTAL}/logo.png", "image")
+    assert proprio.deve_bloquear("https://static.hotjar.com/c.js", "script")
+    assert not proprio.deve_bloquear("https://www.google-analytics.com/analytics.js", "script")
+
+def test_perfil_do_ambiente(arquivo, monkeypatch):
+    """ANVISA_BLOQUEIO_RECURSOS=0 desativa o perfil; ANVISA_BLOQUEAR_CSS=1 inclui o CSS."""
+    monkeypatch.setenv("ANVISA_BLOQUEIO_RECURSOS", "0")
+    assert PerfilBloqueio.do_ambiente() is None
+    monkeypatch.setenv("ANVISA_BLOQUEIO_RECURSOS", "1")
+    monkeypatch.delenv("ANVISA_BLOQUEAR_CSS", raising=False)
+    assert "stylesheet" not in PerfilBloqueio.do_ambiente().tipos_bloqueados
+    monkeypatch.setenv("ANVISA_BLOQUEAR_CSS", "1")
+    assert "stylesheet" in PerfilBloqueio.do_ambiente().tipos_bloqueados
+
+def test_interceptacao_conta_bloqueios_e_bytes_economizados(arquivo):
+    """Execuções visuais aprendem os tamanhos; as demais abortam o recurso e somam o que economizaram."""
+    visual = PerfilBloqueio(arquivo_tamanhos=arquivo)
+    visual.registrar_resposta(Resposta(f"{PORTAL}/logo.png", "image", "2048"))
+    visual.registrar_resposta(Resposta(f"{PORTAL}/app.js", "script", "9999"))  # Não seria bloqueado
+    visual.salvar_tamanhos()
+    assert json.load(open(arquivo)) == {f"{PORTAL}/logo.png": 2048}
+
+    perfil = PerfilBloqueio(arquivo_tamanhos=arquivo)
+    rotas = [RotaFalsa(f"{PORTAL}/logo.png", "image"), RotaFalsa(f"{PORTAL}/outra.png", "image"),
+             RotaFalsa(f"{PORTAL}/app.js", "script")]
+
+    async def interceptar():
+        for rota in rotas:
+            await perfil.interceptar(rota)
+
+    asyncio.run(interceptar())
+    assert [rota.resultado for rota in rotas] == ["blockedbyclient", "blockedbyclient", "seguiu"]
+    assert (perfil.bloqueados["image"], perfil.bytes_economizados, perfil.sem_tamanho_conhecido) == (2, 2048, 1)
+    assert perfil.resumo() == "Requisições bloqueadas: 2 (image=2); ~2.0 KiB economizados (1 sem tamanho conhecido)"
@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+from tests.services.browser_service import BrowserService
+
+TAMANHO_POOL = 2
+
+class PageFalsa:
+    def __init__(self, contexto):
+        self.context = contexto
+        self.fechada = False
+
+    def set_default_timeout(self, timeout):
+        pass
+
+    def is_closed(self):
+        return self.fechada
+
+    async def close(self):
+        self.fechada = True
+        self.context.pages.remove(self)
+
+class ContextoFalso:
+    def __init__(self):
+        self.pages = []
+
+    async def new_page(self):
+        page = PageFalsa(self)
+        self.pages.append(page)
+        return page
+
+    async def clear_cookies(self):
+        pass
+
+class PaginaInstavel:
+    """Page object cuja navegação e cujo reset falham enquanto houver falhas programadas."""
+    falhas_navegacao = 0
+    falhas_reset = 0
+
+    def __init__(self, page, browser_service):
+        self.page = page
+
+    async def acessar_pagina(self):
+        if PaginaInstavel.falhas_navegacao:
+            PaginaInstavel.falhas_navegacao -= 1
+            raise TimeoutError("Portal não respondeu")
+
+    async def restaurar_estado_inicial(self):
+        if PaginaInstavel.falhas_reset:
+            PaginaInstavel.falhas_reset -= 1
+            raise TimeoutError("Reset não concluído")
+        return "formulario"
+
+@pytest.fixture
+def service():
+    service = BrowserService(headless=True, reuse_session=False, tamanho_pool=TAMANHO_POOL, compartilhado=False,
+                             bloqueio_recursos=False, cache_consultas=False, perfil_persistente=False)
+    service._pool = asyncio.Queue()
+    for _ in range(TAMANHO_POOL):
+        contexto = ContextoFalso()
+        service._contextos_pool.append(contexto)
+        service._pool.put_nowait(contexto)
+    return service
+
+def test_falhas_de_aquecimento_e_reset_devolvem_o_contexto(service):
+    """Mais falhas que contextos no pool não o esgotam: cada uma fecha a página e devolve o contexto."""
+    PaginaInstavel.falhas_navegacao = TAMANHO_POOL + 1
+
+    async def cenario():
+        for _ in range(TAMANHO_POOL + 1):
+            with pytest.raises(TimeoutError, match="Portal"):
+                async with service.pagina_aquecida(PaginaInstavel):
+                    pass
+        async with service.pagina_aquecida(PaginaInstavel) as pagina:
+            assert not pagina.page.is_closed()
+
+        PaginaInstavel.falhas_reset = TAMANHO_POOL + 1
+        for _ in range(TAMANHO_POOL + 1):
+            with pytest.raises(TimeoutError, match="Reset"):
+                await service.adquirir_pagina_aquecida(PaginaInstavel)
+            async with service.pagina_aquecida(PaginaInstavel):  # Sem ociosa: navega em um contexto devolvido
+                pass
+        assert pagina.page.is_closed()
+        return await service.adquirir_pagina_aquecida(PaginaInstavel)
+
+    pagina = asyncio.run(asyncio.wait_for(cenario(), timeout=5))
+    assert pagina.page.context.pages == [pagina.page]
+    assert service._pool.qsize() == TAMANHO_POOL - 1
+    assert all(len(contexto.pages) <= 1 for contexto in service._contextos_pool)
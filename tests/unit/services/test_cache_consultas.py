@@ -0,0 +1,38 @@
+import requests
+from tests.config.test_data import TEST_DATA_BULAS
+from tests.mock.servidor_consultas import ServidorConsultas
+from tests.services.cache_consultas import CacheConsultas
+
+def test_cache_aprende_empresas_e_sugestoes_dos_xhrs(tmp_path):
+    """As respostas do modal de empresas e do autocomplete alimentam o cache, compartilhado via arquivo."""
+    caminho = str(tmp_path / "cache.sqlite")
+    cache = CacheConsultas(caminho)
+    with ServidorConsultas() as servidor:
+        for rota, params in (("/api/consulta/empresas", {"filter[razaoSocial]": "opella"}),
+                             ("/api/consulta/sugestoes", {"campo": "nomeProduto", "termo": "novalg"})):
+            resposta = requests.get(f"{servidor.url}{rota}", params=params, timeout=5)
+            cache.registrar_resposta(resposta.url, resposta.json())
+
+    outro_worker = CacheConsultas(caminho)
+    empresa = outro_worker.empresa_por_razao_social(f"  {TEST_DATA_BULAS['nome_empresa'].lower()} ")
+    assert empresa == {"cnpj": "38391432000143", "razaoSocial": TEST_DATA_BULAS["nome_empresa"]}
+    assert outro_worker.empresa_por_cnpj("38.391.432/0001-43") == empresa
+    assert "NOVALGINA" in outro_worker.sugestoes("nomeProduto", "NOVALG")
+    assert outro_worker.sugestoes("nomeProduto", "dorflex") is None
+    assert (outro_worker.acertos, outro_worker.faltas) == (3, 1)
+
+def test_cache_expira_e_descarta_as_menos_usadas(tmp_path):
+    """Entradas vencidas não são devolvidas; acima da capacidade, sai a usada há mais tempo."""
+    vencido = CacheConsultas(str(tmp_path / "vencido.sqlite"), ttl=-1)
+    vencido.guardar_empresa("38391432000143", TEST_DATA_BULAS["nome_empresa"])
+    assert vencido.empresa_por_cnpj("38391432000143") is None
+
+    cache = CacheConsultas(str(tmp_path / "lru.sqlite"), capacidade=2)
+    cache.guardar_sugestoes("nomeProduto", "a", ["A"])
+    cache.guardar_sugestoes("nomeProduto", "b", ["B"])
+    cache.conexao.execute("UPDATE consultas SET ultimo_acesso = ultimo_acesso - 60 WHERE chave = 'nomeProduto|b'")
+    assert cache.sugestoes("nomeProduto", "a") == ["A"]
+    cache.guardar_sugestoes("nomeProduto", "c", ["C"])
+    assert cache.sugestoes("nomeProduto", "b") is None
+    assert cache.sugestoes("nomeProduto", "a") == ["A"]
+    assert cache.sugestoes("nomeProduto", "c") == ["C"]
@@ -0,0 +1,92 @@
+import asyncio
+import base64
+import json
+import os
+from tests.services.cache_rede import CacheRede
+
+URL_CONSULTA = "https://consultas.anvisa.gov.br/api/consulta/bulario?count=10&filter%5BnomeProduto%5D=novalgina&page=1"
+
+def entrada(url, texto, status=200, metodo="GET", corpo=None, base64_=False):
+    requisicao = {"method": metodo, "url": url}
+    if corpo:
+        requisicao["postData"] = {"text": corpo}
+    conteudo = {"text": base64.b64encode(texto.encode()).decode() if base64_ else texto}
+    if base64_:
+        conteudo["encoding"] = "base64"
+    resposta = {"status": status, "content": conteudo,
+                "headers": [{"name": "Content-Type", "value": "application/json"},
+                            {"name": "Content-Length", "value": "999"}]}
+    return {"request": requisicao, "response": resposta}
+
+def gravar_har(diretorio, nome, entradas, mtime):
+    os.makedirs(diretorio, exist_ok=True)
+    caminho = os.path.join(diretorio, nome)
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump({"log": {"entries": entradas}}, f)
+    os.utime(caminho, (mtime, mtime))
+
+class Requisicao:
+    def __init__(self, method, url, post_data=None):
+        self.method = method
+        self.url = url
+        self.post_data = post_data
+
+class RotaFalsa:
+    def __init__(self, requisicao):
+        self.request = requisicao
+        self.atendida = None
+        self.abortada = None
+        self.continuada = False
+
+    async def fulfill(self, **kwargs):
+        self.atendida = kwargs
+
+    async def abort(self, motivo):
+        self.abortada = motivo
+
+    async def continue_(self):
+        self.continuada = True
+
+def test_chave_ignora_ordem_e_parametros_volateis():
+    """Método em maiúsculas, host e caminho; parâmetros ordenados e sem os voláteis; o corpo distingue POSTs."""
+    chave = CacheRede.chave("get", URL_CONSULTA)
+    assert chave == ("GET consultas.anvisa.gov.br/api/consulta/bulario"
+                     "?count=10&filter%5BnomeProduto%5D=novalgina&page=1")
+    reordenada = ("https://consultas.anvisa.gov.br/api/consulta/bulario"
+                  "?page=1&_=1700000000&filter%5BnomeProduto%5D=novalgina&nocache=3&count=10")
+    assert CacheRede.chave("GET", reordenada) == chave
+    assert CacheRede.chave("GET", URL_CONSULTA.replace("page=1", "page=2")) != chave
+    assert CacheRede.chave("GET", URL_CONSULTA.replace("consultas.", "outro.")) != chave
+    assert CacheRede.chave("GET", "https://h/p?vazio=&a=1") == "GET h/p?a=1&vazio="
+    assert CacheRede.chave("POST", URL_CONSULTA, '{"a": 1}') != CacheRede.chave("POST", URL_CONSULTA)
+
+def test_gravacao_indexacao_e_reproducao(tmp_path):
+    """O HAR mais recente prevalece, respostas sem status são ignoradas e a reprodução serve o conteúdo gravado."""
+    cache = CacheRede(diretorio=str(tmp_path), versao="v2")
+    opcoes = cache.opcoes_gravacao()
+    assert os.path.dirname(opcoes["record_har_path"]) == str(tmp_path / "v2")
+    assert (opcoes["record_har_content"], opcoes["record_har_mode"]) == ("embed", "full")
+
+    gravar_har(cache.diretorio, "antigo.har", [entrada(URL_CONSULTA, '{"versao": 1}'),
+                                               entrada("https://h/abortada", "", status=0)], mtime=1000)
+    gravar_har(cache.diretorio, "novo.har", [entrada(URL_CONSULTA, '{"versao": 2}'),
+                                             entrada("https://h/app.js", "js();", base64_=True),
+                                             entrada("https://h/api", "post", metodo="POST", corpo="q=1")], mtime=2000)
+    cache.carregar()
+    assert cache.buscar("GET", URL_CONSULTA + "&_=5")["content"]["text"] == '{"versao": 2}'
+    assert cache.buscar("GET", "https://h/abortada") is None
+    assert cache.buscar("POST", "https://h/api", "q=1") and cache.buscar("POST", "https://h/api", "q=2") is None
+
+    async def reproduzir(cache, requisicao):
+        rota = RotaFalsa(requisicao)
+        await cache.responder(rota)
+        return rota
+
+    rota = asyncio.run(reproduzir(cache, Requisicao("GET", "https://h/app.js")))
+    assert rota.atendida == {"status": 200, "headers": {"Content-Type": "application/json"}, "body": b"js();"}
+    rota = asyncio.run(reproduzir(cache, Requisicao("GET", "https://h/outra")))
+    assert rota.abortada == "internetdisconnected" and rota.atendida is None
+    assert (cache.acertos, cache.faltas) == (1, 1)
+
+    com_rede = CacheRede(diretorio=str(tmp_path), versao="v2", permitir_rede=True)
+    assert asyncio.run(reproduzir(com_rede, Requisicao("GET", "https://h/outra"))).continuada
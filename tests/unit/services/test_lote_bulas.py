@@ -0,0 +1,136 @@
+import asyncio
+import json
+import pytest
+from tests.pages.documentos.bulas_page import BulasPage, RegistroBula
+from tests.services.lote_service import ConsultaEmLote, ler_consultas
+from tests.services.resiliencia import CamadaResiliencia, ErroPortal
+
+class PaginaFalsa:
+    """
+    Page object falso do bulário: cada busca devolve uma linha com o valor
+    buscado. A empresa, como no portal, só é selecionada: a grade depende do
+    clique em Consultar.
+    """
+    botao_consultar = "input.btn.btn-primary[type='submit']"
+
+    def __init__(self, servico):
+        self.servico = servico
+        self.valor = None
+        self.empresa = None
+
+    async def buscar_por_numero_registro(self, numero: str):
+        self.servico.buscas.append(numero)
+        self.servico.ao_buscar(numero)
+        if self.servico.falhas.get(numero, 0) > 0:
+            self.servico.falhas[numero] -= 1
+            raise ErroPortal(f"HTTP 503 ao buscar {numero}")
+        if numero in self.servico.quebrados:
+            raise ValueError(f"grade não carregou para {numero}")
+        self.valor = numero
+
+    async def buscar_por_nome_empresa(self, razao_social: str):
+        self.empresa = razao_social
+
+    async def clicar_e_esperar_consulta(self, seletor: str):
+        assert seletor == self.botao_consultar
+        self.valor = self.empresa
+
+    async def obter_resultados(self):
+        if self.valor is None:
+            return []
+        return [RegistroBula(f"PRODUTO {self.valor}", "EMPRESA", self.valor, "14/01/2025")]
+
+class ServicoFalso:
+    """Substitui o `BrowserService`: a camada de resiliência é a real, as páginas são falsas."""
+
+    def __init__(self, falhas=None, quebrados=(), ao_buscar=lambda numero: None):
+        self.resiliencia = CamadaResiliencia(tentativas=3, espera_base=0, espera_maxima=0)
+        self.falhas = dict(falhas or {})
+        self.quebrados = set(quebrados)
+        self.ao_buscar = ao_buscar
+        self.buscas = []
+        self.endpoints = []
+
+    async def executar_consulta(self, classe_pagina, acao, idempotente=True, timeout=30000):
+        self.endpoints.append(classe_pagina.endpoint_consulta)
+        return await self.resiliencia.executar(classe_pagina.endpoint_consulta, lambda: acao(PaginaFalsa(self)),
+                                               idempotente=idempotente)
+
+@pytest.fixture(autouse=True)
+def diretorio_de_trabalho(tmp_path, monkeypatch):
+    """Eventos de resiliência e o limite de concorrência vão para reports/ do diretório temporário."""
+    monkeypatch.chdir(tmp_path)
+
+def escrever_entrada(caminho, quantidade: int):
+    caminho.write_text("".join(json.dumps({"id": f"r{n}", "tipo": "numero_registro", "valor": f"{n:09d}"}) + "\n"
+                               for n in range(quantidade)))
+    return str(caminho)
+
+def ler_saida(caminho) -> list:
+    return [json.loads(linha) for linha in open(caminho, encoding="utf-8") if linha.strip()]
+
+def test_leitura_de_csv_e_jsonl(tmp_path):
+    """CSV e JSONL viram consultas; sem `id`, vale o número da linha; tipos desconhecidos são recusados."""
+    (tmp_path / "entrada.csv").write_text("tipo,valor\nnome,Novalgina\ncnpj,38391432000143\n")
+    assert list(ler_consultas(str(tmp_path / "entrada.csv"))) == [
+        {"id": "1", "tipo": "nome", "valor": "Novalgina"},
+        {"id": "2", "tipo": "cnpj", "valor": "38391432000143"},
+    ]
+    (tmp_path / "entrada.jsonl").write_text('{"id": 7, "tipo": "numero_registro", "valor": 186200018}\n\n')
+    assert list(ler_consultas(str(tmp_path / "entrada.jsonl"))) == [
+        {"id": "7", "tipo": "numero_registro", "valor": "186200018"}]
+    (tmp_path / "invalida.jsonl").write_text('{"tipo": "bula", "valor": "x"}\n')
+    with pytest.raises(ValueError, match="Linha 1"):
+        list(ler_consultas(str(tmp_path / "invalida.jsonl")))
+
+def test_consultas_passam_pela_camada_de_resiliencia(tmp_path):
+    """Erros do portal são repetidos pela camada de resiliência, no endpoint do bulário."""
+    servico = ServicoFalso(falhas={"000000001": 2})
+    saida = str(tmp_path / "saida.jsonl")
+    asyncio.run(ConsultaEmLote(servico, paralelismo=2).executar(escrever_entrada(tmp_path / "entrada.jsonl", 3), saida))
+    assert {r["id"]: r["status"] for r in ler_saida(saida)} == {"r0": "ok", "r1": "ok", "r2": "ok"}
+    assert servico.buscas.count("000000001") == 3
+    assert set(servico.endpoints) == {BulasPage.endpoint_consulta}
+
+def test_busca_por_nome_da_empresa_dispara_a_consulta(tmp_path):
+    """Selecionar a empresa não consulta: sem o clique em Consultar, a linha sairia vazia e confirmada."""
+    entrada = tmp_path / "entrada.jsonl"
+    entrada.write_text(json.dumps({"id": "e1", "tipo": "nome_empresa", "valor": "OPELLA HEALTHCARE BRAZIL LTDA"}) + "\n")
+    saida = str(tmp_path / "saida.jsonl")
+    asyncio.run(ConsultaEmLote(ServicoFalso(), paralelismo=1).executar(str(entrada), saida))
+    [linha] = ler_saida(saida)
+    assert linha["status"] == "ok"
+    assert [r["produto"] for r in linha["resultado"]] == ["PRODUTO OPELLA HEALTHCARE BRAZIL LTDA"]
+
+def test_retomada_refaz_as_falhas_sem_duplicar_linhas(tmp_path):
+    """Consultas com erro não entram no checkpoint e, na retomada, são regravadas uma única vez."""
+    entrada = escrever_entrada(tmp_path / "entrada.jsonl", 5)
+    saida = str(tmp_path / "saida.jsonl")
+    primeiro = ServicoFalso(quebrados={"000000001", "000000003"})
+    assert asyncio.run(ConsultaEmLote(primeiro, paralelismo=2).executar(entrada, saida)) == 5
+    assert sorted(open(f"{saida}.checkpoint").read().split()) == ["r0", "r2", "r4"]
+
+    segundo = ServicoFalso()
+    assert asyncio.run(ConsultaEmLote(segundo, paralelismo=2).executar(entrada, saida)) == 2
+    assert sorted(segundo.buscas) == ["000000001", "000000003"]
+    linhas = ler_saida(saida)
+    assert sorted(r["id"] for r in linhas) == ["r0", "r1", "r2", "r3", "r4"]
+    assert {r["status"] for r in linhas} == {"ok"}
+
+def test_parquet_so_confirma_grupos_gravados(tmp_path):
+    """O checkpoint só recebe os ids de um grupo depois que o arquivo dele está completo no disco."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    entrada = escrever_entrada(tmp_path / "entrada.jsonl", 5)
+    saida = str(tmp_path / "saida.parquet")
+    checkpoint = tmp_path / "saida.parquet.checkpoint"
+    confirmadas = []
+    servico = ServicoFalso(quebrados={"000000004"}, ao_buscar=lambda numero: confirmadas.append(
+        len(checkpoint.read_text().split()) if checkpoint.exists() else 0))
+    asyncio.run(ConsultaEmLote(servico, paralelismo=1, tamanho_grupo=2).executar(entrada, saida))
+    assert confirmadas == [0, 0, 2, 2, 4]
+    assert sorted(checkpoint.read_text().split()) == ["r0", "r1", "r2", "r3"]
+
+    asyncio.run(ConsultaEmLote(ServicoFalso(), paralelismo=1, tamanho_grupo=2).executar(entrada, saida))
+    linhas = pq.read_table(saida).to_pylist()
+    assert sorted(r["id"] for r in linhas) == ["r0", "r1", "r2", "r3", "r4"]
+    assert {r["status"] for r in linhas} == {"ok"}
@@ -0,0 +1,85 @@
+import asyncio
+import json
+import os
+from tests.mock.servidor_consultas import ServidorConsultas
+from tests.services.browser_service import BrowserService, arquivo_sessao
+from tests.services.perfil_persistente import PerfilPersistente, assinatura_build, assinatura_build_portal, clonar_diretorio
+
+def criar_modelo(diretorio, assinatura):
+    caminho = diretorio / f"modelo-{assinatura}"
+    (caminho / "Default" / "Cache").mkdir(parents=True)
+    (caminho / "Default" / "Cache" / "data_0").write_bytes(b"bundle")
+    (caminho / "SingletonLock").write_text("host-123")
+    (caminho / "modelo.json").write_text(json.dumps({"assinatura": assinatura}))
+    return caminho
+
+def test_assinatura_muda_com_os_bundles_do_build():
+    """A assinatura considera os scripts e CSS da página inicial, em URLs absolutas."""
+    html = "<link rel='stylesheet' href='/css/app.1.css'><script src=\"js/app.1.js\"></script>"
+    assert assinatura_build(html, "https://portal/") == assinatura_build(html, "https://portal/index.html")
+    assert assinatura_build(html, "https://portal/") != assinatura_build(html.replace("app.1.js", "app.2.js"),
+                                                                           "https://portal/")
+
+def test_modelo_do_build_atual_e_reaproveitado_e_os_antigos_removidos(tmp_path, monkeypatch):
+    """Com o modelo do build publicado já pronto, nenhum navegador é aberto e os antigos saem."""
+    with ServidorConsultas() as servidor:
+        monkeypatch.setenv("ANVISA_URL_PORTAL", servidor.url)
+        assinatura = assinatura_build_portal()
+        atual = criar_modelo(tmp_path, assinatura)
+        antigo = criar_modelo(tmp_path, "build-anterior")
+        perfis = PerfilPersistente(str(tmp_path))
+        assert asyncio.run(perfis.garantir_modelo(playwright=None, opcoes={})) == str(atual)
+    assert not antigo.exists()
+
+    copia = perfis.nova_copia()
+    assert os.path.basename(copia).startswith("principal-")
+    assert open(os.path.join(copia, "Default", "Cache", "data_0"), "rb").read() == b"bundle"
+    assert not os.path.lexists(os.path.join(copia, "SingletonLock"))
+    perfis.remover_copias()
+    assert not os.path.exists(copia)
+
+def test_clonagem_e_sessao_por_worker(tmp_path, monkeypatch):
+    """As cópias não levam as travas do Chromium; cada worker grava a própria sessão."""
+    origem = criar_modelo(tmp_path, "x")
+    clonar_diretorio(str(origem), str(tmp_path / "copia"))
+    assert sorted(os.listdir(tmp_path / "copia")) == ["Default", "modelo.json"]
+
+    monkeypatch.delenv("PYTEST_XDIST_WORKER", raising=False)
+    assert arquivo_sessao() == "session.json"
+    monkeypatch.setenv("PYTEST_XDIST_WORKER", "gw3")
+    assert arquivo_sessao() == "session-gw3.json"
+
+class ContextoFalso:
+    pages = []
+
+    def on(self, evento, funcao):
+        pass
+
+    async def route(self, padrao, funcao):
+        pass
+
+    async def close(self):
+        pass
+
+class ChromiumFalso:
+    def __init__(self):
+        self.perfis = []
+
+    async def launch_persistent_context(self, perfil, **opcoes):
+        self.perfis.append(perfil)
+        return ContextoFalso()
+
+def test_pool_persistente_tem_um_navegador_por_worker(tmp_path):
+    """Só o contexto padrão da cópia tem o cache em disco: o pool do worker fica com um único navegador."""
+    perfis = PerfilPersistente(str(tmp_path))
+    perfis.modelo = str(criar_modelo(tmp_path, "x"))
+    service = BrowserService(headless=True, reuse_session=False, tamanho_pool=3, compartilhado=False,
+                             bloqueio_recursos=False, cache_consultas=False, perfil_persistente=perfis)
+    assert service.tamanho_pool == 1
+    service.playwright = type("PlaywrightFalso", (), {"chromium": ChromiumFalso()})()
+    asyncio.run(service.iniciar_pool())
+    copias = service.playwright.chromium.perfis
+    assert copias == perfis.copias and len(copias) == 1 and service.browser is None
+    assert len(service._contextos_pool) == 1
+    assert os.path.exists(os.path.join(copias[0], "Default", "Cache", "data_0"))
+    perfis.remover_copias()
@@ -0,0 +1,162 @@
+import asyncio
+import json
+import pytest
+from tests.services.resiliencia import (CamadaResiliencia, CircuitoAberto, DisjuntorCircuito, ErroPortal,
+                                        LimitadorAdaptativo, RegistroEventos)
+
+class Relogio:
+    """Relógio controlado pelo teste."""
+
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self) -> float:
+        return self.agora
+
+@pytest.fixture(autouse=True)
+def diretorio_de_trabalho(tmp_path, monkeypatch):
+    """O limite compartilhado padrão (reports/limite_concorrencia.json) fica no diretório temporário."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("PYTEST_XDIST_WORKER_COUNT", raising=False)
+
+@pytest.fixture
+def registro(tmp_path):
+    return RegistroEventos(str(tmp_path / "eventos"))
+
+def test_disjuntor_abre_testa_e_fecha(registro):
+    """Fechado -> aberto pela taxa de erro -> meio aberto com uma consulta de teste -> aberto ou fechado."""
+    relogio = Relogio()
+    disjuntor = DisjuntorCircuito("/api/consulta/bulario", registro, minimo_amostras=3, tempo_aberto=10,
+                                  relogio=relogio)
+    disjuntor.registrar(True)
+    disjuntor.registrar(False, "HTTP 503")
+    assert disjuntor.estado == "fechado"  # Abaixo do mínimo de amostras
+    disjuntor.registrar(False, "HTTP 503")
+    assert (disjuntor.estado, disjuntor.permitir()) == ("aberto", False)
+    assert "67%" in disjuntor.motivo
+
+    relogio.agora = 10
+    assert disjuntor.permitir() and disjuntor.estado == "meio_aberto"
+    assert not disjuntor.permitir()  # Uma consulta de teste por vez
+    disjuntor.registrar(False, "HTTP 502")
+    assert disjuntor.estado == "aberto" and "consulta de teste falhou" in disjuntor.motivo
+
+    relogio.agora = 20
+    assert disjuntor.permitir()
+    relogio.agora = 30  # A consulta de teste não trouxe resposta do endpoint: outra é liberada
+    assert disjuntor.permitir()
+    disjuntor.registrar(True)
+    assert disjuntor.estado == "fechado" and not disjuntor.janela
+    assert [e["evento"] for e in registro.eventos] == ["circuito aberto", "circuito aberto", "circuito fechado"]
+
+def test_limitador_reduz_pela_metade_e_sobe_aos_poucos(registro, tmp_path, monkeypatch):
+    """AIMD: cada erro divide o limite total, sucessos seguidos o aumentam de um em um."""
+    arquivo = str(tmp_path / "limite.json")
+    limitador = LimitadorAdaptativo(registro, limite_inicial=8, limite_maximo=10, arquivo=arquivo)
+    limitador.erro("/api/consulta/bulario")
+    assert limitador.limite_total == 4 and json.load(open(arquivo))["limite"] == 4
+    for _ in range(3):
+        limitador.erro("/api/consulta/bulario")
+    assert limitador.limite_total == 1  # Nunca abaixo do mínimo
+    assert [e["detalhe"] for e in registro.eventos] == ["8 → 4", "4 → 2", "2 → 1"]
+
+    limitador.sucesso()
+    assert limitador.limite_total == 2
+    limitador.sucesso()
+    assert limitador.limite_total == 2  # Com limite 2, são precisos 2 sucessos seguidos
+    limitador.sucesso()
+    assert limitador.limite_total == 3
+
+    # Outro worker lê o limite total publicado e fica com a sua parte
+    monkeypatch.setenv("PYTEST_XDIST_WORKER_COUNT", "2")
+    outro = LimitadorAdaptativo(registro, limite_inicial=8, arquivo=arquivo)
+    assert outro.limite_local == 2 and outro.limite_total == 3
+
+def test_limitador_segura_as_consultas_acima_do_limite(registro, tmp_path):
+    """Com limite 2, a terceira consulta simultânea espera uma das outras terminar."""
+    limitador = LimitadorAdaptativo(registro, limite_inicial=2, arquivo=str(tmp_path / "limite.json"))
+    simultaneas = []
+    em_andamento = 0
+
+    async def consulta():
+        nonlocal em_andamento
+        async with limitador:
+            em_andamento += 1
+            simultaneas.append(em_andamento)
+            await asyncio.sleep(0.01)
+            em_andamento -= 1
+
+    async def executar():
+        await asyncio.gather(*(consulta() for _ in range(5)))
+
+    asyncio.run(executar())
+    assert max(simultaneas) == 2
+
+def test_camada_repete_so_consultas_idempotentes(registro):
+    """ErroPortal é repetido em consultas idempotentes; outras exceções e as não idempotentes, não."""
+    camada = CamadaResiliencia(tentativas=3, espera_base=0, espera_maxima=0, registro=registro)
+    chamadas = []
+
+    def operacao(falhas: int, erro=ErroPortal):
+        async def executar():
+            chamadas.append(1)
+            if len(chamadas) <= falhas:
+                raise erro("HTTP 503")
+            return "ok"
+        return executar
+
+    assert asyncio.run(camada.executar("/api/consulta/bulario", operacao(2))) == "ok"
+    assert len(chamadas) == 3
+    assert [e["evento"] for e in registro.eventos] == ["retentativa", "retentativa"]
+
+    chamadas.clear()
+    with pytest.raises(ErroPortal):
+        asyncio.run(camada.executar("/api/consulta/bulario", operacao(1), idempotente=False))
+    assert len(chamadas) == 1
+
+    chamadas.clear()
+    with pytest.raises(ValueError):
+        asyncio.run(camada.executar("/api/consulta/bulario", operacao(1, ValueError)))
+    assert len(chamadas) == 1
+
+def test_camada_nao_consulta_com_o_circuito_aberto(registro):
+    """Com o circuito aberto, a operação nem é chamada e o motivo da abertura vai na exceção."""
+    camada = CamadaResiliencia(espera_base=0, espera_maxima=0, registro=registro)
+    disjuntor = camada.disjuntor("https://consultas.anvisa.gov.br/api/consulta/bulario?count=10")
+    assert camada.disjuntor("**/api/consulta/bulario**") is disjuntor
+    for _ in range(5):
+        disjuntor.registrar(False, "HTTP 503")
+
+    async def operacao():
+        raise AssertionError("consulta feita com o circuito aberto")
+
+    with pytest.raises(CircuitoAberto, match="taxa de erro 100%"):
+        asyncio.run(camada.executar("**/api/consulta/bulario**", operacao))
+
+class RequestFalso:
+    def __init__(self, url):
+        self.url = url
+        self.resource_type = "xhr"
+        self.failure = "net::ERR_CONNECTION_RESET"
+
+class ResponseFalsa:
+    def __init__(self, url, status):
+        self.url = url
+        self.status = status
+        self.request = RequestFalso(url)
+
+def test_respostas_observadas_alimentam_o_disjuntor_de_executar(registro):
+    """XHRs casados pelo padrão do endpoint abrem o mesmo disjuntor que `executar` consulta."""
+    camada = CamadaResiliencia(espera_base=0, espera_maxima=0, registro=registro)
+    disjuntor = camada.disjuntor("**/api/consulta/bulario**")
+    camada.observar_falha(RequestFalso("https://consultas.anvisa.gov.br/api/consulta/bulario/detalhe/1"))
+    for _ in range(4):
+        camada.observar_resposta(ResponseFalsa("https://consultas.anvisa.gov.br/api/consulta/bulario?count=10", 503))
+    assert disjuntor.estado == "aberto"
+    assert list(camada._disjuntores) == ["/api/consulta/bulario"]
+
+    async def operacao():
+        raise AssertionError("consulta feita com o circuito aberto")
+
+    with pytest.raises(CircuitoAberto):
+        asyncio.run(camada.executar("**/api/consulta/bulario**", operacao))
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import os
+import sys
+import time
+import pytest
+from tests.services.browser_service import BrowserService
+from tests.services.servidor_navegador import ServidorNavegador
+
+# Chromium falso: grava o DevToolsActivePort no perfil (com atraso, como o real) e fica no ar
+NAVEGADOR_FALSO = f"""#!{sys.executable}
+import os, sys, time
+perfil = next(a.split("=", 1)[1] for a in sys.argv if a.startswith("--user-data-dir="))
+if os.environ.get("NAVEGADOR_FALSO_FALHAR"):
+    sys.exit(1)
+time.sleep(0.2)
+os.makedirs(perfil, exist_ok=True)
+with open(os.path.join(perfil, "DevToolsActivePort"), "w") as f:
+    f.write("9555\\n/devtools/browser/falso\\n")
+time.sleep(60)
+"""
+
+@pytest.fixture
+def executavel(tmp_path):
+    caminho = tmp_path / "chromium"
+    caminho.write_text(NAVEGADOR_FALSO)
+    caminho.chmod(0o755)
+    return str(caminho)
+
+@pytest.fixture
+def servidor(tmp_path, monkeypatch):
+    monkeypatch.setattr(ServidorNavegador, "saudavel", staticmethod(lambda porta: True))
+    return ServidorNavegador(headless=True, reiniciar_apos=2, diretorio=str(tmp_path / "servidor"))
+
+def test_trava_abandonada_e_tomada(servidor):
+    """Uma trava recente segura os outros processos; uma com mais de `validade` segundos é removida."""
+    os.makedirs(servidor.diretorio)
+    open(servidor.arquivo_trava, "w").close()
+    with pytest.raises(TimeoutError):
+        with servidor._trava(timeout=0.2):
+            pass
+
+    antiga = time.time() - 121
+    os.utime(servidor.arquivo_trava, (antiga, antiga))
+    with servidor._trava(timeout=0.2):
+        assert os.path.getmtime(servidor.arquivo_trava) > antiga
+    assert not os.path.exists(servidor.arquivo_trava)
+
+def test_porta_lida_do_devtoolsactiveport(servidor, executavel, monkeypatch):
+    """A inicialização espera o arquivo de porta aparecer; um navegador que sai antes dele é um erro."""
+    processo = servidor._iniciar_processo(executavel, geracao=1, timeout=10)
+    try:
+        assert processo["porta"] == 9555 and processo["usos"] == 0
+        assert processo["perfil"] == os.path.join(servidor.diretorio, "perfil-1")
+    finally:
+        servidor._encerrar_processo(processo)
+    assert not os.path.exists(processo["perfil"])
+
+    monkeypatch.setenv("NAVEGADOR_FALSO_FALHAR", "1")
+    with pytest.raises(RuntimeError, match="Não foi possível iniciar"):
+        servidor._iniciar_processo(executavel, geracao=2, timeout=10)
+
+def test_navegador_trocado_ao_atingir_o_limite_de_usos(servidor, executavel, monkeypatch):
+    """Atingido `reiniciar_apos`, a próxima conexão recebe um processo novo e o antigo sai com o último cliente."""
+    assert servidor.conectar(executavel) == "http://127.0.0.1:9555"
+    assert (servidor.registrar_uso(), servidor.registrar_uso()) == (False, True)
+
+    outro = ServidorNavegador(headless=True, reiniciar_apos=2, diretorio=servidor.diretorio)
+    outro.cliente = f"gw1-{os.getpid()}"
+    outro.conectar(executavel)
+    estado = json.load(open(servidor.arquivo_estado))
+    assert (servidor.geracao, outro.geracao, estado["geracao"]) == (1, 2, 2)
+    assert sorted(estado["processos"]) == ["1", "2"]
+
+    servidor.desconectar()
+    assert sorted(json.load(open(servidor.arquivo_estado))["processos"]) == ["2"]
+    outro.desconectar()
+    assert json.load(open(servidor.arquivo_estado))["processos"] == {}
+
+class ServidorFalso:
+    def __init__(self, limite):
+        self.usos = 0
+        self.limite = limite
+
+    def registrar_uso(self, quantidade=1):
+        self.usos += quantidade
+        return self.usos >= self.limite
+
+class PaginaAquecida:
+    def __init__(self):
+        self.page = type("Page", (), {"is_closed": lambda self: False})()
+
+    async def restaurar_estado_inicial(self):
+        return "formulario"
+
+def test_paginas_aquecidas_contam_usos_e_reciclam_o_navegador(monkeypatch):
+    """Cada página aquecida reaproveitada conta um uso; no limite, o navegador é trocado quando nada está em uso."""
+    service = BrowserService(headless=True, reuse_session=False, tamanho_pool=1, compartilhado=False,
+                             bloqueio_recursos=False, cache_consultas=False, perfil_persistente=False)
+    service.servidor = ServidorFalso(limite=3)
+    service.browser = type("Browser", (), {"is_connected": lambda self: True})()
+    service._pool = asyncio.Queue()
+    service._contextos_pool = [object()]
+    pagina = PaginaAquecida()
+    service.liberar_pagina_aquecida(pagina)
+    reciclagens = []
+
+    async def reciclar():
+        reciclagens.append(service.servidor.usos)
+        service._paginas_aquecidas = {}
+        service._reciclar = False
+
+    monkeypatch.setattr(service, "_reciclar_navegador", reciclar)
+
+    async def cenario():
+        for _ in range(3):
+            assert await service.adquirir_pagina_aquecida(PaginaAquecida) is pagina
+            service.liberar_pagina_aquecida(pagina)
+        assert service._reciclar and not reciclagens
+        await service._reciclar_se_necessario()
+
+    asyncio.run(cenario())
+    assert service.servidor.usos == 3 and reciclagens == [3]
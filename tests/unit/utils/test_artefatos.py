@@ -0,0 +1,77 @@
+import asyncio
+import gzip
+import os
+import pytest
+from tests.pages.base import base_page
+from tests.pages.base.base_page import BasePage
+from tests.utils import artefatos
+from tests.utils.artefatos import ArmazemArtefatos
+
+@pytest.fixture
+def armazem(tmp_path):
+    armazem = ArmazemArtefatos(str(tmp_path / "artefatos"))
+    yield armazem
+    armazem.aguardar()
+
+def arquivos(diretorio) -> list:
+    return sorted(os.path.relpath(os.path.join(raiz, nome), diretorio)
+                  for raiz, _, nomes in os.walk(diretorio) for nome in nomes)
+
+def test_conteudos_identicos_sao_gravados_uma_vez(armazem):
+    """O mesmo conteúdo (bytes ou texto) dá o mesmo caminho e um só arquivo; textos são comprimidos."""
+    primeiro = armazem.salvar('{"erro": 1}', "json")
+    segundo = armazem.salvar(b'{"erro": 1}', "json")
+    screenshot = armazem.salvar(b"\x89PNG", "png")
+    armazem.aguardar()
+    assert primeiro == segundo and primeiro.endswith(".json.gz") and screenshot.endswith(".png")
+    assert len(arquivos(armazem.diretorio)) == 2
+    with gzip.open(primeiro, "rb") as f:
+        assert f.read() == b'{"erro": 1}'
+
+    assert armazem.salvar('{"erro": 1}', "json") == primeiro
+    assert len(arquivos(armazem.diretorio)) == 2
+
+def test_arquivos_identicos_sao_movidos_para_um_unico_artefato(armazem, tmp_path):
+    """Traces idênticos (maiores que um bloco de leitura) viram um só artefato; as origens são removidas."""
+    conteudo = os.urandom(3 * 1024 * 1024 + 17)
+    origens = [tmp_path / "trace-1.zip", tmp_path / "trace-2.zip"]
+    for origem in origens:
+        origem.write_bytes(conteudo)
+
+    caminhos = [armazem.salvar_arquivo(str(origem)) for origem in origens]
+    assert caminhos[0] == caminhos[1] and caminhos[0].endswith(".zip")
+    assert arquivos(armazem.diretorio) == [os.path.relpath(caminhos[0], armazem.diretorio)]
+    assert open(caminhos[0], "rb").read() == conteudo
+    assert not any(origem.exists() for origem in origens)
+
+    mantido = tmp_path / "outro.zip"
+    mantido.write_bytes(b"outro")
+    assert armazem.salvar_arquivo(str(mantido), remover_origem=False) != caminhos[0]
+    assert mantido.exists() and len(arquivos(armazem.diretorio)) == 2
+
+class PageFalsa:
+    async def screenshot(self):
+        return b"\x89PNG"
+
+    async def content(self):
+        return "<html>erro</html>"
+
+class ItemFalso:
+    execution_count = 2
+
+def test_captura_dos_page_objects_vai_para_o_teste_em_execucao(armazem, monkeypatch):
+    """`capturar_erro` grava screenshot e DOM sem compressão e os associa ao teste em execução."""
+    item = ItemFalso()
+    monkeypatch.setattr(artefatos, "teste_atual", item)
+    monkeypatch.setattr(base_page, "armazem", armazem)
+    screenshot = asyncio.run(BasePage(PageFalsa(), "https://consultas.anvisa.gov.br/#/bulario/").capturar_erro("teste"))
+    armazem.aguardar()
+    assert [nome for nome, _ in item.artefatos_falha] == ["Screenshot", "DOM"]
+    assert item.artefatos_falha[0][1] == screenshot and screenshot.endswith(".png")
+    assert item.artefatos_falha[1][1].endswith(".html")
+    assert open(item.artefatos_falha[1][1], encoding="utf-8").read() == "<html>erro</html>"
+    assert artefatos.repeticao_do_teste()
+
+    monkeypatch.setattr(artefatos, "teste_atual", None)
+    assert not artefatos.repeticao_do_teste()
+    artefatos.registrar_captura({"DOM": "ignorado.html"})  # Fora de um teste: nada a associar
@@ -0,0 +1,52 @@
+import pytest
+from tests.utils.metricas import ColetorMetricas, MedicaoRede, percentil
+
+def amostra(etapa, parede, rede=0.0, servidor=0.0, pagina="BulasPage"):
+    return {"pagina": pagina, "etapa": etapa, "teste": "t", "parede_ms": parede, "rede_ms": rede,
+            "servidor_ms": servidor, "requisicoes": 1}
+
+@pytest.mark.parametrize("valores, p, esperado", [
+    ([], 50, 0.0),
+    ([], 95, 0.0),
+    ([42.0], 50, 42.0),
+    ([42.0], 95, 42.0),
+    ([1, 2, 3, 4], 50, 2),
+    ([1, 2, 3, 4], 95, 4),
+    (list(range(1, 11)), 50, 5),
+    (list(range(1, 11)), 95, 10),
+    (list(range(1, 21)), 95, 19),
+    (list(range(1, 101)), 95, 95),
+    ([1, 2, 3], 0, 1),
+    ([1, 2, 3], 100, 3),
+])
+def test_percentil_pelo_posto_mais_proximo(valores, p, esperado):
+    """O percentil p é o menor valor com pelo menos p% das amostras até ele; sem amostras, 0."""
+    assert percentil(valores, p) == esperado
+
+def test_agregar_por_pagina_e_etapa():
+    """Cada par (página, etapa) vira uma linha com n, p50 e p95 de cada medida, em ordem."""
+    amostras = [amostra("buscar_por_nome", parede, rede=parede / 2, servidor=parede / 4)
+                for parede in (400.0, 100.0, 300.0, 200.0)]
+    amostras.append(amostra("acessar_pagina", 900.0))
+    amostras.append(amostra("acessar_pagina", 50.0, pagina="PareceresPage"))
+    resumo = ColetorMetricas.agregar(amostras)
+    assert [(l["pagina"], l["etapa"], l["n"]) for l in resumo] == [
+        ("BulasPage", "acessar_pagina", 1), ("BulasPage", "buscar_por_nome", 4), ("PareceresPage", "acessar_pagina", 1)]
+    busca = resumo[1]
+    assert (busca["parede_p50_ms"], busca["parede_p95_ms"]) == (200.0, 400.0)
+    assert (busca["rede_p50_ms"], busca["rede_p95_ms"]) == (100.0, 200.0)
+    assert (busca["servidor_p50_ms"], busca["servidor_p95_ms"]) == (50.0, 100.0)
+    assert resumo[0]["parede_p50_ms"] == resumo[0]["parede_p95_ms"] == 900.0
+    assert ColetorMetricas.agregar([]) == []
+
+def test_medicao_de_rede_ignora_requisicoes_incompletas():
+    """Só requisições concluídas contam; o tempo de servidor exige o início da requisição e da resposta."""
+    class Requisicao:
+        def __init__(self, **timing):
+            self.timing = timing
+
+    medicao = MedicaoRede()
+    medicao(Requisicao(requestStart=10, responseStart=40, responseEnd=60))
+    medicao(Requisicao(requestStart=-1, responseStart=-1, responseEnd=30))
+    medicao(Requisicao(requestStart=5, responseStart=-1, responseEnd=-1))
+    assert (medicao.requisicoes, medicao.rede_ms, medicao.servidor_ms) == (2, 90, 30)
@@ -0,0 +1,310 @@
+"""
+Plugin do pytest que ordena e divide a suíte pela duração histórica dos testes.
+
+- Registra, por node id, a duração (média móvel) e quantas vezes o teste
+  falhou ou foi repetido pelo pytest-rerunfailures em `reports/duracoes.json`.
+- Com o xdist (ou `--ordem-duracao`), os testes são ordenados do mais longo
+  para o mais curto (LPT): o escalonador `load` do xdist entrega o próximo
+  teste da fila ao worker que ficar livre, e os curtos equilibram o final.
+- Com `--shards N --shard I`, a suíte é dividida em N partes de duração
+  estimada equivalente (LPT) e só a parte I é executada. Cada shard grava o
+  resultado em `reports/shards/` sem alterar o histórico (todas as máquinas
+  precisam dividir a suíte a partir do mesmo arquivo), e
+  `python -m tests.utils.agendamento mesclar` junta os resultados e atualiza
+  o histórico para a próxima execução.
+"""
+import argparse
+import glob
+import heapq
+import html
+import json
+import logging
+import os
+import statistics
+import time
+from collections import defaultdict
+
+import pytest
+
+ARQUIVO_DURACOES = os.path.join("reports", "duracoes.json")
+DIRETORIO_SHARDS = os.path.join("reports", "shards")
+
+# Estimativa de um teste sem histórico nenhum na suíte (em segundos)
+DURACAO_PADRAO = 1.0
+# Peso da execução mais recente na média móvel da duração
+PESO_RECENTE = 0.3
+
+class HistoricoDuracoes:
+    """Duração e instabilidade históricas por node id, em um arquivo JSON local."""
+
+    def __init__(self, caminho: str = ARQUIVO_DURACOES):
+        self.caminho = caminho
+        self.testes = {}
+        if os.path.exists(caminho):
+            try:
+                with open(caminho, "r", encoding="utf-8") as f:
+                    self.testes = json.load(f)
+            except (OSError, ValueError) as e:
+                logging.warning(f"Histórico de durações ignorado ({caminho}): {e}")
+        self._por_modulo = None
+
+    def registrar(self, nodeid: str, duracao: float, falhou: bool = False, reexecucoes: int = 0):
+        """
+        Inclui uma execução do teste no histórico.
+
+        :param duracao: Duração da última tentativa (setup + chamada + teardown), em segundos.
+        :param falhou: Se o teste terminou com falha.
+        :param reexecucoes: Tentativas repetidas pelo pytest-rerunfailures nesta execução.
+        """
+        atual = self.testes.setdefault(nodeid, {"duracao": duracao, "execucoes": 0, "falhas": 0, "reexecucoes": 0})
+        if atual["execucoes"]:
+            atual["duracao"] = atual["duracao"] * (1 - PESO_RECENTE) + duracao * PESO_RECENTE
+        atual["duracao"] = round(atual["duracao"], 3)
+        atual["execucoes"] += 1
+        atual["falhas"] += int(falhou)
+        atual["reexecucoes"] += reexecucoes
+        self._por_modulo = None
+
+    def instabilidade(self, nodeid: str) -> float:
+        """Tentativas repetidas por execução do teste (0 para testes estáveis ou sem histórico)."""
+        dados = self.testes.get(nodeid)
+        return dados["reexecucoes"] / dados["execucoes"] if dados and dados["execucoes"] else 0.0
+
+    def estimativa(self, nodeid: str) -> float:
+        """
+        Custo esperado do teste: duração histórica acrescida das repetições
+        esperadas. Sem histórico, usa a mediana do módulo (ou da suíte).
+        """
+        dados = self.testes.get(nodeid)
+        if dados:
+            return dados["duracao"] * (1 + self.instabilidade(nodeid))
+        if self._por_modulo is None:
+            self._por_modulo = defaultdict(list)
+            for outro, valores in self.testes.items():
+                self._por_modulo[outro.split("::")[0]].append(valores["duracao"])
+        duracoes = self._por_modulo.get(nodeid.split("::")[0]) or [v["duracao"] for v in self.testes.values()]
+        return statistics.median(duracoes) if duracoes else DURACAO_PADRAO
+
+    def salvar(self):
+        """Grava o histórico de forma atômica."""
+        os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+        temporario = f"{self.caminho}.{os.getpid()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(self.testes, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(temporario, self.caminho)
+
+def dividir_em_shards(custos: dict, quantidade: int) -> list:
+    """
+    Divide os testes em `quantidade` shards de custo equivalente (LPT: cada
+    teste, do mais longo para o mais curto, vai para o shard menos carregado).
+
+    :param custos: Dicionário node id -> custo estimado (segundos).
+    :return: Lista de shards, cada um com a lista de node ids.
+    """
+    shards = [[] for _ in range(quantidade)]
+    cargas = [(0.0, indice) for indice in range(quantidade)]
+    for nodeid in sorted(custos, key=lambda n: (-custos[n], n)):
+        carga, indice = heapq.heappop(cargas)
+        shards[indice].append(nodeid)
+        heapq.heappush(cargas, (carga + custos[nodeid], indice))
+    return shards
+
+def arquivo_shard(shard: int, shards: int, diretorio: str = DIRETORIO_SHARDS) -> str:
+    return os.path.join(diretorio, f"shard-{shard}-de-{shards}.json")
+
+def pytest_addoption(parser):
+    grupo = parser.getgroup("agendamento", "ordem e divisão dos testes pela duração histórica")
+    grupo.addoption("--ordem-duracao", action="store_true", default=False,
+                    help="Executa os testes do mais longo para o mais curto (automático com o xdist).")
+    grupo.addoption("--shards", type=int, default=1,
+                    help="Divide a suíte em N shards de duração equivalente (uma máquina de CI por shard).")
+    grupo.addoption("--shard", type=int, default=1,
+                    help="Shard executado nesta máquina (1 a N).")
+    grupo.addoption("--historico-duracoes", default=ARQUIVO_DURACOES,
+                    help="Arquivo com a duração e a instabilidade históricas dos testes.")
+
+def pytest_configure(config):
+    shards, shard = config.getoption("--shards"), config.getoption("--shard")
+    if shards < 1 or not 1 <= shard <= shards:
+        raise pytest.UsageError(f"--shard deve estar entre 1 e --shards ({shard} de {shards}).")
+    config.pluginmanager.register(AgendadorDuracoes(config), "agendador_duracoes")
+
+class AgendadorDuracoes:
+    """Estado do plugin em uma execução: histórico, estimativas e duração de cada teste."""
+
+    def __init__(self, config):
+        self.config = config
+        self.historico = HistoricoDuracoes(config.getoption("--historico-duracoes"))
+        self.shards = config.getoption("--shards")
+        self.shard = config.getoption("--shard")
+        self.estimativas = {}
+        self.estimativa_shards = None
+        self.execucoes = {}
+        self.inicio = time.time()
+        # Com o xdist, só o processo principal grava: ele recebe os relatórios de todos os workers
+        self.principal = not os.environ.get("PYTEST_XDIST_WORKER")
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_modifyitems(self, config, items):
+        """Seleciona os testes do shard e os ordena do mais longo para o mais curto."""
+        ordenar = config.getoption("--ordem-duracao") or config.getoption("numprocesses", None) or self.shards > 1
+        if not ordenar:
+            return
+        self.estimativas = {item.nodeid: self.historico.estimativa(item.nodeid) for item in items}
+        if self.shards > 1:
+            divisao = dividir_em_shards(self.estimativas, self.shards)
+            selecionados = set(divisao[self.shard - 1])
+            deselecionados = [item for item in items if item.nodeid not in selecionados]
+            if deselecionados:
+                config.hook.pytest_deselected(items=deselecionados)
+            items[:] = [item for item in items if item.nodeid in selecionados]
+            self.estimativa_shards = [sum(self.estimativas[nodeid] for nodeid in shard) for shard in divisao]
+        # O desempate pelo node id mantém a mesma ordem em todos os workers do xdist
+        items.sort(key=lambda item: (-self.estimativas[item.nodeid], item.nodeid))
+
+    def pytest_runtest_logreport(self, report):
+        """Soma setup, chamada e teardown da última tentativa de cada teste."""
+        if not self.principal:
+            return
+        execucao = self.execucoes.setdefault(report.nodeid, {"duracao": 0.0, "resultado": "passed", "reexecucoes": 0})
+        if report.outcome == "rerun":
+            execucao["duracao"] = 0.0
+            execucao["reexecucoes"] += 1
+            return
+        execucao["duracao"] += report.duration
+        if report.failed:
+            execucao["resultado"] = "failed"
+        elif report.skipped and execucao["resultado"] == "passed":
+            execucao["resultado"] = "skipped"
+
+    def pytest_sessionfinish(self, session):
+        if not self.principal or not self.execucoes:
+            return
+        if self.shards > 1:
+            # O histórico só muda na mesclagem: os outros shards ainda podem dividir a suíte a partir dele
+            self.salvar_resultado_shard()
+            return
+        for nodeid, execucao in self.execucoes.items():
+            if execucao["resultado"] != "skipped":
+                self.historico.registrar(nodeid, execucao["duracao"], execucao["resultado"] == "failed",
+                                         execucao["reexecucoes"])
+        self.historico.salvar()
+
+    def salvar_resultado_shard(self, diretorio: str = DIRETORIO_SHARDS):
+        """Grava o resultado deste shard para a etapa de mesclagem."""
+        os.makedirs(diretorio, exist_ok=True)
+        htmlpath = self.config.getoption("htmlpath", None)
+        resultado = {
+            "shard": self.shard,
+            "shards": self.shards,
+            "duracao": round(time.time() - self.inicio, 3),
+            "estimativa": round(self.estimativa_shards[self.shard - 1], 3) if self.estimativa_shards else None,
+            "relatorio": os.path.abspath(htmlpath) if htmlpath else None,
+            "testes": {nodeid: {**execucao, "duracao": round(execucao["duracao"], 3)}
+                       for nodeid, execucao in self.execucoes.items()},
+        }
+        with open(arquivo_shard(self.shard, self.shards, diretorio), "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.estimativa_shards:
+            return
+        terminalreporter.write_sep("-", "agendamento")
+        for indice, estimativa in enumerate(self.estimativa_shards, start=1):
+            marcador = " <- esta máquina" if indice == self.shard else ""
+            terminalreporter.write_line(f"shard {indice}/{self.shards}: estimativa de {estimativa:.1f} s{marcador}")
+        terminalreporter.write_line(f"duração deste shard: {time.time() - self.inicio:.1f} s")
+
+def mesclar_shards(diretorio: str = DIRETORIO_SHARDS, historico: HistoricoDuracoes = None) -> dict:
+    """
+    Junta os resultados gravados pelos shards (um arquivo por máquina).
+
+    :param diretorio: Diretório com os arquivos `shard-<i>-de-<n>.json`.
+    :param historico: Se informado, as durações dos shards são incluídas nele.
+    :return: Resumo com os shards, os testes e os totais por resultado.
+    """
+    shards, testes = [], {}
+    for arquivo in sorted(glob.glob(os.path.join(diretorio, "shard-*-de-*.json"))):
+        with open(arquivo, "r", encoding="utf-8") as f:
+            resultado = json.load(f)
+        shards.append({campo: resultado[campo] for campo in ("shard", "shards", "duracao", "estimativa", "relatorio")}
+                      | {"testes": len(resultado["testes"])})
+        for nodeid, execucao in resultado["testes"].items():
+            testes[nodeid] = {**execucao, "shard": resultado["shard"]}
+            if historico is not None and execucao["resultado"] != "skipped":
+                historico.registrar(nodeid, execucao["duracao"], execucao["resultado"] == "failed",
+                                    execucao["reexecucoes"])
+    shards.sort(key=lambda s: s["shard"])
+    totais = defaultdict(int)
+    for execucao in testes.values():
+        totais[execucao["resultado"]] += 1
+    duracoes = [s["duracao"] for s in shards]
+    return {
+        "shards": shards,
+        "testes": testes,
+        "totais": dict(totais),
+        "duracao": max(duracoes, default=0.0),
+        "desequilibrio": (max(duracoes) / statistics.mean(duracoes) - 1) if duracoes and min(duracoes) > 0 else 0.0,
+    }
+
+def resumo_html(resumo: dict) -> str:
+    """Página HTML com os shards (e links para os relatórios de cada um) e o resultado de cada teste."""
+    def link(caminho):
+        return f"<a href='file://{html.escape(caminho)}'>relatório</a>" if caminho else ""
+
+    linhas_shards = "".join(
+        f"<tr><td>{s['shard']}/{s['shards']}</td><td>{s['testes']}</td><td>{s['duracao']:.1f}</td>"
+        f"<td>{'' if s['estimativa'] is None else format(s['estimativa'], '.1f')}</td><td>{link(s['relatorio'])}</td></tr>"
+        for s in resumo["shards"])
+    linhas_testes = "".join(
+        f"<tr class='{t['resultado']}'><td>{html.escape(nodeid)}</td><td>{t['resultado']}</td>"
+        f"<td>{t['duracao']:.2f}</td><td>{t['reexecucoes']}</td><td>{t['shard']}</td></tr>"
+        for nodeid, t in sorted(resumo["testes"].items(), key=lambda par: -par[1]["duracao"]))
+    totais = ", ".join(f"{quantidade} {resultado}" for resultado, quantidade in sorted(resumo["totais"].items()))
+    return (f"<!DOCTYPE html><html lang='pt-BR'><head><meta charset='utf-8'><title>Resumo dos shards</title>"
+            f"<style>td, th {{ border: 1px solid #ccc; padding: 2px 6px; }} tr.failed {{ color: #a00; }}</style></head>"
+            f"<body><h1>Resumo dos shards</h1><p>{totais}; duração da execução: {resumo['duracao']:.1f} s "
+            f"(desequilíbrio de {resumo['desequilibrio'] * 100:.0f}%)</p>"
+            f"<h2>Shards</h2><table><thead><tr><th>shard</th><th>testes</th><th>duração (s)</th>"
+            f"<th>estimativa (s)</th><th></th></tr></thead><tbody>{linhas_shards}</tbody></table>"
+            f"<h2>Testes</h2><table><thead><tr><th>teste</th><th>resultado</th><th>duração (s)</th>"
+            f"<th>reexecuções</th><th>shard</th></tr></thead><tbody>{linhas_testes}</tbody></table></body></html>")
+
+def main():
+    parser = argparse.ArgumentParser(description="Ferramentas do agendamento da suíte por duração histórica.")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    mesclar = comandos.add_parser("mesclar", help="Junta os resultados dos shards em um resumo (JSON e HTML).")
+    mesclar.add_argument("--diretorio", default=DIRETORIO_SHARDS, help="Diretório com os resultados dos shards.")
+    mesclar.add_argument("--sem-historico", action="store_true",
+                         help="Não inclui as durações dos shards no histórico.")
+    mesclar.add_argument("--historico-duracoes", default=ARQUIVO_DURACOES, help="Arquivo do histórico.")
+    dividir = comandos.add_parser("dividir", help="Mostra como os testes do histórico seriam divididos.")
+    dividir.add_argument("shards", type=int, help="Quantidade de shards.")
+    dividir.add_argument("--historico-duracoes", default=ARQUIVO_DURACOES, help="Arquivo do histórico.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    historico = HistoricoDuracoes(args.historico_duracoes)
+    if args.comando == "dividir":
+        custos = {nodeid: historico.estimativa(nodeid) for nodeid in historico.testes}
+        for indice, shard in enumerate(dividir_em_shards(custos, args.shards), start=1):
+            logging.info(f"shard {indice}/{args.shards}: {len(shard)} testes, "
+                         f"estimativa de {sum(custos[n] for n in shard):.1f} s")
+        return
+
+    resumo = mesclar_shards(args.diretorio, None if args.sem_historico else historico)
+    if not args.sem_historico:
+        historico.salvar()
+    with open(os.path.join(args.diretorio, "resumo.json"), "w", encoding="utf-8") as f:
+        json.dump(resumo, f, ensure_ascii=False, indent=2)
+    with open(os.path.join(args.diretorio, "resumo.html"), "w", encoding="utf-8") as f:
+        f.write(resumo_html(resumo))
+    for shard in resumo["shards"]:
+        logging.info(f"shard {shard['shard']}/{shard['shards']}: {shard['testes']} testes em {shard['duracao']:.1f} s")
+    logging.info(f"{len(resumo['testes'])} testes ({resumo['totais']}); a execução durou {resumo['duracao']:.1f} s, "
+                 f"desequilíbrio de {resumo['desequilibrio'] * 100:.0f}% entre os shards.")
+    if resumo["totais"].get("failed"):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
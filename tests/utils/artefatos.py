@@ -0,0 +1,127 @@
+import atexit
+import gzip
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+# Diretório padrão dos artefatos de falha (screenshots, DOM, traces)
+DIRETORIO_ARTEFATOS = os.path.join("reports", "artefatos")
+
+# Formatos gravados como estão: já comprimidos ou abertos direto pelos links do relatório
+SEM_COMPRESSAO = {"png", "jpg", "jpeg", "zip", "pdf", "html"}
+
+# Leitura em blocos ao calcular o hash de arquivos (traces podem ter dezenas de MB)
+TAMANHO_BLOCO = 1024 * 1024
+
+class ArmazemArtefatos:
+    """
+    Armazém de artefatos endereçado por conteúdo.
+
+    O hash é calculado na hora (e determina o caminho devolvido), mas a
+    compressão e a gravação acontecem em threads de fundo, fora do caminho
+    crítico do teste. Conteúdos idênticos (o mesmo DOM, o mesmo screenshot)
+    são gravados uma única vez.
+    """
+
+    def __init__(self, diretorio=DIRETORIO_ARTEFATOS, trabalhadores=2):
+        """
+        :param diretorio: Diretório raiz dos artefatos.
+        :param trabalhadores: Threads de gravação em segundo plano.
+        """
+        self.diretorio = diretorio
+        self._executor = ThreadPoolExecutor(max_workers=trabalhadores, thread_name_prefix="artefatos")
+        self._pendentes = {}
+        atexit.register(self.aguardar)
+
+    def _caminho(self, digest: str, extensao: str) -> str:
+        sufixo = "" if extensao in SEM_COMPRESSAO else ".gz"
+        return os.path.join(self.diretorio, digest[:2], f"{digest}.{extensao}{sufixo}")
+
+    @staticmethod
+    def _gravar(caminho: str, conteudo: bytes):
+        if os.path.exists(caminho):
+            return
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        if caminho.endswith(".gz"):
+            with gzip.open(temporario, "wb", compresslevel=6) as f:
+                f.write(conteudo)
+        else:
+            with open(temporario, "wb") as f:
+                f.write(conteudo)
+        os.replace(temporario, caminho)
+
+    def salvar(self, conteudo, extensao: str) -> str:
+        """
+        Agenda a gravação do conteúdo e devolve o caminho final do artefato.
+
+        :param conteudo: Bytes ou texto (gravado em UTF-8).
+        :param extensao: Extensão do artefato ('png', 'html', 'zip'...).
+        """
+        if isinstance(conteudo, str):
+            conteudo = conteudo.encode("utf-8")
+        caminho = self._caminho(hashlib.sha256(conteudo).hexdigest(), extensao)
+        if caminho not in self._pendentes and not os.path.exists(caminho):
+            self._pendentes[caminho] = self._executor.submit(self._gravar, caminho, conteudo)
+        return caminho
+
+    def salvar_arquivo(self, origem: str, extensao: str = None, remover_origem: bool = True) -> str:
+        """Move um arquivo já gravado (ex.: trace do Playwright) para o armazém."""
+        extensao = extensao or origem.rsplit(".", 1)[-1]
+        digest = hashlib.sha256()
+        with open(origem, "rb") as f:
+            for bloco in iter(lambda: f.read(TAMANHO_BLOCO), b""):
+                digest.update(bloco)
+        caminho = self._caminho(digest.hexdigest(), extensao)
+        if not os.path.exists(caminho):
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            shutil.copyfile(origem, caminho)
+        if remover_origem:
+            os.remove(origem)
+        return caminho
+
+    def aguardar(self):
+        """Espera todas as gravações pendentes terminarem."""
+        for caminho, futuro in list(self._pendentes.items()):
+            try:
+                futuro.result()
+            except Exception as e:
+                logging.error(f"Erro ao gravar artefato {caminho}: {e}")
+        self._pendentes.clear()
+
+def registrar_no_teste(item, artefatos: dict):
+    """Associa artefatos (nome -> caminho) a um item do pytest, para os links do relatório HTML."""
+    item.artefatos_falha = getattr(item, "artefatos_falha", []) + list(artefatos.items())
+
+# Teste em execução neste processo (definido pelos hooks do conftest.py da raiz): os page
+# objects e o BulasTestRunner capturam artefatos sem receber o item do pytest
+teste_atual = None
+
+def registrar_captura(artefatos: dict):
+    """Associa ao teste em execução artefatos capturados fora das fixtures (page objects, runners)."""
+    if teste_atual is not None:
+        registrar_no_teste(teste_atual, artefatos)
+
+def repeticao_do_teste() -> bool:
+    """Se o teste em execução é uma repetição do pytest-rerunfailures (quando vale gravar o trace)."""
+    return teste_atual is not None and getattr(teste_atual, "execution_count", 1) > 1
+
+async def encerrar_trace(contexto, falhou: bool) -> dict:
+    """
+    Para o trace do Playwright iniciado no contexto; só o de um teste com falha é guardado.
+
+    :return: {"Trace": caminho no armazém} ou vazio.
+    """
+    if not falhou:
+        await contexto.tracing.stop()
+        return {}
+    descritor, caminho_trace = tempfile.mkstemp(suffix=".zip")
+    os.close(descritor)
+    await contexto.tracing.stop(path=caminho_trace)
+    return {"Trace": armazem.salvar_arquivo(caminho_trace, "zip")}
+
+# Armazém do processo atual
+armazem = ArmazemArtefatos()
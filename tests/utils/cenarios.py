@@ -0,0 +1,226 @@
+import asyncio
+import inspect
+import itertools
+import logging
+import os
+import pytest
+
+# Classes de valor de cada campo de busca; "vazio" equivale a não preencher o campo
+CLASSES_VALOR = ("valido", "invalido", "vazio")
+
+# Campo de busca do bulário -> chaves de TEST_DATA_BULAS de cada classe de valor. Os valores
+# válidos descrevem o mesmo produto (Novalgina), para que qualquer combinação deles encontre a bula
+CLASSES_BULAS = {
+    "nome": {"valido": "nome_medicamento", "invalido": "nome_medicamento_invalido"},
+    "numero_registro": {"valido": "numero_registro_produto", "invalido": "numero_registro_invalido"},
+    "numero_expediente": {"valido": "numero_expediente", "invalido": "numero_expediente_invalido"},
+    "cnpj": {"valido": "cnpj_empresa", "invalido": "cnpj_empresa_invalido"},
+    "categorias": {"valido": "categorias_regulatorias", "invalido": "categoria_invalida"},
+    "data_inicial": {"valido": "data_inicial", "invalido": "data_inicial_invalida", "vazio": "data_inicial_vazia"},
+    "data_final": {"valido": "data_final", "invalido": "data_final_invalida", "vazio": "data_final_vazia"},
+}
+
+def forca_do_ambiente(padrao: int = 2) -> int:
+    """Força das combinações (2 = pares, 3 = trios...) definida em ANVISA_COMBINACOES_FORCA."""
+    return int(os.environ.get("ANVISA_COMBINACOES_FORCA", padrao))
+
+def classes_de_valores(mapa: dict, dados: dict) -> dict:
+    """
+    Monta os valores de cada classe a partir de um dicionário de dados de teste.
+
+    :param mapa: Campo -> {classe: chave em `dados`}, como `CLASSES_BULAS`. Sem a
+                 classe "vazio", o campo vazio é "".
+    :param dados: Dados de teste (ex.: `TEST_DATA_BULAS`).
+    :return: Campo -> {classe: valor}.
+    """
+    valores = {}
+    for campo, chaves in mapa.items():
+        valores[campo] = {classe: dados[chave] for classe, chave in chaves.items()}
+        valores[campo].setdefault("vazio", "")
+    return valores
+
+def classes_da_especificacao(especificacao, dados: dict) -> dict:
+    """
+    Classes de valor dos campos usados nas buscas de uma `EspecificacaoPagina`.
+
+    Segue a convenção dos dados de teste: `<campo>` é o valor válido,
+    `<campo>_invalido` (ou `_invalida`) o inválido e `<campo>_vazio` (ou
+    `_vazia`) o vazio. Campos sem valor válido nos dados ficam de fora.
+    """
+    campos = dict.fromkeys(campo for nomes in especificacao.buscas.values() for campo in nomes)
+    mapa = {}
+    for campo in campos:
+        if campo not in dados:
+            continue
+        mapa[campo] = {"valido": campo}
+        for classe, sufixos in (("invalido", ("_invalido", "_invalida")), ("vazio", ("_vazio", "_vazia"))):
+            chave = next((campo + s for s in sufixos if campo + s in dados), None)
+            if chave:
+                mapa[campo][classe] = chave
+    return classes_de_valores(mapa, dados)
+
+def combinacoes(dominios: dict, forca: int = 2, negativos=()) -> list:
+    """
+    Gera combinações que cobrem todas as interações de `forca` campos (pairwise
+    com 2, n-wise com n), em vez do produto cartesiano completo.
+
+    Cada linha começa pela primeira interação ainda não coberta; os demais
+    campos recebem, em ordem, o valor que cobre mais interações pendentes (no
+    empate, o primeiro do domínio). O resultado é determinístico, o que mantém
+    os ids dos testes estáveis entre execuções e workers.
+
+    Valores negativos (ex.: a classe "invalido") entram no máximo um por
+    linha, e as interações só de valores positivos são cobertas por linhas
+    sem nenhum negativo: um campo inválido costuma bastar para a consulta não
+    trazer resultados, o que esconderia o efeito dos demais campos da linha.
+
+    :param dominios: Campo -> sequência de valores possíveis (ex.: as classes de valor).
+    :param forca: Quantidade de campos cujas combinações devem aparecer juntas.
+    :param negativos: Valores que não se combinam entre si.
+    :return: Lista de dicionários campo -> valor.
+    """
+    campos = list(dominios)
+    forca = min(forca, len(campos))
+    negativos = set(negativos)
+
+    def permitida(valores) -> bool:
+        return sum(valor in negativos for valor in valores) <= 1
+
+    if forca == len(campos):
+        return [dict(zip(campos, valores)) for valores in itertools.product(*dominios.values())
+                if permitida(valores)]
+
+    # Interações pendentes, na ordem dos campos e dos domínios (dict como conjunto ordenado)
+    pendentes = dict.fromkeys(
+        tuple(zip(grupo, valores))
+        for grupo in itertools.combinations(campos, forca)
+        for valores in itertools.product(*(dominios[c] for c in grupo)) if permitida(valores)
+    )
+    posicao = {campo: i for i, campo in enumerate(campos)}
+
+    def conta(linha: dict, interacao: tuple) -> bool:
+        """Em linhas com um valor negativo, só contam as interações que o incluem."""
+        negativa = any(v in negativos for v in linha.values())
+        return not negativa or any(v in negativos for _, v in interacao)
+
+    def novas(linha: dict, campo: str) -> int:
+        """Interações pendentes que a linha cobre ao fixar `campo` (com os campos já fixados)."""
+        fixados = sorted((c for c in linha if c != campo), key=posicao.get)
+        total = 0
+        for grupo in itertools.combinations(fixados, forca - 1):
+            grupo = sorted(grupo + (campo,), key=posicao.get)
+            interacao = tuple((c, linha[c]) for c in grupo)
+            total += interacao in pendentes and conta(linha, interacao)
+        return total
+
+    linhas = []
+    while pendentes:
+        linha = dict(next(iter(pendentes)))
+        for campo in campos:
+            if campo in linha:
+                continue
+            melhor = None
+            for valor in dominios[campo]:
+                if valor in negativos:
+                    continue
+                linha[campo] = valor
+                cobertas = novas(linha, campo)
+                if melhor is None or cobertas > melhor[0]:
+                    melhor = (cobertas, valor)
+            linha[campo] = melhor[1]
+        linha = {campo: linha[campo] for campo in campos}
+        for grupo in itertools.combinations(campos, forca):
+            interacao = tuple((c, linha[c]) for c in grupo)
+            if conta(linha, interacao):
+                pendentes.pop(interacao, None)
+        linhas.append(linha)
+    return linhas
+
+def id_caso(classes: dict) -> str:
+    """Id legível do caso: os campos preenchidos e suas classes (ex.: 'nome=valido,data_final=invalido')."""
+    preenchidos = [f"{campo}={classe}" for campo, classe in classes.items() if classe != "vazio"]
+    return ",".join(preenchidos) or "vazios"
+
+def gerar_casos(valores: dict, forca: int = None, marcas=()) -> list:
+    """
+    Casos parametrizados (`pytest.param(valores, classes)`) com as combinações das classes de valor.
+
+    :param valores: Campo -> {classe: valor}, de `classes_de_valores` ou `classes_da_especificacao`.
+    :param forca: Força das combinações; se None, `forca_do_ambiente()`.
+    :param marcas: Marcas aplicadas a todos os casos.
+    """
+    forca = forca or forca_do_ambiente()
+    dominios = {campo: [c for c in CLASSES_VALOR if c in classes] for campo, classes in valores.items()}
+    casos = []
+    for classes in combinacoes(dominios, forca, negativos=("invalido",)):
+        preenchidos = {campo: valores[campo][classe] for campo, classe in classes.items()}
+        casos.append(pytest.param(preenchidos, classes, id=id_caso(classes), marks=marcas))
+    logging.debug(f"{len(casos)} casos gerados com força {forca} para os campos {list(valores)}")
+    return casos
+
+def _normalizar(valor):
+    if isinstance(valor, str):
+        return " ".join(valor.split()).casefold()
+    if isinstance(valor, (list, tuple, set)):
+        itens = sorted({_normalizar(v) for v in valor} - {""})
+        return itens[0] if len(itens) == 1 else tuple(itens)
+    return valor
+
+def chave_consulta(pagina: str, valores: dict) -> tuple:
+    """
+    Chave de uma consulta: campos vazios não contam, textos são comparados sem
+    diferença de caixa e de espaços, e listas sem ordem nem repetições (uma
+    lista de um item equivale ao próprio item).
+    """
+    normalizados = {campo: _normalizar(valor) for campo, valor in valores.items() if valor is not None}
+    return (pagina,) + tuple(sorted((c, v) for c, v in normalizados.items() if v not in ("", ())))
+
+class ResultadosSessao:
+    """
+    Resultados das consultas já executadas nesta sessão (por processo/worker).
+
+    Consultas equivalentes (mesma `chave_consulta`) reaproveitam o resultado da
+    primeira; se ela ainda estiver em andamento, as demais aguardam por ela em
+    vez de repetir a busca no portal. Consultas que falham não são guardadas.
+    """
+
+    def __init__(self):
+        self.resultados = {}
+        self.executadas = 0
+        self.reaproveitadas = 0
+
+    async def obter_ou_executar(self, pagina: str, valores: dict, consulta):
+        """
+        :param pagina: Nome da página consultada (faz parte da chave).
+        :param valores: Campos preenchidos na consulta.
+        :param consulta: Função sem argumentos, síncrona ou assíncrona, que executa a busca.
+        :return: O resultado da consulta (o mesmo objeto para consultas equivalentes).
+        """
+        chave = chave_consulta(pagina, valores)
+        if chave in self.resultados:
+            self.reaproveitadas += 1
+            logging.info(f"Consulta equivalente já executada nesta sessão; reaproveitando o resultado: {chave}")
+            resultado = self.resultados[chave]
+            return await asyncio.shield(resultado) if isinstance(resultado, asyncio.Future) else resultado
+
+        futuro = asyncio.get_running_loop().create_future()
+        self.resultados[chave] = futuro
+        try:
+            resultado = consulta()
+            if inspect.isawaitable(resultado):
+                resultado = await resultado
+        except BaseException as e:
+            del self.resultados[chave]
+            futuro.set_exception(e)
+            futuro.exception()  # Quem aguardava recebe a exceção; sem ninguém, não há aviso no loop
+            raise
+        self.executadas += 1
+        self.resultados[chave] = resultado
+        futuro.set_result(resultado)
+        return resultado
+
+    def resumo(self) -> str:
+        return f"{self.executadas} consultas executadas, {self.reaproveitadas} reaproveitadas de consultas equivalentes"
+
+# Resultados compartilhados pelos testes do processo
+resultados_sessao = ResultadosSessao()
@@ -0,0 +1,20 @@
+import os
+
+# Endereço do portal de consultas da Anvisa
+URL_PORTAL = "https://consultas.anvisa.gov.br"
+
+def url_portal(url: str = "") -> str:
+    """
+    Aplica a base definida em ANVISA_URL_PORTAL (ex.: o portal local de
+    `tests/mock/servidor_consultas.py`) a uma URL do portal.
+
+    :param url: URL absoluta do portal (ex.: 'https://consultas.anvisa.gov.br/#/bulario/')
+                ou caminho relativo a ele (ex.: '/#/bulario/').
+    :return: A mesma URL com a base trocada; URLs de outros domínios não são alteradas.
+    """
+    base = os.environ.get("ANVISA_URL_PORTAL", URL_PORTAL).rstrip("/")
+    if url.startswith(URL_PORTAL):
+        url = url[len(URL_PORTAL):]
+    elif url.startswith(("http://", "https://")):
+        return url
+    return base + url
@@ -0,0 +1,142 @@
+import functools
+import glob
+import html
+import inspect
+import json
+import math
+import os
+import time
+from collections import defaultdict
+
+# Diretório com as amostras brutas de cada worker e arquivo com o agregado da execução
+DIRETORIO_AMOSTRAS = os.path.join("reports", "metricas")
+ARQUIVO_RESUMO = os.path.join("reports", "metricas.json")
+
+def percentil(valores: list, p: float) -> float:
+    """Percentil pelo método do posto mais próximo (valores já ordenados)."""
+    if not valores:
+        return 0.0
+    return valores[max(0, math.ceil(p / 100 * len(valores)) - 1)]
+
+class MedicaoRede:
+    """Soma o tempo de rede e o tempo de resposta do servidor das requisições concluídas."""
+
+    def __init__(self):
+        self.requisicoes = 0
+        self.rede_ms = 0.0
+        self.servidor_ms = 0.0
+
+    def __call__(self, request):
+        timing = request.timing
+        if timing.get("responseEnd", -1) < 0:
+            return
+        self.requisicoes += 1
+        self.rede_ms += timing["responseEnd"]
+        if timing.get("responseStart", -1) >= 0 and timing.get("requestStart", -1) >= 0:
+            self.servidor_ms += timing["responseStart"] - timing["requestStart"]
+
+class ColetorMetricas:
+    """Acumula as amostras de tempo por page object e etapa durante a execução."""
+
+    def __init__(self):
+        self.amostras = []
+
+    def registrar(self, pagina: str, etapa: str, parede_ms: float, medicao: MedicaoRede, teste: str = None):
+        self.amostras.append({
+            "pagina": pagina,
+            "etapa": etapa,
+            "teste": teste or os.environ.get("PYTEST_CURRENT_TEST", "").split(" ")[0],
+            "parede_ms": round(parede_ms, 2),
+            "rede_ms": round(medicao.rede_ms, 2),
+            "servidor_ms": round(medicao.servidor_ms, 2),
+            "requisicoes": medicao.requisicoes,
+        })
+
+    def salvar_amostras(self, worker: str):
+        """Grava as amostras brutas deste processo (um arquivo por worker do xdist)."""
+        os.makedirs(DIRETORIO_AMOSTRAS, exist_ok=True)
+        with open(os.path.join(DIRETORIO_AMOSTRAS, f"{worker}.json"), "w", encoding="utf-8") as f:
+            json.dump(self.amostras, f, ensure_ascii=False)
+
+    @staticmethod
+    def carregar_amostras() -> list:
+        amostras = []
+        for arquivo in sorted(glob.glob(os.path.join(DIRETORIO_AMOSTRAS, "*.json"))):
+            with open(arquivo, "r", encoding="utf-8") as f:
+                amostras.extend(json.load(f))
+        return amostras
+
+    @staticmethod
+    def agregar(amostras: list) -> list:
+        """Calcula n, p50 e p95 de parede, rede e servidor por page object e etapa."""
+        grupos = defaultdict(list)
+        for amostra in amostras:
+            grupos[(amostra["pagina"], amostra["etapa"])].append(amostra)
+        resumo = []
+        for (pagina, etapa), itens in sorted(grupos.items()):
+            linha = {"pagina": pagina, "etapa": etapa, "n": len(itens)}
+            for medida in ("parede_ms", "rede_ms", "servidor_ms"):
+                valores = sorted(item[medida] for item in itens)
+                linha[f"{medida[:-3]}_p50_ms"] = percentil(valores, 50)
+                linha[f"{medida[:-3]}_p95_ms"] = percentil(valores, 95)
+            resumo.append(linha)
+        return resumo
+
+    @staticmethod
+    def salvar_resumo(resumo: list, caminho: str = ARQUIVO_RESUMO):
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(resumo, f, ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def tabela_html(resumo: list) -> str:
+        """Tabela HTML do resumo para o relatório do pytest-html."""
+        colunas = ["pagina", "etapa", "n", "parede_p50_ms", "parede_p95_ms",
+                   "rede_p50_ms", "rede_p95_ms", "servidor_p50_ms", "servidor_p95_ms"]
+        cabecalho = "".join(f"<th>{c}</th>" for c in colunas)
+        linhas = "".join("<tr>" + "".join(f"<td>{html.escape(str(l[c]))}</td>" for c in colunas) + "</tr>"
+                         for l in resumo)
+        return (f"<h2>Tempo por etapa</h2><table class='metricas'><thead><tr>{cabecalho}</tr></thead>"
+                f"<tbody>{linhas}</tbody></table>")
+
+# Coletor do processo atual
+coletor = ColetorMetricas()
+
+def medir_etapa(funcao):
+    """
+    Decorator que mede uma etapa de um page object: tempo de parede, tempo de
+    rede e tempo de resposta do servidor das requisições concluídas durante a
+    etapa (eventos `requestfinished` do Playwright).
+    """
+    if getattr(funcao, "_etapa_medida", False):
+        return funcao
+
+    def _iniciar(pagina):
+        medicao = MedicaoRede()
+        pagina.page.on("requestfinished", medicao)
+        return medicao, time.perf_counter()
+
+    def _finalizar(pagina, medicao, inicio):
+        parede_ms = (time.perf_counter() - inicio) * 1000
+        pagina.page.remove_listener("requestfinished", medicao)
+        coletor.registrar(type(pagina).__name__, funcao.__name__, parede_ms, medicao)
+
+    if inspect.iscoroutinefunction(funcao):
+        @functools.wraps(funcao)
+        async def envoltorio(pagina, *args, **kwargs):
+            medicao, inicio = _iniciar(pagina)
+            try:
+                return await funcao(pagina, *args, **kwargs)
+            finally:
+                _finalizar(pagina, medicao, inicio)
+    else:
+        @functools.wraps(funcao)
+        def envoltorio(pagina, *args, **kwargs):
+            medicao, inicio = _iniciar(pagina)
+            try:
+                return funcao(pagina, *args, **kwargs)
+            finally:
+                _finalizar(pagina, medicao, inicio)
+
+    envoltorio._etapa_medida = True
+    return envoltorio
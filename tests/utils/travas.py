@@ -0,0 +1,36 @@
+import contextlib
+import os
+import time
+
+@contextlib.contextmanager
+def trava_arquivo(caminho: str, timeout=60, validade=120):
+    """
+    Trava entre processos (workers do xdist) baseada na criação exclusiva de um arquivo.
+
+    :param caminho: Arquivo da trava; o diretório é criado se não existir.
+    :param timeout: Segundos esperando a trava antes de desistir com `TimeoutError`.
+    :param validade: Idade, em segundos, a partir da qual uma trava é considerada
+                     abandonada por um processo encerrado e removida.
+    """
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    limite = time.monotonic() + timeout
+    while True:
+        try:
+            descritor = os.open(caminho, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(caminho) > validade:
+                    os.remove(caminho)  # Trava abandonada por um processo encerrado
+                    continue
+            except OSError:
+                continue
+            if time.monotonic() > limite:
+                raise TimeoutError(f"Trava ocupada: {caminho}")
+            time.sleep(0.05)
+    try:
+        os.close(descritor)
+        yield
+    finally:
+        with contextlib.suppress(OSError):
+            os.remove(caminho)